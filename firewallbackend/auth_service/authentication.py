@@ -0,0 +1,128 @@
+"""
+Authentification JWT commune à HTTP (DRF) et aux websockets.
+
+Le token est vérifié une seule fois par requête : RateLimitMiddleware appelle
+authenticate_request, le résultat est gardé sur la requête et réutilisé par
+CachedJWTAuthentication. L'utilisateur est mis en cache (TTL court) pour ne
+pas refaire un SELECT à chaque requête ; le cache est invalidé par les
+signaux post_save/post_delete de User (gel, changement de droits...).
+Seuls les champs sans secret sont mis en cache : le hash du mot de passe
+reste un champ différé, relu en base si une vue en a besoin.
+"""
+
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+logger = logging.getLogger(__name__)
+
+# Durée de vie d'un utilisateur en cache
+USER_CACHE_TTL = 60  # seconds
+USER_CACHE_PREFIX = 'jwt_user'
+# Champs jamais mis en cache
+USER_CACHE_EXCLUDED_FIELDS = ('password',)
+
+User = get_user_model()
+
+
+def _user_cache_key(user_id):
+    return f"{USER_CACHE_PREFIX}:{user_id}"
+
+
+def _snapshot(user):
+    return {
+        field.attname: getattr(user, field.attname)
+        for field in User._meta.concrete_fields
+        if field.attname not in USER_CACHE_EXCLUDED_FIELDS
+    }
+
+
+def _from_snapshot(snapshot):
+    # Instance chargée avec password différé : save() n'écrit que les champs chargés
+    field_names = list(snapshot)
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, [snapshot[name] for name in field_names])
+
+
+def get_cached_user(user_id):
+    """Utilisateur actif pour cet id, depuis le cache ou la base. None sinon."""
+    key = _user_cache_key(user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        try:
+            user = User.objects.defer(*USER_CACHE_EXCLUDED_FIELDS).get(**{api_settings.USER_ID_FIELD: user_id})
+        except (User.DoesNotExist, ValueError):
+            return None
+        cache.set(key, _snapshot(user), USER_CACHE_TTL)
+    else:
+        user = _from_snapshot(snapshot)
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        return None
+    return user
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_cache_key(user_id))
+
+
+def authenticate_token(raw_token):
+    """
+    Vérifie un access token (signature, expiration, type) et retourne
+    (user, validated_token), ou None si le token ou l'utilisateur est invalide.
+    """
+    try:
+        validated_token = AccessToken(raw_token)
+    except TokenError:
+        return None
+    user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None
+    user = get_cached_user(user_id)
+    if user is None:
+        return None
+    return user, validated_token
+
+
+def _bearer_token(request):
+    header = request.META.get(api_settings.AUTH_HEADER_NAME, '')
+    parts = header.split()
+    if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+        return parts[1]
+    return None
+
+
+def authenticate_request(request):
+    """
+    Authentifie une HttpRequest à partir de l'en-tête Authorization.
+    Le résultat est mémorisé sur la requête (request.jwt_auth).
+    """
+    if not hasattr(request, 'jwt_auth'):
+        raw_token = _bearer_token(request)
+        request.jwt_auth = authenticate_token(raw_token) if raw_token else None
+    return request.jwt_auth
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication qui réutilise la vérification faite par le middleware
+    et lit l'utilisateur depuis le cache.
+    """
+
+    def authenticate(self, request):
+        result = getattr(request._request, 'jwt_auth', None)
+        if result is not None:
+            return result
+        # Token absent ou invalide : chemin standard (None ou 401 explicite)
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user = get_cached_user(validated_token.get(api_settings.USER_ID_CLAIM))
+        if user is None:
+            # Laisse simplejwt produire l'erreur adaptée (inconnu, inactif)
+            return super().get_user(validated_token)
+        return user
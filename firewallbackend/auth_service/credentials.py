@@ -0,0 +1,112 @@
+"""
+Fournisseur d'identifiants SSH déchiffrés.
+
+Les identifiants sont gardés en mémoire (TTL et taille bornés) pour que les
+jobs sur des milliers de firewalls ne refassent pas une requête et un
+déchiffrement par hôte. Le cache est invalidé par les signaux de SSHUser.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from .models import SSHUser
+
+# Durée de vie d'une entrée
+CREDENTIALS_TTL = 300  # seconds
+# Nombre maximal d'entrées (éviction LRU)
+CREDENTIALS_MAX_ENTRIES = 1024
+
+# Clé des identifiants par défaut (premier SSHUser), utilisés en dernier recours
+_DEFAULT_KEY = '__default__'
+
+
+class SSHCredentials(NamedTuple):
+    user_id: object
+    ssh_username: str
+    password: Optional[str]
+
+
+class CredentialCache:
+    """Cache LRU thread-safe avec expiration."""
+
+    def __init__(self, ttl=CREDENTIALS_TTL, max_entries=CREDENTIALS_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = CredentialCache()
+
+
+def _from_model(ssh_user):
+    return SSHCredentials(
+        user_id=ssh_user.user_id,
+        ssh_username=ssh_user.ssh_username,
+        password=ssh_user.get_ssh_password()
+    )
+
+
+def get_ssh_credentials(user):
+    """
+    Identifiants SSH déchiffrés d'un utilisateur (instance ou id).
+    Lève SSHUser.DoesNotExist si l'utilisateur n'en a pas.
+    """
+    user_id = getattr(user, 'pk', user)
+    key = str(user_id)
+    credentials = _cache.get(key)
+    if credentials is None:
+        credentials = _from_model(SSHUser.objects.get(user_id=user_id))
+        _cache.set(key, credentials)
+    return credentials
+
+
+def get_default_ssh_credentials():
+    """Identifiants du premier SSHUser, ou None s'il n'en existe aucun."""
+    credentials = _cache.get(_DEFAULT_KEY)
+    if credentials is None:
+        ssh_user = SSHUser.objects.order_by('pk').first()
+        if ssh_user is None:
+            return None
+        credentials = _from_model(ssh_user)
+        _cache.set(_DEFAULT_KEY, credentials)
+    return credentials
+
+
+def invalidate_ssh_credentials(user_id=None):
+    """Invalide les identifiants d'un utilisateur, ou tout le cache si user_id est None."""
+    if user_id is None:
+        _cache.clear()
+        return
+    _cache.delete(str(user_id))
+    # Les identifiants par défaut peuvent être ceux de cet utilisateur
+    _cache.delete(_DEFAULT_KEY)
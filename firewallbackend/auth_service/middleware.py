@@ -1,11 +1,10 @@
 from django.http import HttpResponse
 from django.utils.deprecation import MiddlewareMixin
-from django.core.cache import cache
 from django.conf import settings
-import time
 import logging
-import base64
-import json
+
+from . import ratelimit
+from .authentication import authenticate_request
 
 logger = logging.getLogger(__name__)
 
@@ -52,57 +51,40 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
 
 class RateLimitMiddleware(MiddlewareMixin):
     def process_request(self, request):
-        # Skip rate limiting for certain paths
-        if request.path.startswith('/admin/') or request.path.startswith('/static/'):
-            return None
-
-        def get_jwt_user_id(request):
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-                try:
-                    payload_part = token.split('.')[1]
-                    rem = len(payload_part) % 4
-                    if rem > 0:
-                        payload_part += '=' * (4 - rem)
-                    payload = json.loads(base64.urlsafe_b64decode(payload_part.encode()).decode())
-                    return payload.get('user_id')
-                except Exception as e:
-                    logger.warning(f"JWT decode error: {e}")
+        path = request.path
+        if ratelimit.is_exempt(path):
             return None
 
         # Get IP address for all requests (even authenticated ones)
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
+            ip = x_forwarded_for.split(',')[0].strip()
         else:
             ip = request.META.get('REMOTE_ADDR')
 
-        user_id = get_jwt_user_id(request)
-        if user_id:
-            rate_key = f"rate_limit_user_{user_id}"
-        else:
-            rate_key = f"rate_limit_ip_{ip}"
-        logger.warning(f"[RateLimit] key={rate_key} user_id={user_id} path={request.path}")
+        # Token vérifié une fois ici, réutilisé par CachedJWTAuthentication
+        auth = authenticate_request(request)
+        identity = f"user_{auth[0].pk}" if auth else f"ip_{ip}"
+        bucket, limit = ratelimit.route_budget(path)
 
-        # Get current rate limit data
-        rate_data = cache.get(rate_key, {'count': 0, 'reset_time': time.time() + 60})
-        
-        # Check if rate limit window has expired
-        if time.time() > rate_data['reset_time']:
-            rate_data = {'count': 0, 'reset_time': time.time() + 420}
-        
-        # Increment request count
-        rate_data['count'] += 1
-        
-        # Check if rate limit exceeded
-        if rate_data['count'] > 60:  # 60 requests per minute (plus sécurisé)
-            logger.warning(f"Rate limit exceeded for IP: {ip} (user_id: {user_id})")
-            return HttpResponse(
+        result = ratelimit.hit(identity, bucket, limit)
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded for {identity} on {bucket} ({path})")
+            response = HttpResponse(
                 'Rate limit exceeded. Please try again later.',
                 status=429
             )
-        
-        # Update rate limit data
-        cache.set(rate_key, rate_data, 60)
-        return None 
\ No newline at end of file
+            response['Retry-After'] = str(result.retry_after)
+            response['X-RateLimit-Limit'] = str(result.limit)
+            response['X-RateLimit-Remaining'] = '0'
+            return response
+
+        request.rate_limit = result
+        return None
+
+    def process_response(self, request, response):
+        result = getattr(request, 'rate_limit', None)
+        if result is not None:
+            response['X-RateLimit-Limit'] = str(result.limit)
+            response['X-RateLimit-Remaining'] = str(result.remaining)
+        return response
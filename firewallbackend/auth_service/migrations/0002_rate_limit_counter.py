@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.FloatField()),
+            ],
+            options={
+                'db_table': 'auth_rate_limit_counter',
+                'indexes': [models.Index(fields=['expires_at'], name='auth_rate_l_expires_79ac56_idx')],
+            },
+        ),
+    ]
@@ -138,3 +138,20 @@ class SSHUser(models.Model):
         except Exception as e:
             logger.error(f"Error in check_ssh_password: {str(e)}")
             return False
+
+
+class RateLimitCounter(models.Model):
+    """Compteur d'une fenêtre de limitation de débit (RATE_LIMIT_STORE=database, voir ratelimit.py)"""
+    key = models.CharField(max_length=255, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+    # Horodatage epoch, comme les fenêtres de ratelimit.hit
+    expires_at = models.FloatField()
+
+    class Meta:
+        db_table = 'auth_rate_limit_counter'
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.key} = {self.count}"
@@ -0,0 +1,144 @@
+"""
+Limitation de débit par fenêtre glissante.
+
+La fenêtre glissante est approchée par deux fenêtres fixes consécutives, la
+précédente étant pondérée par sa part encore couverte. Chaque incrément est
+atomique, deux requêtes concurrentes ne peuvent pas s'écraser :
+
+- RATE_LIMIT_STORE=cache : cache.add / cache.incr du cache Django, atomiques
+  en LocMem (un processus) comme en Redis (plusieurs workers) ;
+- RATE_LIMIT_STORE=database : table RateLimitCounter incrémentée par un seul
+  INSERT ... ON CONFLICT DO UPDATE ... RETURNING, pour plusieurs workers sans
+  Redis (le cache fichier n'a pas d'incr atomique entre processus). Les
+  compteurs expirés sont purgés une fois par fenêtre et par processus.
+"""
+
+import math
+import re
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .models import RateLimitCounter
+
+# Durée de la fenêtre
+RATE_LIMIT_WINDOW = 60  # seconds
+# Budget par défaut (requêtes par fenêtre et par client)
+DEFAULT_BUDGET = 120
+
+# Budgets par route (premier motif qui correspond sur request.path)
+ROUTE_BUDGETS = [
+    ('login', re.compile(r'^/api/auth/login/'), 10),
+    ('register', re.compile(r'^/api/auth/register/'), 10),
+    ('token_refresh', re.compile(r'^/api/auth/token/refresh/'), 30),
+    # /api/firewalls/upload-csv/ et /api/cameras/upload_csv/
+    ('csv_upload', re.compile(r'/upload[_-]csv/$'), 20),
+]
+
+# Routes jamais limitées : websocket, admin, fichiers statiques, scrape
+# Prometheus et polling de progression des jobs en masse
+EXEMPT_PATHS = [
+    re.compile(r'^/ws/'),
+    re.compile(r'^/admin/'),
+    re.compile(r'^/static/'),
+    re.compile(r'^/metrics$'),
+    re.compile(r'/(ping_status|check_ping_status|check_task_status)/$'),
+    re.compile(r'^/api/command/commands/[^/]+/status/$'),
+    re.compile(r'^/api/interface-monitor/api/monitoring/status/$'),
+]
+
+KEY_PREFIX = 'ratelimit'
+
+_purged_window = None
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int
+
+
+def is_exempt(path):
+    return any(pattern.search(path) for pattern in EXEMPT_PATHS)
+
+
+def route_budget(path):
+    """Retourne (nom du budget, limite) pour un chemin."""
+    for name, pattern, limit in ROUTE_BUDGETS:
+        if pattern.search(path):
+            return name, limit
+    return 'default', DEFAULT_BUDGET
+
+
+def _uses_database():
+    return getattr(settings, 'RATE_LIMIT_STORE', 'cache') == 'database'
+
+
+def _incr(key, timeout):
+    # add n'écrit que si la clé est absente ; incr est atomique
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Clé expirée entre add et incr
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def _db_incr(key, expires_at):
+    """Incrément atomique en une requête (SQLite >= 3.35 et PostgreSQL)."""
+    quote = connection.ops.quote_name
+    table = quote(RateLimitCounter._meta.db_table)
+    key_column, count_column, expires_column = (quote(name) for name in ('key', 'count', 'expires_at'))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({key_column}, {count_column}, {expires_column}) VALUES (%s, 1, %s) "
+            f"ON CONFLICT ({key_column}) DO UPDATE SET {count_column} = {table}.{count_column} + 1 "
+            f"RETURNING {count_column}",
+            [key, expires_at]
+        )
+        return cursor.fetchone()[0]
+
+
+def _db_purge(window_number, now):
+    global _purged_window
+    if _purged_window == window_number:
+        return
+    _purged_window = window_number
+    RateLimitCounter.objects.filter(expires_at__lt=now).delete()
+
+
+def hit(identity, bucket, limit, window=RATE_LIMIT_WINDOW, now=None):
+    """
+    Compte une requête de identity sur bucket et indique si elle passe.
+    Les requêtes refusées sont comptées aussi, un client qui insiste reste bloqué.
+    """
+    now = time.time() if now is None else now
+    current_window = int(now // window)
+    elapsed = (now % window) / window
+    base = f"{KEY_PREFIX}:{bucket}:{identity}"
+
+    if _uses_database():
+        _db_purge(current_window, now)
+        current = _db_incr(f"{base}:{current_window}", now + window * 2)
+        previous = RateLimitCounter.objects.filter(
+            key=f"{base}:{current_window - 1}"
+        ).values_list('count', flat=True).first() or 0
+    else:
+        current = _incr(f"{base}:{current_window}", window * 2)
+        previous = cache.get(f"{base}:{current_window - 1}", 0)
+
+    estimated = previous * (1 - elapsed) + current
+    if estimated <= limit:
+        return RateLimitResult(True, limit, int(limit - estimated), 0)
+
+    # Temps avant que le poids de la fenêtre précédente suffise à repasser sous la limite
+    if previous and current <= limit:
+        retry_after = math.ceil((1 - elapsed - (limit - current) / previous) * window)
+    else:
+        retry_after = math.ceil((1 - elapsed) * window)
+    return RateLimitResult(False, limit, 0, max(retry_after, 1))
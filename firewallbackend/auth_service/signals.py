@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from .models import SSHUser
+from .credentials import invalidate_ssh_credentials
+from .authentication import invalidate_user
 from .utils.crypto import encrypt_user_data, encrypt_ssh_data
 import logging
 from template_service.models import Variable
@@ -129,4 +131,20 @@ def save_user_profile(sender, instance, **kwargs):
 # ou via l'interface utilisateur avec des mots de passe séparés
 
 # Suppression du signal qui crée automatiquement un SSHUser
-# Les SSHUser devront être créés manuellement avec les bons identifiants 
\ No newline at end of file
+# Les SSHUser devront être créés manuellement avec les bons identifiants 
+@receiver(post_save, sender=SSHUser)
+@receiver(post_delete, sender=SSHUser)
+def invalidate_ssh_user_credentials(sender, instance, **kwargs):
+    """
+    Signal pour invalider les identifiants SSH déchiffrés en cache
+    """
+    invalidate_ssh_credentials(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Signal pour invalider l'utilisateur en cache de l'authentification JWT
+    """
+    invalidate_user(instance.pk)
@@ -0,0 +1,74 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import USER_CACHE_TTL, _user_cache_key, authenticate_token, get_cached_user
+from .models import User
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'jwt-user-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='jwtuser',
+            email='jwtuser@example.com',
+            password='testpass123'
+        )
+        cache.clear()
+
+    def test_cache_hit_without_password_hash(self):
+        """Test un seul SELECT puis le cache, sans le hash du mot de passe"""
+        with self.assertNumQueries(1):
+            get_cached_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = get_cached_user(self.user.pk)
+        self.assertEqual((user.pk, user.username), (self.user.pk, 'jwtuser'))
+        self.assertNotIn('password', cache.get(_user_cache_key(self.user.pk)))
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+
+    def test_entry_expires(self):
+        """Test la relecture en base après le TTL"""
+        get_cached_user(self.user.pk)
+        later = time.time() + USER_CACHE_TTL + 1
+        with patch('time.time', return_value=later), self.assertNumQueries(1):
+            get_cached_user(self.user.pk)
+
+    def test_invalidated_on_user_save(self):
+        """Test l'invalidation à l'enregistrement (droits, gel du compte)"""
+        self.assertFalse(get_cached_user(self.user.pk).is_staff)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertTrue(get_cached_user(self.user.pk).is_staff)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_cached_user_save_keeps_password(self):
+        """Test qu'enregistrer l'utilisateur lu du cache n'écrase pas le mot de passe"""
+        get_cached_user(self.user.pk)
+        user = get_cached_user(self.user.pk)
+        user.phone_number = '0600000000'
+        user.save()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.phone_number, '0600000000')
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_token_authentication(self):
+        """Test l'authentification d'une requête par access token"""
+        token = str(AccessToken.for_user(self.user))
+        user, validated_token = authenticate_token(token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertIsNone(authenticate_token('not-a-token'))
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.get('/api/firewalls/firewalls/')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+
+from .credentials import CredentialCache, get_ssh_credentials, invalidate_ssh_credentials
+from .models import User, SSHUser
+
+
+class CredentialCacheTests(SimpleTestCase):
+    @patch('auth_service.credentials.time.monotonic')
+    def test_entries_expire_after_ttl(self, monotonic):
+        """Test l'expiration des entrées après le TTL"""
+        monotonic.return_value = 1000.0
+        cache = CredentialCache(ttl=300)
+        cache.set('user', 'secret')
+        monotonic.return_value = 1299.0
+        self.assertEqual(cache.get('user'), 'secret')
+        monotonic.return_value = 1301.0
+        self.assertIsNone(cache.get('user'))
+
+    def test_lru_bound(self):
+        """Test l'éviction de l'entrée la moins récemment lue au-delà de max_entries"""
+        cache = CredentialCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+
+class SSHCredentialsProviderTests(TestCase):
+    def setUp(self):
+        invalidate_ssh_credentials()
+        self.addCleanup(invalidate_ssh_credentials)
+        self.user = User.objects.create_user(
+            username='credentialsuser',
+            email='credentialsuser@example.com',
+            password='testpass123'
+        )
+        self.ssh_user = SSHUser.objects.get(user=self.user)
+        self.ssh_user.set_ssh_password('firstpass')
+
+    def test_cached_until_ssh_user_saved(self):
+        """Test une seule requête et un seul déchiffrement, puis l'invalidation à l'enregistrement"""
+        self.assertEqual(get_ssh_credentials(self.user).password, 'firstpass')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_ssh_credentials(self.user.pk).password, 'firstpass')
+
+        self.ssh_user.set_ssh_password('secondpass')
+        self.assertEqual(get_ssh_credentials(self.user).password, 'secondpass')
+
+    def test_invalidated_on_delete(self):
+        """Test l'invalidation à la suppression du SSHUser"""
+        get_ssh_credentials(self.user)
+        self.ssh_user.delete()
+        with self.assertRaises(SSHUser.DoesNotExist):
+            get_ssh_credentials(self.user)
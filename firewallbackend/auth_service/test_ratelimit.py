@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import ratelimit
+from .models import RateLimitCounter
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ratelimit-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # Début d'une fenêtre de 60 s
+        self.start = 60 * 1000
+
+    def test_sliding_window_weighting(self):
+        """Test la pondération de la fenêtre précédente par sa part encore couverte"""
+        results = [ratelimit.hit('ip_1', 'default', 10, now=self.start + i) for i in range(11)]
+        self.assertTrue(all(result.allowed for result in results[:10]))
+        self.assertEqual(results[9].remaining, 0)
+        self.assertFalse(results[10].allowed)
+
+        # Mi-fenêtre suivante : 11 requêtes précédentes comptent pour 5.5
+        middle = self.start + 90
+        allowed = [ratelimit.hit('ip_1', 'default', 10, now=middle) for _ in range(5)]
+        self.assertEqual([result.allowed for result in allowed], [True, True, True, True, False])
+        self.assertEqual(allowed[0].remaining, 3)
+        # (1 - 0.5 - (10 - 5) / 11) * 60 = 2.7 s
+        self.assertEqual(allowed[-1].retry_after, 3)
+
+        # La fenêtre précédente ne compte plus après une fenêtre complète
+        self.assertTrue(ratelimit.hit('ip_1', 'default', 10, now=self.start + 180).allowed)
+
+    def test_identities_and_buckets_are_separate(self):
+        """Test des compteurs distincts par client et par budget"""
+        for _ in range(2):
+            ratelimit.hit('ip_1', 'login', 2, now=self.start)
+        self.assertFalse(ratelimit.hit('ip_1', 'login', 2, now=self.start).allowed)
+        self.assertTrue(ratelimit.hit('ip_2', 'login', 2, now=self.start).allowed)
+        self.assertTrue(ratelimit.hit('ip_1', 'default', 2, now=self.start).allowed)
+
+    def test_route_budgets(self):
+        """Test le budget choisi selon la route"""
+        self.assertEqual(ratelimit.route_budget('/api/auth/login/'), ('login', 10))
+        self.assertEqual(ratelimit.route_budget('/api/auth/token/refresh/'), ('token_refresh', 30))
+        self.assertEqual(ratelimit.route_budget('/api/firewalls/upload-csv/'), ('csv_upload', 20))
+        self.assertEqual(ratelimit.route_budget('/api/cameras/upload_csv/'), ('csv_upload', 20))
+        self.assertEqual(ratelimit.route_budget('/api/firewalls/firewalls/'), ('default', ratelimit.DEFAULT_BUDGET))
+
+    def test_exempt_paths(self):
+        """Test les routes jamais limitées (websocket, scrape, polling de progression)"""
+        for path in ('/ws/terminal/abc/', '/metrics', '/api/firewalls/ping_status/',
+                     '/api/daily-check/daily-checks/check_task_status/', '/api/command/commands/42/status/'):
+            self.assertTrue(ratelimit.is_exempt(path), path)
+        self.assertFalse(ratelimit.is_exempt('/api/firewalls/firewalls/'))
+        self.assertFalse(ratelimit.is_exempt('/api/auth/login/'))
+
+    def test_middleware_returns_429(self):
+        """Test la réponse 429 avec Retry-After une fois le budget épuisé"""
+        for _ in range(10):
+            response = self.client.post('/api/auth/login/', {}, REMOTE_ADDR='198.51.100.7')
+            self.assertNotEqual(response.status_code, 429)
+        response = self.client.post('/api/auth/login/', {}, REMOTE_ADDR='198.51.100.7')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['X-RateLimit-Limit'], '10')
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+
+@override_settings(RATE_LIMIT_STORE='database')
+class DatabaseRateLimitTests(TestCase):
+    def setUp(self):
+        ratelimit._purged_window = None
+        self.addCleanup(setattr, ratelimit, '_purged_window', None)
+        self.start = 60 * 1000
+
+    def test_sliding_window_in_database(self):
+        """Test le décompte par upsert en base et la pondération de la fenêtre précédente"""
+        results = [ratelimit.hit('ip_1', 'default', 10, now=self.start + i) for i in range(11)]
+        self.assertTrue(all(result.allowed for result in results[:10]))
+        self.assertFalse(results[10].allowed)
+        self.assertEqual(RateLimitCounter.objects.get(key='ratelimit:default:ip_1:1000').count, 11)
+
+        # Mi-fenêtre suivante : 11 requêtes précédentes comptent pour 5.5
+        allowed = [ratelimit.hit('ip_1', 'default', 10, now=self.start + 90) for _ in range(5)]
+        self.assertEqual([result.allowed for result in allowed], [True, True, True, True, False])
+        self.assertTrue(ratelimit.hit('ip_2', 'default', 10, now=self.start + 90).allowed)
+
+    def test_expired_counters_purged(self):
+        """Test la purge des compteurs expirés au changement de fenêtre"""
+        ratelimit.hit('ip_1', 'login', 10, now=self.start)
+        ratelimit.hit('ip_1', 'login', 10, now=self.start + 60)
+        self.assertEqual(RateLimitCounter.objects.count(), 2)
+        # Deux fenêtres plus tard, le compteur de la première a expiré
+        ratelimit.hit('ip_1', 'login', 10, now=self.start + 121)
+        self.assertEqual(
+            sorted(RateLimitCounter.objects.values_list('key', flat=True)),
+            ['ratelimit:login:ip_1:1001', 'ratelimit:login:ip_1:1002']
+        )
@@ -21,6 +21,18 @@ def get_user_encryption_key():
         settings.USER_ENCRYPTION_KEY = os.urandom(32)  # 256 bits pour AES-256
     return settings.USER_ENCRYPTION_KEY
 
+_ssh_cipher = None
+_ssh_cipher_key = None
+
+def get_ssh_cipher():
+    """Retourne le chiffreur ChaCha20-Poly1305, construit une seule fois par clé"""
+    global _ssh_cipher, _ssh_cipher_key
+    key = get_ssh_encryption_key()
+    if _ssh_cipher is None or _ssh_cipher_key != key:
+        _ssh_cipher = ChaCha20Poly1305(key)
+        _ssh_cipher_key = key
+    return _ssh_cipher
+
 def get_ssh_encryption_key():
     """Génère ou récupère la clé de chiffrement SSH"""
     if not hasattr(settings, 'SSH_ENCRYPTION_KEY'):
@@ -88,11 +100,8 @@ def encrypt_ssh_data(plain_text):
         if not isinstance(plain_text, str):
             raise ValueError("Input must be a string")
 
-        # Récupérer la clé de chiffrement
-        key = get_ssh_encryption_key()
-        
-        # Créer un objet de chiffrement
-        cipher = ChaCha20Poly1305(key)
+        # Récupérer le chiffreur
+        cipher = get_ssh_cipher()
         
         # Générer un nonce aléatoire
         nonce = os.urandom(12)
@@ -147,11 +156,8 @@ def decrypt_ssh_data(encrypted_text):
         nonce = encrypted_data[:12]
         ciphertext = encrypted_data[12:]
 
-        # Récupérer la clé de chiffrement
-        key = get_ssh_encryption_key()
-        
         # Déchiffrer avec ChaCha20-Poly1305
-        cipher = ChaCha20Poly1305(key)
+        cipher = get_ssh_cipher()
         try:
             decrypted_data = cipher.decrypt(nonce, ciphertext, None)
         except Exception as e:
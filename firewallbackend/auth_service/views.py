@@ -12,7 +12,6 @@ from django.http import JsonResponse
 from django.middleware.csrf import get_token
 from django.conf import settings
 import logging
-import paramiko
 
 from .models import User, SSHUser
 from .serializers import (
@@ -491,6 +490,7 @@ class SSHUserViewSet(viewsets.ModelViewSet):
             decrypted_password = ssh_user.get_ssh_password()
             
             # Tester la connexion SSH
+            import paramiko
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             
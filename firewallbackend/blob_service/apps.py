@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class BlobServiceConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'blob_service'
+    verbose_name = 'Blob Service'
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blob_service import offload
+from blob_service.store import get_store
+from websocket_service.models import TerminalCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Entretien du BlobStore : déport des sorties volumineuses écrites avant sa mise en place '
+        '(--offload) et suppression des blobs qui ne sont plus référencés (--gc).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offload', action='store_true',
+                            help='Déporter les textes de plus de INLINE_LIMIT caractères encore en base')
+        parser.add_argument('--gc', action='store_true', help='Supprimer les blobs non référencés')
+        parser.add_argument('--grace-period', type=int, default=offload.GC_GRACE_PERIOD,
+                            help='Âge minimal en secondes d\'un blob non référencé avant suppression')
+        parser.add_argument('--dry-run', action='store_true', help='Avec --gc, compter sans supprimer')
+        parser.add_argument('--batch-size', type=int, default=offload.OFFLOAD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not options['offload'] and not options['gc']:
+            raise CommandError('Préciser --offload et/ou --gc')
+
+        if options['offload']:
+            for model in offload.offloading_models():
+                count = offload.offload_existing(model, batch_size=options['batch_size'])
+                self.stdout.write(f"{model._meta.label:<45} {count:>8} lignes déportées")
+            pending = TerminalCommand.objects.filter(
+                status='completed', output_blob='', output_size__gt=offload.INLINE_LIMIT
+            )
+            compacted = sum(command.compact_output() for command in list(pending))
+            self.stdout.write(f"{TerminalCommand._meta.label:<45} {compacted:>8} sorties compactées")
+
+        if options['gc']:
+            report = offload.collect_garbage(grace_period=options['grace_period'], dry_run=options['dry_run'])
+            verb = 'à supprimer' if options['dry_run'] else 'supprimés'
+            self.stdout.write(
+                f"{report['referenced']} blobs référencés, {report['deleted']} {verb} "
+                f"({report['freed_bytes'] / 1024 / 1024:.1f} Mo), {report['kept']} conservés "
+                f"dans {get_store().root}"
+            )
@@ -0,0 +1,196 @@
+"""
+Déport des champs texte volumineux vers le BlobStore.
+
+Un modèle qui hérite de BlobOffloadMixin déclare offloaded_fields ; pour
+chaque champ <f> il définit <f>_blob (BlobKeyField) et <f>_size. Au-delà de
+INLINE_LIMIT caractères, save() écrit le texte complet dans le store et ne
+garde en base que la clé, la taille et les PREVIEW_SIZE premiers
+caractères : les listes et les pages de la base restent petites. Le texte
+complet se lit avec get_full(<f>) ou se streame avec stream_response().
+"""
+
+import logging
+import os
+import time
+
+from django.apps import apps
+from django.db import models
+from django.db.models.functions import Length
+from django.http import StreamingHttpResponse
+
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+# Au-delà, le texte quitte la base (en caractères)
+INLINE_LIMIT = 64 * 1024
+PREVIEW_SIZE = 2000
+# Un blob récent non référencé peut appartenir à une ligne pas encore écrite
+GC_GRACE_PERIOD = 3600  # seconds
+OFFLOAD_BATCH_SIZE = 200
+
+
+class BlobKeyField(models.CharField):
+    """Clé d'un blob du BlobStore ('' si le texte est en base)."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', 64)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('default', '')
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+
+class BlobOffloadMixin:
+    offloaded_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Aperçus lus en base : save() ne réécrit pas un blob inchangé
+        instance._loaded_previews = {
+            field: instance.__dict__[field] for field in cls.offloaded_fields if field in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        fields = self.offloaded_fields
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = list(update_fields)
+            fields = [field for field in fields if field in update_fields]
+            for field in fields:
+                update_fields += [name for name in (f'{field}_blob', f'{field}_size') if name not in update_fields]
+            kwargs['update_fields'] = update_fields
+        for field in fields:
+            self.offload_field(field)
+        super().save(*args, **kwargs)
+
+    def offload_field(self, field):
+        """À appeler aussi avant un bulk_create, qui ne passe pas par save()."""
+        if field not in self.__dict__:
+            # Champ différé (.defer/.only) : rien à écrire
+            return
+        text = self.__dict__[field]
+        previews = self.__dict__.setdefault('_loaded_previews', {})
+        blob_attr = f'{field}_blob'
+        if getattr(self, blob_attr) and text == previews.get(field):
+            return
+        size = len(text) if text else 0
+        if size > INLINE_LIMIT:
+            setattr(self, blob_attr, get_store().put(text))
+            self.__dict__[f'_full_{field}'] = text
+            setattr(self, field, text[:PREVIEW_SIZE])
+        else:
+            setattr(self, blob_attr, '')
+            self.__dict__.pop(f'_full_{field}', None)
+        setattr(self, f'{field}_size', size)
+        previews[field] = getattr(self, field)
+
+    def is_offloaded(self, field):
+        return bool(getattr(self, f'{field}_blob'))
+
+    def text_size(self, field):
+        """Taille du texte complet, sans relire le blob."""
+        text = self.__dict__.get(field)
+        if self.is_offloaded(field) and text == self.__dict__.get('_loaded_previews', {}).get(field):
+            return getattr(self, f'{field}_size')
+        return len(text) if text else 0
+
+    def get_full(self, field):
+        """Texte complet du champ, relu dans le store s'il a été déporté."""
+        full = self.__dict__.get(f'_full_{field}')
+        if full is not None:
+            return full
+        key = getattr(self, f'{field}_blob')
+        if key:
+            try:
+                return get_store().read_text(key)
+            except FileNotFoundError:
+                logger.error(f"Blob {key} missing for {self._meta.label} {self.pk}, returning preview")
+        return getattr(self, field)
+
+    def blob_texts(self):
+        """Textes complets des champs déportés (archives de rétention)."""
+        return {field: self.get_full(field) for field in self.offloaded_fields if self.is_offloaded(field)}
+
+
+def stream_response(key, text='', filename=None):
+    """
+    Réponse HTTP en flux : le blob décompressé morceau par morceau, ou text
+    s'il n'y a pas de blob. FileNotFoundError si le blob manque.
+    """
+    if key:
+        store = get_store()
+        if not store.exists(key):
+            raise FileNotFoundError(key)
+        chunks = store.iter_chunks(key)
+    else:
+        chunks = [(text or '').encode('utf-8')]
+    response = StreamingHttpResponse(chunks, content_type='text/plain; charset=utf-8')
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def field_response(instance, field, filename=None):
+    return stream_response(getattr(instance, f'{field}_blob'), getattr(instance, field), filename)
+
+
+def offloading_models():
+    return [model for model in apps.get_models() if issubclass(model, BlobOffloadMixin)]
+
+
+def referenced_keys():
+    keys = set()
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, BlobKeyField):
+                rows = model.objects.exclude(**{field.name: ''}).values_list(field.name, flat=True).distinct()
+                keys.update(rows.iterator())
+    return keys
+
+
+def collect_garbage(grace_period=GC_GRACE_PERIOD, dry_run=False):
+    """Supprime les blobs qu'aucune ligne ne référence (après grace_period)."""
+    store = get_store()
+    referenced = referenced_keys()
+    report = {'referenced': len(referenced), 'kept': 0, 'deleted': 0, 'freed_bytes': 0}
+    limit = time.time() - grace_period
+    for key, mtime, size in list(store.keys()):
+        if key in referenced or mtime >= limit:
+            report['kept'] += 1
+            continue
+        if not dry_run:
+            # Relu juste avant la suppression : put() a pu réutiliser le blob
+            try:
+                if os.stat(store.path(key)).st_mtime >= limit:
+                    report['kept'] += 1
+                    continue
+            except FileNotFoundError:
+                continue
+            store.delete(key)
+        report['deleted'] += 1
+        report['freed_bytes'] += size
+    if not dry_run and os.path.isdir(store.root):
+        store.remove_stale_temp_files(grace_period)
+    if report['deleted']:
+        logger.info(f"Blob GC: {report['deleted']} blobs deleted, {report['freed_bytes']} bytes freed")
+    return report
+
+
+def offload_existing(model, batch_size=OFFLOAD_BATCH_SIZE):
+    """Déporte les textes des lignes écrites avant le BlobStore ; retourne le nombre de lignes."""
+    total = 0
+    for field in model.offloaded_fields:
+        pending = (model.objects.annotate(_text_length=Length(field))
+                   .filter(**{f'{field}_blob': '', '_text_length__gt': INLINE_LIMIT})
+                   .order_by())
+        while True:
+            ids = list(pending.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            for instance in model.objects.filter(pk__in=ids):
+                instance.save(update_fields=[field])
+            total += len(ids)
+    return total
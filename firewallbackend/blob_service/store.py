@@ -0,0 +1,114 @@
+"""
+Stockage des sorties volumineuses hors de la base.
+
+Contenu adressé par son empreinte sha256 : BLOB_STORE_DIR/ab/cd/<clé>.gz,
+compressé en gzip. Une même sortie (config inchangée d'un jour à l'autre)
+n'est écrite qu'une fois ; un blob n'est jamais modifié, seulement créé
+puis supprimé par collect_garbage quand plus aucune ligne ne le référence.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Taille des morceaux lus pour le streaming HTTP
+STREAM_CHUNK_SIZE = 64 * 1024
+COMPRESS_LEVEL = 6
+
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+
+    @staticmethod
+    def key_for(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, key):
+        if not KEY_PATTERN.match(key or ''):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return os.path.join(self.root, key[:2], key[2:4], f'{key}.gz')
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put(self, data):
+        """Enregistre data (str ou bytes) et retourne sa clé."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        key = self.key_for(data)
+        path = self.path(key)
+        if os.path.exists(path):
+            # Contenu identique déjà stocké : rafraîchir la date pour la GC
+            os.utime(path)
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb',
+                                                           compresslevel=COMPRESS_LEVEL, mtime=0) as f:
+                f.write(data)
+            # Le blob n'apparaît sous sa clé qu'une fois complet
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def open(self, key):
+        return gzip.open(self.path(key), 'rb')
+
+    def read(self, key):
+        with self.open(key) as f:
+            return f.read()
+
+    def read_text(self, key):
+        return self.read(key).decode('utf-8')
+
+    def iter_chunks(self, key, chunk_size=STREAM_CHUNK_SIZE):
+        with self.open(key) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def keys(self):
+        """(clé, date de modification, taille compressée) de chaque blob."""
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                key = filename[:-3]
+                if filename.endswith('.gz') and KEY_PATTERN.match(key):
+                    stat = os.stat(os.path.join(directory, filename))
+                    yield key, stat.st_mtime, stat.st_size
+
+    def remove_stale_temp_files(self, older_than):
+        """Fichiers .tmp laissés par une écriture interrompue."""
+        limit = time.time() - older_than
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if filename.endswith('.tmp') and os.stat(path).st_mtime < limit:
+                    os.remove(path)
+
+
+def get_store():
+    return BlobStore(settings.BLOB_STORE_DIR)
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from auth_service.models import User
+from email_service.models import EmailLog
+from . import offload
+from .store import BlobStore, get_store
+
+
+class BlobStoreTests(TestCase):
+    def setUp(self):
+        self.blob_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.blob_dir, ignore_errors=True)
+        settings_override = override_settings(BLOB_STORE_DIR=self.blob_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.config = 'config system global\n' * 10000
+
+    def _log(self, content):
+        return EmailLog.objects.create(recipient='admin@example.com', subject='Backup', content=content)
+
+    def test_put_is_content_addressed(self):
+        """Test qu'un même contenu n'est stocké qu'une fois, compressé"""
+        store = BlobStore(self.blob_dir)
+        key = store.put(self.config)
+        self.assertEqual(store.put(self.config.encode('utf-8')), key)
+        self.assertEqual(len(list(store.keys())), 1)
+        self.assertEqual(store.read_text(key), self.config)
+        self.assertLess(os.path.getsize(store.path(key)), len(self.config) // 10)
+        with self.assertRaises(ValueError):
+            store.path('../settings')
+
+    def test_large_text_offloaded(self):
+        """Test que la base ne garde que la clé, la taille et l'aperçu"""
+        log = self._log(self.config)
+        row = EmailLog.objects.get(pk=log.pk)
+        self.assertTrue(row.content_blob)
+        self.assertEqual(row.content_size, len(self.config))
+        self.assertEqual(row.content, self.config[:offload.PREVIEW_SIZE])
+        self.assertEqual(row.get_full('content'), self.config)
+        self.assertEqual(log.get_full('content'), self.config)
+
+        # Réenregistrer la ligne lue ne remplace pas la sortie par son aperçu
+        row.status = 'failed'
+        row.save()
+        self.assertEqual(EmailLog.objects.get(pk=log.pk).get_full('content'), self.config)
+
+        # Champ différé : save() ne touche pas au blob
+        deferred = EmailLog.objects.defer('content').get(pk=log.pk)
+        deferred.save()
+        self.assertEqual(EmailLog.objects.get(pk=log.pk).content_blob, row.content_blob)
+
+    def test_small_text_stays_inline(self):
+        """Test qu'une sortie courte reste en base, sans blob"""
+        row = EmailLog.objects.get(pk=self._log('short').pk)
+        self.assertEqual((row.content, row.content_blob, row.content_size), ('short', '', 5))
+        row.content = self.config
+        row.save(update_fields=['content'])
+        row.content = 'short again'
+        row.save(update_fields=['content'])
+        row = EmailLog.objects.get(pk=row.pk)
+        self.assertEqual((row.content, row.content_blob, row.content_size), ('short again', '', 11))
+
+    def test_stream_endpoint(self):
+        """Test le téléchargement en flux du contenu complet"""
+        admin = User.objects.create_user(username='blobadmin', email='blobadmin@example.com',
+                                         password='testpass123', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        log = self._log(self.config)
+
+        response = client.get(f'/api/email/logs/{log.pk}/content/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8'), self.config)
+
+        get_store().delete(log.content_blob)
+        response = client.get(f'/api/email/logs/{log.pk}/content/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_garbage_collection(self):
+        """Test la suppression des seuls blobs non référencés"""
+        kept = self._log(self.config)
+        dropped = self._log(self.config + 'end\n')
+        dropped.delete()
+        store = get_store()
+
+        # Période de grâce : un blob récent n'est jamais supprimé
+        self.assertEqual(offload.collect_garbage()['deleted'], 0)
+        report = offload.collect_garbage(grace_period=-1)
+        self.assertEqual(report['deleted'], 1)
+        self.assertEqual([key for key, _, _ in store.keys()], [kept.content_blob])
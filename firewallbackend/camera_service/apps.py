@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class CameraServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'camera_service' 
\ No newline at end of file
+    name = 'camera_service'
+
+    def ready(self):
+        from firewallbackend import workers
+        workers.register('camera_service.views.start_worker')
@@ -0,0 +1,135 @@
+"""Import CSV des caméras en flux (même pipeline que firewall_service.csv_import)."""
+
+import logging
+import uuid
+
+from django.utils import timezone
+
+from firewall_service.csv_import import (
+    CHUNK_SIZE, detect_encoding, open_csv, iter_chunks, history_entry, append_history, write_chunk
+)
+from history_service.models import ServiceHistory
+from .models import Camera
+from .utils import parse_coordinates
+
+logger = logging.getLogger(__name__)
+
+# Mapper les noms de champs insensibles à la casse
+FIELD_MAPPING = {
+    'name': ['name', 'Name', 'NAME'],
+    'ip_address': ['ip_address', 'IP Address', 'IP_ADDRESS', 'ipaddress'],
+    'latitude': ['latitude', 'Latitude', 'LATITUDE'],
+    'longitude': ['longitude', 'Longitude', 'LONGITUDE'],
+    'location': ['location', 'Location', 'LOCATION', 'coordinates', 'Coordinates', 'COORDINATES']
+}
+REQUIRED_FIELDS = ['name', 'ip_address']
+CSV_FIELDS = ['ip_address', 'location', 'latitude', 'longitude']
+UPDATE_FIELDS = CSV_FIELDS + ['updated_at', 'historique_camera']
+HISTORY_DETAILS = {
+    'create_csv': "Camera created from CSV import",
+    'update_csv': "Camera updated from CSV import",
+}
+
+
+def _header_mapping(fieldnames):
+    header_mapping = {}
+    for standard_field, possible_names in FIELD_MAPPING.items():
+        for name in possible_names:
+            if name in fieldnames:
+                header_mapping[name] = standard_field
+                break
+    return header_mapping
+
+
+def _apply_fields(camera, fields):
+    for field, value in fields.items():
+        setattr(camera, field, value)
+    # Même traitement que Camera.save(), contourné par bulk_create/bulk_update
+    if camera.location:
+        coords = parse_coordinates(camera.location)
+        if coords:
+            camera.latitude, camera.longitude = coords
+
+
+def import_cameras(uploaded_file, user, ip_address=None, chunk_size=CHUNK_SIZE):
+    """
+    Importe ou met à jour les caméras d'un CSV. Une caméra existante
+    (même nom, même propriétaire) est mise à jour si ses champs changent.
+    Retourne (nombre créées, nombre mises à jour, erreurs).
+    """
+    encoding = detect_encoding(uploaded_file)
+    reader = open_csv(uploaded_file, encoding)
+    header_mapping = _header_mapping(reader.fieldnames or [])
+
+    created_count = 0
+    updated_count = 0
+    errors = []
+
+    def write(plan):
+        Camera.objects.bulk_create(
+            [camera for _, action, camera in plan if action == 'create_csv'], batch_size=chunk_size
+        )
+        Camera.objects.bulk_update(
+            [camera for _, action, camera in plan if action == 'update_csv'], UPDATE_FIELDS, batch_size=chunk_size
+        )
+        ServiceHistory.objects.bulk_create([
+            ServiceHistory(
+                service_name='camera',
+                action=action,
+                status='success',
+                details=HISTORY_DETAILS[action],
+                user=str(user) if user else None,
+                ip_address=ip_address
+            )
+            for _, action, _ in plan
+        ], batch_size=chunk_size)
+
+    for chunk in iter_chunks(reader, chunk_size):
+        now = timezone.now()
+        rows = {}
+        for row_num, row in chunk:
+            # Nettoyer les valeurs des champs et appliquer le mapping
+            cleaned_row = {}
+            for header, value in row.items():
+                if header in header_mapping:
+                    cleaned_row[header_mapping[header]] = value.strip() if isinstance(value, str) else value
+
+            missing_fields = [field for field in REQUIRED_FIELDS if not cleaned_row.get(field)]
+            if missing_fields:
+                errors.append(f"Row {row_num}: Missing required fields: {', '.join(missing_fields)}")
+                continue
+            rows[cleaned_row['name']] = (row_num, cleaned_row)
+
+        existing = {
+            camera.name: camera
+            for camera in Camera.objects.filter(owner=user, name__in=rows.keys())
+        }
+
+        plan = []
+        for name, (row_num, fields) in rows.items():
+            camera = existing.get(name)
+            if camera is None:
+                camera = Camera(id=str(uuid.uuid4()), owner=user, created_at=now, updated_at=now)
+                _apply_fields(camera, fields)
+                camera.historique_camera = {'entries': [
+                    history_entry('create_csv', 'success', HISTORY_DETAILS['create_csv'], user, ip_address, now)
+                ]}
+                plan.append((row_num, 'create_csv', camera))
+            else:
+                before = [str(getattr(camera, field)) for field in CSV_FIELDS]
+                _apply_fields(camera, fields)
+                if [str(getattr(camera, field)) for field in CSV_FIELDS] == before:
+                    continue
+                camera.updated_at = now
+                append_history(camera, 'historique_camera',
+                               history_entry('update_csv', 'success', HISTORY_DETAILS['update_csv'],
+                                             user, ip_address, now))
+                plan.append((row_num, 'update_csv', camera))
+
+        written, chunk_errors = write_chunk(plan, write)
+        errors.extend(chunk_errors)
+        created_count += sum(1 for _, action, _ in written if action == 'create_csv')
+        updated_count += sum(1 for _, action, _ in written if action == 'update_csv')
+
+    logger.info(f"CSV import: {created_count} cameras created, {updated_count} updated, {len(errors)} errors")
+    return created_count, updated_count, errors
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from camera_service import timeseries
+
+
+class Command(BaseCommand):
+    help = 'Agrège l\'historique de ping des caméras (heure/jour) et applique la rétention'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-only',
+            action='store_true',
+            help='Appliquer uniquement la rétention, sans recalculer les agrégats'
+        )
+
+    def handle(self, *args, **options):
+        if options['retention_only']:
+            deleted = timeseries.apply_retention()
+        else:
+            deleted = timeseries.maintain()
+        self.stdout.write(self.style.SUCCESS(
+            f"Historique de ping maintenu : {deleted['samples']} mesures, "
+            f"{deleted['hourly']} agrégats horaires, {deleted['daily']} agrégats journaliers supprimés"
+        ))
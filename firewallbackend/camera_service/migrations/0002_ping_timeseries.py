@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+STATUS_CODES = {'online': 0, 'offline': 1, 'error': 2}
+
+
+def copy_recent_ping_results(apps, schema_editor):
+    """Reprend les 7 derniers jours de PingResult dans PingSample."""
+    PingResult = apps.get_model('camera_service', 'PingResult')
+    PingSample = apps.get_model('camera_service', 'PingSample')
+    since = django.utils.timezone.now() - timedelta(days=7)
+    batch = []
+    rows = (
+        PingResult.objects.filter(timestamp__gte=since)
+        .values_list('camera_id', 'timestamp', 'status', 'response_time')
+        .iterator(chunk_size=2000)
+    )
+    for camera_id, timestamp, status, response_time in rows:
+        batch.append(PingSample(
+            camera_id=camera_id,
+            checked_at=timestamp,
+            status=STATUS_CODES.get(status, STATUS_CODES['error']),
+            rtt_ms=response_time,
+        ))
+        if len(batch) >= 2000:
+            PingSample.objects.bulk_create(batch)
+            batch = []
+    PingSample.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.PositiveSmallIntegerField(choices=[(0, 'hour'), (1, 'day')])),
+                ('bucket', models.DateTimeField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('up_samples', models.PositiveIntegerField(default=0)),
+                ('rtt_p50', models.FloatField(blank=True, null=True)),
+                ('rtt_p95', models.FloatField(blank=True, null=True)),
+                ('camera', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ping_rollups', to='camera_service.camera')),
+            ],
+            options={
+                'db_table': 'camera_ping_rollup',
+                'ordering': ['-bucket'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PingSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'online'), (1, 'offline'), (2, 'error')])),
+                ('rtt_ms', models.FloatField(blank=True, null=True)),
+                ('camera', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ping_samples', to='camera_service.camera')),
+            ],
+            options={
+                'db_table': 'camera_ping_sample',
+                'ordering': ['-checked_at'],
+            },
+        ),
+        migrations.RunPython(copy_recent_ping_results, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='PingResult',
+        ),
+        migrations.AddIndex(
+            model_name='pingrollup',
+            index=models.Index(fields=['period', 'bucket'], name='camera_ping_period_317c9c_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pingrollup',
+            constraint=models.UniqueConstraint(fields=('camera', 'period', 'bucket'), name='uniq_camera_ping_rollup'),
+        ),
+        migrations.AddIndex(
+            model_name='pingsample',
+            index=models.Index(fields=['camera', 'checked_at'], name='camera_ping_camera__5c7fb6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pingsample',
+            index=models.Index(fields=['checked_at'], name='camera_ping_checked_1dc8ae_idx'),
+        ),
+    ]
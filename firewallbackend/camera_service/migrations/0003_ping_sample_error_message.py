@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('camera_service', '0002_ping_timeseries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pingsample',
+            name='error_message',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
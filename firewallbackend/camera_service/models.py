@@ -93,24 +93,58 @@ class Camera(models.Model):
     def __str__(self):
         return f"{self.name} ({self.ip_address}) - {self.owner.username if self.owner else 'No owner'}"
 
-class PingResult(models.Model):
-    id = models.CharField(max_length=36, primary_key=True, default=str)
-    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='ping_results')
-    status = models.CharField(max_length=20)  # 'online', 'offline', 'error'
-    response_time = models.FloatField(null=True, blank=True)
+class PingSample(models.Model):
+    """Mesure brute de ping, ligne étroite à clé entière (purgée après PING_SAMPLE_RETENTION_DAYS)"""
+    STATUS_CODES = {'online': 0, 'offline': 1, 'error': 2}
+
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='ping_samples', db_index=False)
+    checked_at = models.DateTimeField(default=timezone.now)
+    status = models.PositiveSmallIntegerField(choices=[(v, k) for k, v in STATUS_CODES.items()])
+    rtt_ms = models.FloatField(null=True, blank=True)
+    # Renseigné seulement pour les mesures en erreur (exception du ping)
     error_message = models.TextField(null=True, blank=True)
-    timestamp = models.DateTimeField(default=timezone.now)
-    task_id = models.CharField(max_length=50, null=True, blank=True)  # Pour lier les résultats à une tâche de ping_all
 
     class Meta:
-        db_table = 'ping_result'
-        ordering = ['-timestamp']
+        db_table = 'camera_ping_sample'
+        ordering = ['-checked_at']
+        indexes = [
+            models.Index(fields=['camera', 'checked_at']),
+            models.Index(fields=['checked_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.camera_id} - {self.get_status_display()} at {self.checked_at}"
+
+
+class PingRollup(models.Model):
+    """Agrégat horaire ou journalier des pings d'une caméra (disponibilité, p50/p95)"""
+    PERIOD_HOUR = 0
+    PERIOD_DAY = 1
+    PERIOD_CHOICES = [(PERIOD_HOUR, 'hour'), (PERIOD_DAY, 'day')]
+
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='ping_rollups', db_index=False)
+    period = models.PositiveSmallIntegerField(choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    samples = models.PositiveIntegerField(default=0)
+    up_samples = models.PositiveIntegerField(default=0)
+    rtt_p50 = models.FloatField(null=True, blank=True)
+    rtt_p95 = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'camera_ping_rollup'
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['camera', 'period', 'bucket'], name='uniq_camera_ping_rollup'),
+        ]
         indexes = [
-            models.Index(fields=['camera']),
-            models.Index(fields=['status']),
-            models.Index(fields=['timestamp']),
-            models.Index(fields=['task_id']),
+            models.Index(fields=['period', 'bucket']),
         ]
 
+    @property
+    def availability(self):
+        if not self.samples:
+            return None
+        return round(self.up_samples * 100 / self.samples, 2)
+
     def __str__(self):
-        return f"Ping result for {self.camera.name} at {self.timestamp}" 
\ No newline at end of file
+        return f"{self.camera_id} - {self.get_period_display()} {self.bucket}"
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from auth_service.models import User
+from . import timeseries
+from .models import Camera, PingRollup, PingSample
+
+ONLINE = PingSample.STATUS_CODES['online']
+OFFLINE = PingSample.STATUS_CODES['offline']
+
+
+class PingTimeseriesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='camerauser',
+            email='camerauser@example.com',
+            password='testpass123'
+        )
+        self.camera = Camera.objects.create(id='cam-1', name='Entrée', ip_address='192.0.2.20', owner=self.user)
+        self.hour = datetime(2026, 10, 12, 10, 0, tzinfo=dt_timezone.utc)
+
+    def _samples(self, start, rtts, offline=0):
+        samples = [
+            PingSample(camera=self.camera, checked_at=start + timedelta(seconds=i), status=ONLINE, rtt_ms=rtt)
+            for i, rtt in enumerate(rtts)
+        ]
+        samples += [
+            PingSample(camera=self.camera, checked_at=start + timedelta(minutes=30, seconds=i), status=OFFLINE)
+            for i in range(offline)
+        ]
+        timeseries.record_samples(samples)
+
+    def test_hourly_rollup_percentiles(self):
+        """Test l'agrégat horaire : disponibilité, p50 et p95"""
+        self._samples(self.hour, [float(rtt) for rtt in range(1, 20)], offline=1)
+        self.assertEqual(timeseries.rollup(PingRollup.PERIOD_HOUR, self.hour, self.hour + timedelta(hours=1)), 1)
+
+        row = PingRollup.objects.get(camera=self.camera, period=PingRollup.PERIOD_HOUR)
+        self.assertEqual((row.bucket, row.samples, row.up_samples), (self.hour, 20, 19))
+        self.assertEqual((row.rtt_p50, row.rtt_p95), (10.0, 19.0))
+        self.assertEqual(row.availability, 95.0)
+
+        # Idempotent : recalculer met à jour la ligne existante
+        self._samples(self.hour + timedelta(minutes=45), [100.0])
+        timeseries.rollup(PingRollup.PERIOD_HOUR, self.hour, self.hour + timedelta(hours=1))
+        row = PingRollup.objects.get(camera=self.camera, period=PingRollup.PERIOD_HOUR)
+        self.assertEqual(row.samples, 21)
+
+    def test_daily_rollup_and_pending(self):
+        """Test l'agrégation des heures et jours terminés, sans le bucket en cours"""
+        self._samples(self.hour, [5.0, 7.0])
+        self._samples(self.hour + timedelta(hours=3), [9.0])
+        timeseries.rollup_pending(now=self.hour + timedelta(days=1, hours=1))
+
+        hourly = PingRollup.objects.filter(period=PingRollup.PERIOD_HOUR).order_by('bucket')
+        self.assertEqual([row.samples for row in hourly], [2, 1])
+        daily = PingRollup.objects.get(period=PingRollup.PERIOD_DAY)
+        self.assertEqual(daily.bucket, self.hour.replace(hour=0))
+        self.assertEqual((daily.samples, daily.rtt_p50), (3, 7.0))
+
+        series = timeseries.uptime_series(self.camera.id, PingRollup.PERIOD_HOUR, self.hour)
+        self.assertEqual([point['availability'] for point in series], [100.0, 100.0])
+
+    def test_retention(self):
+        """Test la purge des mesures brutes et agrégats expirés"""
+        now = self.hour
+        self._samples(now - timedelta(days=timeseries.PING_SAMPLE_RETENTION_DAYS + 1), [1.0, 2.0])
+        self._samples(now - timedelta(hours=1), [3.0])
+        PingRollup.objects.create(camera=self.camera, period=PingRollup.PERIOD_HOUR, samples=1,
+                                  bucket=now - timedelta(days=timeseries.PING_HOURLY_RETENTION_DAYS + 1))
+        PingRollup.objects.create(camera=self.camera, period=PingRollup.PERIOD_DAY, samples=1,
+                                  bucket=now - timedelta(days=timeseries.PING_HOURLY_RETENTION_DAYS + 1))
+
+        deleted = timeseries.apply_retention(now)
+        self.assertEqual(deleted, {'samples': 2, 'hourly': 1, 'daily': 0})
+        self.assertEqual(PingSample.objects.count(), 1)
+        self.assertTrue(PingRollup.objects.filter(period=PingRollup.PERIOD_DAY).exists())
+
+    def test_uptime_days_clamped(self):
+        """Test que days est borné à la rétention des agrégats"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f'/api/cameras/cameras/{self.camera.id}/uptime/'
+
+        self.assertEqual(client.get(url, {'days': -3}).data['days'], 1)
+        self.assertEqual(client.get(url, {'days': 10 ** 9}).data['days'], timeseries.PING_HOURLY_RETENTION_DAYS)
+        self.assertEqual(client.get(url, {'period': 'day', 'days': 10 ** 9}).data['days'],
+                         timeseries.PING_DAILY_RETENTION_DAYS)
+        self.assertEqual(client.get(url, {'days': 'abc'}).status_code, 400)
+        response = client.get('/api/cameras/cameras/uptime_summary/', {'days': 10 ** 9})
+        self.assertEqual(response.data['days'], timeseries.PING_DAILY_RETENTION_DAYS)
+
+    def test_ping_history_keeps_error_message(self):
+        """Test que l'historique de ping renvoie toujours error_message"""
+        timeseries.record_samples([
+            PingSample(camera=self.camera, checked_at=self.hour, status=ONLINE, rtt_ms=3.0),
+            PingSample(camera=self.camera, checked_at=self.hour + timedelta(minutes=1),
+                       status=PingSample.STATUS_CODES['error'], error_message='Network unreachable'),
+        ])
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get('/api/cameras/cameras/get_ping_history/', {'camera_id': self.camera.id})
+
+        self.assertEqual(
+            [(row['status'], row['response_time'], row['error_message']) for row in response.data['results']],
+            [('error', None, 'Network unreachable'), ('online', 3.0, None)]
+        )
+
+
+class PingResultMigrationTests(TransactionTestCase):
+    migrate_from = [('camera_service', '0001_initial')]
+    migrate_to = [('camera_service', '0002_ping_timeseries')]
+
+    def test_recent_ping_results_copied(self):
+        """Test la reprise des 7 derniers jours de PingResult dans PingSample"""
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        OldCamera = old_apps.get_model('camera_service', 'Camera')
+        PingResult = old_apps.get_model('camera_service', 'PingResult')
+        camera = OldCamera.objects.create(id='cam-old', name='Parking', ip_address='192.0.2.30')
+        now = datetime.now(dt_timezone.utc)
+        PingResult.objects.create(id='r1', camera=camera, status='online', response_time=4.5, timestamp=now)
+        PingResult.objects.create(id='r2', camera=camera, status='timeout', timestamp=now - timedelta(hours=1))
+        PingResult.objects.create(id='r3', camera=camera, status='online', timestamp=now - timedelta(days=8))
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+        rows = sorted(PingSample.objects.filter(camera_id='cam-old').values_list('status', 'rtt_ms'))
+        self.assertEqual(rows, [(ONLINE, 4.5), (PingSample.STATUS_CODES['error'], None)])
@@ -0,0 +1,171 @@
+"""Historique de ping des caméras : mesures brutes, agrégats horaires/journaliers et rétention."""
+
+import logging
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PingSample, PingRollup
+
+logger = logging.getLogger(__name__)
+
+# Durée de conservation des mesures brutes (doit couvrir au moins un jour complet
+# pour que les agrégats journaliers puissent être calculés)
+PING_SAMPLE_RETENTION_DAYS = 7
+# Durée de conservation des agrégats horaires
+PING_HOURLY_RETENTION_DAYS = 90
+# Durée de conservation des agrégats journaliers
+PING_DAILY_RETENTION_DAYS = 730
+# Taille des lots pour les insertions et suppressions
+BATCH_SIZE = 2000
+
+UP = PingSample.STATUS_CODES['online']
+
+
+def record_samples(samples):
+    """Enregistre une liste de PingSample en une seule passe."""
+    PingSample.objects.bulk_create(samples, batch_size=BATCH_SIZE)
+
+
+def _percentile(sorted_values, percent):
+    """Percentile au rang le plus proche sur une liste déjà triée."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return round(sorted_values[rank - 1], 2)
+
+
+def _truncate(dt, period):
+    dt = dt.replace(minute=0, second=0, microsecond=0)
+    if period == PingRollup.PERIOD_DAY:
+        dt = dt.replace(hour=0)
+    return dt
+
+
+def rollup(period, start, end):
+    """
+    Calcule les agrégats de la période donnée pour les buckets complets
+    compris entre start et end, à partir des mesures brutes. Idempotent.
+    """
+    start = _truncate(start, period)
+    end = _truncate(end, period)
+    if start >= end:
+        return 0
+
+    buckets = defaultdict(lambda: [0, 0, []])
+    rows = (
+        PingSample.objects
+        .filter(checked_at__gte=start, checked_at__lt=end)
+        .values_list('camera_id', 'checked_at', 'status', 'rtt_ms')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    for camera_id, checked_at, sample_status, rtt_ms in rows:
+        bucket = buckets[(camera_id, _truncate(checked_at, period))]
+        bucket[0] += 1
+        if sample_status == UP:
+            bucket[1] += 1
+            if rtt_ms is not None:
+                bucket[2].append(rtt_ms)
+
+    rollups = []
+    for (camera_id, bucket_start), (samples, up_samples, rtts) in buckets.items():
+        rtts.sort()
+        rollups.append(PingRollup(
+            camera_id=camera_id,
+            period=period,
+            bucket=bucket_start,
+            samples=samples,
+            up_samples=up_samples,
+            rtt_p50=_percentile(rtts, 50),
+            rtt_p95=_percentile(rtts, 95),
+        ))
+
+    PingRollup.objects.bulk_create(
+        rollups,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['camera', 'period', 'bucket'],
+        update_fields=['samples', 'up_samples', 'rtt_p50', 'rtt_p95'],
+    )
+    return len(rollups)
+
+
+def rollup_pending(now=None):
+    """Agrège les heures et jours terminés depuis le dernier agrégat enregistré."""
+    now = now or timezone.now()
+    oldest_sample = PingSample.objects.order_by('checked_at').values_list('checked_at', flat=True).first()
+    if oldest_sample is None:
+        return
+    for period in (PingRollup.PERIOD_HOUR, PingRollup.PERIOD_DAY):
+        last_bucket = (
+            PingRollup.objects.filter(period=period)
+            .order_by('-bucket').values_list('bucket', flat=True).first()
+        )
+        # Le dernier bucket est recalculé : des mesures ont pu arriver après son calcul
+        start = max(last_bucket, oldest_sample) if last_bucket else oldest_sample
+        rollup(period, start, now)
+
+
+def _delete_in_batches(queryset):
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:BATCH_SIZE])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
+
+
+def apply_retention(now=None):
+    """Purge les mesures brutes et agrégats au-delà de leur durée de conservation."""
+    now = now or timezone.now()
+    deleted = {
+        'samples': _delete_in_batches(
+            PingSample.objects.filter(checked_at__lt=now - timedelta(days=PING_SAMPLE_RETENTION_DAYS))
+        ),
+        'hourly': _delete_in_batches(
+            PingRollup.objects.filter(
+                period=PingRollup.PERIOD_HOUR,
+                bucket__lt=now - timedelta(days=PING_HOURLY_RETENTION_DAYS)
+            )
+        ),
+        'daily': _delete_in_batches(
+            PingRollup.objects.filter(
+                period=PingRollup.PERIOD_DAY,
+                bucket__lt=now - timedelta(days=PING_DAILY_RETENTION_DAYS)
+            )
+        ),
+    }
+    if any(deleted.values()):
+        logger.info(f"Ping history retention: {deleted}")
+    return deleted
+
+
+def maintain(now=None):
+    """Agrégation puis rétention, appelée après chaque ping_all et par la commande dédiée."""
+    now = now or timezone.now()
+    rollup_pending(now)
+    return apply_retention(now)
+
+
+def uptime_series(camera_id, period, start, end=None):
+    """Série de disponibilité pour une caméra, depuis les agrégats."""
+    queryset = PingRollup.objects.filter(camera_id=camera_id, period=period, bucket__gte=start)
+    if end is not None:
+        queryset = queryset.filter(bucket__lt=end)
+    return [
+        {
+            'bucket': bucket,
+            'samples': samples,
+            'up_samples': up_samples,
+            'availability': round(up_samples * 100 / samples, 2) if samples else None,
+            'rtt_p50': rtt_p50,
+            'rtt_p95': rtt_p95,
+        }
+        for bucket, samples, up_samples, rtt_p50, rtt_p95 in queryset.order_by('bucket').values_list(
+            'bucket', 'samples', 'up_samples', 'rtt_p50', 'rtt_p95'
+        )
+    ]
@@ -2,22 +2,19 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from .models import Camera, PingResult
+from .models import Camera, PingSample, PingRollup
+from . import timeseries
+from .csv_import import import_cameras
 from .serializers import CameraSerializer
 from rest_framework.permissions import IsAuthenticated
-import csv
-from io import StringIO
-from .utils import parse_coordinates, format_location
 from django.db import models
-import re
-import pythonping
 from django.utils import timezone
-import threading
 from queue import Queue
 import time
 import logging
-import uuid
 from datetime import timedelta
+from metrics_service import metrics
+from firewallbackend import workers
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +39,7 @@ def ping_background_worker():
                 'message': 'Starting ping process...',
                 'last_update': time.time()
             }
+            started = metrics.job_started('camera_ping')
             
             try:
                 cameras = task['cameras']
@@ -50,6 +48,7 @@ def ping_background_worker():
                 total_cameras = len(cameras)
                 processed_cameras = 0
                 results = []
+                samples = []
                 
                 for camera in cameras:
                     try:
@@ -62,6 +61,7 @@ def ping_background_worker():
                             })
                         
                         # Effectuer le ping avec un timeout de 2 secondes
+                        import pythonping
                         response = pythonping.ping(camera.ip_address, count=1, timeout=2)
                         
                         # Vérifier si le ping a réussi
@@ -72,14 +72,13 @@ def ping_background_worker():
                         camera.last_ping = timezone.now()
                         camera.save()
 
-                        # Créer un enregistrement de résultat de ping
-                        ping_result = PingResult.objects.create(
-                            id=str(uuid.uuid4()),
-                            camera=camera,
-                            status='online' if is_online else 'offline',
-                            response_time=response.rtt_avg_ms if is_online else None,
-                            task_id=task_id
-                        )
+                        # Enregistrer la mesure (insérée en lot en fin de tâche)
+                        samples.append(PingSample(
+                            camera_id=camera.id,
+                            checked_at=camera.last_ping,
+                            status=PingSample.STATUS_CODES['online' if is_online else 'offline'],
+                            rtt_ms=response.rtt_avg_ms if is_online else None
+                        ))
 
                         # Ajouter l'historique
                         camera.add_to_history(
@@ -106,14 +105,13 @@ def ping_background_worker():
                         camera.last_ping = timezone.now()
                         camera.save()
 
-                        # Créer un enregistrement de résultat de ping pour l'erreur
-                        ping_result = PingResult.objects.create(
-                            id=str(uuid.uuid4()),
-                            camera=camera,
-                            status='error',
-                            error_message=str(e),
-                            task_id=task_id
-                        )
+                        # Enregistrer la mesure en erreur
+                        samples.append(PingSample(
+                            camera_id=camera.id,
+                            checked_at=camera.last_ping,
+                            status=PingSample.STATUS_CODES['error'],
+                            error_message=str(e)
+                        ))
 
                         # Ajouter l'historique de l'erreur
                         camera.add_to_history(
@@ -142,6 +140,10 @@ def ping_background_worker():
                             'last_update': current_time
                         })
                 
+                # Enregistrer les mesures puis mettre à jour les agrégats et la rétention
+                timeseries.record_samples(samples)
+                timeseries.maintain()
+
                 # Mettre à jour last_ping_all pour toutes les caméras
                 for camera in cameras:
                     camera.last_ping_all = timezone.now()
@@ -164,15 +166,16 @@ def ping_background_worker():
                 })
             
             finally:
+                metrics.job_finished('camera_ping', started)
                 ping_task_queue.task_done()
                 
         except Exception as e:
             logger.error(f"Error in worker thread: {str(e)}")
             continue
 
-# Démarrer le worker thread
-ping_worker_thread = threading.Thread(target=ping_background_worker, daemon=True)
-ping_worker_thread.start()
+def start_worker():
+    """Démarre le worker de ping des caméras (enregistré par CameraServiceConfig.ready)"""
+    return workers.start_worker('camera_ping', ping_background_worker, ping_task_queue)
 
 class CameraViewSet(viewsets.ModelViewSet):
     serializer_class = CameraSerializer
@@ -216,6 +219,7 @@ class CameraViewSet(viewsets.ModelViewSet):
         camera = self.get_object()
         try:
             # Effectuer le ping avec un timeout de 2 secondes
+            import pythonping
             response = pythonping.ping(camera.ip_address, count=1, timeout=2)
             
             # Vérifier si le ping a réussi
@@ -226,6 +230,13 @@ class CameraViewSet(viewsets.ModelViewSet):
             camera.last_ping = timezone.now()
             camera.save()
 
+            PingSample.objects.create(
+                camera=camera,
+                checked_at=camera.last_ping,
+                status=PingSample.STATUS_CODES['online' if is_online else 'offline'],
+                rtt_ms=response.rtt_avg_ms if is_online else None
+            )
+
             # Ajouter l'historique
             camera.add_to_history(
                 action='ping',
@@ -349,189 +360,26 @@ class CameraViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def upload_csv(self, request):
-        print("\n=== Starting CSV Upload ===")
-        print(f"Request Files: {request.FILES}")
-        print(f"Request Content Type: {request.content_type}")
-        
         if 'file' not in request.FILES:
-            print("Error: No file in request.FILES")
             return Response(
                 {'error': 'No file provided'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         file = request.FILES['file']
-        print(f"File name: {file.name}")
-        print(f"File size: {file.size} bytes")
-        
         if not file.name.endswith('.csv'):
-            print(f"Error: Invalid file extension: {file.name}")
             return Response(
                 {'error': 'File must be a CSV'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         try:
-            # Essayer différents encodages
-            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-            content = None
-            
-            for encoding in encodings:
-                try:
-                    file.seek(0)  # Réinitialiser la position du fichier
-                    content = file.read().decode(encoding)
-                    print(f"Successfully decoded file with encoding: {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if content is None:
-                print("Error: Could not decode file with any supported encoding")
-                return Response(
-                    {'error': 'Impossible de décoder le fichier. Veuillez utiliser un encodage UTF-8, Latin-1 ou ISO-8859-1.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Créer un StringIO avec newline='' pour gérer correctement les caractères de nouvelle ligne
-            csv_file = StringIO(content, newline='')
-            reader = csv.DictReader(csv_file, quoting=csv.QUOTE_MINIMAL)
-            
-            # Vérifier les en-têtes du CSV
-            print(f"CSV Headers: {reader.fieldnames}")
-            
-            # Mapper les noms de champs insensibles à la casse
-            field_mapping = {
-                'name': ['name', 'Name', 'NAME'],
-                'ip_address': ['ip_address', 'IP Address', 'IP_ADDRESS', 'ipaddress'],
-                'latitude': ['latitude', 'Latitude', 'LATITUDE'],
-                'longitude': ['longitude', 'Longitude', 'LONGITUDE'],
-                'location': ['location', 'Location', 'LOCATION', 'coordinates', 'Coordinates', 'COORDINATES']
-            }
-            
-            # Créer un mapping inverse pour les en-têtes du CSV
-            header_mapping = {}
-            for standard_field, possible_names in field_mapping.items():
-                for name in possible_names:
-                    if name in reader.fieldnames:
-                        header_mapping[name] = standard_field
-                        break
-            
-            print(f"Header mapping: {header_mapping}")
-            
-            required_fields = ['name', 'ip_address']
-            created_count = 0
-            updated_count = 0
-            errors = []
-
-            def parse_dms(dms_str):
-                try:
-                    # Nettoyer les caractères spéciaux
-                    clean_dms = dms_str.replace('Â°', '°').replace('\\s+', '').strip()
-                    
-                    # Extraire les degrés, minutes, secondes et direction
-                    match = re.match(r'(\d+)°(\d+)\'([\d.]+)"([NSEW])', clean_dms)
-                    if not match:
-                        return None
-                    
-                    degrees, minutes, seconds, direction = match.groups()
-                    decimal = float(degrees) + float(minutes)/60 + float(seconds)/3600
-                    
-                    # Ajuster le signe selon la direction
-                    if direction in ['S', 'W']:
-                        decimal = -decimal
-                    
-                    return decimal
-                except Exception:
-                    return None
-
-            def parse_coordinates(location_str):
-                if not location_str:
-                    return None, None
-                
-                try:
-                    # Nettoyer les caractères spéciaux
-                    clean_location = location_str.replace('Â°', '°').replace('\\s+', ' ').strip()
-                    
-                    # Vérifier si c'est au format DMS
-                    if '°' in clean_location:
-                        parts = clean_location.split()
-                        if len(parts) != 2:
-                            return None, None
-                        
-                        lat_dms, lng_dms = parts
-                        lat = parse_dms(lat_dms)
-                        lng = parse_dms(lng_dms)
-                        
-                        if lat is not None and lng is not None:
-                            return lat, lng
-                    
-                    # Format décimal standard
-                    coords = [float(coord.strip()) for coord in clean_location.split(',')]
-                    if len(coords) == 2:
-                        return coords[0], coords[1]
-                    
-                    return None, None
-                except Exception:
-                    return None, None
-
-            for row_num, row in enumerate(reader, start=2):  # start=2 car la première ligne est l'en-tête
-                try:
-                    print(f"\nProcessing row {row_num}: {row}")
-                    
-                    # Nettoyer les valeurs des champs et appliquer le mapping
-                    cleaned_row = {}
-                    for header, value in row.items():
-                        if header in header_mapping:
-                            cleaned_row[header_mapping[header]] = value.strip() if isinstance(value, str) else value
-                    
-                    print(f"Cleaned row: {cleaned_row}")
-                    
-                    # Vérifier les champs requis
-                    missing_fields = [field for field in required_fields if field not in cleaned_row]
-                    if missing_fields:
-                        errors.append(f"Row {row_num}: Missing required fields: {', '.join(missing_fields)}")
-                        continue
-
-                    # Vérifier si la caméra existe déjà
-                    camera = Camera.objects.filter(
-                        name=cleaned_row['name'],
-                        owner=request.user
-                    ).first()
-
-                    if camera:
-                        # Mise à jour de la caméra existante
-                        for field, value in cleaned_row.items():
-                            setattr(camera, field, value)
-                        camera.save()
-                        updated_count += 1
-
-                        # Ajouter l'historique
-                        camera.add_to_history(
-                            action='update_csv',
-                            status='success',
-                            details=f"Camera updated from CSV import",
-                            user=request.user,
-                            ip_address=request.META.get('REMOTE_ADDR')
-                        )
-                    else:
-                        # Création d'une nouvelle caméra
-                        camera = Camera.objects.create(
-                            **cleaned_row,
-                            owner=request.user
-                        )
-                        created_count += 1
-
-                        # Ajouter l'historique
-                        camera.add_to_history(
-                            action='create_csv',
-                            status='success',
-                            details=f"Camera created from CSV import",
-                            user=request.user,
-                            ip_address=request.META.get('REMOTE_ADDR')
-                        )
-
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
+            # Lecture en flux, validation et écriture par lots (voir csv_import)
+            created_count, updated_count, errors = import_cameras(
+                file,
+                request.user,
+                ip_address=request.META.get('REMOTE_ADDR')
+            )
 
             return Response({
                 'created': created_count,
@@ -540,6 +388,7 @@ class CameraViewSet(viewsets.ModelViewSet):
             })
 
         except Exception as e:
+            logger.error(f"Error importing cameras CSV: {str(e)}")
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -554,18 +403,19 @@ class CameraViewSet(viewsets.ModelViewSet):
                     'error': 'No camera ID provided'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Récupérer les 100 derniers résultats de ping pour la caméra
-            ping_results = PingResult.objects.filter(
+            # Récupérer les 100 dernières mesures de ping pour la caméra
+            statuses = dict(PingSample._meta.get_field('status').choices)
+            ping_samples = PingSample.objects.filter(
                 camera_id=camera_id
-            ).order_by('-timestamp')[:100]
+            ).order_by('-checked_at').values_list('id', 'status', 'rtt_ms', 'error_message', 'checked_at')[:100]
 
             results = [{
-                'id': result.id,
-                'status': result.status,
-                'response_time': result.response_time,
-                'error_message': result.error_message,
-                'timestamp': result.timestamp
-            } for result in ping_results]
+                'id': sample_id,
+                'status': statuses[sample_status],
+                'response_time': rtt_ms,
+                'error_message': error_message,
+                'timestamp': checked_at
+            } for sample_id, sample_status, rtt_ms, error_message, checked_at in ping_samples]
 
             return Response({
                 'camera_id': camera_id,
@@ -577,4 +427,78 @@ class CameraViewSet(viewsets.ModelViewSet):
             logger.error(f"Error getting ping history: {str(e)}")
             return Response({
                 'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=True, methods=['get'])
+    def uptime(self, request, pk=None):
+        """
+        Courbe de disponibilité d'une caméra à partir des agrégats.
+        Paramètres : period=hour|day (défaut hour), days (défaut 7 / 90).
+        """
+        camera = self.get_object()
+        period_name = request.query_params.get('period', 'hour')
+        periods = {name: value for value, name in PingRollup.PERIOD_CHOICES}
+        if period_name not in periods:
+            return Response({'error': 'period must be hour or day'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            days = int(request.query_params.get('days', 7 if period_name == 'hour' else 90))
+        except ValueError:
+            return Response({'error': 'Invalid days parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        # Au-delà de la rétention des agrégats il n'y a plus de données
+        retention = (
+            timeseries.PING_HOURLY_RETENTION_DAYS if period_name == 'hour'
+            else timeseries.PING_DAILY_RETENTION_DAYS
+        )
+        days = min(max(days, 1), retention)
+
+        series = timeseries.uptime_series(
+            camera.id, periods[period_name], timezone.now() - timedelta(days=days)
+        )
+        total_samples = sum(point['samples'] for point in series)
+        up_samples = sum(point['up_samples'] for point in series)
+        return Response({
+            'camera_id': camera.id,
+            'period': period_name,
+            'days': days,
+            'availability': round(up_samples * 100 / total_samples, 2) if total_samples else None,
+            'series': series
+        })
+
+    @action(detail=False, methods=['get'])
+    def uptime_summary(self, request):
+        """Disponibilité et p95 moyens par caméra sur les N derniers jours (agrégats journaliers)."""
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'error': 'Invalid days parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        days = min(max(days, 1), timeseries.PING_DAILY_RETENTION_DAYS)
+
+        rows = (
+            PingRollup.objects
+            .filter(
+                camera__owner=request.user,
+                period=PingRollup.PERIOD_DAY,
+                bucket__gte=timezone.now() - timedelta(days=days)
+            )
+            .values('camera_id', 'camera__name')
+            .annotate(
+                samples=models.Sum('samples'),
+                up_samples=models.Sum('up_samples'),
+                rtt_p95=models.Avg('rtt_p95')
+            )
+            .order_by('camera__name')
+        )
+        return Response({
+            'days': days,
+            'results': [
+                {
+                    'camera_id': row['camera_id'],
+                    'name': row['camera__name'],
+                    'samples': row['samples'],
+                    'availability': round(row['up_samples'] * 100 / row['samples'], 2) if row['samples'] else None,
+                    'rtt_p95': round(row['rtt_p95'], 2) if row['rtt_p95'] is not None else None
+                }
+                for row in rows
+            ]
+        })
@@ -5,3 +5,7 @@ class CommandServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'command_service'
     verbose_name = 'Firewall Command Service'
+
+    def ready(self):
+        from firewallbackend import workers
+        workers.register('command_service.views.start_worker')
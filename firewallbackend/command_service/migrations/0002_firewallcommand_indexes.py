@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('command_service', '0001_initial'),
+        ('firewall_service', '0002_firewallreachability'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firewallcommand',
+            index=models.Index(fields=['created_at'], name='command_ser_created_a4119b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='firewallcommand',
+            index=models.Index(fields=['user', 'created_at'], name='command_ser_user_id_f33765_idx'),
+        ),
+    ]
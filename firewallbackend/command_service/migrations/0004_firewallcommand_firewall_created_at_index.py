@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('command_service', '0003_firewallcommand_output_blob'),
+        ('firewall_service', '0002_firewallreachability'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='firewallcommand',
+            index=models.Index(fields=['firewall', 'created_at'], name='command_ser_firewal_d06b19_idx'),
+        ),
+    ]
@@ -8,10 +8,11 @@ from datetime import datetime
 import json
 from django.utils import timezone
 from history_service.models import ServiceHistory
+from blob_service.offload import BlobKeyField, BlobOffloadMixin
 
 logger = logging.getLogger(__name__)
 
-class FirewallCommand(models.Model):
+class FirewallCommand(BlobOffloadMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('executing', 'Executing'),
@@ -23,14 +24,24 @@ class FirewallCommand(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     command = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Aperçu si la sortie complète est dans le BlobStore (output_blob)
     output = models.TextField(blank=True, null=True)
+    output_blob = BlobKeyField()
+    output_size = models.PositiveBigIntegerField(default=0)
     error_message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     historique_command = models.JSONField(default=dict, blank=True)
 
+    offloaded_fields = ('output',)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['firewall', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Command {self.id} for {self.firewall.name}"
@@ -53,7 +64,7 @@ class FirewallCommand(models.Model):
             'command_info': {
                 'raw_command': self.command,
                 'status': self.status,
-                'output_length': len(self.output) if self.output else 0,
+                'output_length': self.text_size('output'),
                 'has_error': bool(self.error_message),
                 'error_message': self.error_message
             }
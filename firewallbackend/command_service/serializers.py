@@ -1,22 +1,34 @@
 from rest_framework import serializers
 from .models import FirewallCommand
 
+# Caractères de sortie renvoyés par ligne d'historique
+HISTORY_PREVIEW_SIZE = 500
+
 class FirewallCommandSerializer(serializers.ModelSerializer):
     firewall_id = serializers.UUIDField(source='firewall.id')
     parameters = serializers.JSONField(default=dict)
+    # Sortie complète, relue dans le BlobStore si elle y a été déportée
+    output = serializers.SerializerMethodField()
+    output_offloaded = serializers.SerializerMethodField()
 
     class Meta:
         model = FirewallCommand
         fields = [
             'id', 'firewall', 'firewall_id', 'user', 'command', 'status',
-            'output', 'error_message', 'created_at', 'updated_at',
+            'output', 'output_size', 'output_offloaded', 'error_message', 'created_at', 'updated_at',
             'historique_command', 'parameters'
         ]
         read_only_fields = [
-            'id', 'user', 'status', 'output', 'error_message',
+            'id', 'user', 'status', 'output', 'output_size', 'error_message',
             'created_at', 'updated_at', 'historique_command'
         ]
 
+    def get_output(self, instance):
+        return instance.get_full('output')
+
+    def get_output_offloaded(self, instance):
+        return instance.is_offloaded('output')
+
     def to_representation(self, instance):
         """
         S'assure que les paramètres sont toujours un dictionnaire
@@ -66,11 +78,33 @@ class FirewallCommandExecuteSerializer(serializers.Serializer):
         return value
 
 class FirewallCommandHistorySerializer(serializers.ModelSerializer):
+    """
+    Liste de l'historique : output et historique_command sont différés,
+    output n'est qu'un aperçu (annotation output_preview du queryset) ; la
+    sortie complète est servie par l'action output.
+    """
+    firewall_id = serializers.UUIDField(read_only=True)
+    output = serializers.SerializerMethodField()
+    output_truncated = serializers.SerializerMethodField()
+    executed_at = serializers.DateTimeField(source='created_at', read_only=True)
+
     class Meta:
         model = FirewallCommand
-        fields = ['id', 'firewall_id', 'command', 'output', 'status', 'executed_at']
+        fields = [
+            'id', 'firewall_id', 'command', 'output', 'output_size', 'output_truncated',
+            'status', 'error_message', 'executed_at', 'updated_at'
+        ]
         read_only_fields = fields
 
+    def get_output(self, instance):
+        preview = getattr(instance, 'output_preview', None)
+        if preview is None and 'output' in instance.__dict__:
+            preview = (instance.output or '')[:HISTORY_PREVIEW_SIZE]
+        return preview
+
+    def get_output_truncated(self, instance):
+        return instance.output_size > len(self.get_output(instance) or '')
+
 class FirewallConfigSaveSerializer(serializers.Serializer):
     firewall_id = serializers.UUIDField(required=True)
     command = serializers.CharField(required=True)
@@ -1,3 +1,80 @@
-from django.test import TestCase
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from auth_service.models import User
+from firewall_service.models import Firewall
+from firewallbackend.testing import QueryCountMixin
+from .models import FirewallCommand
+from .serializers import HISTORY_PREVIEW_SIZE
+
+
+class CommandHistoryTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        blob_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, blob_dir, ignore_errors=True)
+        settings_override = override_settings(BLOB_STORE_DIR=blob_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            username='historyuser',
+            email='historyuser@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.firewall = Firewall.objects.filter(owner=self.user).first()
+        self.url = f'/api/command/commands/get_firewall_commands/?firewall_id={self.firewall.id}'
+
+    def _create_commands(self, count, output='show system status\n'):
+        for i in range(count):
+            FirewallCommand.objects.create(firewall=self.firewall, user=self.user, command=f'cmd {i}',
+                                           status='completed', output=output)
+
+    def test_history_is_slim_and_cursor_paginated(self):
+        """Test l'historique allégé (aperçu, sans historique JSON) et paginé par curseur"""
+        config = 'config firewall policy\n' * 10000
+        self._create_commands(3)
+        self._create_commands(1, output=config)
+
+        response = self.client.get(self.url + '&page_size=2')
+        self.assertEqual(response.status_code, 200)
+        first = response.data['results']
+        self.assertEqual(len(first), 2)
+        self.assertNotIn('historique_command', first[0])
+        self.assertEqual(len(first[0]['output']), HISTORY_PREVIEW_SIZE)
+        self.assertTrue(first[0]['output_truncated'])
+        self.assertEqual(first[0]['output_size'], len(config))
+        self.assertFalse(first[1]['output_truncated'])
+
+        response = self.client.get(response.data['next'])
+        second = response.data['results']
+        self.assertEqual(len(second), 2)
+        self.assertIsNone(response.data['next'])
+        ids = {row['id'] for row in first + second}
+        self.assertEqual(len(ids), 4)
+
+        # Sortie complète à la demande
+        response = self.client.get(f"/api/command/commands/{first[0]['id']}/output/")
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8'), config)
+
+    def test_history_query_count(self):
+        """Test que l'historique ne fait pas de requête par commande"""
+        self._create_commands(2)
+        self.assertConstantQueries(self.url, lambda: self._create_commands(5))
+
+    def test_detail_returns_full_output(self):
+        """Test que le détail et le statut renvoient la sortie complète, pas l'aperçu"""
+        config = 'config firewall address\n' * 10000
+        self._create_commands(1, output=config)
+        command = FirewallCommand.objects.get(firewall=self.firewall)
+        self.assertTrue(command.is_offloaded('output'))
+
+        response = self.client.get(f'/api/command/commands/{command.id}/')
+        self.assertEqual(response.data['output'], config)
+        self.assertTrue(response.data['output_offloaded'])
+        response = self.client.get(f'/api/command/commands/{command.id}/status/')
+        self.assertEqual(response.data['output'], config)
@@ -1,16 +1,19 @@
 from django.shortcuts import render
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, pagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from auth_service.models import SSHUser
+from auth_service.credentials import get_ssh_credentials
 from .models import FirewallCommand
-from .serializers import FirewallCommandSerializer, FirewallCommandExecuteSerializer, FirewallConfigSaveSerializer
+from .serializers import (
+    FirewallCommandSerializer, FirewallCommandExecuteSerializer, FirewallConfigSaveSerializer,
+    FirewallCommandHistorySerializer, HISTORY_PREVIEW_SIZE
+)
 from rest_framework.permissions import IsAuthenticated
 from django.http import FileResponse
 from django.conf import settings
 import os
-import paramiko
 from datetime import datetime
 from firewall_service.models import Firewall
 import time
@@ -19,12 +22,16 @@ import re
 from auth_service.utils.crypto import decrypt_ssh_data
 import logging
 import base64
-import threading
+import uuid
 from queue import Queue
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 from typing import List, Tuple
+from django.db.models.functions import Substr
+from metrics_service import metrics
+from firewallbackend import workers
+from blob_service.offload import field_response
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,7 +39,7 @@ logger = logging.getLogger(__name__)
 
 # Queue pour stocker les tâches en cours
 config_task_queue = Queue()
-# Dictionnaire pour stocker l'état des tâches
+# Dictionnaire pour stocker l'état des tâches (propre au processus, voir websocket_service.layers)
 config_task_status = {}
 # Lock pour la mise à jour du statut
 status_lock = Lock()
@@ -40,10 +47,12 @@ status_lock = Lock()
 def process_single_firewall(firewall, command, ssh_user, decrypted_password, base_config_dir, task_id):
     try:
         # Établir la connexion SSH avec des paramètres optimisés
+        import paramiko
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         ssh.connect(
             firewall.ip_address,
+            port=firewall.ssh_port or 22,
             username=ssh_user.ssh_username,
             password=decrypted_password,
             timeout=2,  # Timeout réduit
@@ -83,7 +92,7 @@ def process_single_firewall(firewall, command, ssh_user, decrypted_password, bas
         # Créer l'enregistrement
         command_result = FirewallCommand.objects.create(
             firewall=firewall,
-            user=ssh_user.user,
+            user_id=ssh_user.user_id,
             command=command,
             status='completed',
             output=output
@@ -124,6 +133,7 @@ def config_background_worker():
                     'message': 'Starting configuration save...',
                     'last_update': time.time()
                 }
+            started = metrics.job_started('config_save')
             
             try:
                 firewalls = task['firewalls']
@@ -140,8 +150,8 @@ def config_background_worker():
                 os.makedirs(base_config_dir, exist_ok=True)
                 
                 # Récupérer les informations SSH une seule fois
-                ssh_user = SSHUser.objects.get(user=user)
-                decrypted_password = ssh_user.get_ssh_password()
+                ssh_user = get_ssh_credentials(user)
+                decrypted_password = ssh_user.password
                 
                 # Utiliser ThreadPoolExecutor pour le traitement parallèle
                 with ThreadPoolExecutor(max_workers=min(10, total_firewalls)) as executor:
@@ -197,22 +207,39 @@ def config_background_worker():
                     })
             
             finally:
+                metrics.job_finished('config_save', started)
                 config_task_queue.task_done()
                 
         except Exception as e:
             logger.error(f"Error in worker thread: {str(e)}")
             continue
 
-# Démarrer le worker thread
-config_worker_thread = threading.Thread(target=config_background_worker, daemon=True)
-config_worker_thread.start()
+def start_worker():
+    """Démarre le worker de sauvegarde de config (enregistré par CommandServiceConfig.ready)"""
+    return workers.start_worker('config_save', config_background_worker, config_task_queue)
 
 # Create your views here.
 
+class CommandHistoryPagination(pagination.CursorPagination):
+    # Parcours de l'index (firewall, created_at), stable pendant les insertions
+    ordering = '-created_at'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
 class FirewallCommandViewSet(viewsets.ModelViewSet):
     queryset = FirewallCommand.objects.all()
     serializer_class = FirewallCommandSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CommandHistoryPagination
+    # Actions de liste : sérialiseur allégé, sortie et historique différés
+    history_actions = ('list', 'get_firewall_commands')
+
+    def get_serializer_class(self):
+        if self.action in self.history_actions:
+            return FirewallCommandHistorySerializer
+        return FirewallCommandSerializer
 
     def get_queryset(self):
         queryset = FirewallCommand.objects.all()
@@ -228,6 +255,10 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
             except (ValueError, Firewall.DoesNotExist) as e:
                 logger.error(f"Invalid firewall_id: {firewall_id}. Error: {str(e)}")
                 return FirewallCommand.objects.none()
+        if self.action in self.history_actions:
+            return queryset.defer('output', 'historique_command').annotate(
+                output_preview=Substr('output', 1, HISTORY_PREVIEW_SIZE)
+            )
         return queryset.select_related('firewall')
 
     def perform_create(self, serializer):
@@ -334,15 +365,13 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                 ip_address=None
             )
 
-            # Récupérer l'utilisateur SSH
-            ssh_user = SSHUser.objects.get(user=command_obj.user)
-            logger.info(f"Retrieved SSH user: {ssh_user.ssh_username}")
-            
-            # Déchiffrer le mot de passe SSH
+            # Récupérer les identifiants SSH déchiffrés (en cache)
             try:
-                logger.info(f"Attempting to decrypt SSH password for user: {ssh_user.ssh_username}")
-                decrypted_password = ssh_user.get_ssh_password()
-                logger.info("SSH password decrypted successfully")
+                ssh_user = get_ssh_credentials(command_obj.user_id)
+                decrypted_password = ssh_user.password
+                logger.info(f"Retrieved SSH user: {ssh_user.ssh_username}")
+            except SSHUser.DoesNotExist:
+                raise
             except Exception as e:
                 logger.error(f"Error decrypting SSH password: {str(e)}")
                 command_obj.status = 'failed'
@@ -360,10 +389,12 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
             # Établir la connexion SSH
             try:
                 logger.info(f"Attempting SSH connection to {firewall.ip_address}")
+                import paramiko
                 ssh = paramiko.SSHClient()
                 ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
                 ssh.connect(
                     firewall.ip_address,
+                    port=firewall.ssh_port or 22,
                     username=ssh_user.ssh_username,
                     password=decrypted_password,
                     timeout=10
@@ -377,6 +408,7 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                 error = stderr.read().decode()
                 end_time = time.time()
                 execution_time = round(end_time - start_time, 2)
+                metrics.command_duration_seconds.labels(source='command').observe(end_time - start_time)
 
                 logger.info(f"Command '{command_obj.command}' executed on {firewall.ip_address}")
                 logger.info(f"Standard Output:\n{output}")
@@ -393,7 +425,7 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                     command_obj.add_to_history(
                         action='execute_error',
                         status='failed',
-                        details=f"Command execution failed: {error}\nCommand: {command_obj.command}\nOutput: {output}",
+                        details=f"Command execution failed: {error}\nCommand: {command_obj.command}\nOutput: {len(output)} chars",
                         user=command_obj.user,
                         ip_address=None
                     )
@@ -403,7 +435,7 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                     command_obj.add_to_history(
                         action='execute_complete',
                         status='completed',
-                        details=f"Command executed successfully in {execution_time} seconds\nCommand: {command_obj.command}\nOutput: {output}",
+                        details=f"Command executed successfully in {execution_time} seconds\nCommand: {command_obj.command}\nOutput: {len(output)} chars",
                         user=command_obj.user,
                         ip_address=None
                     )
@@ -453,14 +485,16 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                 )
 
             # Récupérer l'utilisateur SSH
-            ssh_user = SSHUser.objects.get(user=self.request.user)
-            decrypted_password = ssh_user.get_ssh_password()
+            ssh_user = get_ssh_credentials(self.request.user)
+            decrypted_password = ssh_user.password
 
             # Établir une seule connexion SSH
+            import paramiko
             ssh = paramiko.SSHClient()
             ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             ssh.connect(
                 firewall.ip_address,
+                port=firewall.ssh_port or 22,
                 username=ssh_user.ssh_username,
                 password=decrypted_password,
                 timeout=10
@@ -484,6 +518,7 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                     error = stderr.read().decode()
                     end_time = time.time()
                     execution_time = round(end_time - start_time, 2)
+                    metrics.command_duration_seconds.labels(source='command').observe(end_time - start_time)
 
                     # Mettre à jour les paramètres avec toutes les informations importantes
                     command_obj.parameters = {
@@ -594,11 +629,12 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
 
         return self.execute_multiple_commands(firewall_id, commands)
 
-    def _open_interactive_session(self, host: str, username: str, password: str) -> Tuple[paramiko.SSHClient, any]:
+    def _open_interactive_session(self, host: str, username: str, password: str, port: int = 22) -> Tuple['paramiko.SSHClient', any]:
         """Open a single interactive SSH session and return (client, channel)."""
+        import paramiko
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(host, username=username, password=password, timeout=10)
+        ssh.connect(host, port=port, username=username, password=password, timeout=10)
         channel = ssh.invoke_shell()
         channel.settimeout(1)
         return ssh, channel
@@ -653,8 +689,8 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Pare-feu non trouvé'}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            ssh_user = SSHUser.objects.get(user=request.user)
-            decrypted_password = ssh_user.get_ssh_password()
+            ssh_user = get_ssh_credentials(request.user)
+            decrypted_password = ssh_user.password
         except SSHUser.DoesNotExist:
             return Response({'error': 'Utilisateur SSH non trouvé'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -668,7 +704,8 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
             ssh, channel = self._open_interactive_session(
                 firewall.ip_address,
                 ssh_user.ssh_username,
-                decrypted_password
+                decrypted_password,
+                port=firewall.ssh_port or 22
             )
 
             # Prime the prompt
@@ -693,8 +730,9 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                 )
 
                 try:
-                    channel.send(cmd_str + '\n')
-                    output = self._read_until_prompt(channel, timeout=30.0)
+                    with metrics.command_duration_seconds.labels(source='template').time():
+                        channel.send(cmd_str + '\n')
+                        output = self._read_until_prompt(channel, timeout=30.0)
 
                     command_obj.output = output
                     command_obj.status = 'completed'
@@ -745,12 +783,19 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Créer un ID unique pour la tâche
-            task_id = f"config_task_{time.strftime('%Y%m%d_%H%M%S')}"
+            task_id = f"config_task_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
             
             # Récupérer le firewall
             from command_service.models import Firewall
             firewall = Firewall.objects.get(id=firewall_id)
             
+            # Initialiser le statut avant la mise en file : le worker peut démarrer aussitôt
+            config_task_status[task_id] = {
+                'status': 'pending',
+                'progress': 0,
+                'message': 'Task queued'
+            }
+
             # Ajouter la tâche à la queue
             config_task_queue.put({
                 'task_id': task_id,
@@ -759,13 +804,6 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                 'user': request.user
             })
             
-            # Initialiser le statut de la tâche
-            config_task_status[task_id] = {
-                'status': 'pending',
-                'progress': 0,
-                'message': 'Task queued'
-            }
-            
             return Response({
                 'status': 'success',
                 'message': 'Configuration save started',
@@ -791,12 +829,19 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Créer un ID unique pour la tâche
-            task_id = f"config_task_{time.strftime('%Y%m%d_%H%M%S')}"
+            task_id = f"config_task_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
             
             # Récupérer les firewalls
             from command_service.models import Firewall
             firewalls = list(Firewall.objects.filter(id__in=firewall_ids))
             
+            # Initialiser le statut avant la mise en file : le worker peut démarrer aussitôt
+            config_task_status[task_id] = {
+                'status': 'pending',
+                'progress': 0,
+                'message': 'Task queued'
+            }
+
             # Ajouter la tâche à la queue
             config_task_queue.put({
                 'task_id': task_id,
@@ -805,13 +850,6 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
                 'user': request.user
             })
             
-            # Initialiser le statut de la tâche
-            config_task_status[task_id] = {
-                'status': 'pending',
-                'progress': 0,
-                'message': 'Task queued'
-            }
-            
             return Response({
                 'status': 'success',
                 'message': 'Bulk configuration save started',
@@ -913,19 +951,34 @@ class FirewallCommandViewSet(viewsets.ModelViewSet):
         return Response({
             'id': command_obj.id,
             'status': command_obj.status,
-            'output': command_obj.output,
+            'output': command_obj.get_full('output'),
+            'output_size': command_obj.output_size,
+            'output_offloaded': command_obj.is_offloaded('output'),
             'error_message': command_obj.error_message,
             'created_at': command_obj.created_at,
             'updated_at': command_obj.updated_at
         })
 
+    @action(detail=True, methods=['get'])
+    def output(self, request, pk=None):
+        """Sortie complète de la commande, en flux (output ne contient qu'un aperçu au-delà de 64 Ko)"""
+        command_obj = self.get_object()
+        try:
+            return field_response(command_obj, 'output', filename=f'command_{command_obj.id}.txt')
+        except FileNotFoundError:
+            logger.error(f"Output blob missing for command {command_obj.id}")
+            return Response({
+                'error': 'Command output not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
     @action(detail=False, methods=['get'])
     def get_firewall_commands(self, request):
         firewall_id = request.query_params.get('firewall_id')
         if firewall_id:
-            commands = self.get_queryset().filter(firewall_id=firewall_id)
-            serializer = self.get_serializer(commands, many=True)
-            return Response(serializer.data)
+            # get_queryset filtre déjà sur firewall_id
+            page = self.paginate_queryset(self.get_queryset())
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         return Response({
             'error': 'firewall_id parameter is required'
         }, status=status.HTTP_400_BAD_REQUEST)
@@ -969,7 +1022,7 @@ class ExecuteCommandView(APIView):
                 logger.info(f"Executing command on firewall {firewall_id}: {command}")
 
                 firewall = Firewall.objects.get(id=firewall_id)
-                ssh_user = SSHUser.objects.get(user=request.user)
+                ssh_user = get_ssh_credentials(request.user)
 
                 # Créer l'enregistrement de la commande
                 command_obj = FirewallCommand.objects.create(
@@ -989,9 +1042,10 @@ class ExecuteCommandView(APIView):
                 )
 
                 try:
-                    # Déchiffrer le mot de passe SSH
-                    decrypted_password = ssh_user.get_ssh_password()
+                    # Mot de passe SSH déjà déchiffré par le fournisseur d'identifiants
+                    decrypted_password = ssh_user.password
 
+                    import paramiko
                     ssh = paramiko.SSHClient()
                     ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
                     
@@ -999,6 +1053,7 @@ class ExecuteCommandView(APIView):
                     
                     ssh.connect(
                         firewall.ip_address,
+                        port=firewall.ssh_port or 22,
                         username=ssh_user.ssh_username,
                         password=decrypted_password,
                         timeout=10
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class DailyCheckServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'dailycheck_service' 
\ No newline at end of file
+    name = 'dailycheck_service'
+
+    def ready(self):
+        from firewallbackend import workers
+        workers.register('dailycheck_service.views.start_worker')
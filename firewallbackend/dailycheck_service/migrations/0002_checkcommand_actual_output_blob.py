@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:04
+
+import blob_service.offload
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Length
+
+
+def fill_sizes(apps, schema_editor):
+    # Lignes existantes : texte toujours en base, taille = longueur
+    apps.get_model('dailycheck_service', 'CheckCommand').objects.update(actual_output_size=Coalesce(Length('actual_output'), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dailycheck_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkcommand',
+            name='actual_output_blob',
+            field=blob_service.offload.BlobKeyField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='checkcommand',
+            name='actual_output_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_sizes, migrations.RunPython.noop),
+    ]
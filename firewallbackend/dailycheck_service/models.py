@@ -2,6 +2,7 @@ from django.db import models
 from firewall_service.models import Firewall
 from django.utils import timezone
 from history_service.models import ServiceHistory
+from blob_service.offload import BlobKeyField, BlobOffloadMixin
 
 class DailyCheck(models.Model):
     firewall = models.ForeignKey(Firewall, on_delete=models.CASCADE, related_name='daily_checks')
@@ -57,11 +58,14 @@ class DailyCheck(models.Model):
             ip_address=ip_address
         )
 
-class CheckCommand(models.Model):
+class CheckCommand(BlobOffloadMixin, models.Model):
     daily_check = models.ForeignKey(DailyCheck, on_delete=models.CASCADE, related_name='commands')
     command = models.TextField()
     expected_output = models.TextField(blank=True, null=True)
+    # Aperçu si la sortie complète est dans le BlobStore (actual_output_blob)
     actual_output = models.TextField(blank=True, null=True)
+    actual_output_blob = BlobKeyField()
+    actual_output_size = models.PositiveBigIntegerField(default=0)
     status = models.CharField(max_length=50, choices=[
         ('SUCCESS', 'Success'),
         ('FAILED', 'Failed'),
@@ -70,6 +74,8 @@ class CheckCommand(models.Model):
     execution_time = models.DateTimeField(auto_now_add=True)
     historique_dailycheck = models.JSONField(default=dict, blank=True)
 
+    offloaded_fields = ('actual_output',)
+
     class Meta:
         ordering = ['execution_time']
 
@@ -0,0 +1,92 @@
+"""Écriture en flux des rapports Excel des daily checks."""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Limites Excel
+MAX_SHEET_NAME_LENGTH = 31
+MAX_CELL_LENGTH = 32767
+MAX_ROWS = 1048576
+
+HEADER = 'Command and Output'
+COMMAND_PREFIX = 'COMMAND: '
+
+
+def iter_lines(text):
+    """Lignes de text sans fin de ligne, découpées sur place (pas de copie complète de la sortie)."""
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start)
+        if end == -1:
+            end = len(text)
+        yield text[start:end].rstrip('\r')
+        start = end + 1
+
+
+class DailyCheckReportWriter:
+    """
+    Rapport Excel écrit en mode constant_memory : chaque ligne est formatée
+    au moment où elle est émise puis vidée sur disque, le classeur n'est
+    jamais chargé en mémoire. Une feuille par firewall, écrites l'une après l'autre.
+    """
+
+    def __init__(self, filepath):
+        # Chargé au premier rapport, pas au démarrage du serveur
+        import xlsxwriter
+
+        self.filepath = filepath
+        self.workbook = xlsxwriter.Workbook(filepath, {'constant_memory': True})
+        self.header_format = self.workbook.add_format({'bold': True, 'border': 1})
+        self.command_format = self.workbook.add_format({'font_color': '#FF0000'})
+        self._sheet_names = set()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _unique_sheet_name(self, firewall):
+        base = f"{firewall.name}_{firewall.ip_address}"[:MAX_SHEET_NAME_LENGTH]
+        for char in '[]:*?/\\':
+            base = base.replace(char, '_')
+        name, index = base, 1
+        while name.lower() in self._sheet_names:
+            suffix = f"_{index}"
+            name = base[:MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix
+            index += 1
+        self._sheet_names.add(name.lower())
+        return name
+
+    def add_firewall(self, firewall, command_outputs):
+        """
+        Ajoute la feuille d'un firewall. command_outputs est un itérable de
+        (commande, sortie) consommé au fil de l'eau.
+        """
+        worksheet = self.workbook.add_worksheet(self._unique_sheet_name(firewall))
+        worksheet.set_column(0, 0, 100)
+        worksheet.write_string(0, 0, HEADER, self.header_format)
+
+        row = 1
+        for command, output in command_outputs:
+            if row >= MAX_ROWS - 1:
+                logger.warning(f"Daily check sheet truncated for firewall {firewall.name}: Excel row limit reached")
+                break
+            worksheet.write_string(row, 0, f"{COMMAND_PREFIX}{command}", self.command_format)
+            row += 1
+            for line in iter_lines(output or ''):
+                if row >= MAX_ROWS - 1:
+                    break
+                if line:
+                    worksheet.write_string(row, 0, line[:MAX_CELL_LENGTH])
+                row += 1
+            # Ligne vide pour séparer les commandes
+            row += 1
+        return worksheet.name
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.workbook.close()
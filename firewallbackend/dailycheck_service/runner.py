@@ -0,0 +1,100 @@
+"""Exécution SSH des commandes de daily check (une session interactive par firewall)."""
+
+import logging
+import re
+import time
+
+from metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+command_duration = metrics.command_duration_seconds.labels(source='daily_check')
+
+# Nombre maximal de firewalls traités en parallèle dans un job
+MAX_WORKERS = 10
+# Timeout de connexion SSH
+CONNECT_TIMEOUT = 10  # seconds
+# Timeout de lecture d'une commande
+COMMAND_TIMEOUT = 30  # seconds
+# Délai d'attente du prompt à l'ouverture du shell
+SHELL_READY_TIMEOUT = 5  # seconds
+# Silence après un prompt au-delà duquel la commande est considérée terminée
+QUIET_WINDOW = 0.3  # seconds
+POLL_INTERVAL = 0.05  # seconds
+BUFFER_SIZE = 65536
+
+PROMPT_RE = re.compile(r'[#>]\s*$')
+PAGER = '--More--'
+
+
+def read_until_prompt(channel, timeout=COMMAND_TIMEOUT):
+    """
+    Lit la sortie jusqu'au prompt (# ou >) suivi d'un court silence,
+    en paginant automatiquement les --More--.
+    """
+    chunks = []
+    deadline = time.monotonic() + timeout
+    last_data = None
+    tail = ''
+    while time.monotonic() < deadline:
+        if channel.recv_ready():
+            chunk = channel.recv(BUFFER_SIZE).decode('utf-8', errors='replace')
+            if PAGER in chunk:
+                channel.send(' ')
+                chunk = chunk.replace(PAGER, '')
+            chunks.append(chunk)
+            tail = (tail + chunk)[-256:]
+            last_data = time.monotonic()
+            continue
+        if channel.exit_status_ready() or channel.closed:
+            break
+        if last_data is not None and PROMPT_RE.search(tail) and time.monotonic() - last_data >= QUIET_WINDOW:
+            break
+        time.sleep(POLL_INTERVAL)
+    else:
+        logger.warning("Timeout reached while reading command output")
+    return ''.join(chunks)
+
+
+def clean_output(output, command):
+    """Supprime l'écho de la commande et les lignes de prompt."""
+    return '\n'.join(
+        line for line in output.split('\n')
+        if line.strip() != command.strip() and not line.strip().endswith(('#', '>'))
+    ).strip()
+
+
+def run_commands(ip_address, username, password, commands, port=22):
+    """
+    Exécute les commandes dans une seule session SSH.
+    Retourne une liste de (commande, sortie nettoyée).
+    """
+    # Importé au premier daily check, pas au démarrage du serveur
+    import paramiko
+
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(
+        ip_address,
+        port=port,
+        username=username,
+        password=password,
+        timeout=CONNECT_TIMEOUT,
+        look_for_keys=False,
+        allow_agent=False
+    )
+    try:
+        channel = ssh.invoke_shell()
+        # Attendre le premier prompt plutôt qu'un délai fixe
+        read_until_prompt(channel, timeout=SHELL_READY_TIMEOUT)
+
+        results = []
+        for cmd in commands:
+            with command_duration.time():
+                channel.send(cmd + '\n')
+                output = read_until_prompt(channel)
+            results.append((cmd, clean_output(output, cmd)))
+        channel.close()
+        return results
+    finally:
+        ssh.close()
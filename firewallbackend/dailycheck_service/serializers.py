@@ -2,9 +2,15 @@ from rest_framework import serializers
 from .models import DailyCheck, CheckCommand
 
 class CheckCommandSerializer(serializers.ModelSerializer):
+    # Sortie complète, relue dans le BlobStore si elle y a été déportée
+    actual_output = serializers.SerializerMethodField()
+
     class Meta:
         model = CheckCommand
-        fields = ['id', 'command', 'expected_output', 'actual_output', 'status', 'execution_time']
+        fields = ['id', 'command', 'expected_output', 'actual_output', 'actual_output_size', 'status', 'execution_time']
+
+    def get_actual_output(self, instance):
+        return instance.get_full('actual_output')
 
 class DailyCheckSerializer(serializers.ModelSerializer):
     commands = serializers.ListField(
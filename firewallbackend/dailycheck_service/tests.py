@@ -0,0 +1,185 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import openpyxl
+from django.test import SimpleTestCase, TestCase
+
+from auth_service.models import User
+from firewall_service.models import Firewall
+from . import views
+from .models import CheckCommand, DailyCheck
+from .reports import COMMAND_PREFIX, HEADER, MAX_CELL_LENGTH, DailyCheckReportWriter, iter_lines
+
+
+class DailyCheckReportWriterTests(SimpleTestCase):
+    def setUp(self):
+        self.report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.report_dir, ignore_errors=True)
+        self.filepath = os.path.join(self.report_dir, 'daily_check.xlsx')
+
+    def _firewall(self, name, ip_address='192.0.2.1'):
+        return SimpleNamespace(name=name, ip_address=ip_address)
+
+    def test_sheet_per_firewall(self):
+        """Test une feuille par firewall, commandes et sorties ligne à ligne"""
+        with DailyCheckReportWriter(self.filepath) as report:
+            report.add_firewall(self._firewall('FW-PAR-01'), [
+                ('get system status', 'Version: v7.2.5\r\nHostname: FW-PAR-01\n'),
+                ('get hardware memory', 'total: 2048\n\nfree: 1024'),
+            ])
+            report.add_firewall(self._firewall('FW-LYS-01', '192.0.2.2'), iter([('get system status', '')]))
+
+        workbook = openpyxl.load_workbook(self.filepath, read_only=True)
+        self.assertEqual(workbook.sheetnames, ['FW-PAR-01_192.0.2.1', 'FW-LYS-01_192.0.2.2'])
+        rows = [row[0] for row in workbook['FW-PAR-01_192.0.2.1'].iter_rows(values_only=True)]
+        self.assertEqual(rows, [
+            HEADER,
+            f'{COMMAND_PREFIX}get system status', 'Version: v7.2.5', 'Hostname: FW-PAR-01', None,
+            f'{COMMAND_PREFIX}get hardware memory', 'total: 2048', None, 'free: 1024',
+        ])
+        workbook.close()
+
+    def test_sheet_names_unique_and_valid(self):
+        """Test des noms de feuille uniques, sans caractères interdits et de 31 caractères au plus"""
+        long_name = 'FW/DATACENTER:PARIS[CORE]-0001-PRIMARY'
+        with DailyCheckReportWriter(self.filepath) as report:
+            first = report.add_firewall(self._firewall(long_name), [])
+            second = report.add_firewall(self._firewall(long_name), [])
+        self.assertNotEqual(first.lower(), second.lower())
+        for name in (first, second):
+            self.assertLessEqual(len(name), 31)
+            self.assertFalse(set(name) & set('[]:*?/\\'))
+
+    def test_long_line_truncated_to_cell_limit(self):
+        """Test qu'une ligne plus longue qu'une cellule Excel est tronquée"""
+        with DailyCheckReportWriter(self.filepath) as report:
+            name = report.add_firewall(self._firewall('FW-01'), [('show', 'x' * (MAX_CELL_LENGTH + 10))])
+            report.close()
+        workbook = openpyxl.load_workbook(self.filepath, read_only=True)
+        rows = [row[0] for row in workbook[name].iter_rows(values_only=True)]
+        self.assertEqual(len(rows[2]), MAX_CELL_LENGTH)
+        workbook.close()
+
+    def test_iter_lines(self):
+        """Test le découpage des lignes (\\n, \\r\\n, ligne finale sans fin de ligne)"""
+        self.assertEqual(list(iter_lines('a\r\nb\n\nc')), ['a', 'b', '', 'c'])
+        self.assertEqual(list(iter_lines('a\n')), ['a'])
+        self.assertEqual(list(iter_lines('')), [])
+
+
+class RecordingReportWriter(DailyCheckReportWriter):
+    """Rapport qui journalise ses écritures (thread, fichier) pour les tests."""
+    events = []
+
+    def add_firewall(self, firewall, command_outputs):
+        self.events.append(('add', self.filepath, threading.current_thread()))
+        return super().add_firewall(firewall, command_outputs)
+
+    def close(self):
+        if not self.closed:
+            self.events.append(('close', self.filepath, threading.current_thread()))
+        super().close()
+
+
+class DailyCheckTaskTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='dailycheckuser',
+            email='dailycheckuser@example.com',
+            password='testpass123'
+        )
+        self.firewalls = list(
+            Firewall.objects.filter(owner=self.user).select_related('data_center', 'firewall_type')
+        )
+        self.report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.report_dir, ignore_errors=True)
+        RecordingReportWriter.events = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+        for target, value in (
+            ('dailycheck_service.views.report_base_dir', lambda: self.report_dir),
+            ('dailycheck_service.views.DailyCheckReportWriter', RecordingReportWriter),
+            ('dailycheck_service.views.get_ssh_credentials',
+             lambda user: SimpleNamespace(ssh_username='admin', password='secret')),
+            ('dailycheck_service.runner.run_commands', self._run_commands),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _run_commands(self, ip_address, username, password, commands, port=22):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            # Le premier firewall répond en dernier
+            time.sleep(0.3 if ip_address == self.firewalls[0].ip_address else 0.05)
+            if ip_address == self.failing_ip:
+                raise TimeoutError('timed out')
+            return [(command, f'{command} on {ip_address}') for command in commands]
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def _run(self, failing_ip=None):
+        self.failing_ip = failing_ip
+        task_id = str(uuid.uuid4())
+        views.run_daily_check_task({
+            'task_id': task_id,
+            'firewalls': self.firewalls,
+            'commands': ['get system status', 'get hardware memory'],
+            'user': self.user,
+        })
+        return views.task_status.pop(task_id)
+
+    def _group(self, firewall):
+        return (firewall.data_center.name, firewall.firewall_type.name)
+
+    def test_parallel_ssh_single_writer(self):
+        """Test le SSH en parallèle et l'écriture des classeurs et de la base par un seul thread"""
+        self.assertGreater(len(self.firewalls), 2)
+        result = self._run()
+
+        self.assertEqual(result['status'], 'completed')
+        self.assertEqual(len(result['results']), len(self.firewalls))
+        self.assertTrue(all(row['success'] for row in result['results']))
+        self.assertGreater(self.max_running, 1)
+        writers = {thread for _, _, thread in RecordingReportWriter.events}
+        self.assertEqual(writers, {threading.current_thread()})
+        self.assertEqual(
+            CheckCommand.objects.filter(daily_check__firewall__owner=self.user).count(), 2 * len(self.firewalls)
+        )
+
+    def test_workbook_closed_when_group_done(self):
+        """Test la fermeture de chaque classeur dès le dernier firewall de son groupe"""
+        self._run()
+        events = RecordingReportWriter.events
+        groups = {self._group(firewall) for firewall in self.firewalls}
+        closes = [(index, path) for index, (kind, path, _) in enumerate(events) if kind == 'close']
+        self.assertEqual(len(closes), len(groups))
+        for index, path in closes:
+            last_add = max(i for i, (kind, p, _) in enumerate(events) if kind == 'add' and p == path)
+            self.assertEqual(index, last_add + 1)
+            self.assertTrue(os.path.exists(path))
+        # Les autres classeurs sont fermés avant que le firewall lent ne réponde
+        self.assertGreater(len(groups), 1)
+        self.assertEqual(os.path.dirname(closes[-1][1]), os.path.join(self.report_dir, *self._group(self.firewalls[0])))
+
+    def test_failed_firewall_still_closes_workbook(self):
+        """Test qu'un firewall en échec est enregistré et que son classeur est fermé"""
+        failing = self.firewalls[-1]
+        result = self._run(failing_ip=failing.ip_address)
+
+        failed = [row for row in result['results'] if not row['success']]
+        self.assertEqual([row['firewall_id'] for row in failed], [failing.id])
+        self.assertEqual(DailyCheck.objects.get(firewall=failing).status, 'FAILED')
+        closed = [path for kind, path, _ in RecordingReportWriter.events if kind == 'close']
+        self.assertEqual(len(closed), len({self._group(firewall) for firewall in self.firewalls}))
@@ -3,221 +3,196 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import DailyCheck, CheckCommand
 from .serializers import DailyCheckSerializer, CheckCommandSerializer
+from .reports import DailyCheckReportWriter
+from . import runner
 from command_service.models import FirewallCommand
 from command_service.views import FirewallCommandViewSet
-import pandas as pd
 from datetime import datetime
 import os
-import time
 from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404
 from django.conf import settings
 import logging
-import paramiko
-from auth_service.models import SSHUser
-from openpyxl import load_workbook
-from openpyxl.styles import Font
-import threading
+from auth_service.credentials import get_ssh_credentials
+import uuid
 from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
 import json
+from metrics_service import metrics
+from firewallbackend import workers
+from blob_service.offload import field_response
 
 logger = logging.getLogger(__name__)
 
 # Queue pour stocker les tâches en cours
 task_queue = Queue()
-# Dictionnaire pour stocker l'état des tâches
+# Dictionnaire pour stocker l'état des tâches (propre au processus, voir websocket_service.layers)
 task_status = {}
 
-def background_task_worker():
-    while True:
-        try:
-            task = task_queue.get()
-            if task is None:
-                break
-                
-            task_id = task['task_id']
-            task_status[task_id] = {
-                'status': 'running',
-                'progress': 0,
-                'message': 'Starting daily checks...'
-            }
+def report_base_dir():
+    """Répertoire racine des rapports Excel (~/Documents/DailyCheck)."""
+    return os.path.join(os.path.expanduser('~/Documents'), 'DailyCheck')
+
+
+def check_firewall(firewall, commands, ssh_username, ssh_password):
+    """Exécute les commandes sur un firewall (thread du pool, sans accès base)."""
+    try:
+        outputs = runner.run_commands(
+            firewall.ip_address,
+            ssh_username,
+            ssh_password,
+            commands,
+            port=firewall.ssh_port or 22
+        )
+        return firewall, outputs, None
+    except Exception as e:
+        logger.error(f"Error processing firewall {firewall.id}: {str(e)}")
+        return firewall, None, str(e)
+
+
+def run_daily_check_task(task):
+    """
+    Exécute un job de daily check : SSH en parallèle dans un pool, ce thread
+    est l'unique rédacteur des classeurs et de la base.
+    """
+    task_id = task['task_id']
+    task_status[task_id] = {
+        'status': 'running',
+        'progress': 0,
+        'message': 'Starting daily checks...'
+    }
+    firewall_groups = {}
+    started = metrics.job_started('daily_check')
+    
+    try:
+        # Exécuter les daily checks
+        firewalls = task['firewalls']
+        commands = task['commands']
+        user = task['user']
+        
+        # Récupérer les informations SSH une seule fois pour tout le job
+        ssh_user = get_ssh_credentials(user)
+        decrypted_password = ssh_user.password
+        
+        # Créer le répertoire de base
+        base_dir = report_base_dir()
+        os.makedirs(base_dir, exist_ok=True)
+        
+        # Grouper les firewalls par data center et type : un classeur par groupe
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        group_of = {}
+        for firewall in firewalls:
+            dc_name = firewall.data_center.name if firewall.data_center else 'Unknown_DC'
+            fw_type = firewall.firewall_type.name if firewall.firewall_type else 'Unknown_FW_Type'
+            group = firewall_groups.setdefault((dc_name, fw_type), {'pending': 0})
+            group['pending'] += 1
+            group_of[firewall.id] = (dc_name, fw_type)
+        
+        for (dc_name, fw_type), group in firewall_groups.items():
+            fw_type_dir = os.path.join(base_dir, dc_name, fw_type)
+            os.makedirs(fw_type_dir, exist_ok=True)
+            group['filepath'] = os.path.join(fw_type_dir, f'daily_check_{timestamp}.xlsx')
+            group['report'] = DailyCheckReportWriter(group['filepath'])
+        
+        total_firewalls = len(firewalls)
+        processed_firewalls = 0
+        results = []
+        # Les threads SSH déposent leurs résultats ici ; ce thread est
+        # l'unique rédacteur des classeurs et de la base
+        results_queue = Queue()
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(runner.MAX_WORKERS, total_firewalls))) as executor:
+            for firewall in firewalls:
+                executor.submit(
+                    check_firewall, firewall, commands, ssh_user.ssh_username, decrypted_password
+                ).add_done_callback(lambda future: results_queue.put(future.result()))
             
-            try:
-                # Exécuter les daily checks
-                firewalls = task['firewalls']
-                commands = task['commands']
-                user = task['user']
-                
-                # Créer le répertoire de base
-                documents_path = os.path.expanduser('~/Documents')
-                base_dir = os.path.join(documents_path, 'DailyCheck')
-                os.makedirs(base_dir, exist_ok=True)
-                
-                # Grouper les firewalls par data center et type
-                firewall_groups = {}
-                for firewall in firewalls:
-                    dc_name = firewall.data_center.name if firewall.data_center else 'Unknown_DC'
-                    fw_type = firewall.firewall_type.name if firewall.firewall_type else 'Unknown_FW_Type'
+            for _ in range(total_firewalls):
+                firewall, outputs, error = results_queue.get()
+                group = firewall_groups[group_of[firewall.id]]
+                try:
+                    if error is not None:
+                        raise Exception(error)
                     
-                    if dc_name not in firewall_groups:
-                        firewall_groups[dc_name] = {}
-                    if fw_type not in firewall_groups[dc_name]:
-                        firewall_groups[dc_name][fw_type] = []
+                    # Écrire la feuille Excel au fil des sorties
+                    group['report'].add_firewall(firewall, outputs)
                     
-                    firewall_groups[dc_name][fw_type].append(firewall)
-                
-                total_firewalls = len(firewalls)
-                processed_firewalls = 0
-                results = []
-                
-                for dc_name, fw_types in firewall_groups.items():
-                    dc_dir = os.path.join(base_dir, dc_name)
-                    os.makedirs(dc_dir, exist_ok=True)
+                    daily_check = DailyCheck.objects.create(
+                        firewall=firewall,
+                        status='SUCCESS',
+                        excel_report=group['filepath']
+                    )
+                    check_commands = [
+                        CheckCommand(
+                            daily_check=daily_check,
+                            command=cmd,
+                            actual_output=output,
+                            status='SUCCESS'
+                        )
+                        for cmd, output in outputs
+                    ]
+                    # bulk_create ne passe pas par save()
+                    for check_command in check_commands:
+                        check_command.offload_field('actual_output')
+                    CheckCommand.objects.bulk_create(check_commands)
+                    
+                    results.append({
+                        'firewall_id': firewall.id,
+                        'status': 'SUCCESS',
+                        'success': True,
+                        'report_path': group['filepath']
+                    })
                     
-                    for fw_type, group_firewalls in fw_types.items():
-                        fw_type_dir = os.path.join(dc_dir, fw_type)
-                        os.makedirs(fw_type_dir, exist_ok=True)
-                        
-                        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                        filename = f'daily_check_{timestamp}.xlsx'
-                        filepath = os.path.join(fw_type_dir, filename)
-                        
-                        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                            for firewall in group_firewalls:
-                                try:
-                                    # Mettre à jour le statut
-                                    task_status[task_id]['message'] = f'Processing {firewall.name}...'
-                                    
-                                    # Créer daily check
-                                    daily_check = DailyCheck.objects.create(
-                                        firewall=firewall,
-                                        status='PENDING'
-                                    )
-                                    
-                                    # Exécuter les commandes
-                                    check_results = []
-                                    ssh_user = SSHUser.objects.get(user=user)
-                                    decrypted_password = ssh_user.get_ssh_password()
-                                    
-                                    ssh = paramiko.SSHClient()
-                                    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                                    ssh.connect(
-                                        firewall.ip_address,
-                                        username=ssh_user.ssh_username,
-                                        password=decrypted_password,
-                                        timeout=10
-                                    )
-                                    
-                                    channel = ssh.invoke_shell()
-                                    time.sleep(2)
-                                    
-                                    for cmd in commands:
-                                        channel.send(cmd + '\n')
-                                        time.sleep(2)
-                                        
-                                        output = ""
-                                        start_time = time.time()
-                                        while True:
-                                            if channel.recv_ready():
-                                                chunk = channel.recv(4096).decode('utf-8')
-                                                output += chunk
-                                                if '#' in chunk or '>' in chunk:
-                                                    time.sleep(1)
-                                                    if not channel.recv_ready():
-                                                        break
-                                                elif '--More--' in chunk:
-                                                    channel.send(' ')
-                                                    output = output.replace('--More--', '')
-                                                    time.sleep(1)
-                                            else:
-                                                if time.time() - start_time > 30:
-                                                    break
-                                                time.sleep(0.1)
-                                        
-                                        # Nettoyer la sortie
-                                        output_lines = output.split('\n')
-                                        cleaned_output_lines = []
-                                        for line in output_lines:
-                                            if line.strip() != cmd.strip() and not line.strip().endswith(tuple(['#', '>'])):
-                                                cleaned_output_lines.append(line)
-                                        output = '\n'.join(cleaned_output_lines).strip()
-                                        
-                                        # Créer l'enregistrement
-                                        command_result = CheckCommand.objects.create(
-                                            daily_check=daily_check,
-                                            command=cmd,
-                                            actual_output=output,
-                                            status='SUCCESS'
-                                        )
-                                        check_results.append(command_result)
-                                    
-                                    channel.close()
-                                    ssh.close()
-                                    
-                                    # Créer la feuille Excel
-                                    sheet_name = f"{firewall.name}_{firewall.ip_address}"
-                                    sheet_name = sheet_name[:31]
-                                    
-                                    all_output_data = []
-                                    for cmd_result in check_results:
-                                        all_output_data.append(f"COMMAND: {cmd_result.command}")
-                                        if cmd_result.actual_output:
-                                            all_output_data.extend(cmd_result.actual_output.split('\n'))
-                                        all_output_data.append("")
-                                    
-                                    pd.DataFrame(all_output_data, columns=['Command and Output']).to_excel(
-                                        writer,
-                                        sheet_name=sheet_name,
-                                        index=False
-                                    )
-                                    
-                                    # Formater la feuille
-                                    wb = writer.book
-                                    ws = wb[sheet_name]
-                                    red_font = Font(color="FF0000")
-                                    
-                                    for row in ws.iter_rows():
-                                        for cell in row:
-                                            if isinstance(cell.value, str) and cell.value.startswith('COMMAND: '):
-                                                cell.font = red_font
-                                    
-                                    # Mettre à jour le statut
-                                    daily_check.excel_report = filepath
-                                    daily_check.status = 'SUCCESS'
-                                    daily_check.save()
-                                    
-                                    results.append({
-                                        'firewall_id': firewall.id,
-                                        'status': 'SUCCESS',
-                                        'success': True,
-                                        'report_path': filepath
-                                    })
-                                    
-                                except Exception as e:
-                                    logger.error(f"Error processing firewall {firewall.id}: {str(e)}")
-                                    results.append({
-                                        'firewall_id': firewall.id,
-                                        'status': 'FAILED',
-                                        'success': False,
-                                        'error': str(e)
-                                    })
-                                
-                                processed_firewalls += 1
-                                task_status[task_id]['progress'] = int((processed_firewalls / total_firewalls) * 100)
+                except Exception as e:
+                    logger.error(f"Error processing firewall {firewall.id}: {str(e)}")
+                    DailyCheck.objects.create(firewall=firewall, status='FAILED', notes=str(e))
+                    results.append({
+                        'firewall_id': firewall.id,
+                        'status': 'FAILED',
+                        'success': False,
+                        'error': str(e)
+                    })
                 
-                task_status[task_id].update({
-                    'status': 'completed',
-                    'progress': 100,
-                    'message': 'All daily checks completed',
-                    'results': results
-                })
+                # Fermer le classeur dès que tous ses firewalls sont traités
+                group['pending'] -= 1
+                if group['pending'] == 0:
+                    group['report'].close()
                 
-            except Exception as e:
-                logger.error(f"Error in background task: {str(e)}")
+                processed_firewalls += 1
                 task_status[task_id].update({
-                    'status': 'failed',
-                    'message': str(e)
+                    'progress': int((processed_firewalls / total_firewalls) * 100),
+                    'message': f'Processed {firewall.name} ({processed_firewalls}/{total_firewalls})'
                 })
-            
+        
+        task_status[task_id].update({
+            'status': 'completed',
+            'progress': 100,
+            'message': 'All daily checks completed',
+            'results': results
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in background task: {str(e)}")
+        task_status[task_id].update({
+            'status': 'failed',
+            'message': str(e)
+        })
+        for group in firewall_groups.values():
+            if 'report' in group:
+                group['report'].close()
+    
+    finally:
+        metrics.job_finished('daily_check', started)
+
+
+def background_task_worker():
+    while True:
+        try:
+            task = task_queue.get()
+            if task is None:
+                break
+            try:
+                run_daily_check_task(task)
             finally:
                 task_queue.task_done()
                 
@@ -225,9 +200,9 @@ def background_task_worker():
             logger.error(f"Error in worker thread: {str(e)}")
             continue
 
-# Démarrer le worker thread
-worker_thread = threading.Thread(target=background_task_worker, daemon=True)
-worker_thread.start()
+def start_worker():
+    """Démarre le worker des daily checks (enregistré par DailyCheckServiceConfig.ready)"""
+    return workers.start_worker('daily_check', background_task_worker, task_queue)
 
 class DailyCheckViewSet(viewsets.ModelViewSet):
     serializer_class = DailyCheckSerializer
@@ -283,106 +258,31 @@ class DailyCheckViewSet(viewsets.ModelViewSet):
         """
         try:
             # Récupérer l'utilisateur SSH
-            ssh_user = SSHUser.objects.get(user=user)
-            decrypted_password = ssh_user.get_ssh_password()
-
-            # Établir la connexion SSH
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(
-                firewall.ip_address,
-                username=ssh_user.ssh_username,
-                password=decrypted_password,
-                timeout=10
-            )
+            ssh_user = get_ssh_credentials(user)
+            decrypted_password = ssh_user.password
 
             results = []
-            # Créer un canal interactif
-            channel = ssh.invoke_shell()
-            time.sleep(2)  # Attendre que le shell soit prêt
-
-            # Fonction pour lire la sortie complète
-            def read_output(channel, timeout=30):
-                output = ""
-                start_time = time.time()
-                
-                while True:
-                    # Vérifier si le canal est prêt à être lu
-                    if channel.recv_ready():
-                        chunk = channel.recv(4096).decode('utf-8')
-                        output += chunk
-                        
-                        # Détecter le prompt final ou --More--
-                        if '#' in chunk or '>' in chunk:
-                             time.sleep(1)  # Attendre un peu plus pour être sûr
-                             if not channel.recv_ready():
-                                break
-                        elif '--More--' in chunk:
-                             # Envoyer un espace pour paginer
-                             channel.send(' ')
-                             # Supprimer --More-- de la sortie capturée pour la netteté
-                             output = output.replace('--More--', '')
-                             time.sleep(1) # Donner au pare-feu le temps de répondre
-
-                    else:
-                        # Vérifier le timeout
-                        if time.time() - start_time > timeout:
-                            logger.warning(f"Timeout reached while reading command output")
-                            break
-                        time.sleep(0.1)
-                
-                return output
-
-            # Exécuter chaque commande
-            for cmd in commands:
-                try:
-                    logger.info(f"Executing command: {cmd}")
-                    # Envoyer la commande
-                    channel.send(cmd + '\n')
-                    time.sleep(2)  # Attendre que la commande commence
-
-                    # Lire la sortie complète
-                    output = read_output(channel)
-                    logger.info(f"Command output length: {len(output)}")
-
-                    # Nettoyer la sortie
-                    # Supprimer la commande elle-même de la sortie et les prompts résiduels
-                    output_lines = output.split('\n')
-                    cleaned_output_lines = []
-                    for line in output_lines:
-                         # Ignorer les lignes qui contiennent uniquement la commande ou le prompt
-                         if line.strip() != cmd.strip() and not line.strip().endswith(tuple(['#', '>'])):
-                              cleaned_output_lines.append(line)
-                    output = '\n'.join(cleaned_output_lines).strip()
-
-                    # Créer l'enregistrement FirewallCommand
-                    command_obj = FirewallCommand.objects.create(
-                        firewall=firewall,
-                        user=user,
-                        command=cmd,
-                        status='completed',
-                        output=output
-                    )
-
-                    results.append({
-                        'command': cmd,
-                        'status': 'completed',
-                        'output': output,
-                        'error': None
-                    })
-
-                except Exception as e:
-                    logger.error(f"Error executing command {cmd}: {str(e)}")
-                    results.append({
-                        'command': cmd,
-                        'status': 'failed',
-                        'output': None,
-                        'error': str(e)
-                    })
-
-            # Fermer la connexion
-            channel.close()
-            ssh.close()
+            for cmd, output in runner.run_commands(
+                firewall.ip_address,
+                ssh_user.ssh_username,
+                decrypted_password,
+                commands,
+                port=firewall.ssh_port or 22
+            ):
+                logger.info(f"Command {cmd} output length: {len(output)}")
+                FirewallCommand.objects.create(
+                    firewall=firewall,
+                    user=user,
+                    command=cmd,
+                    status='completed',
+                    output=output
+                )
+                results.append({
+                    'command': cmd,
+                    'status': 'completed',
+                    'output': output,
+                    'error': None
+                })
 
             return results
 
@@ -438,8 +338,7 @@ class DailyCheckViewSet(viewsets.ModelViewSet):
             filename = f'daily_check_{timestamp}.xlsx'
             
             # Create directories
-            documents_path = os.path.expanduser('~/Documents')
-            base_dir = os.path.join(documents_path, 'DailyCheck')
+            base_dir = report_base_dir()
             os.makedirs(base_dir, exist_ok=True)
             
             if not hasattr(firewall, 'data_center') or not firewall.data_center:
@@ -455,42 +354,13 @@ class DailyCheckViewSet(viewsets.ModelViewSet):
             
             filepath = os.path.join(fw_type_dir, filename)
             
-            # Create Excel report with multiple sheets
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # Create a sheet for this firewall
-                sheet_name = f"{firewall.name}_{firewall.ip_address}"
-                # Truncate sheet name if too long (Excel has a 31 character limit)
-                sheet_name = sheet_name[:31]
-                
-                # Prepare data for this firewall
-                all_output_data = []
-                for cmd_result in check_results:
-                    # Add command line with prefix
-                    all_output_data.append(f"COMMAND: {cmd_result.command}")
-                    # Add output
-                    if cmd_result.actual_output:
-                        all_output_data.extend(cmd_result.actual_output.split('\n'))
-                    # Add empty line to separate commands
-                    all_output_data.append("")
-
-                # Write to sheet
-                pd.DataFrame(all_output_data, columns=['Command and Output']).to_excel(
-                    writer, 
-                    sheet_name=sheet_name,
-                    index=False
+            # Create Excel report (streamed, rows formatted as they are written)
+            with DailyCheckReportWriter(filepath) as report:
+                report.add_firewall(
+                    firewall,
+                    ((cmd_result.command, cmd_result.get_full('actual_output')) for cmd_result in check_results)
                 )
 
-                # Format the sheet
-                wb = writer.book
-                ws = wb[sheet_name]
-                red_font = Font(color="FF0000")
-
-                # Color command lines in red
-                for row in ws.iter_rows():
-                    for cell in row:
-                        if isinstance(cell.value, str) and cell.value.startswith('COMMAND: '):
-                            cell.font = red_font
-
             # Update daily check status
             daily_check.excel_report = filepath
             daily_check.status = 'SUCCESS'
@@ -531,6 +401,16 @@ class DailyCheckViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['get'], url_path=r'commands/(?P<command_pk>[0-9]+)/output')
+    def command_output(self, request, pk=None, command_pk=None):
+        """Sortie complète d'une commande du daily check, en flux"""
+        daily_check = self.get_object()
+        check_command = get_object_or_404(CheckCommand, pk=command_pk, daily_check=daily_check)
+        try:
+            return field_response(check_command, 'actual_output', filename=f'check_command_{check_command.pk}.txt')
+        except FileNotFoundError:
+            return Response({'error': 'Command output not found'}, status=status.HTTP_404_NOT_FOUND)
+
     @action(detail=False, methods=['get'])
     def get_reports(self, request):
         reports = DailyCheck.objects.filter(excel_report__isnull=False)
@@ -583,12 +463,21 @@ class DailyCheckViewSet(viewsets.ModelViewSet):
                 )
             
             # Créer un ID unique pour la tâche
-            task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
             
             # Récupérer les firewalls
             from command_service.models import Firewall
-            firewalls = list(Firewall.objects.filter(id__in=firewall_ids))
+            firewalls = list(
+                Firewall.objects.filter(id__in=firewall_ids).select_related('data_center', 'firewall_type')
+            )
             
+            # Initialiser le statut avant la mise en file : le worker peut démarrer aussitôt
+            task_status[task_id] = {
+                'status': 'pending',
+                'progress': 0,
+                'message': 'Task queued'
+            }
+
             # Ajouter la tâche à la queue
             task_queue.put({
                 'task_id': task_id,
@@ -597,13 +486,6 @@ class DailyCheckViewSet(viewsets.ModelViewSet):
                 'user': request.user
             })
             
-            # Initialiser le statut de la tâche
-            task_status[task_id] = {
-                'status': 'pending',
-                'progress': 0,
-                'message': 'Task queued'
-            }
-            
             return Response({
                 'status': 'success',
                 'message': 'Daily checks started',
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class DashboardServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard_service'
+
+    def ready(self):
+        import dashboard_service.signals  # Compteurs du dashboard tenus à jour au fil des écritures
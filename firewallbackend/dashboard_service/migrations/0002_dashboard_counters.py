@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_command_activity(apps, schema_editor):
+    """Reprend les 8 derniers jours de FirewallCommand dans CommandActivity."""
+    FirewallCommand = apps.get_model('command_service', 'FirewallCommand')
+    CommandActivity = apps.get_model('dashboard_service', 'CommandActivity')
+    since = django.utils.timezone.now() - timedelta(days=8)
+    counts = Counter()
+    rows = (
+        FirewallCommand.objects.filter(created_at__gte=since, user__isnull=False)
+        .values_list('user_id', 'created_at')
+        .iterator(chunk_size=2000)
+    )
+    for user_id, created_at in rows:
+        counts[(user_id, created_at.replace(minute=0, second=0, microsecond=0))] += 1
+    CommandActivity.objects.bulk_create(
+        [CommandActivity(user_id=user_id, hour=hour, count=count) for (user_id, hour), count in counts.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard_service', '0001_initial'),
+        ('command_service', '0004_firewallcommand_firewall_created_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64)),
+                ('name', models.CharField(max_length=64)),
+                ('value', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'dashboard_counter',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'name'), name='unique_dashboard_counter')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CommandActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='command_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'dashboard_command_activity',
+                'indexes': [models.Index(fields=['hour'], name='dashboard_c_hour_81913a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'hour'), name='unique_command_activity_hour')],
+            },
+        ),
+        migrations.RunPython(seed_command_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard_service', '0002_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='DashboardStats',
+        ),
+    ]
@@ -1,22 +1,40 @@
 from django.db import models
 from django.utils import timezone
-import uuid
-
-class DashboardStats(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    total_firewalls = models.IntegerField(default=0)
-    active_firewalls = models.IntegerField(default=0)
-    total_datacenters = models.IntegerField(default=0)
-    total_users = models.IntegerField(default=0)
-    recent_commands = models.IntegerField(default=0)
-    pending_tasks = models.IntegerField(default=0)
-    system_health = models.CharField(max_length=20, default='warning')
-    last_updated = models.DateTimeField(default=timezone.now)
-    
+
+from auth_service.models import User
+
+
+class DashboardCounter(models.Model):
+    """Compteur du dashboard tenu à jour par les signaux (scope 'global' ou id utilisateur)"""
+    scope = models.CharField(max_length=64)
+    name = models.CharField(max_length=64)
+    value = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
     class Meta:
-        db_table = 'dashboard_stats'
-        verbose_name = 'Dashboard Statistics'
-        verbose_name_plural = 'Dashboard Statistics'
-    
+        db_table = 'dashboard_counter'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'name'], name='unique_dashboard_counter'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.name} = {self.value}"
+
+
+class CommandActivity(models.Model):
+    """Nombre de commandes firewall par utilisateur et par heure (fenêtres 24 h / 7 j)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='command_activity')
+    hour = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'dashboard_command_activity'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'hour'], name='unique_command_activity_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+
     def __str__(self):
-        return f"Dashboard Stats - {self.last_updated.strftime('%Y-%m-%d %H:%M')}"
+        return f"{self.user_id} @ {self.hour}: {self.count}"
@@ -1,10 +1,4 @@
 from rest_framework import serializers
-from .models import DashboardStats
-
-class DashboardStatsSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = DashboardStats
-        fields = '__all__'
 
 class DashboardDataSerializer(serializers.Serializer):
     total_firewalls = serializers.IntegerField()
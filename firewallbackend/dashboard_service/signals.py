@@ -0,0 +1,143 @@
+from collections import Counter
+
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from firewall_service.models import Firewall
+from datacenter_service.models import DataCenter
+from auth_service.models import User
+from command_service.models import FirewallCommand
+from websocket_service.models import TerminalCommand, TerminalSession
+from . import stats
+
+# Champs dont dépendent les compteurs, par modèle
+TRACKED_FIELDS = {
+    Firewall: ('owner',),
+    DataCenter: ('owner', 'is_active'),
+    User: ('is_active',),
+    TerminalCommand: ('status',),
+}
+TRACKED_COUNTERS = {
+    Firewall: ('firewalls',),
+    DataCenter: ('datacenters',),
+    User: ('users',),
+    TerminalCommand: ('terminal_executing',),
+}
+
+
+def _state(instance):
+    """Valeurs des champs suivis, None si l'un d'eux est différé."""
+    values = []
+    for name in TRACKED_FIELDS[type(instance)]:
+        attname = instance._meta.get_field(name).attname
+        if attname not in instance.__dict__:
+            return None
+        values.append(instance.__dict__[attname])
+    return tuple(values)
+
+
+def _terminal_user_id(instance):
+    # La session est déjà chargée sur les chemins de création et de fin de commande
+    session = instance._state.fields_cache.get('session')
+    if session is not None:
+        return session.user_id
+    return TerminalSession.objects.filter(pk=instance.session_id).values_list('user_id', flat=True).first()
+
+
+def _contributions(instance, state):
+    """{(compteur, user_id ou None pour le global): 1} pour une ligne dans cet état."""
+    model = type(instance)
+    if model is User:
+        is_active, = state
+        return Counter({('users', None): 1} if is_active else {})
+    if model is Firewall:
+        owner_id, = state
+        name, counted = 'firewalls', True
+    elif model is DataCenter:
+        owner_id, is_active = state
+        name, counted = 'datacenters', is_active
+    else:
+        status, = state
+        if status != 'executing':
+            return Counter()
+        name, owner_id, counted = 'terminal_executing', _terminal_user_id(instance), True
+    if not counted:
+        return Counter()
+    deltas = Counter({(name, None): 1})
+    if owner_id is not None:
+        deltas[(name, owner_id)] = 1
+    return deltas
+
+
+@receiver(post_init, sender=Firewall)
+@receiver(post_init, sender=DataCenter)
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=TerminalCommand)
+def remember_tracked_state(sender, instance, **kwargs):
+    """
+    Signal pour mémoriser les champs suivis au chargement (calcul des transitions)
+    """
+    instance._dashboard_state = _state(instance)
+
+
+@receiver(post_save, sender=Firewall)
+@receiver(post_save, sender=DataCenter)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=TerminalCommand)
+def update_counters(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Signal pour appliquer aux compteurs la transition de la ligne enregistrée
+    """
+    if not created and update_fields is not None and not set(TRACKED_FIELDS[sender]) & set(update_fields):
+        # last_login, sortie de commande... : aucun compteur concerné
+        return
+    old_state = None if created else getattr(instance, '_dashboard_state', None)
+    new_state = _state(instance)
+    instance._dashboard_state = new_state
+    if not created and (old_state is None or new_state is None):
+        # État précédent inconnu (champ différé) : recomptage à la prochaine lecture
+        stats.reset_counters(TRACKED_COUNTERS[sender])
+        return
+    if old_state == new_state:
+        return
+    deltas = _contributions(instance, new_state)
+    if old_state is not None:
+        deltas.subtract(_contributions(instance, old_state))
+    stats.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Firewall)
+@receiver(post_delete, sender=DataCenter)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=TerminalCommand)
+def remove_from_counters(sender, instance, **kwargs):
+    """
+    Signal pour retirer une ligne supprimée des compteurs
+    """
+    state = _state(instance)
+    if state is None:
+        stats.reset_counters(TRACKED_COUNTERS[sender])
+        return
+    deltas = Counter()
+    deltas.subtract(_contributions(instance, state))
+    stats.apply_deltas(deltas)
+    if sender is User:
+        stats.forget_user(instance.pk)
+
+
+@receiver(post_save, sender=FirewallCommand)
+def count_command(sender, instance, created, **kwargs):
+    """
+    Signal pour compter une nouvelle commande dans l'activité horaire
+    """
+    if created:
+        stats.record_command(instance.user_id, instance.created_at)
+
+
+@receiver(post_delete, sender=FirewallCommand)
+def uncount_command(sender, instance, **kwargs):
+    """
+    Signal pour retirer une commande supprimée de l'activité horaire
+    """
+    if instance.created_at >= stats.activity_cutoff():
+        stats.record_command(instance.user_id, instance.created_at, delta=-1)
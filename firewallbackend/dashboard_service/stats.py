@@ -0,0 +1,173 @@
+"""
+Statistiques du dashboard tenues à jour au fil de l'eau.
+
+Les totaux (firewalls, datacenters actifs, utilisateurs actifs, commandes
+terminal en cours) sont des DashboardCounter que les signaux
+(dashboard_service.signals) incrémentent ou décrémentent à chaque transition :
+une lecture ne recompte rien. Les fenêtres 24 h / 7 j et le classement des
+utilisateurs se lisent dans CommandActivity (commandes par utilisateur et par
+heure), à l'heure près.
+
+Un compteur absent ou plus vieux que COUNTER_RECONCILE_INTERVAL est recompté
+une fois en base. Cela corrige la dérive des écritures sans signaux (update()
+en masse, SQL brut) et d'un incrément concurrent d'un recomptage.
+"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from firewall_service.models import Firewall
+from datacenter_service.models import DataCenter
+from auth_service.models import User
+from websocket_service.models import TerminalCommand
+from .models import CommandActivity, DashboardCounter
+
+# Âge maximal d'un compteur avant recomptage en base
+COUNTER_RECONCILE_INTERVAL = 3600  # seconds
+# Conservation de CommandActivity (fenêtre 7 j + marge)
+ACTIVITY_RETENTION_DAYS = 8
+GLOBAL_SCOPE = 'global'
+
+USER_COUNTERS = ('firewalls', 'datacenters', 'terminal_executing')
+GLOBAL_COUNTERS = ('firewalls', 'datacenters', 'users', 'terminal_executing')
+
+
+def _scope(user_id):
+    return GLOBAL_SCOPE if user_id is None else str(user_id)
+
+
+def _counted(name, user_id=None):
+    """Lignes comptées par un compteur, pour le recomptage."""
+    if name == 'firewalls':
+        queryset = Firewall.objects.all()
+        return queryset if user_id is None else queryset.filter(owner_id=user_id)
+    if name == 'datacenters':
+        queryset = DataCenter.objects.filter(is_active=True)
+        return queryset if user_id is None else queryset.filter(owner_id=user_id)
+    if name == 'users':
+        return User.objects.filter(is_active=True)
+    if name == 'terminal_executing':
+        queryset = TerminalCommand.objects.filter(status='executing')
+        return queryset if user_id is None else queryset.filter(session__user_id=user_id)
+    raise ValueError(f"Unknown dashboard counter: {name}")
+
+
+def apply_deltas(deltas):
+    """
+    Applique {(compteur, user_id ou None): delta}. Un compteur pas encore
+    créé est ignoré : son premier recomptage inclura la ligne.
+    """
+    for (name, user_id), delta in deltas.items():
+        if delta:
+            DashboardCounter.objects.filter(scope=_scope(user_id), name=name).update(value=F('value') + delta)
+
+
+def reset_counters(names, user_id=None):
+    """Force le recomptage des compteurs à la prochaine lecture."""
+    DashboardCounter.objects.filter(scope=_scope(user_id), name__in=names).delete()
+
+
+def forget_user(user_id):
+    DashboardCounter.objects.filter(scope=_scope(user_id)).delete()
+
+
+def get_counters(names, user_id=None):
+    """Valeurs des compteurs, recomptés seulement s'ils sont absents ou trop vieux."""
+    now = timezone.now()
+    scope = _scope(user_id)
+    stale_before = now - timedelta(seconds=COUNTER_RECONCILE_INTERVAL)
+    rows = {
+        name: (value, refreshed_at)
+        for name, value, refreshed_at in DashboardCounter.objects.filter(scope=scope, name__in=names)
+        .values_list('name', 'value', 'refreshed_at')
+    }
+    counters = {}
+    for name in names:
+        value, refreshed_at = rows.get(name, (None, None))
+        if value is None or refreshed_at < stale_before:
+            value = _counted(name, user_id).count()
+            DashboardCounter.objects.update_or_create(
+                scope=scope, name=name, defaults={'value': value, 'refreshed_at': now}
+            )
+        counters[name] = value
+    return counters
+
+
+def activity_cutoff(now=None):
+    """Début de la période conservée dans CommandActivity."""
+    return (now or timezone.now()) - timedelta(days=ACTIVITY_RETENTION_DAYS)
+
+
+def _hour(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def record_command(user_id, created_at, delta=1):
+    """Ajoute delta aux commandes de l'utilisateur pour l'heure de created_at."""
+    if user_id is None:
+        return
+    hour = _hour(created_at)
+    if delta < 0:
+        CommandActivity.objects.filter(user_id=user_id, hour=hour, count__gt=0).update(count=F('count') + delta)
+        return
+    if CommandActivity.objects.filter(user_id=user_id, hour=hour).update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            CommandActivity.objects.create(user_id=user_id, hour=hour, count=delta)
+    except IntegrityError:
+        # Heure créée entre-temps par une autre requête
+        CommandActivity.objects.filter(user_id=user_id, hour=hour).update(count=F('count') + delta)
+
+
+def _activity(now, hours):
+    """Activité des `hours` dernières heures, heure en cours comprise."""
+    return CommandActivity.objects.filter(hour__gte=_hour(now) - timedelta(hours=hours - 1))
+
+
+def get_user_stats(user_id):
+    """Compteurs du dashboard d'un utilisateur."""
+    now = timezone.now()
+    counters = get_counters(USER_COUNTERS, user_id)
+    recent = _activity(now, 24).filter(user_id=user_id).aggregate(total=Sum('count'))['total']
+    return {
+        'total_firewalls': counters['firewalls'],
+        'total_datacenters': counters['datacenters'],
+        'recent_commands': recent or 0,
+        'pending_tasks': counters['terminal_executing'],
+        'computed_at': now,
+    }
+
+
+def get_global_stats():
+    """Agrégats globaux du dashboard administrateur."""
+    now = timezone.now()
+    counters = get_counters(GLOBAL_COUNTERS)
+    activity_24h = _activity(now, 24)
+    activity_7d = _activity(now, 24 * 7)
+    return {
+        'totals': {
+            'firewalls': counters['firewalls'],
+            'datacenters': counters['datacenters'],
+            'users': counters['users'],
+            'recent_commands_24h': activity_24h.aggregate(total=Sum('count'))['total'] or 0,
+            'commands_last_7_days': activity_7d.aggregate(total=Sum('count'))['total'] or 0,
+            'active_terminal_commands': counters['terminal_executing'],
+        },
+        # Top utilisateurs par volume de commandes (7 jours)
+        'top_users_7d': list(
+            activity_7d.values('user__id', 'user__username')
+            .annotate(command_count=Sum('count'))
+            .order_by('-command_count')[:10]
+        ),
+        # Activité récente des utilisateurs (dernières 24h)
+        'recent_activity_24h': list(
+            activity_24h.values('user__id', 'user__username')
+            .annotate(commands=Sum('count'))
+            .order_by('-commands')
+        ),
+        'generated_at': now,
+    }
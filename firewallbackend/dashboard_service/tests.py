@@ -0,0 +1,165 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from auth_service.models import User
+from command_service.models import FirewallCommand
+from datacenter_service.models import DataCenter
+from firewall_service.models import Firewall, FirewallType
+from websocket_service.models import TerminalCommand, TerminalSession
+from . import stats
+from .models import CommandActivity, DashboardCounter
+
+
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dashuser', email='dash@example.com', password='testpass123')
+        self.datacenter = DataCenter.objects.create(name='Dash DC', owner=self.user)
+        self.firewall_type = FirewallType.objects.create(
+            name='Dash Type', attributes_schema={}, data_center=self.datacenter, owner=self.user
+        )
+        # Premier calcul : les compteurs existent, les signaux les font ensuite évoluer
+        stats.get_user_stats(self.user.pk)
+        stats.get_global_stats()
+
+    def _firewall(self, name='fw-1'):
+        return Firewall.objects.create(
+            name=name, ip_address='10.0.0.1', data_center=self.datacenter,
+            firewall_type=self.firewall_type, owner=self.user
+        )
+
+    def _stored(self, name, user_id=None):
+        return DashboardCounter.objects.get(scope=stats._scope(user_id), name=name).value
+
+    def test_create_and_delete_update_counters(self):
+        """Test l'incrément puis le décrément des compteurs sans recomptage"""
+        total, owned = self._stored('firewalls'), self._stored('firewalls', self.user.pk)
+        firewall = self._firewall()
+        self.assertEqual(self._stored('firewalls'), total + 1)
+        self.assertEqual(self._stored('firewalls', self.user.pk), owned + 1)
+
+        firewall.delete()
+        self.assertEqual(self._stored('firewalls'), total)
+        self.assertEqual(self._stored('firewalls', self.user.pk), owned)
+
+    def test_active_flag_transitions(self):
+        """Test le suivi de is_active sur les datacenters et les utilisateurs"""
+        datacenters, users = self._stored('datacenters'), self._stored('users')
+        owned = self._stored('datacenters', self.user.pk)
+        self.datacenter.is_active = False
+        self.datacenter.save()
+        self.assertEqual(self._stored('datacenters'), datacenters - 1)
+        self.assertEqual(self._stored('datacenters', self.user.pk), owned - 1)
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.assertEqual(self._stored('users'), users + 1)
+        other.is_active = False
+        other.save()
+        self.assertEqual(self._stored('users'), users)
+
+    def test_untracked_save_does_no_counter_work(self):
+        """Test qu'une connexion (last_login) ne touche pas aux compteurs"""
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_terminal_command_status(self):
+        """Test le compteur des commandes terminal en cours"""
+        executing = self._stored('terminal_executing')
+        firewall = self._firewall()
+        session = TerminalSession.objects.create(user=self.user, firewall=firewall, session_id='dash-session')
+        command = TerminalCommand.objects.create(session=session, command='show ver', command_id='dash-cmd',
+                                                 status='executing')
+        self.assertEqual(self._stored('terminal_executing'), executing + 1)
+        self.assertEqual(self._stored('terminal_executing', self.user.pk), 1)
+
+        command = TerminalCommand.objects.select_related('session').get(pk=command.pk)
+        command.status = 'completed'
+        with self.assertNumQueries(3):
+            command.save(update_fields=['status'])
+        self.assertEqual(self._stored('terminal_executing'), executing)
+        self.assertEqual(self._stored('terminal_executing', self.user.pk), 0)
+
+    def test_stale_counter_reconciled(self):
+        """Test le recomptage d'un compteur trop vieux ou faussé par un update() en masse"""
+        owned = self._stored('firewalls', self.user.pk)
+        firewall = self._firewall()
+        other = User.objects.create_user(username='owner', email='owner@example.com', password='testpass123')
+        Firewall.objects.filter(pk=firewall.pk).update(owner=other)
+        self.assertEqual(stats.get_user_stats(self.user.pk)['total_firewalls'], owned + 1)
+
+        later = timezone.now() + timedelta(seconds=stats.COUNTER_RECONCILE_INTERVAL + 1)
+        with patch('dashboard_service.stats.timezone.now', return_value=later):
+            self.assertEqual(stats.get_user_stats(self.user.pk)['total_firewalls'], owned)
+
+    def test_missing_counter_counted_once(self):
+        """Test qu'une lecture de compteurs à jour ne recompte rien"""
+        self._firewall()
+        with self.assertNumQueries(1):
+            stats.get_counters(stats.GLOBAL_COUNTERS)
+
+
+class CommandActivityTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='activity', email='activity@example.com', password='testpass123')
+        self.other = User.objects.create_user(username='quiet', email='quiet@example.com', password='testpass123')
+        datacenter = DataCenter.objects.create(name='Activity DC', owner=self.user)
+        firewall_type = FirewallType.objects.create(
+            name='Activity Type', attributes_schema={}, data_center=datacenter, owner=self.user
+        )
+        self.firewall = Firewall.objects.create(
+            name='fw-activity', ip_address='10.0.0.2', data_center=datacenter,
+            firewall_type=firewall_type, owner=self.user
+        )
+
+    def _command(self, user, age):
+        command = FirewallCommand.objects.create(firewall=self.firewall, user=user, command='show ver')
+        created_at = timezone.now() - age
+        FirewallCommand.objects.filter(pk=command.pk).update(created_at=created_at)
+        # Le signal a compté l'heure de création réelle : on la déplace comme le ferait l'historique
+        stats.record_command(user.pk, command.created_at, delta=-1)
+        stats.record_command(user.pk, created_at)
+        command.created_at = created_at
+        return command
+
+    def test_windows_and_top_users(self):
+        """Test les fenêtres 24 h / 7 j et le classement des utilisateurs"""
+        FirewallCommand.objects.create(firewall=self.firewall, user=self.user, command='show ver')
+        self._command(self.user, timedelta(days=2))
+        self._command(self.other, timedelta(hours=3))
+        self._command(self.other, timedelta(days=10))
+
+        totals = stats.get_global_stats()
+        self.assertEqual(totals['totals']['recent_commands_24h'], 2)
+        self.assertEqual(totals['totals']['commands_last_7_days'], 3)
+        self.assertEqual(
+            [(row['user__username'], row['command_count']) for row in totals['top_users_7d']],
+            [('activity', 2), ('quiet', 1)]
+        )
+        self.assertEqual(stats.get_user_stats(self.user.pk)['recent_commands'], 1)
+
+    def test_delete_uncounts(self):
+        """Test le retrait d'une commande supprimée de l'activité"""
+        command = FirewallCommand.objects.create(firewall=self.firewall, user=self.user, command='show ver')
+        self.assertEqual(CommandActivity.objects.get(user=self.user).count, 1)
+        command.delete()
+        self.assertEqual(CommandActivity.objects.get(user=self.user).count, 0)
+
+    def test_views_keep_their_keys(self):
+        """Test que les vues du dashboard renvoient toujours les mêmes champs"""
+        self.user.is_staff = True
+        self.user.save()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        data = client.get('/api/dashboard/stats/').data['data']
+        for key in ('total_firewalls', 'total_datacenters', 'recent_commands', 'pending_tasks', 'last_updated'):
+            self.assertIn(key, data)
+        self.assertEqual(data['total_firewalls'], Firewall.objects.filter(owner=self.user).count())
+
+        response = client.get('/api/dashboard/admin-stats/')
+        self.assertEqual(response.status_code, 200)
@@ -2,15 +2,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from django.utils import timezone
-from datetime import timedelta
 
-# Import des modèles
-from firewall_service.models import Firewall
-from datacenter_service.models import DataCenter
-from auth_service.models import User
-from command_service.models import FirewallCommand
-from websocket_service.models import TerminalCommand
+from .stats import get_user_stats, get_global_stats
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -19,26 +12,11 @@ def dashboard_stats(request):
     Récupère toutes les statistiques du dashboard en une seule requête
     """
     try:
-        # Récupérer les statistiques de base (filtrées par utilisateur)
-        total_firewalls = Firewall.objects.filter(owner=request.user).count()
+        # Compteurs de l'utilisateur, tenus à jour par les signaux
+        stats = get_user_stats(request.user.pk)
+        total_firewalls = stats['total_firewalls']
         active_firewalls = total_firewalls  # Tous les pare-feux sont considérés comme actifs pour l'instant
         
-        # Data centers possédés par l'utilisateur
-        total_datacenters = DataCenter.objects.filter(owner=request.user, is_active=True).count()
-        
-        # Commandes récentes de l'utilisateur (dernières 24h)
-        yesterday = timezone.now() - timedelta(days=1)
-        recent_commands = FirewallCommand.objects.filter(
-            user=request.user,
-            created_at__gte=yesterday
-        ).count()
-        
-        # Tâches en attente de l'utilisateur (commandes en cours)
-        pending_tasks = TerminalCommand.objects.filter(
-            session__user=request.user,
-            status='executing'
-        ).count()
-        
         # Déterminer la santé du système
         if active_firewalls > 0 and total_firewalls > 0:
             health_ratio = active_firewalls / total_firewalls
@@ -57,11 +35,11 @@ def dashboard_stats(request):
         dashboard_data = {
             'total_firewalls': total_firewalls,
             'active_firewalls': active_firewalls,
-            'total_datacenters': total_datacenters,
-            'recent_commands': recent_commands,
-            'pending_tasks': pending_tasks,
+            'total_datacenters': stats['total_datacenters'],
+            'recent_commands': stats['recent_commands'],
+            'pending_tasks': stats['pending_tasks'],
             'system_health': system_health,
-            'last_updated': timezone.now(),
+            'last_updated': stats['computed_at'],
             'user_info': {
                 'username': request.user.username,
                 'email': request.user.email,
@@ -92,51 +70,7 @@ def admin_dashboard_stats(request):
     - Sessions terminal actives
     """
     try:
-        # Fenêtre de temps
-        yesterday = timezone.now() - timedelta(days=1)
-        last_7_days = timezone.now() - timedelta(days=7)
-
-        # Agrégats globaux
-        total_firewalls = Firewall.objects.count()
-        total_datacenters = DataCenter.objects.filter(is_active=True).count()
-        total_users = User.objects.filter(is_active=True).count()
-
-        recent_commands_total = FirewallCommand.objects.filter(created_at__gte=yesterday).count()
-        commands_last_7_days = FirewallCommand.objects.filter(created_at__gte=last_7_days).count()
-
-        # Sessions en cours
-        active_sessions = TerminalCommand.objects.filter(status='executing').count()
-
-        # Top utilisateurs par volume de commandes (7 jours)
-        from django.db.models import Count
-        top_users = list(
-            FirewallCommand.objects.filter(created_at__gte=last_7_days)
-            .values('user__id', 'user__username')
-            .annotate(command_count=Count('id'))
-            .order_by('-command_count')[:10]
-        )
-
-        # Activité récente des utilisateurs (dernières 24h)
-        recent_activity = list(
-            FirewallCommand.objects.filter(created_at__gte=yesterday)
-            .values('user__id', 'user__username')
-            .annotate(commands=Count('id'))
-            .order_by('-commands')
-        )
-
-        data = {
-            'totals': {
-                'firewalls': total_firewalls,
-                'datacenters': total_datacenters,
-                'users': total_users,
-                'recent_commands_24h': recent_commands_total,
-                'commands_last_7_days': commands_last_7_days,
-                'active_terminal_commands': active_sessions,
-            },
-            'top_users_7d': top_users,
-            'recent_activity_24h': recent_activity,
-            'generated_at': timezone.now(),
-        }
+        data = get_global_stats()
 
         return Response({'success': True, 'data': data}, status=status.HTTP_200_OK)
     except Exception as e:
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class DataCenterServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'datacenter_service' 
\ No newline at end of file
+    name = 'datacenter_service'
+
+    def ready(self):
+        import datacenter_service.signals  # Invalidation de la hiérarchie en cache
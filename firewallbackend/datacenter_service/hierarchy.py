@@ -0,0 +1,107 @@
+"""
+Instantané en cache de la hiérarchie datacenter → type → firewall, par propriétaire.
+
+Chaque propriétaire a un numéro de version incrémenté à chaque écriture sur
+DataCenter, FirewallType ou Firewall (signaux, et explicitement après les
+écritures en masse). L'instantané est rangé sous sa version : une écriture le
+rend simplement inaccessible, et la version sert d'ETag.
+
+La version est en base (HierarchyVersion) et non dans le cache : avec le cache
+locmem par défaut, chaque worker aurait son propre compteur et servirait
+l'instantané d'avant une écriture faite par un autre. Les instantanés restent
+dans le cache ; un cache partagé (CACHE_BACKEND=file ou redis) évite seulement
+de les reconstruire dans chaque worker.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+
+from firewall_service.models import FirewallType, Firewall
+from .models import DataCenter, HierarchyVersion
+
+# Durée de vie d'un instantané (une écriture l'invalide avant)
+HIERARCHY_TTL = 3600  # seconds
+SNAPSHOT_PREFIX = 'dc_hierarchy'
+
+
+def _new_version():
+    # Jamais inférieure à une version précédente, même si la ligne a été recréée
+    return int(time.time() * 1000)
+
+
+def get_version(owner_id):
+    version = HierarchyVersion.objects.filter(owner_id=owner_id).values_list('version', flat=True).first()
+    if version is None:
+        version = HierarchyVersion.objects.get_or_create(
+            owner_id=owner_id, defaults={'version': _new_version()}
+        )[0].version
+    return version
+
+
+def bump_version(owner_id):
+    """
+    Invalide la hiérarchie d'un propriétaire. Sans ligne, aucune version n'a
+    encore été servie : il n'y a rien à invalider.
+    """
+    HierarchyVersion.objects.filter(owner_id=owner_id).update(version=F('version') + 1)
+
+
+def etag_for(owner_id, version):
+    return f'"{owner_id}-{version}"'
+
+
+def build_hierarchy(owner_id):
+    """Construit la hiérarchie en trois requêtes, sans instancier de modèles."""
+    datacenters = list(
+        DataCenter.objects.filter(owner_id=owner_id).values('id', 'name', 'description')
+    )
+    dc_ids = [dc['id'] for dc in datacenters]
+    firewall_types = list(
+        FirewallType.objects.filter(data_center_id__in=dc_ids)
+        .values('id', 'name', 'description', 'data_center_id')
+    )
+    firewalls = (
+        Firewall.objects.filter(firewall_type_id__in=[ft['id'] for ft in firewall_types])
+        .values('id', 'name', 'ip_address', 'firewall_type_id')
+    )
+
+    firewalls_by_type = {}
+    for fw in firewalls:
+        firewalls_by_type.setdefault(fw['firewall_type_id'], []).append({
+            'id': str(fw['id']),
+            'name': fw['name'],
+            'ip_address': fw['ip_address']
+        })
+
+    types_by_dc = {}
+    for ft in firewall_types:
+        types_by_dc.setdefault(ft['data_center_id'], []).append({
+            'id': str(ft['id']),
+            'name': ft['name'],
+            'description': ft['description'],
+            'firewalls': firewalls_by_type.get(ft['id'], [])
+        })
+
+    return [
+        {
+            'id': str(dc['id']),
+            'name': dc['name'],
+            'description': dc['description'],
+            'firewall_types': types_by_dc.get(dc['id'], [])
+        }
+        for dc in datacenters
+    ]
+
+
+def get_hierarchy(owner_id, version=None):
+    """Retourne la hiérarchie du propriétaire pour sa version courante."""
+    if version is None:
+        version = get_version(owner_id)
+    key = f"{SNAPSHOT_PREFIX}:{owner_id}:{version}"
+    data = cache.get(key)
+    if data is None:
+        data = build_hierarchy(owner_id)
+        cache.set(key, data, HIERARCHY_TTL)
+    return data
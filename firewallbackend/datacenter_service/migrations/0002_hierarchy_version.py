@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_service', '0001_initial'),
+        ('datacenter_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HierarchyVersion',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='hierarchy_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'datacenter_hierarchy_version',
+            },
+        ),
+    ]
@@ -64,4 +64,13 @@ class DataCenter(models.Model):
             details=details,
             user=str(user) if user else None,
             ip_address=ip_address
-        ) 
\ No newline at end of file
+        )
+
+
+class HierarchyVersion(models.Model):
+    """Version de la hiérarchie en cache d'un propriétaire (voir hierarchy.py)."""
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='hierarchy_version')
+    version = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'datacenter_hierarchy_version'
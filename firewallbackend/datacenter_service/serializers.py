@@ -20,9 +20,14 @@ class DataCenterSerializer(serializers.ModelSerializer):
         return obj.owner.username
 
     def get_firewall_count(self, obj):
+        # Annoté par DataCenterViewSet.get_queryset
+        if hasattr(obj, 'firewall_count'):
+            return obj.firewall_count
         return obj.get_firewall_count()
 
     def get_firewall_type_count(self, obj):
+        if hasattr(obj, 'firewall_type_count'):
+            return obj.firewall_type_count
         return obj.get_firewall_type_count()
 
     def to_representation(self, instance):
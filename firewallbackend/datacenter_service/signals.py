@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from firewall_service.models import FirewallType, Firewall
+from .models import DataCenter
+from .hierarchy import bump_version
+
+# Clés étrangères qui placent une ligne dans la hiérarchie d'un propriétaire
+HIERARCHY_LINKS = {
+    DataCenter: ('owner_id',),
+    FirewallType: ('data_center_id',),
+    Firewall: ('data_center_id', 'firewall_type_id'),
+}
+
+
+def _links(instance):
+    return tuple(instance.__dict__.get(attname) for attname in HIERARCHY_LINKS[type(instance)])
+
+
+def _hierarchy_owners(instance, previous):
+    """
+    Propriétaires dont la hiérarchie contient la ligne, avant et après
+    l'écriture : un firewall ou un type déplacé quitte aussi l'ancienne.
+    """
+    if isinstance(instance, DataCenter):
+        return {instance.owner_id, *previous} - {None}
+
+    current = _links(instance)
+    if previous == current:
+        # Cas courant : datacenter (et type) déjà chargés, aucune requête
+        datacenter = instance._state.fields_cache.get('data_center')
+        if datacenter is not None and isinstance(instance, FirewallType):
+            return {datacenter.owner_id}
+        firewall_type = instance._state.fields_cache.get('firewall_type')
+        if datacenter is not None and firewall_type is not None and firewall_type.data_center_id == datacenter.pk:
+            return {datacenter.owner_id}
+
+    datacenter_ids = {current[0], *previous[:1]} - {None}
+    firewall_type_ids = {*current[1:], *previous[1:]} - {None}
+    return set(
+        DataCenter.objects.filter(Q(pk__in=datacenter_ids) | Q(firewall_types__in=firewall_type_ids))
+        .values_list('owner_id', flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_init, sender=DataCenter)
+@receiver(post_init, sender=FirewallType)
+@receiver(post_init, sender=Firewall)
+def remember_hierarchy_links(sender, instance, **kwargs):
+    """
+    Signal pour mémoriser la place de la ligne dans la hiérarchie au chargement
+    """
+    instance._hierarchy_links = _links(instance)
+
+
+@receiver(post_save, sender=DataCenter)
+@receiver(post_delete, sender=DataCenter)
+@receiver(post_save, sender=FirewallType)
+@receiver(post_delete, sender=FirewallType)
+@receiver(post_save, sender=Firewall)
+@receiver(post_delete, sender=Firewall)
+def invalidate_hierarchy(sender, instance, **kwargs):
+    """
+    Signal pour invalider la hiérarchie en cache des propriétaires concernés
+    """
+    previous = getattr(instance, '_hierarchy_links', None) or _links(instance)
+    owner_ids = _hierarchy_owners(instance, previous)
+    instance._hierarchy_links = _links(instance)
+    # Après le commit, pour qu'un instantané ne soit pas reconstruit sur des données non validées
+    for owner_id in owner_ids:
+        transaction.on_commit(lambda owner_id=owner_id: bump_version(owner_id))
@@ -2,7 +2,12 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from auth_service.models import User
+from firewall_service.models import Firewall, FirewallType
+from .hierarchy import get_version
+from .models import DataCenter
 
 class DataCenterServiceTests(TestCase):
     def setUp(self):
@@ -62,4 +67,91 @@ class DataCenterServiceTests(TestCase):
         
         # Vérifier que le datacenter a bien été supprimé
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND) 
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_hierarchy_etag(self):
+        """Test le cache de la hiérarchie : 304 tant que rien ne change, nouvel ETag après une écriture"""
+        url = reverse('datacenter_service:datacenter-hierarchy')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DataCenter.objects.create(name='New DataCenter', owner=self.user)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('New DataCenter', [dc['name'] for dc in response.data])
+
+    def test_list_datacenters_query_count(self):
+        """Test que la liste des datacenters ne fait pas de requête par ligne"""
+        url = reverse('datacenter_service:datacenter-list')
+        # Le signal de création d'utilisateur crée déjà des datacenters avec types et firewalls
+        self.assertGreater(DataCenter.objects.filter(owner=self.user).count(), 1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        DataCenter.objects.create(name='Other DataCenter', owner=self.user)
+        with self.assertNumQueries(len(queries.captured_queries)):
+            self.client.get(url)
+        first = response.data['results'][0]
+        datacenter = DataCenter.objects.get(id=first['id'])
+        self.assertEqual(first['firewall_count'], datacenter.get_firewall_count())
+        self.assertEqual(first['firewall_type_count'], datacenter.get_firewall_type_count())
+
+
+class HierarchyInvalidationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='dcowner', password='testpass123', email='dcowner@example.com')
+        self.other = User.objects.create_user(username='dcother', password='testpass123', email='dcother@example.com')
+        self.datacenter = DataCenter.objects.create(name='Owner DC', owner=self.owner)
+        self.other_datacenter = DataCenter.objects.create(name='Other DC', owner=self.other)
+        self.firewall_type = FirewallType.objects.create(
+            name='Owner Type', attributes_schema={}, data_center=self.datacenter, owner=self.owner
+        )
+        self.other_type = FirewallType.objects.create(
+            name='Other Type', attributes_schema={}, data_center=self.other_datacenter, owner=self.other
+        )
+        # Le créateur du firewall n'est pas le propriétaire du datacenter
+        self.firewall = Firewall.objects.create(
+            name='shared-fw', ip_address='10.1.0.1', data_center=self.datacenter,
+            firewall_type=self.firewall_type, owner=self.other
+        )
+        self.versions = {user.pk: get_version(user.pk) for user in (self.owner, self.other)}
+
+    def _bumped(self):
+        return {user.username for user in (self.owner, self.other) if get_version(user.pk) != self.versions[user.pk]}
+
+    def test_firewall_change_bumps_datacenter_owner(self):
+        """Test qu'une écriture sur un firewall invalide la hiérarchie du propriétaire du datacenter"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.firewall.ip_address = '10.1.0.2'
+            self.firewall.save()
+        self.assertEqual(self._bumped(), {'dcowner'})
+
+    def test_firewall_move_bumps_both_owners(self):
+        """Test qu'un firewall déplacé invalide l'ancienne et la nouvelle hiérarchie"""
+        firewall = Firewall.objects.get(pk=self.firewall.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            firewall.data_center = self.other_datacenter
+            firewall.firewall_type = self.other_type
+            firewall.save()
+        self.assertEqual(self._bumped(), {'dcowner', 'dcother'})
+
+    def test_firewall_type_delete_bumps_datacenter_owner(self):
+        """Test la suppression d'un type de firewall"""
+        with self.captureOnCommitCallbacks(execute=True):
+            FirewallType.objects.get(pk=self.firewall_type.pk).delete()
+        self.assertEqual(self._bumped(), {'dcowner'})
+
+    def test_version_shared_between_workers(self):
+        """Test que la version est lue en base et non dans le cache du processus"""
+        version = get_version(self.owner.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            DataCenter.objects.create(name='Second DC', owner=self.owner)
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertEqual(get_version(self.owner.pk), version + 1)
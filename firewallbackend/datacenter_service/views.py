@@ -2,18 +2,36 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Prefetch
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from .models import DataCenter
 from .serializers import DataCenterSerializer
+from .hierarchy import get_version, get_hierarchy, etag_for
 from firewall_service.models import FirewallType, Firewall
 
+
+def _count_subquery(model):
+    counts = (
+        model.objects.filter(data_center=OuterRef('pk'))
+        .order_by()
+        .values('data_center')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
 class DataCenterViewSet(viewsets.ModelViewSet):
     queryset = DataCenter.objects.all()
     serializer_class = DataCenterSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return DataCenter.objects.filter(owner=self.request.user)
+        # Compteurs annotés : évite deux COUNT par datacenter dans le serializer
+        return DataCenter.objects.filter(owner=self.request.user).select_related('owner').annotate(
+            firewall_count=_count_subquery(Firewall),
+            firewall_type_count=_count_subquery(FirewallType)
+        )
 
     def perform_create(self, serializer):
         instance = serializer.save(owner=self.request.user)
@@ -101,46 +119,15 @@ class DataCenterViewSet(viewsets.ModelViewSet):
         """
         Retourne la hiérarchie complète des datacenters, types de pare-feu et pare-feu
         """
-        user = request.user
-        
-        # Précharger les relations pour optimiser les performances
-        datacenters = DataCenter.objects.filter(owner=user).prefetch_related(
-            Prefetch(
-                'firewall_types',
-                queryset=FirewallType.objects.all().prefetch_related(
-                    Prefetch(
-                        'firewalls',
-                        queryset=Firewall.objects.all()
-                    )
-                )
-            )
-        )
-
-        hierarchy_data = []
-        for dc in datacenters:
-            dc_data = {
-                'id': str(dc.id),
-                'name': dc.name,
-                'description': dc.description,
-                'firewall_types': []
-            }
-            
-            for ft in dc.firewall_types.all():
-                ft_data = {
-                    'id': str(ft.id),
-                    'name': ft.name,
-                    'description': ft.description,
-                    'firewalls': [
-                        {
-                            'id': str(fw.id),
-                            'name': fw.name,
-                            'ip_address': fw.ip_address
-                        }
-                        for fw in ft.firewalls.all()
-                    ]
-                }
-                dc_data['firewall_types'].append(ft_data)
-            
-            hierarchy_data.append(dc_data)
+        owner_id = request.user.pk
+        version = get_version(owner_id)
+        etag = etag_for(owner_id, version)
 
-        return Response(hierarchy_data) 
\ No newline at end of file
+        # Le client a déjà la version courante
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(get_hierarchy(owner_id, version))
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_service', '0001_initial'),
+        ('firewall_service', '0002_firewallreachability'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commandexecutionresult',
+            index=models.Index(fields=['started_at'], name='command_exe_started_da8a77_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(fields=['sent_at'], name='email_log_sent_at_0948f6_idx'),
+        ),
+    ]
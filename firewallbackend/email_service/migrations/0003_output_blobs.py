@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:04
+
+import blob_service.offload
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Length
+
+
+def fill_sizes(apps, schema_editor):
+    # Lignes existantes : texte toujours en base, taille = longueur
+    apps.get_model('email_service', 'CommandExecutionResult').objects.update(output_size=Coalesce(Length('output'), 0))
+    apps.get_model('email_service', 'EmailLog').objects.update(content_size=Coalesce(Length('content'), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_service', '0002_retention_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commandexecutionresult',
+            name='output_blob',
+            field=blob_service.offload.BlobKeyField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='commandexecutionresult',
+            name='output_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emaillog',
+            name='content_blob',
+            field=blob_service.offload.BlobKeyField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='emaillog',
+            name='content_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_sizes, migrations.RunPython.noop),
+    ]
@@ -4,12 +4,17 @@ from django.utils import timezone
 from datetime import time
 import uuid
 
+from blob_service.offload import BlobKeyField, BlobOffloadMixin
+
 User = get_user_model()
 
-class EmailLog(models.Model):
+class EmailLog(BlobOffloadMixin, models.Model):
     recipient = models.CharField(max_length=255)
     subject = models.CharField(max_length=255)
+    # Aperçu si le contenu complet est dans le BlobStore (content_blob)
     content = models.TextField()
+    content_blob = BlobKeyField()
+    content_size = models.PositiveBigIntegerField(default=0)
     sent_at = models.DateTimeField(auto_now_add=True)
     from_email = models.CharField(max_length=255, blank=True, null=True)
     smtp_host = models.CharField(max_length=255, blank=True, null=True)
@@ -21,11 +26,16 @@ class EmailLog(models.Model):
     ])
     error_message = models.TextField(blank=True, null=True)
 
+    offloaded_fields = ('content',)
+
     class Meta:
         db_table = 'email_log'
         verbose_name = 'Email Log'
         verbose_name_plural = 'Email Logs'
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['sent_at']),
+        ]
 
     def __str__(self):
         return f"{self.recipient} - {self.subject} - {self.sent_at}"
@@ -136,7 +146,7 @@ class AutomatedEmailExecution(models.Model):
         return f"{self.schedule.name} - {self.execution_time} - {self.status}"
 
 
-class CommandExecutionResult(models.Model):
+class CommandExecutionResult(BlobOffloadMixin, models.Model):
     """Modèle pour stocker les résultats d'exécution des commandes"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     execution = models.ForeignKey(AutomatedEmailExecution, on_delete=models.CASCADE, related_name='command_results')
@@ -155,8 +165,10 @@ class CommandExecutionResult(models.Model):
         ('timeout', 'Timeout')
     ], default='pending')
     
-    # Sortie de la commande
+    # Sortie de la commande (aperçu si output_blob est renseigné)
     output = models.TextField(blank=True, null=True)
+    output_blob = BlobKeyField()
+    output_size = models.PositiveBigIntegerField(default=0)
     error_output = models.TextField(blank=True, null=True)
     exit_code = models.IntegerField(null=True, blank=True)
     
@@ -168,11 +180,16 @@ class CommandExecutionResult(models.Model):
     # WebSocket session info
     websocket_session_id = models.CharField(max_length=100, blank=True, null=True)
 
+    offloaded_fields = ('output',)
+
     class Meta:
         db_table = 'command_execution_result'
         verbose_name = 'Résultat Exécution Commande'
         verbose_name_plural = 'Résultats Exécution Commandes'
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['started_at']),
+        ]
 
     def __str__(self):
         return f"{self.firewall.name} - {self.command[:50]}... - {self.status}"
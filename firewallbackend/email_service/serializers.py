@@ -144,12 +144,24 @@ class EmailScheduleListSerializer(serializers.ModelSerializer):
         ]
     
     def get_recipients_count(self, obj):
-        return obj.get_recipients().count()
+        # Annotations de AutomatedEmailScheduleViewSet.get_queryset (liste)
+        if not hasattr(obj, 'active_recipients_count'):
+            return obj.get_recipients().count()
+        if obj.include_all_users:
+            # Même valeur pour toutes les lignes : comptée une fois par réponse
+            if 'active_users_count' not in self.context:
+                self.context['active_users_count'] = User.objects.filter(is_active=True).count()
+            return self.context['active_users_count']
+        return obj.active_recipients_count
     
     def get_firewalls_count(self, obj):
+        if hasattr(obj, 'firewalls_count'):
+            return obj.firewalls_count
         return obj.firewalls.count()
     
     def get_last_execution_status(self, obj):
+        if hasattr(obj, 'last_execution_status'):
+            return obj.last_execution_status
         last_execution = obj.executions.first()
         return last_execution.status if last_execution else None
 
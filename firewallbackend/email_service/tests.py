@@ -1,3 +1,52 @@
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from auth_service.models import User
+from firewall_service.models import Firewall
+from firewallbackend.testing import QueryCountMixin
+from .models import AutomatedEmailSchedule, AutomatedEmailExecution
 
-# Create your tests here.
+
+class ScheduleListQueryCountTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='scheduleadmin',
+            email='scheduleadmin@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.firewalls = list(Firewall.objects.filter(owner=self.user)[:2])
+
+    def _create_schedule(self, name, include_all_users=False, execution_statuses=()):
+        schedule = AutomatedEmailSchedule.objects.create(
+            name=name,
+            email_subject='Daily report',
+            email_template='Report',
+            include_all_users=include_all_users,
+            created_by=self.user
+        )
+        schedule.recipients.add(self.user)
+        schedule.firewalls.set(self.firewalls)
+        for execution_status in execution_statuses:
+            AutomatedEmailExecution.objects.create(schedule=schedule, status=execution_status)
+        return schedule
+
+    def test_list_schedules_query_count(self):
+        """Test que les compteurs et le dernier statut des plannings sont annotés"""
+        self._create_schedule('Schedule 0', include_all_users=True)
+        self._create_schedule('Schedule 1', execution_statuses=['completed'])
+
+        def add_rows():
+            for i in range(2, 5):
+                self._create_schedule(f'Schedule {i}', execution_statuses=['failed'])
+
+        response = self.assertConstantQueries(reverse('schedule-list'), add_rows)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        schedule = next(row for row in rows if row['name'] == 'Schedule 2')
+        self.assertEqual(schedule['recipients_count'], 1)
+        self.assertEqual(schedule['firewalls_count'], len(self.firewalls))
+        self.assertEqual(schedule['last_execution_status'], 'failed')
+        schedule = next(row for row in rows if row['name'] == 'Schedule 0')
+        self.assertEqual(schedule['recipients_count'], User.objects.filter(is_active=True).count())
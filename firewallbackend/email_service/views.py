@@ -19,6 +19,7 @@ from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from auth_service.models import SSHUser
 from auth_service.utils.crypto import decrypt_ssh_data
+from blob_service.offload import field_response
 
 from .models import (
     EmailLog, AutomatedEmailSchedule, AutomatedEmailExecution, 
@@ -30,7 +31,7 @@ from .serializers import (
     EmailScheduleListSerializer, CommandTemplateSerializer
 )
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Q, OuterRef, Subquery
 import asyncio
 
 User = get_user_model()
@@ -42,6 +43,15 @@ class EmailLogViewSet(viewsets.ModelViewSet):
     serializer_class = EmailLogSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
 
+    @action(detail=True, methods=['get'])
+    def content(self, request, pk=None):
+        """Contenu complet de l'email, en flux"""
+        email_log = self.get_object()
+        try:
+            return field_response(email_log, 'content')
+        except FileNotFoundError:
+            return Response({'error': 'Email content not found'}, status=status.HTTP_404_NOT_FOUND)
+
 
 class AdminSendEmailView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
@@ -100,7 +110,18 @@ class AutomatedEmailScheduleViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
 
     def get_queryset(self):
-        return AutomatedEmailSchedule.objects.filter(created_by=self.request.user)
+        queryset = AutomatedEmailSchedule.objects.filter(created_by=self.request.user)
+        if self.action == 'list':
+            # Compteurs et dernier statut annotés pour EmailScheduleListSerializer
+            last_execution = AutomatedEmailExecution.objects.filter(
+                schedule=OuterRef('pk')
+            ).order_by('-execution_time').values('status')[:1]
+            return queryset.annotate(
+                active_recipients_count=Count('recipients', filter=Q(recipients__is_active=True), distinct=True),
+                firewalls_count=Count('firewalls', distinct=True),
+                last_execution_status=Subquery(last_execution)
+            )
+        return queryset.select_related('created_by').prefetch_related('recipients', 'firewalls')
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -341,7 +362,7 @@ class AutomatedEmailScheduleViewSet(viewsets.ModelViewSet):
                         'command': command,
                         'command_type': command_type,
                         'status': 'success',
-                        'output': result.output or f"Commande exécutée avec succès sur {firewall.name}",
+                        'output': result.get_full('output') or f"Commande exécutée avec succès sur {firewall.name}",
                         'execution_time': result.completed_at or timezone.now(),
                         'duration': (result.completed_at - result.started_at).total_seconds() if result.completed_at else 0
                     })
@@ -709,7 +730,11 @@ class AutomatedEmailExecutionViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
 
     def get_queryset(self):
-        return AutomatedEmailExecution.objects.filter(schedule__created_by=self.request.user)
+        return AutomatedEmailExecution.objects.filter(
+            schedule__created_by=self.request.user
+        ).select_related('schedule__created_by').prefetch_related(
+            'schedule__recipients', 'schedule__firewalls', 'command_results__firewall'
+        )
 
 
 class CommandExecutionResultViewSet(viewsets.ReadOnlyModelViewSet):
@@ -720,6 +745,15 @@ class CommandExecutionResultViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         return CommandExecutionResult.objects.filter(execution__schedule__created_by=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def output(self, request, pk=None):
+        """Sortie complète de la commande, en flux"""
+        result = self.get_object()
+        try:
+            return field_response(result, 'output', filename=f'result_{result.id}.txt')
+        except FileNotFoundError:
+            return Response({'error': 'Command output not found'}, status=status.HTTP_404_NOT_FOUND)
+
 
     
 
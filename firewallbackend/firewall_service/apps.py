@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class FirewallServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'firewall_service' 
\ No newline at end of file
+    name = 'firewall_service'
+
+    def ready(self):
+        from firewallbackend import workers
+        workers.register('firewall_service.reachability.start_worker')
@@ -0,0 +1,206 @@
+"""
+Import CSV en flux : lecture par lots, upsert en masse et historique groupé.
+
+Une transaction par lot : le verrou d'écriture est rendu entre deux lots et
+un lot refusé par la base est rejoué ligne par ligne, chaque ligne fautive
+étant signalée dans les erreurs sans annuler les autres.
+"""
+
+import codecs
+import csv
+import io
+import ipaddress
+import logging
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from dashboard_service import stats as dashboard_stats
+from datacenter_service.hierarchy import bump_version
+from history_service.models import ServiceHistory
+from .models import Firewall
+
+logger = logging.getLogger(__name__)
+
+# Nombre de lignes validées et écrites par lot
+CHUNK_SIZE = 500
+# Encodages essayés dans l'ordre ; latin-1 accepte toujours, il sert de repli
+ENCODINGS = ('utf-8-sig', 'cp1252', 'latin-1')
+# Taille des blocs lus pour la détection de l'encodage
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def detect_encoding(uploaded_file):
+    """Détecte l'encodage en décodant le fichier par blocs, sans le charger en mémoire."""
+    for encoding in ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        uploaded_file.seek(0)
+        try:
+            for block in iter(lambda: uploaded_file.read(READ_BLOCK_SIZE), b''):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def open_csv(uploaded_file, encoding):
+    """Retourne un DictReader qui lit l'upload en flux."""
+    uploaded_file.seek(0)
+    text = io.TextIOWrapper(uploaded_file.file, encoding=encoding, newline='')
+    return csv.DictReader(text, quoting=csv.QUOTE_MINIMAL)
+
+
+def iter_chunks(reader, chunk_size=CHUNK_SIZE):
+    """Regroupe les lignes du CSV en lots de (numéro de ligne, ligne)."""
+    chunk = []
+    for row in reader:
+        chunk.append((reader.line_num, row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def history_entry(action, status, details=None, user=None, ip_address=None, timestamp=None):
+    """Même format que add_to_history, pour les écritures en masse."""
+    return {
+        'timestamp': (timestamp or timezone.now()).isoformat(),
+        'action': action,
+        'status': status,
+        'details': details,
+        'user': str(user) if user else None,
+        'ip_address': ip_address
+    }
+
+
+def append_history(instance, field, entry):
+    history = getattr(instance, field) or {}
+    history.setdefault('entries', []).append(entry)
+    setattr(instance, field, history)
+
+
+def write_chunk(plan, write):
+    """
+    Écrit le plan d'un lot (liste de (numéro de ligne, ...)) avec write(plan)
+    dans une transaction ; s'il échoue, ligne par ligne. Retourne
+    (lignes écrites, erreurs).
+    """
+    try:
+        with transaction.atomic():
+            write(plan)
+        return plan, []
+    except DatabaseError as e:
+        logger.warning(f"CSV chunk rejected ({e}), writing its rows one by one")
+    written, errors = [], []
+    for item in plan:
+        try:
+            with transaction.atomic():
+                write([item])
+            written.append(item)
+        except DatabaseError as e:
+            errors.append(f"Error in row {item[0]}: {str(e)}")
+    return written, errors
+
+
+def import_firewalls(uploaded_file, firewall_type, user, ip_address=None, chunk_size=CHUNK_SIZE):
+    """
+    Importe les firewalls d'un CSV (name,ip_address) pour un type donné.
+    Un firewall existant de même nom (même propriétaire et type) est mis à jour,
+    les lignes identiques à l'existant sont ignorées.
+    """
+    encoding = detect_encoding(uploaded_file)
+    reader = open_csv(uploaded_file, encoding)
+    missing_headers = {'name', 'ip_address'} - set(reader.fieldnames or [])
+    if missing_headers:
+        raise ValueError(f"Missing required columns: {', '.join(sorted(missing_headers))}")
+
+    created, updated, errors = [], [], []
+    existing_scope = Firewall.objects.filter(owner=user, firewall_type=firewall_type)
+
+    def write(plan):
+        Firewall.objects.bulk_create(
+            [fw for _, action, fw, _ in plan if action == 'create'], batch_size=chunk_size
+        )
+        Firewall.objects.bulk_update(
+            [fw for _, action, fw, _ in plan if action == 'update'],
+            ['ip_address', 'historique_firewall'], batch_size=chunk_size
+        )
+        ServiceHistory.objects.bulk_create([
+            ServiceHistory(
+                service_name='firewall',
+                action=action,
+                status='success',
+                details=details,
+                user=str(user) if user else None,
+                ip_address=ip_address
+            )
+            for _, action, _, details in plan
+        ], batch_size=chunk_size)
+
+    for chunk in iter_chunks(reader, chunk_size):
+        now = timezone.now()
+        rows = {}
+        for line_num, row in chunk:
+            name = (row.get('name') or '').strip()
+            ip = (row.get('ip_address') or '').strip()
+            if not name or not ip:
+                errors.append(f"Error in row {line_num}: name and ip_address are required")
+                continue
+            try:
+                ipaddress.ip_address(ip)
+            except ValueError:
+                errors.append(f"Error in row {line_num}: invalid IP address '{ip}'")
+                continue
+            # La dernière occurrence d'un nom dans le fichier l'emporte
+            rows[name] = (line_num, ip)
+
+        existing = {
+            fw.name: fw
+            for fw in existing_scope.filter(name__in=rows.keys()).only('id', 'name', 'ip_address', 'historique_firewall')
+        }
+
+        plan = []
+        for name, (line_num, ip) in rows.items():
+            firewall = existing.get(name)
+            if firewall is None:
+                details = f'Created firewall from CSV: {name} ({ip})'
+                firewall = Firewall(
+                    name=name,
+                    ip_address=ip,
+                    firewall_type=firewall_type,
+                    data_center=firewall_type.data_center,
+                    owner=user,
+                    created_at=now,
+                    historique_firewall={'entries': [
+                        history_entry('create', 'success', details, user, ip_address, now)
+                    ]}
+                )
+                plan.append((line_num, 'create', firewall, details))
+            elif firewall.ip_address != ip:
+                details = f'Updated firewall from CSV: {name} ({ip})'
+                firewall.ip_address = ip
+                append_history(firewall, 'historique_firewall',
+                               history_entry('update', 'success', details, user, ip_address, now))
+                plan.append((line_num, 'update', firewall, details))
+
+        written, chunk_errors = write_chunk(plan, write)
+        errors.extend(chunk_errors)
+        chunk_created = [str(fw.id) for _, action, fw, _ in written if action == 'create']
+        created.extend(chunk_created)
+        updated.extend(str(fw.id) for _, action, fw, _ in written if action == 'update')
+        # bulk_create/bulk_update n'envoient pas de signaux
+        if chunk_created:
+            dashboard_stats.apply_deltas({
+                ('firewalls', None): len(chunk_created), ('firewalls', user.pk): len(chunk_created)
+            })
+
+    if created or updated:
+        # La hiérarchie est celle du propriétaire du datacenter, pas de l'importateur
+        owner_id = firewall_type.data_center.owner_id
+        transaction.on_commit(lambda: bump_version(owner_id))
+
+    logger.info(f"CSV import: {len(created)} firewalls created, {len(updated)} updated, {len(errors)} errors")
+    return created, updated, errors
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('firewall_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FirewallReachability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'online'), (1, 'offline'), (2, 'error')])),
+                ('method', models.PositiveSmallIntegerField(choices=[(0, 'icmp'), (1, 'tcp')])),
+                ('rtt_ms', models.FloatField(blank=True, null=True)),
+                ('checked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('firewall', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reachability', to='firewall_service.firewall')),
+            ],
+            options={
+                'db_table': 'firewall_reachability',
+                'ordering': ['-checked_at'],
+                'indexes': [models.Index(fields=['firewall', 'checked_at'], name='firewall_re_firewal_dc43cd_idx')],
+            },
+        ),
+    ]
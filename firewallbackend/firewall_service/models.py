@@ -108,3 +108,25 @@ class Firewall(models.Model):
             ip_address=ip_address
         )
 
+
+
+class FirewallReachability(models.Model):
+    """Mesure d'accessibilité compacte (une ligne par firewall et par sondage)"""
+    STATUS_CODES = {'online': 0, 'offline': 1, 'error': 2}
+    METHOD_CODES = {'icmp': 0, 'tcp': 1}
+
+    firewall = models.ForeignKey(Firewall, on_delete=models.CASCADE, related_name='reachability')
+    status = models.PositiveSmallIntegerField(choices=[(v, k) for k, v in STATUS_CODES.items()])
+    method = models.PositiveSmallIntegerField(choices=[(v, k) for k, v in METHOD_CODES.items()])
+    rtt_ms = models.FloatField(null=True, blank=True)
+    checked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'firewall_reachability'
+        ordering = ['-checked_at']
+        indexes = [
+            models.Index(fields=['firewall', 'checked_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.firewall_id} - {self.get_status_display()} ({self.rtt_ms} ms)"
@@ -0,0 +1,215 @@
+"""Sonde d'accessibilité des firewalls (ICMP + TCP/22) exécutée en parallèle."""
+
+import asyncio
+import logging
+import time
+import uuid
+from queue import Queue
+
+from django.utils import timezone
+
+from firewallbackend import workers
+from metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de sondes simultanées
+MAX_CONCURRENCY = 64
+# Timeout d'une sonde ICMP
+ICMP_TIMEOUT = 1.0  # seconds
+# Timeout d'une connexion TCP sur le port SSH
+TCP_TIMEOUT = 2.0  # seconds
+# Durée de conservation en mémoire de l'état d'une tâche terminée
+TASK_STATUS_TTL = 15 * 60  # seconds
+
+# Queue pour stocker les tâches de sondage
+reachability_task_queue = Queue()
+# Dictionnaire pour stocker l'état des tâches (propre au processus, voir websocket_service.layers)
+reachability_task_status = {}
+
+
+async def _probe_icmp(loop, ip_address):
+    """Ping ICMP (pythonping est bloquant, on le délègue à l'executor)."""
+    import pythonping
+
+    response = await loop.run_in_executor(
+        None, lambda: pythonping.ping(ip_address, count=1, timeout=ICMP_TIMEOUT)
+    )
+    if response.success():
+        return response.rtt_avg_ms
+    return None
+
+
+async def _probe_tcp(ip_address, port):
+    """Connexion TCP sur le port SSH pour les hôtes qui filtrent l'ICMP."""
+    started = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(ip_address, port), timeout=TCP_TIMEOUT
+        )
+    except (OSError, asyncio.TimeoutError):
+        return None
+    rtt_ms = (time.perf_counter() - started) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return rtt_ms
+
+
+async def probe_host(ip_address, port=22, loop=None):
+    """
+    Sonde un hôte : ICMP d'abord, puis TCP/<port> si l'ICMP échoue
+    ou n'est pas autorisé (sockets raw réservés à root).
+    Retourne un dict {status, method, rtt_ms, error}.
+    """
+    loop = loop or asyncio.get_running_loop()
+    icmp_error = None
+    try:
+        rtt_ms = await _probe_icmp(loop, ip_address)
+        if rtt_ms is not None:
+            return {'status': 'online', 'method': 'icmp', 'rtt_ms': round(rtt_ms, 2), 'error': None}
+    except Exception as e:
+        icmp_error = str(e)
+
+    try:
+        rtt_ms = await _probe_tcp(ip_address, port)
+    except Exception as e:
+        return {'status': 'error', 'method': 'tcp', 'rtt_ms': None, 'error': str(e)}
+    if rtt_ms is not None:
+        return {'status': 'online', 'method': 'tcp', 'rtt_ms': round(rtt_ms, 2), 'error': None}
+    return {'status': 'offline', 'method': 'tcp', 'rtt_ms': None, 'error': icmp_error}
+
+
+async def sweep(targets, on_result, concurrency=MAX_CONCURRENCY):
+    """
+    Sonde toutes les cibles (id, ip_address, port) avec un fan-out borné.
+    on_result(target, result) est appelé dès qu'un hôte a répondu.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(target):
+        async with semaphore:
+            result = await probe_host(target['ip_address'], target['port'], loop=loop)
+        on_result(target, result)
+
+    await asyncio.gather(*(_run(target) for target in targets))
+
+
+def probe_host_sync(ip_address, port=22):
+    """Version synchrone de probe_host pour les vues."""
+    return asyncio.run(probe_host(ip_address, port))
+
+
+def _purge_expired_tasks():
+    now = time.time()
+    for task_id in [
+        task_id for task_id, task in reachability_task_status.items()
+        if task.get('finished_at') and now - task['finished_at'] > TASK_STATUS_TTL
+    ]:
+        reachability_task_status.pop(task_id, None)
+
+
+def _run_task(task):
+    from .models import FirewallReachability
+    from history_service.models import ServiceHistory
+
+    task_id = task['task_id']
+    targets = task['targets']
+    state = reachability_task_status[task_id]
+    state.update({'status': 'running', 'message': 'Sweep in progress'})
+
+    checked_at = timezone.now()
+    rows = []
+
+    def on_result(target, result):
+        # Les résultats sont publiés au fil de l'eau pour le polling incrémental
+        state['results'].append({
+            'id': target['id'],
+            'name': target['name'],
+            'ip_address': target['ip_address'],
+            'status': result['status'],
+            'method': result['method'],
+            'response_time': result['rtt_ms'],
+            'message': result['error'],
+        })
+        state[result['status']] += 1
+        state['progress'] = int(len(state['results']) * 100 / len(targets))
+        rows.append(FirewallReachability(
+            firewall_id=target['id'],
+            status=FirewallReachability.STATUS_CODES[result['status']],
+            method=FirewallReachability.METHOD_CODES[result['method']],
+            rtt_ms=result['rtt_ms'],
+            checked_at=checked_at,
+        ))
+
+    asyncio.run(sweep(targets, on_result))
+
+    FirewallReachability.objects.bulk_create(rows, batch_size=500)
+    ServiceHistory.objects.create(
+        service_name='firewall',
+        action='ping_all',
+        status='success',
+        details=(
+            f"Reachability sweep {task_id}: {state['online']} online, "
+            f"{state['offline']} offline, {state['error']} errors on {len(targets)} firewalls"
+        ),
+        user=str(task['user']) if task['user'] else None,
+        ip_address=task['ip_address']
+    )
+    state.update({'status': 'completed', 'progress': 100, 'message': f'Pinged {len(targets)} firewalls'})
+
+
+def reachability_background_worker():
+    while True:
+        task = reachability_task_queue.get()
+        if task is None:
+            break
+        task_id = task['task_id']
+        started = metrics.job_started('firewall_ping')
+        try:
+            _run_task(task)
+        except Exception as e:
+            logger.error(f"Error in reachability sweep {task_id}: {str(e)}")
+            reachability_task_status[task_id].update({'status': 'failed', 'message': str(e)})
+        finally:
+            reachability_task_status[task_id]['finished_at'] = time.time()
+            metrics.job_finished('firewall_ping', started)
+            reachability_task_queue.task_done()
+
+
+def submit_sweep(firewalls, user=None, ip_address=None):
+    """Met en file un sondage de tous les firewalls et retourne l'identifiant de tâche."""
+    _purge_expired_tasks()
+    task_id = f"reachability_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    targets = [
+        {'id': str(fw.id), 'name': fw.name, 'ip_address': fw.ip_address, 'port': fw.ssh_port or 22}
+        for fw in firewalls
+    ]
+    reachability_task_status[task_id] = {
+        # Seul le demandeur peut suivre la tâche (ping_status)
+        'owner_id': user.pk if user is not None else None,
+        'status': 'pending',
+        'progress': 0,
+        'message': 'Task queued',
+        'total': len(targets),
+        'online': 0,
+        'offline': 0,
+        'error': 0,
+        'results': [],
+        'finished_at': None,
+    }
+    reachability_task_queue.put({
+        'task_id': task_id,
+        'targets': targets,
+        'user': user,
+        'ip_address': ip_address,
+    })
+    return task_id
+
+
+def start_worker():
+    """Démarre le worker de joignabilité (enregistré par FirewallServiceConfig.ready)"""
+    return workers.start_worker('firewall_ping', reachability_background_worker, reachability_task_queue)
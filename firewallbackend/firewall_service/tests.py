@@ -1,10 +1,19 @@
-from django.test import TestCase
+import asyncio
+import socket
+from unittest.mock import patch
+from django.test import TestCase, SimpleTestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 import uuid
 from auth_service.models import User
-from .models import FirewallType
+from datacenter_service.models import DataCenter
+from history_service.models import ServiceHistory
+from .models import FirewallType, Firewall, FirewallReachability
+from .csv_import import import_firewalls
+from . import reachability
+from firewallbackend.testing import QueryCountMixin
 
 class FirewallServiceTests(TestCase):
     def setUp(self):
@@ -110,6 +119,36 @@ class FirewallServiceTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_reachability_limit(self):
+        """Test la validation du paramètre limit de l'historique de latence"""
+        firewall = Firewall.objects.filter(owner=self.user).first()
+        for rtt in (1.0, 2.0, 3.0):
+            FirewallReachability.objects.create(firewall=firewall, status=0, method=0, rtt_ms=rtt)
+        url = reverse('firewall_service:firewall-reachability', args=[firewall.id])
+
+        self.assertEqual(len(self.client.get(url, {'limit': 2}).data['results']), 2)
+        self.assertEqual(self.client.get(url, {'limit': -5}).data['results'], [])
+        response = self.client.get(url, {'limit': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ping_status_owner_only(self):
+        """Test que le statut d'un sondage n'est visible que par son demandeur"""
+        from queue import Queue
+        with patch.object(reachability, 'reachability_task_queue', Queue()):
+            task_id = reachability.submit_sweep([], user=self.user)
+        self.addCleanup(reachability.reachability_task_status.pop, task_id, None)
+        url = reverse('firewall_service:firewall-ping-status')
+
+        response = self.client.get(url, {'task_id': task_id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'pending')
+
+        other = User.objects.create_user(username='other', password='testpass123', email='other@example.com')
+        client = APIClient()
+        client.force_authenticate(user=other)
+        response = client.get(url, {'task_id': task_id})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_my_firewalls(self):
         """Test la récupération des firewalls de l'utilisateur"""
         # Créer d'abord un firewall
@@ -128,4 +167,154 @@ class FirewallServiceTests(TestCase):
         url = reverse('firewall_service:firewall-type-list') + 'my_types/'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1) 
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1) 
+
+class ReachabilityProbeTests(SimpleTestCase):
+    def setUp(self):
+        # Serveur TCP local pour simuler le port SSH d'un firewall
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(16)
+        self.port = self.server.getsockname()[1]
+
+    def tearDown(self):
+        self.server.close()
+
+    @patch('firewall_service.reachability._probe_icmp', side_effect=PermissionError('raw socket'))
+    def test_tcp_fallback_when_icmp_unavailable(self, _):
+        """Test le repli TCP quand l'ICMP n'est pas autorisé"""
+        result = reachability.probe_host_sync('127.0.0.1', self.port)
+        self.assertEqual(result['status'], 'online')
+        self.assertEqual(result['method'], 'tcp')
+        self.assertIsNotNone(result['rtt_ms'])
+
+    @patch('firewall_service.reachability._probe_icmp', return_value=None)
+    def test_offline_when_no_response(self, _):
+        """Test qu'un hôte sans réponse ICMP ni TCP est marqué hors ligne"""
+        self.server.close()
+        result = reachability.probe_host_sync('127.0.0.1', self.port)
+        self.assertEqual(result['status'], 'offline')
+        self.assertIsNone(result['rtt_ms'])
+
+    def test_sweep_bounded_concurrency(self):
+        """Test que le sondage respecte la borne de concurrence"""
+        in_flight = {'current': 0, 'max': 0}
+
+        async def fake_probe(ip_address, port=22, loop=None):
+            in_flight['current'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['current'])
+            await asyncio.sleep(0.01)
+            in_flight['current'] -= 1
+            return {'status': 'online', 'method': 'icmp', 'rtt_ms': 1.0, 'error': None}
+
+        targets = [{'id': str(i), 'ip_address': f'10.0.0.{i}', 'port': 22} for i in range(20)]
+        results = []
+        with patch('firewall_service.reachability.probe_host', fake_probe):
+            asyncio.run(reachability.sweep(targets, lambda t, r: results.append(t['id']), concurrency=5))
+
+        self.assertEqual(len(results), 20)
+        self.assertLessEqual(in_flight['max'], 5)
+
+
+class FirewallCsvImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='csvuser', password='testpass123')
+        self.datacenter = DataCenter.objects.create(name='CSV DC', owner=self.user)
+        self.firewall_type = FirewallType.objects.create(
+            name='CSV Type',
+            attributes_schema={},
+            data_center=self.datacenter,
+            owner=self.user
+        )
+
+    def _upload(self, content, encoding='utf-8'):
+        return SimpleUploadedFile('firewalls.csv', content.encode(encoding), content_type='text/csv')
+
+    def test_import_creates_updates_and_reports_errors(self):
+        """Test l'import en masse : création, mise à jour et lignes invalides"""
+        created, updated, errors = import_firewalls(
+            self._upload("name,ip_address\nfw-a,10.0.0.1\nfw-b,10.0.0.2\nfw-c,not-an-ip\n"),
+            self.firewall_type, self.user, chunk_size=2
+        )
+        self.assertEqual(len(created), 2)
+        self.assertEqual(updated, [])
+        self.assertEqual(len(errors), 1)
+        self.assertIn('row 4', errors[0])
+
+        created, updated, errors = import_firewalls(
+            self._upload("name,ip_address\nfw-a,10.0.0.10\nfw-b,10.0.0.2\nfw-d,10.0.0.4\n"),
+            self.firewall_type, self.user
+        )
+        self.assertEqual(len(created), 1)
+        self.assertEqual(len(updated), 1)
+        fw_a = Firewall.objects.get(owner=self.user, firewall_type=self.firewall_type, name='fw-a')
+        self.assertEqual(fw_a.ip_address, '10.0.0.10')
+        self.assertEqual([e['action'] for e in fw_a.historique_firewall['entries']], ['create', 'update'])
+        self.assertEqual(
+            Firewall.objects.filter(owner=self.user, firewall_type=self.firewall_type).count(), 3
+        )
+        self.assertEqual(ServiceHistory.objects.filter(service_name='firewall', action='create').count(), 3)
+
+    def test_import_latin1_file(self):
+        """Test la détection d'encodage d'un fichier non UTF-8"""
+        created, _, errors = import_firewalls(
+            self._upload("name,ip_address\npare-feu-é,10.0.1.1\n", encoding='cp1252'),
+            self.firewall_type, self.user
+        )
+        self.assertEqual(errors, [])
+        self.assertTrue(Firewall.objects.filter(name='pare-feu-é').exists())
+
+
+    def test_rejected_row_keeps_the_rest(self):
+        """Test qu'une ligne refusée par la base n'annule ni son lot ni les lots suivants"""
+        from django.db import IntegrityError
+        bulk_create = Firewall.objects.bulk_create
+
+        def reject_bad_row(objs, *args, **kwargs):
+            if any(fw.name == 'fw-bad' for fw in objs):
+                raise IntegrityError('rejected')
+            return bulk_create(objs, *args, **kwargs)
+
+        with patch.object(Firewall.objects, 'bulk_create', side_effect=reject_bad_row):
+            created, _, errors = import_firewalls(
+                self._upload("name,ip_address\nfw-1,10.0.2.1\nfw-bad,10.0.2.2\nfw-3,10.0.2.3\nfw-4,10.0.2.4\n"),
+                self.firewall_type, self.user, chunk_size=2
+            )
+        self.assertEqual(len(created), 3)
+        self.assertEqual(errors, ['Error in row 3: rejected'])
+        self.assertEqual(
+            sorted(Firewall.objects.filter(firewall_type=self.firewall_type).values_list('name', flat=True)),
+            ['fw-1', 'fw-3', 'fw-4']
+        )
+        self.assertFalse(ServiceHistory.objects.filter(details__contains='fw-bad').exists())
+
+class FirewallListQueryCountTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='listuser', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # Une page partielle, sinon la taille de page masque les requêtes par ligne
+        Firewall.objects.filter(owner=self.user).delete()
+
+    def _create_firewalls(self, prefix, count):
+        datacenter = DataCenter.objects.create(name=f'{prefix} DC', owner=self.user)
+        firewall_type = FirewallType.objects.create(
+            name=f'{prefix} Type', attributes_schema={}, data_center=datacenter, owner=self.user
+        )
+        for i in range(count):
+            Firewall.objects.create(
+                name=f'{prefix}-fw-{i}', ip_address=f'10.9.0.{i + 1}',
+                data_center=datacenter, firewall_type=firewall_type, owner=self.user
+            )
+
+    def test_list_firewalls_query_count(self):
+        """Test que la liste des firewalls ne suit pas les relations ligne par ligne"""
+        self._create_firewalls('first', 1)
+
+        def add_rows():
+            self._create_firewalls('second', 3)
+
+        response = self.assertConstantQueries(reverse('firewall_service:firewall-list'), add_rows)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertTrue(all(row['data_center_info'] for row in response.data['results']))
+
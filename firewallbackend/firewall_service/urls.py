@@ -12,5 +12,6 @@ urlpatterns = [
     path('', include(router.urls)),
     path('<uuid:pk>/ping/', FirewallViewSet.as_view({'post': 'ping'}), name='firewall-ping'),
     path('ping_all/', FirewallViewSet.as_view({'post': 'ping_all'}), name='firewall-ping-all'),
+    path('ping_status/', FirewallViewSet.as_view({'get': 'ping_status'}), name='firewall-ping-status'),
     path('upload-csv/', FirewallViewSet.as_view({'post': 'upload_csv'}), name='firewall-upload-csv'),
 ] 
\ No newline at end of file
@@ -2,22 +2,18 @@ from rest_framework import viewsets, permissions, status, pagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import FirewallType, Firewall
+from .models import FirewallType, Firewall, FirewallReachability
+from .csv_import import import_firewalls
+from .reachability import probe_host_sync, submit_sweep, reachability_task_status
 from .serializers import FirewallTypeSerializer, FirewallSerializer
 from rest_framework.permissions import IsAuthenticated
-import csv
-import io
-from django.core.exceptions import ValidationError
-import time
+import logging
 from django.utils import timezone
-import asyncio
-import platform
-import subprocess
-from concurrent.futures import ThreadPoolExecutor
-from asgiref.sync import sync_to_async
 from rest_framework.decorators import api_view
 from django.http import HttpResponse
 
+logger = logging.getLogger(__name__)
+
 class StandardResultsSetPagination(pagination.PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
@@ -30,7 +26,7 @@ class FirewallTypeViewSet(viewsets.ModelViewSet):
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
-        return self.queryset.filter(owner=self.request.user)
+        return self.queryset.filter(owner=self.request.user).select_related('data_center')
 
     def perform_create(self, serializer):
         instance = serializer.save(owner=self.request.user)
@@ -65,7 +61,7 @@ class FirewallTypeViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def get_firewalls(self, request, pk=None):
         firewall_type = self.get_object()
-        firewalls = firewall_type.firewalls.all()
+        firewalls = firewall_type.firewalls.select_related('data_center', 'firewall_type__data_center')
         serializer = FirewallSerializer(firewalls, many=True)
         return Response(serializer.data)
 
@@ -76,7 +72,10 @@ class FirewallViewSet(viewsets.ModelViewSet):
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
-        return self.queryset.filter(owner=self.request.user)
+        # Relations lues par FirewallSerializer (data_center_info, firewall_type)
+        return self.queryset.filter(owner=self.request.user).select_related(
+            'data_center', 'firewall_type__data_center'
+        )
 
     def perform_create(self, serializer):
         instance = serializer.save(owner=self.request.user)
@@ -119,7 +118,7 @@ class FirewallViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        firewalls = Firewall.objects.all().select_related('owner', 'firewall_type')
+        firewalls = Firewall.objects.all().select_related('owner', 'data_center', 'firewall_type__data_center')
         serializer = self.get_serializer(firewalls, many=True)
         return Response(serializer.data)
 
@@ -142,9 +141,10 @@ class FirewallViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def upload_csv(self, request):
         """
-        Upload a CSV file to create multiple firewalls.
+        Upload a CSV file to create or update multiple firewalls.
         Expected CSV format:
         name,ip_address
+        The file is streamed and written in batches (see csv_import).
         """
         if 'file' not in request.FILES:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
@@ -161,38 +161,18 @@ class FirewallViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Invalid firewall type ID'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            csv_file = io.TextIOWrapper(file.file, encoding='utf-8')
-            reader = csv.DictReader(csv_file)
-
-            created_firewalls = []
-            errors = []
-
-            for row in reader:
-                try:
-                    firewall = Firewall.objects.create(
-                        name=row['name'],
-                        ip_address=row['ip_address'],
-                        firewall_type=firewall_type,
-                        data_center=firewall_type.data_center,
-                        owner=request.user
-                    )
-                    firewall.add_to_history(
-                        action='create',
-                        status='success',
-                        details=f'Created firewall from CSV: {firewall.name} ({firewall.ip_address})',
-                        user=request.user,
-                        ip_address=request.META.get('REMOTE_ADDR')
-                    )
-                    created_firewalls.append(str(firewall.id))
-                except (KeyError, ValidationError) as e:
-                    errors.append(f"Error in row {reader.line_num}: {str(e)}")
-                except Exception as e:
-                    errors.append(f"Unexpected error in row {reader.line_num}: {str(e)}")
+            created_firewalls, updated_firewalls, errors = import_firewalls(
+                file,
+                firewall_type,
+                request.user,
+                ip_address=request.META.get('REMOTE_ADDR')
+            )
 
             if errors:
                 return Response({
-                    'success': len(created_firewalls) > 0,
+                    'success': len(created_firewalls) + len(updated_firewalls) > 0,
                     'created_count': len(created_firewalls),
+                    'updated_count': len(updated_firewalls),
                     'error_count': len(errors),
                     'errors': errors
                 }, status=status.HTTP_207_MULTI_STATUS)
@@ -200,7 +180,8 @@ class FirewallViewSet(viewsets.ModelViewSet):
             return Response({
                 'success': True,
                 'created_count': len(created_firewalls),
-                'firewalls': created_firewalls
+                'updated_count': len(updated_firewalls),
+                'firewalls': created_firewalls + updated_firewalls
             }, status=status.HTTP_201_CREATED)
 
         except Exception as e:
@@ -214,53 +195,29 @@ class FirewallViewSet(viewsets.ModelViewSet):
         """Ping a specific firewall and return its status"""
         firewall = self.get_object()
         try:
-            # Simple ping command without any parameters
-            command = f'ping {firewall.ip_address}'
-            
-            print(f"Executing ping command: {command}")
-            
-            # Execute ping using subprocess
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                shell=True,
-                encoding='cp1252'  # Use Windows encoding for better compatibility
-            )
-            
-            stdout, stderr = process.communicate(timeout=5)
-            return_code = process.returncode
-            
-            # Log the output
-            print(f"Ping output for {firewall.ip_address}:")
-            print(f"stdout: {stdout if stdout else 'None'}")
-            print(f"stderr: {stderr if stderr else 'None'}")
-            print(f"return code: {return_code}")
-            
-            if return_code == 0:
-                # Extract response time from output if possible
-                output = stdout.lower() if stdout else ''
-                response_time = None
-                if 'time=' in output:
-                    try:
-                        time_str = output.split('time=')[1].split('ms')[0].strip()
-                        response_time = float(time_str)
-                    except:
-                        pass
-                
+            probe = probe_host_sync(firewall.ip_address, firewall.ssh_port or 22)
+            if probe['status'] == 'online':
                 result = {
                     'status': 'online',
-                    'response_time': response_time,
+                    'response_time': probe['rtt_ms'],
+                    'method': probe['method'],
                     'message': 'Firewall is reachable'
                 }
             else:
-                error_msg = stderr if stderr else stdout if stdout else 'Unknown error'
                 result = {
-                    'status': 'offline',
+                    'status': probe['status'],
                     'response_time': None,
-                    'message': f'Firewall is not reachable: {error_msg}'
+                    'method': probe['method'],
+                    'message': f"Firewall is not reachable: {probe['error'] or 'no ICMP or TCP response'}"
                 }
-            
+
+            FirewallReachability.objects.create(
+                firewall=firewall,
+                status=FirewallReachability.STATUS_CODES[probe['status']],
+                method=FirewallReachability.METHOD_CODES[probe['method']],
+                rtt_ms=probe['rtt_ms']
+            )
+
             # Add to history
             firewall.add_to_history(
                 action='ping',
@@ -269,33 +226,13 @@ class FirewallViewSet(viewsets.ModelViewSet):
                 user=request.user,
                 ip_address=request.META.get('REMOTE_ADDR')
             )
-            
+
             return Response(result, status=status.HTTP_200_OK)
-            
-        except subprocess.TimeoutExpired:
-            process.kill()
-            error_message = f'Ping timeout after 5 seconds'
-            print(f"Error in ping endpoint: {error_message}")
-            
-            # Add error to history
-            firewall.add_to_history(
-                action='ping',
-                status='error',
-                details=error_message,
-                user=request.user,
-                ip_address=request.META.get('REMOTE_ADDR')
-            )
-            
-            return Response({
-                'status': 'error',
-                'response_time': None,
-                'message': error_message
-            }, status=status.HTTP_200_OK)
-            
+
         except Exception as e:
             error_message = f"Error pinging firewall: {str(e)}"
-            print(f"Error in ping endpoint: {error_message}")
-            
+            logger.error(f"Error in ping endpoint: {error_message}")
+
             # Add error to history
             firewall.add_to_history(
                 action='ping',
@@ -304,7 +241,7 @@ class FirewallViewSet(viewsets.ModelViewSet):
                 user=request.user,
                 ip_address=request.META.get('REMOTE_ADDR')
             )
-            
+
             return Response({
                 'status': 'error',
                 'response_time': None,
@@ -313,157 +250,88 @@ class FirewallViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def ping_all(self, request):
-        """Ping all firewalls and return their statuses"""
+        """
+        Lance un sondage ICMP/TCP de tous les firewalls en arrière-plan.
+        Les résultats sont récupérés via ping_status (polling incrémental).
+        """
         try:
-            # Get all firewalls
-            firewalls = list(self.get_queryset())
-            if not firewalls:
-                return Response({
-                    'status': 'success',
-                    'message': 'No firewalls found',
-                    'results': [],
-                    'total': 0,
-                    'online': 0,
-                    'offline': 0,
-                    'errors': 0
-                }, status=status.HTTP_200_OK)
-
-            results = []
-            for firewall in firewalls:
-                try:
-                    # Simple ping command without any parameters
-                    command = f'ping {firewall.ip_address}'
-                    
-                    print(f"Executing ping command: {command}")
-                    
-                    # Execute ping using subprocess
-                    process = subprocess.Popen(
-                        command,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        shell=True,
-                        encoding='cp1252'  # Use Windows encoding for better compatibility
-                    )
-                    
-                    stdout, stderr = process.communicate(timeout=5)
-                    return_code = process.returncode
-                    
-                    # Log the output
-                    print(f"Ping output for {firewall.ip_address}:")
-                    print(f"stdout: {stdout if stdout else 'None'}")
-                    print(f"stderr: {stderr if stderr else 'None'}")
-                    print(f"return code: {return_code}")
-                    
-                    if return_code == 0:
-                        # Extract response time from output if possible
-                        output = stdout.lower() if stdout else ''
-                        response_time = None
-                        if 'time=' in output:
-                            try:
-                                time_str = output.split('time=')[1].split('ms')[0].strip()
-                                response_time = float(time_str)
-                            except:
-                                pass
-                        
-                        result = {
-                            'status': 'online',
-                            'response_time': response_time,
-                            'message': 'Firewall is reachable'
-                        }
-                    else:
-                        error_msg = stderr if stderr else stdout if stdout else 'Unknown error'
-                        result = {
-                            'status': 'offline',
-                            'response_time': None,
-                            'message': f'Firewall is not reachable: {error_msg}'
-                        }
-                    
-                    # Add to history
-                    firewall.add_to_history(
-                        action='ping',
-                        status=result['status'],
-                        details=f"Ping result: {result['message']} (Response time: {result['response_time']}ms)" if result['response_time'] else f"Ping result: {result['message']}",
-                        user=request.user,
-                        ip_address=request.META.get('REMOTE_ADDR')
-                    )
-                    
-                    results.append({
-                        'id': str(firewall.id),
-                        'name': firewall.name,
-                        'ip_address': firewall.ip_address,
-                        'status': result['status'],
-                        'response_time': result['response_time'],
-                        'message': result['message']
-                    })
-                    
-                except subprocess.TimeoutExpired:
-                    process.kill()
-                    error_message = f'Ping timeout after 5 seconds'
-                    print(f"Error pinging {firewall.ip_address}: {error_message}")
-                    
-                    firewall.add_to_history(
-                        action='ping',
-                        status='error',
-                        details=error_message,
-                        user=request.user,
-                        ip_address=request.META.get('REMOTE_ADDR')
-                    )
-                    
-                    results.append({
-                        'id': str(firewall.id),
-                        'name': firewall.name,
-                        'ip_address': firewall.ip_address,
-                        'status': 'error',
-                        'response_time': None,
-                        'message': error_message
-                    })
-                    
-                except Exception as e:
-                    error_message = f"Error pinging firewall: {str(e)}"
-                    print(f"Error pinging {firewall.ip_address}: {error_message}")
-                    
-                    firewall.add_to_history(
-                        action='ping',
-                        status='error',
-                        details=error_message,
-                        user=request.user,
-                        ip_address=request.META.get('REMOTE_ADDR')
-                    )
-                    
-                    results.append({
-                        'id': str(firewall.id),
-                        'name': firewall.name,
-                        'ip_address': firewall.ip_address,
-                        'status': 'error',
-                        'response_time': None,
-                        'message': error_message
-                    })
-
-            # Calculate statistics
-            total = len(results)
-            online = sum(1 for r in results if r['status'] == 'online')
-            offline = sum(1 for r in results if r['status'] == 'offline')
-            errors = sum(1 for r in results if r['status'] == 'error')
-
+            firewalls = self.get_queryset().select_related(None).only('id', 'name', 'ip_address', 'ssh_port')
+            task_id = submit_sweep(
+                firewalls,
+                user=request.user,
+                ip_address=request.META.get('REMOTE_ADDR')
+            )
             return Response({
                 'status': 'success',
-                'message': f'Pinged {total} firewalls',
-                'results': results,
-                'total': total,
-                'online': online,
-                'offline': offline,
-                'errors': errors
-            }, status=status.HTTP_200_OK)
+                'message': 'Ping process started',
+                'task_id': task_id,
+                'total': reachability_task_status[task_id]['total']
+            }, status=status.HTTP_202_ACCEPTED)
 
         except Exception as e:
             error_message = f"Error pinging all firewalls: {str(e)}"
-            print(f"Error in ping_all endpoint: {error_message}")
+            logger.error(f"Error in ping_all endpoint: {error_message}")
             return Response({
                 'status': 'error',
-                'message': error_message,
-                'results': [],
-                'total': 0,
-                'online': 0,
-                'offline': 0,
-                'errors': 0
-            }, status=status.HTTP_200_OK)
\ No newline at end of file
+                'message': error_message
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'])
+    def ping_status(self, request):
+        """
+        Statut d'un sondage ping_all. Le paramètre `since` permet de ne
+        récupérer que les résultats arrivés depuis le dernier appel.
+        """
+        task_id = request.query_params.get('task_id')
+        if not task_id:
+            return Response({'error': 'No task ID provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+        task = reachability_task_status.get(task_id)
+        # La tâche d'un autre utilisateur est introuvable (noms et IP de ses firewalls)
+        if task is None or task['owner_id'] != request.user.id:
+            return Response({'error': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            since = max(int(request.query_params.get('since', 0)), 0)
+        except ValueError:
+            return Response({'error': 'Invalid since parameter'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = task['results'][since:]
+        response = Response({
+            'task_id': task_id,
+            'status': task['status'],
+            'progress': task['progress'],
+            'message': task['message'],
+            'total': task['total'],
+            'online': task['online'],
+            'offline': task['offline'],
+            'errors': task['error'],
+            'results': results,
+            'next': since + len(results)
+        })
+        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def reachability(self, request, pk=None):
+        """Historique de latence d'un firewall (dernières mesures)"""
+        firewall = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 100)), 0), 1000)
+        except ValueError:
+            return Response({'error': 'Invalid limit parameter'}, status=status.HTTP_400_BAD_REQUEST)
+        statuses = dict(FirewallReachability._meta.get_field('status').choices)
+        methods = dict(FirewallReachability._meta.get_field('method').choices)
+        rows = firewall.reachability.values_list('checked_at', 'status', 'method', 'rtt_ms')[:limit]
+        return Response({
+            'firewall_id': str(firewall.id),
+            'results': [
+                {
+                    'timestamp': checked_at,
+                    'status': statuses[code],
+                    'method': methods[method],
+                    'response_time': rtt_ms
+                }
+                for checked_at, code, method, rtt_ms in rows
+            ]
+        })
@@ -20,6 +20,10 @@ django_asgi_app = get_asgi_application()
 # Import websocket routing after Django setup to avoid AppRegistryNotReady
 from websocket_service.routing import websocket_urlpatterns  # noqa: E402
 from websocket_service.middleware import JWTAuthMiddleware  # noqa: E402
+from firewallbackend import workers  # noqa: E402
+
+# Processus serveur (daphne, uvicorn) : workers en arrière-plan
+workers.start_background_workers()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
@@ -0,0 +1,77 @@
+"""
+Profils de base de données, choisis par DATABASE_PROFILE :
+
+- sqlite (défaut) : fichier db.sqlite3 réglé pour les écritures concurrentes
+  des workers en arrière-plan (sauvegarde de config, daily check, ping,
+  interface monitor) et des requêtes : WAL, synchronous=NORMAL, attente du
+  verrou au lieu de « database is locked », transactions IMMEDIATE, mmap.
+- postgres (défaut si DATABASE_URL est défini) : connexions persistantes
+  vérifiées avant réutilisation ; .iterator() y utilise des curseurs serveur
+  (DB_DISABLE_SERVER_SIDE_CURSORS=True derrière pgbouncer en mode transaction).
+"""
+
+import os
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Attente du verrou d'écriture avant « database is locked »
+SQLITE_BUSY_TIMEOUT = 20  # seconds
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+# Cache de pages par connexion, en KiB (valeur négative pour SQLite)
+SQLITE_CACHE_SIZE = 20000
+POSTGRES_CONN_MAX_AGE = 60  # seconds
+POSTGRES_CONNECT_TIMEOUT = 10  # seconds
+
+
+def sqlite_profile(base_dir):
+    pragmas = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={int(os.getenv('DB_MMAP_SIZE', SQLITE_MMAP_SIZE))}",
+        f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE}',
+        'PRAGMA temp_store=MEMORY',
+    )
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DB_NAME', str(base_dir / 'db.sqlite3')),
+        'OPTIONS': {
+            # busy_timeout de la connexion
+            'timeout': int(os.getenv('DB_BUSY_TIMEOUT', SQLITE_BUSY_TIMEOUT)),
+            # Verrou d'écriture pris au début de atomic() : pas d'échec
+            # immédiat quand une lecture veut devenir une écriture
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(pragmas),
+        },
+    }
+
+
+def postgres_profile(url):
+    if not url:
+        raise ImproperlyConfigured('DATABASE_PROFILE=postgres requires DATABASE_URL')
+    parts = urlsplit(url)
+    if parts.scheme not in ('postgres', 'postgresql'):
+        raise ImproperlyConfigured(f"Unsupported DATABASE_URL scheme: {parts.scheme}")
+    options = {'connect_timeout': POSTGRES_CONNECT_TIMEOUT, 'application_name': 'firewallbackend'}
+    # ?sslmode=require etc. passés tels quels à libpq
+    options.update(parse_qsl(parts.query))
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': unquote(parts.path.lstrip('/')),
+        'USER': unquote(parts.username or ''),
+        'PASSWORD': unquote(parts.password or ''),
+        'HOST': parts.hostname or '',
+        'PORT': str(parts.port or ''),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', POSTGRES_CONN_MAX_AGE)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
+        'OPTIONS': options,
+    }
+
+
+def database_settings(profile, base_dir):
+    if profile == 'sqlite':
+        return sqlite_profile(base_dir)
+    if profile == 'postgres':
+        return postgres_profile(os.getenv('DATABASE_URL', ''))
+    raise ImproperlyConfigured(f"Unknown DATABASE_PROFILE: {profile}")
@@ -5,6 +5,8 @@ import pymysql
 from cryptography.fernet import Fernet
 from dotenv import load_dotenv
 
+from firewallbackend.database import database_settings
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -55,6 +57,9 @@ INSTALLED_APPS = [
 
     'websocket_service.apps.WebsocketServiceConfig',
     'dashboard_service.apps.DashboardServiceConfig',
+    'metrics_service.apps.MetricsServiceConfig',
+    'retention_service.apps.RetentionServiceConfig',
+    'blob_service.apps.BlobServiceConfig',
     # 'screenshot_service',  # Commented out - service not implemented
     'channels',
 ]
@@ -77,6 +82,32 @@ MIDDLEWARE = [
 if not DEBUG:
     MIDDLEWARE.append("csp.middleware.CSPMiddleware")
 
+# Instrumentation des requêtes (temps, SQL, SSH) - désactivée par défaut
+INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'False') == 'True'
+if INSTRUMENTATION_ENABLED:
+    MIDDLEWARE.insert(0, 'metrics_service.middleware.InstrumentationMiddleware')
+
+# Workers en arrière-plan (sauvegarde de config, daily check, ping, alertes,
+# rétention), démarrés par les seuls points d'entrée serveur : wsgi.py,
+# asgi.py, run_app.py (voir firewallbackend/workers.py)
+BACKGROUND_WORKERS_ENABLED = os.getenv('BACKGROUND_WORKERS_ENABLED', 'True') == 'True'
+
+# Jeton du scraper Prometheus pour /metrics (sinon JWT administrateur requis)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Rétention des tables volumineuses (voir retention_service/policies.py).
+# Surcharges par modèle, ex. {'command_service.FirewallCommand': {'days': 30, 'archive': False}}
+RETENTION_POLICIES = {}
+RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archives'))
+# Passage quotidien à partir de cette heure (TIME_ZONE)
+RETENTION_HOUR = int(os.getenv('RETENTION_HOUR', '3'))
+# Planification du passage quotidien par les processus serveur
+RETENTION_SCHEDULE_ENABLED = os.getenv('RETENTION_SCHEDULE_ENABLED', 'True') == 'True'
+
+# Sorties volumineuses (configs, daily checks) hors de la base, compressées
+# et adressées par contenu (voir blob_service/offload.py)
+BLOB_STORE_DIR = os.getenv('BLOB_STORE_DIR', os.path.join(BASE_DIR, 'blobs'))
+
 ROOT_URLCONF = 'firewallbackend.urls'
 
 # Templates
@@ -100,11 +131,10 @@ WSGI_APPLICATION = 'firewallbackend.wsgi.application'
 ASGI_APPLICATION = 'firewallbackend.asgi.application'
 
 # Database
+# Profil de base : sqlite ou postgres (voir firewallbackend/database.py)
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'postgres' if os.getenv('DATABASE_URL') else 'sqlite')
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_settings(DATABASE_PROFILE, BASE_DIR),
 }
 
 # Password validation
@@ -142,7 +172,7 @@ AUTH_USER_MODEL = 'auth_service.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth_service.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -353,8 +383,66 @@ EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'False').lower() == 'true'
 
 
 # Channels Configuration
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-    },
-}
+# CHANNEL_LAYER_BACKEND : memory (un seul processus), sqlite (plusieurs workers
+# sur une machine, sans service externe) ou redis (nécessite channels-redis)
+CHANNEL_LAYER_BACKEND = os.getenv('CHANNEL_LAYER_BACKEND', 'memory')
+if CHANNEL_LAYER_BACKEND == 'sqlite':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'websocket_service.layers.SQLiteChannelLayer',
+            'CONFIG': {
+                'path': os.getenv('CHANNEL_LAYER_PATH', str(BASE_DIR / 'channels.sqlite3')),
+            },
+        },
+    }
+elif CHANNEL_LAYER_BACKEND == 'redis':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.getenv('CHANNEL_LAYER_REDIS_URL', 'redis://127.0.0.1:6379/0')],
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+
+# Cache (limitation de débit, utilisateurs JWT, hiérarchie, statistiques)
+# CACHE_BACKEND : locmem (un seul processus), file (plusieurs workers sur une
+# machine) ou redis. Par défaut suit CHANNEL_LAYER_BACKEND : un déploiement
+# multi-workers partage aussi son cache.
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', {'sqlite': 'file', 'redis': 'redis'}.get(CHANNEL_LAYER_BACKEND, 'locmem')
+)
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '50000'))},
+        },
+    }
+elif CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '50000'))},
+        },
+    }
+
+# Compteurs de limitation de débit (voir auth_service/ratelimit.py) : cache
+# (incr atomique en locmem et redis) ou database (upsert atomique). Le cache
+# fichier n'a pas d'incr atomique entre processus : les compteurs vont alors
+# en base, et aucune requête limitée n'écrit dans le cache fichier.
+RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'database' if CACHE_BACKEND == 'file' else 'cache')
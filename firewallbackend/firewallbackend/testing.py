@@ -0,0 +1,29 @@
+"""Outils communs aux tests des services."""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """Vérifie que les listes de l'API ne font pas de requêtes par ligne (N+1)."""
+
+    def assertConstantQueries(self, url, add_rows, **kwargs):
+        """
+        Appelle url avant et après add_rows() et vérifie que le nombre de
+        requêtes SQL n'a pas changé. Retourne la seconde réponse.
+        """
+        with CaptureQueriesContext(connection) as before:
+            response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+
+        add_rows()
+
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(after.captured_queries), len(before.captured_queries),
+            'Query count depends on the number of rows:\n' +
+            '\n'.join(query['sql'] for query in after.captured_queries)
+        )
+        return response
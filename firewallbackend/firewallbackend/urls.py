@@ -4,6 +4,7 @@ from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
 from .csrf_views import get_csrf_token
+from metrics_service.views import metrics_export
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,6 +26,10 @@ urlpatterns = [
     # path('api/screenshots/', include('screenshot_service.urls')),  # Commented out - service not implemented
 
     path('api/dashboard/',  include('dashboard_service.urls')),
+    path('api/metrics/',    include('metrics_service.urls')),
+
+    # Export Prometheus (hors api/ pour les scrapers)
+    path('metrics', metrics_export, name='metrics'),
 ]
 
 # Catch-all route for React - must be last
@@ -0,0 +1,69 @@
+"""
+Workers en arrière-plan des services (sauvegarde de config, daily check,
+ping caméras, joignabilité des firewalls, runner des alertes d'interface et
+planification de la rétention).
+
+Les AppConfig.ready() enregistrent leur fonction de démarrage (register) ;
+seuls les points d'entrée qui servent l'application (wsgi.py, asgi.py,
+run_app.py, donc aussi le processus fils de runserver) appellent
+start_background_workers(). Les commandes manage.py (migrate, shell,
+apply_retention, tests...) et le parent de l'autoreloader ne lancent aucun
+thread. BACKGROUND_WORKERS_ENABLED=False les désactive aussi au service.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from metrics_service import metrics
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_threads = {}
+_starters = []
+_serving = False
+
+
+def register(starter):
+    """Enregistre le chemin de la fonction qui démarre les workers d'une application."""
+    if starter not in _starters:
+        _starters.append(starter)
+
+
+def workers_enabled():
+    """Vrai dans un processus qui sert l'application, workers non désactivés."""
+    return _serving and getattr(settings, 'BACKGROUND_WORKERS_ENABLED', True)
+
+
+def start_background_workers():
+    """Point d'entrée des serveurs : démarre les workers enregistrés."""
+    global _serving
+    _serving = True
+    if not workers_enabled():
+        return
+    for starter in _starters:
+        try:
+            import_string(starter)()
+        except Exception as e:
+            logger.error(f"Worker {starter} failed to start: {e}")
+
+
+def start_worker(name, target, queue=None):
+    """
+    Démarre le thread name une fois par processus (de nouveau s'il est mort)
+    et expose sa file d'attente aux métriques. Retourne le thread.
+    """
+    with _lock:
+        thread = _threads.get(name)
+        if thread is not None and thread.is_alive():
+            return thread
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        _threads[name] = thread
+    if queue is not None:
+        metrics.watch_queue(name, queue, thread)
+    logger.debug(f"Worker {name} started")
+    return thread
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'firewallbackend.settings')
 
 application = get_wsgi_application()
+
+# Processus serveur (gunicorn, waitress, fils de runserver) : workers en arrière-plan
+from firewallbackend import workers  # noqa: E402
+workers.start_background_workers()
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='servicehistory',
+            index=models.Index(fields=['timestamp'], name='history_ser_timesta_8fe8b8_idx'),
+        ),
+    ]
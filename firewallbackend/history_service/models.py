@@ -12,6 +12,9 @@ class ServiceHistory(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp']),
+        ]
         verbose_name = 'Service History'
         verbose_name_plural = 'Service Histories'
 
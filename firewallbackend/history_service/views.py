@@ -5,6 +5,9 @@ from django.utils import timezone
 from .models import ServiceHistory
 from .serializers import ServiceHistorySerializer
 
+# Lignes lues par lot (curseur serveur sous PostgreSQL) : l'historique complet est renvoyé
+EXPORT_CHUNK_SIZE = 2000
+
 class ServiceHistoryViewSet(viewsets.ModelViewSet):
     queryset = ServiceHistory.objects.all()
     serializer_class = ServiceHistorySerializer
@@ -26,7 +29,7 @@ class ServiceHistoryViewSet(viewsets.ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), many=True)
         
         # Group actions by service
         services = {}
@@ -100,6 +100,9 @@ datas += [
     ('dailycheck_service', 'dailycheck_service'),
     ('dashboard_service', 'dashboard_service'),
     ('history_service', 'history_service'),
+    ('metrics_service', 'metrics_service'),
+    ('retention_service', 'retention_service'),
+    ('blob_service', 'blob_service'),
 ]
 
 # Collect all dynamic libraries from Django
@@ -256,6 +259,7 @@ hiddenimports += [
     'auth_service.urls',
     'auth_service.serializers',
     'auth_service.admin',
+    'auth_service.authentication',
     
     'analysis_service',
     'analysis_service.apps',
@@ -296,6 +300,25 @@ hiddenimports += [
     'history_service.urls',
     'history_service.serializers',
     'history_service.admin',
+
+    'metrics_service',
+    'metrics_service.apps',
+    'metrics_service.views',
+    'metrics_service.urls',
+    'metrics_service.middleware',
+    'metrics_service.instrumentation',
+    'metrics_service.registry',
+    'metrics_service.metrics',
+
+    'retention_service',
+    'retention_service.apps',
+    'retention_service.policies',
+    'retention_service.engine',
+
+    'blob_service',
+    'blob_service.apps',
+    'blob_service.store',
+    'blob_service.offload',
 ]
 
 # Add additional dependencies from requirements.txt
@@ -310,7 +333,6 @@ hiddenimports += [
     'waitress',
     'cryptography',
     'cryptography.fernet',
-    'pandas',
     'xlsxwriter',
     'jinja2',
     'psycopg2',
@@ -14,3 +14,5 @@ class InterfaceMonitorServiceConfig(AppConfig):
             import interface_monitor_service.tasks
         except ImportError:
             pass
+        from firewallbackend import workers
+        workers.register('interface_monitor_service.tasks.start_worker')
@@ -78,14 +78,21 @@ class InterfaceAlertSerializer(serializers.ModelSerializer):
     
     def get_total_executions(self, obj):
         """Retourne le nombre total d'exécutions"""
+        # Annoté par with_execution_stats, requête seulement hors liste (création...)
+        if hasattr(obj, 'total_executions'):
+            return obj.total_executions
         return obj.executions.count()
     
     def get_successful_executions(self, obj):
         """Retourne le nombre d'exécutions réussies"""
+        if hasattr(obj, 'successful_executions'):
+            return obj.successful_executions
         return obj.executions.filter(status='completed').count()
     
     def get_failed_executions(self, obj):
         """Retourne le nombre d'exécutions échouées"""
+        if hasattr(obj, 'failed_executions'):
+            return obj.failed_executions
         return obj.executions.filter(status='failed').count()
     
     def get_success_rate(self, obj):
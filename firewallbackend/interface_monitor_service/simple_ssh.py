@@ -1,9 +1,8 @@
 import asyncio
 import time
-import paramiko
 import logging
 from auth_service.models import SSHUser
-from auth_service.utils.crypto import decrypt_ssh_data
+from auth_service.credentials import get_ssh_credentials, get_default_ssh_credentials
 
 
 logger = logging.getLogger(__name__)
@@ -36,18 +35,18 @@ class SimpleSSHSession:
             # Fallback to stored SSHUser credentials if firewall creds are missing
             if not username or not password:
                 try:
-                    owner = getattr(self.firewall, 'owner', None)
-                    ssh_user_obj = None
-                    if owner:
-                        ssh_user_obj = SSHUser.objects.filter(user=owner).first()
-                    if not ssh_user_obj:
-                        ssh_user_obj = SSHUser.objects.first()
-                    if ssh_user_obj:
-                        username = ssh_user_obj.ssh_username
+                    owner_id = getattr(self.firewall, 'owner_id', None)
+                    credentials = None
+                    if owner_id:
                         try:
-                            password = decrypt_ssh_data(ssh_user_obj.ssh_password)
-                        except Exception:
-                            password = ssh_user_obj.ssh_password
+                            credentials = get_ssh_credentials(owner_id)
+                        except SSHUser.DoesNotExist:
+                            credentials = None
+                    if not credentials:
+                        credentials = get_default_ssh_credentials()
+                    if credentials:
+                        username = credentials.ssh_username
+                        password = credentials.password
                 except Exception as cred_err:
                     logger.error(f"SSH credentials fallback error: {str(cred_err)}")
 
@@ -55,6 +54,7 @@ class SimpleSSHSession:
             username = username or 'admin'
             password = password or ''
 
+            import paramiko
             client = paramiko.SSHClient()
             client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             client.connect(
@@ -7,6 +7,10 @@ from django.conf import settings
 # from celery.utils.log import get_task_logger
 from .models import InterfaceAlert, AlertExecution
 from .services import InterfaceMonitorService
+from firewallbackend import workers
+from metrics_service import metrics
+from retention_service import engine as retention_engine
+from retention_service.policies import DEFAULT_POLICIES
 import threading
 import time
 
@@ -136,7 +140,11 @@ def check_all_active_alerts() -> Dict[str, Any]:
         logger.info(f"{alerts_to_check.count()} alertes à vérifier")
         
         results = []
+        # Échéances lues avant la vérification, qui les reprogramme
+        next_checks = []
+        cycle_start = time.perf_counter()
         for alert in alerts_to_check:
+            next_checks.append(alert.next_check)
             try:
                 # Exécuter la vérification immédiatement (sans Celery)
                 monitor_service = InterfaceMonitorService(alert)
@@ -163,6 +171,8 @@ def check_all_active_alerts() -> Dict[str, Any]:
                     'error': str(e)
                 })
         
+        metrics.observe_monitor_cycle(now, next_checks, time.perf_counter() - cycle_start)
+        
         summary = {
             'total_alerts': len(alerts_to_check),
             'scheduled': len([r for r in results if r['status'] == 'scheduled']),
@@ -182,6 +192,13 @@ def check_all_active_alerts() -> Dict[str, Any]:
         }
 
 
+def _retention_policy(model_name, days_to_keep):
+    """Politique du modèle avec une durée imposée, même si désactivée dans les settings."""
+    label = f'interface_monitor_service.{model_name}'
+    policy = next(policy for policy in DEFAULT_POLICIES if policy.model == label)
+    return policy.with_overrides(days=days_to_keep)
+
+
 # @shared_task(name='interface_monitor.cleanup_old_executions')
 def cleanup_old_executions(days_to_keep: int = 30) -> Dict[str, Any]:
     """
@@ -196,27 +213,18 @@ def cleanup_old_executions(days_to_keep: int = 30) -> Dict[str, Any]:
     try:
         logger.info(f"Nettoyage des exécutions d'alertes de plus de {days_to_keep} jours")
         
-        # Calculer la date limite
-        cutoff_date = timezone.now() - timezone.timedelta(days=days_to_keep)
-        
-        # Compter les exécutions à supprimer
-        executions_to_delete = AlertExecution.objects.filter(
-            started_at__lt=cutoff_date
-        )
+        # Suppression par lots (retention_service)
+        report = retention_engine.apply_policy(_retention_policy('AlertExecution', days_to_keep))
         
-        count = executions_to_delete.count()
-        
-        if count > 0:
-            # Supprimer les anciennes exécutions
-            executions_to_delete.delete()
-            logger.info(f"{count} anciennes exécutions supprimées")
+        if report['deleted'] > 0:
+            logger.info(f"{report['deleted']} anciennes exécutions supprimées")
         else:
             logger.info("Aucune ancienne exécution à supprimer")
         
         return {
             'success': True,
-            'deleted_count': count,
-            'cutoff_date': cutoff_date.isoformat()
+            'deleted_count': report['deleted'],
+            'cutoff_date': report['cutoff']
         }
         
     except Exception as e:
@@ -232,14 +240,11 @@ def cleanup_old_status(days_to_keep: int = 14) -> Dict[str, Any]:
     """Supprime les InterfaceStatus plus anciens que N jours (rétention)."""
     try:
         logger.info(f"Nettoyage des InterfaceStatus de plus de {days_to_keep} jours")
-        cutoff = timezone.now() - timezone.timedelta(days=days_to_keep)
-        qs = InterfaceAlert.objects.none()  # placeholder to avoid linter; real import below
-        from .models import InterfaceStatus  # local import to avoid cycles
-        del_count, _ = InterfaceStatus.objects.filter(last_seen__lt=cutoff).delete()
+        report = retention_engine.apply_policy(_retention_policy('InterfaceStatus', days_to_keep))
         return {
             'success': True,
-            'deleted_count': del_count,
-            'cutoff_date': cutoff.isoformat()
+            'deleted_count': report['deleted'],
+            'cutoff_date': report['cutoff']
         }
     except Exception as e:
         logger.error(f"Erreur lors du nettoyage des statuts: {str(e)}")
@@ -447,14 +452,11 @@ def _runner_loop():
         try:
             # Stagger: sleep a small random jitter between alerts
             summary = check_all_active_alerts()
-            # Periodic retention cleanup once per day window
+            # Rétention quotidienne (retention_service), dans son propre thread
             try:
-                now = timezone.now()
-                if now.hour == 3 and now.minute < 2:  # between 03:00 and 03:02
-                    cleanup_old_status(days_to_keep=14)
-                    cleanup_old_executions(days_to_keep=30)
-            except Exception:
-                pass
+                retention_engine.run_if_due()
+            except Exception as e:
+                logger.error(f"Erreur planification rétention: {str(e)}")
             # If nothing due, sleep longer
             total = summary.get('total_alerts', 0)
             scheduled = summary.get('scheduled', 0)
@@ -470,7 +472,8 @@ def _runner_loop():
 
 def _start_background_runner():
     global _RUNNER_STARTED
-    if _RUNNER_STARTED:
+    # Hors d'un processus serveur (manage.py, tests), aucun runner
+    if _RUNNER_STARTED or not workers.workers_enabled():
         return
     try:
         thread = threading.Thread(target=_runner_loop, name="interface_monitor_runner", daemon=True)
@@ -479,3 +482,8 @@ def _start_background_runner():
         logger.info("Runner périodique des alertes d'interface initialisé")
     except Exception as e:
         logger.error(f"Impossible de démarrer le runner périodique: {str(e)}")
+
+
+def start_worker():
+    """Démarre le runner des alertes d'interface (enregistré par InterfaceMonitorServiceConfig.ready)"""
+    _start_background_runner()
@@ -9,6 +9,7 @@ from unittest.mock import patch, MagicMock
 from .models import InterfaceAlert, InterfaceStatus, AlertExecution
 from firewall_service.models import Firewall, FirewallType
 from datacenter_service.models import DataCenter
+from firewallbackend.testing import QueryCountMixin
 
 User = get_user_model()
 
@@ -426,6 +427,48 @@ class APITestCase(APITestCase):
             self.assertTrue(self.alert.is_active)
 
 
+class AlertListQueryCountTestCase(QueryCountMixin, TestCase):
+    """Tests du nombre de requêtes de la liste des alertes"""
+    
+    def setUp(self):
+        self.superuser = User.objects.create_superuser(
+            username='queryadmin',
+            email='queryadmin@example.com',
+            password='adminpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superuser)
+        self.firewall = Firewall.objects.filter(owner=self.superuser).first()
+    
+    def _create_alert(self, name, statuses):
+        alert = InterfaceAlert.objects.create(
+            name=name,
+            firewall=self.firewall,
+            alert_type='interface_down',
+            created_by=self.superuser
+        )
+        alert.recipients.add(self.superuser)
+        for execution_status in statuses:
+            AlertExecution.objects.create(alert=alert, status=execution_status)
+        return alert
+    
+    def test_list_alerts_query_count(self):
+        """Test que les statistiques d'exécution sont annotées et non calculées par alerte"""
+        self._create_alert('Alert 0', ['completed', 'failed'])
+        
+        def add_rows():
+            for i in range(1, 4):
+                self._create_alert(f'Alert {i}', ['completed', 'completed', 'failed'])
+        
+        url = reverse('interface_monitor_service:interface-alert-list')
+        response = self.assertConstantQueries(url, add_rows)
+        alert = next(row for row in response.data['results'] if row['name'] == 'Alert 1')
+        self.assertEqual(alert['total_executions'], 3)
+        self.assertEqual(alert['successful_executions'], 2)
+        self.assertEqual(alert['failed_executions'], 1)
+        self.assertEqual(alert['success_rate'], 66.67)
+
+
 class ParserTestCase(TestCase):
     """Tests pour le parser FortiGate"""
     
@@ -29,6 +29,17 @@ from .services import InterfaceMonitorService
 logger = logging.getLogger(__name__)
 
 
+def with_execution_stats(queryset):
+    """Relations et statistiques d'exécution chargées en une requête (plus un prefetch)"""
+    return queryset.select_related(
+        'firewall', 'firewall__firewall_type', 'firewall__data_center', 'created_by'
+    ).prefetch_related('recipients').annotate(
+        total_executions=Count('executions', distinct=True),
+        successful_executions=Count('executions', filter=Q(executions__status='completed'), distinct=True),
+        failed_executions=Count('executions', filter=Q(executions__status='failed'), distinct=True)
+    )
+
+
 # Vues API REST
 class InterfaceAlertViewSet(viewsets.ModelViewSet):
     """ViewSet pour la gestion des alertes d'interfaces via l'API REST"""
@@ -42,15 +53,12 @@ class InterfaceAlertViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         if user.is_superuser:
-            return InterfaceAlert.objects.select_related(
-                'firewall', 'firewall__firewall_type', 'firewall__data_center', 'created_by'
-            )
+            queryset = InterfaceAlert.objects.all()
         else:
-            return InterfaceAlert.objects.filter(
+            queryset = InterfaceAlert.objects.filter(
                 Q(recipients=user) | Q(include_admin=True) | Q(include_superuser=True)
-            ).select_related(
-                'firewall', 'firewall__firewall_type', 'firewall__data_center', 'created_by'
             )
+        return with_execution_stats(queryset)
     
     def get_serializer_class(self):
         """Retourne le sérialiseur approprié selon l'action"""
@@ -139,9 +147,9 @@ class InterfaceAlertViewSet(viewsets.ModelViewSet):
         if user.is_superuser:
             queryset = self.get_queryset()
         else:
-            queryset = InterfaceAlert.objects.filter(
+            queryset = with_execution_stats(InterfaceAlert.objects.filter(
                 Q(recipients=user) | Q(include_admin=True) | Q(include_superuser=True)
-            ).select_related('firewall', 'firewall__firewall_type')
+            ))
         
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class MetricsServiceConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'metrics_service'
+    verbose_name = 'Metrics Service'
+
+    def ready(self):
+        from .metrics import install_hooks
+        install_hooks()
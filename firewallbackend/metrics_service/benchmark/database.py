@@ -0,0 +1,193 @@
+"""
+Validation du profil de base (firewallbackend/database.py) sur les données
+seedées par seed_load_fixtures : réglages effectifs, contention écritures /
+lectures entre threads (workers en arrière-plan contre requêtes), export
+en flux (.iterator, curseur serveur sous PostgreSQL) contre liste, et
+réutilisation des connexions d'un cycle de requête à l'autre.
+"""
+
+import logging
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.backends.signals import connection_created
+
+from .fixtures import DEFAULT_PREFIX, load_users
+from .harness import percentile
+
+logger = logging.getLogger(__name__)
+
+# Marque des lignes d'historique écrites par le scénario de contention
+CONTENTION_MARKER = 'db-benchmark'
+EXPORT_CHUNK_SIZE = 2000
+SQLITE_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store')
+
+
+def _ms(value):
+    return None if value is None else round(value * 1000, 2)
+
+
+def profile_report():
+    """Réglages effectifs de la connexion par défaut."""
+    database = settings.DATABASES['default']
+    report = {
+        'profile': getattr(settings, 'DATABASE_PROFILE', None),
+        'vendor': connection.vendor,
+        'conn_max_age': database.get('CONN_MAX_AGE', 0),
+        'conn_health_checks': database.get('CONN_HEALTH_CHECKS', False),
+        'server_side_cursors': not database.get('DISABLE_SERVER_SIDE_CURSORS', False),
+    }
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(f'PRAGMA {pragma}')
+                # mmap_size ne retourne rien sur une base en mémoire (tests)
+                row = cursor.fetchone()
+                report[pragma] = row[0] if row else None
+            report['transaction_mode'] = database.get('OPTIONS', {}).get('transaction_mode', 'DEFERRED')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SHOW server_version')
+            report['server_version'] = cursor.fetchone()[0]
+    return report
+
+
+def contention(writers=4, readers=8, duration=10.0, prefix=DEFAULT_PREFIX):
+    """
+    writers threads écrivent en transaction (comme les workers de jobs)
+    pendant que readers threads lisent l'historique (comme les requêtes).
+    """
+    from history_service.models import ServiceHistory
+
+    usernames = list(load_users(prefix).values_list('username', flat=True))
+    if not usernames:
+        raise ValueError(f"No '{prefix}' users seeded: run seed_load_fixtures first")
+
+    lock = threading.Lock()
+    results = {'write': [], 'read': []}
+    errors = {'write': 0, 'read': 0}
+    stop_at = time.monotonic() + duration
+
+    def record(kind, latency=None):
+        with lock:
+            if latency is None:
+                errors[kind] += 1
+            else:
+                results[kind].append(latency)
+
+    def writer(index):
+        try:
+            while time.monotonic() < stop_at:
+                start = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        entry = ServiceHistory.objects.create(
+                            service_name='firewall', action='update', status='success',
+                            details=CONTENTION_MARKER, user=usernames[index % len(usernames)],
+                        )
+                        ServiceHistory.objects.filter(pk=entry.pk).update(status='completed')
+                except OperationalError as e:
+                    logger.debug(f"Writer {index}: {e}")
+                    record('write')
+                    continue
+                record('write', time.perf_counter() - start)
+        finally:
+            connection.close()
+
+    def reader(index):
+        username = usernames[index % len(usernames)]
+        try:
+            while time.monotonic() < stop_at:
+                start = time.perf_counter()
+                try:
+                    list(ServiceHistory.objects.filter(user=username).order_by('-timestamp')[:50])
+                    ServiceHistory.objects.filter(user=username).count()
+                except OperationalError as e:
+                    logger.debug(f"Reader {index}: {e}")
+                    record('read')
+                    continue
+                record('read', time.perf_counter() - start)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ServiceHistory.objects.filter(details=CONTENTION_MARKER).delete()
+
+    report = {'writers': writers, 'readers': readers, 'duration': duration}
+    for kind, latencies in results.items():
+        report[kind] = {
+            'operations': len(latencies),
+            'per_second': round(len(latencies) / duration, 1),
+            'errors': errors[kind],
+            'p50_ms': _ms(percentile(latencies, 50)),
+            'p99_ms': _ms(percentile(latencies, 99)),
+        }
+    return report
+
+
+def export(prefix=DEFAULT_PREFIX, chunk_size=EXPORT_CHUNK_SIZE):
+    """Lecture complète des commandes seedées : liste en mémoire contre flux."""
+    from command_service.models import FirewallCommand
+
+    queryset = FirewallCommand.objects.filter(user__in=load_users(prefix)).order_by('pk')
+    report = {}
+    for mode in ('list', 'iterator'):
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = queryset.all() if mode == 'list' else queryset.iterator(chunk_size=chunk_size)
+        count = size = 0
+        for command in rows:
+            count += 1
+            size += len(command.output or '')
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del rows
+        report[mode] = {'rows': count, 'output_bytes': size, 'seconds': round(elapsed, 3),
+                        'peak_mb': round(peak / 1024 / 1024, 1)}
+    return report
+
+
+def connection_reuse(requests=50):
+    """
+    Cycles de requête simulés (close_old_connections avant et après, comme
+    les signaux request_started/request_finished) dans un même thread :
+    connexions ouvertes et durée moyenne d'un cycle.
+    """
+    opened = []
+
+    def cycle():
+        try:
+            for _ in range(requests):
+                close_old_connections()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+                close_old_connections()
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=cycle)
+
+    def count(sender, **kwargs):
+        if threading.current_thread() is thread:
+            opened.append(sender)
+
+    connection_created.connect(count)
+    start = time.perf_counter()
+    try:
+        thread.start()
+        thread.join()
+    finally:
+        connection_created.disconnect(count)
+    return {
+        'requests': requests,
+        'connections_opened': len(opened),
+        'avg_cycle_ms': _ms((time.perf_counter() - start) / requests),
+    }
@@ -0,0 +1,331 @@
+"""
+Faux FortiGate SSH (paramiko ServerInterface) pour les benchmarks hors ligne.
+
+Chaque serveur écoute sur 127.0.0.1 (port éphémère), accepte n'importe quel
+mot de passe et émule un shell FortiGate : écho de la commande, latence
+configurable, pagination --More-- et sortie volumineuse pour
+show full-configuration. Les commandes exec (sans shell) sont servies sans
+pagination, comme sur un vrai boîtier.
+"""
+
+import logging
+import socket
+import threading
+import time
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+# Les déconnexions brutales des clients ne sont pas des erreurs côté serveur
+TRANSPORT_LOGGER = f'{__name__}.transport'
+logging.getLogger(TRANSPORT_LOGGER).setLevel(logging.CRITICAL)
+
+# Attente d'une connexion avant de revérifier l'arrêt
+ACCEPT_TIMEOUT = 0.5  # seconds
+# Attente de la fermeture par le client après une commande exec
+EXEC_LINGER = 30  # seconds
+# Taille des envois vers le client
+SEND_CHUNK = 32 * 1024
+PAGER = '--More-- '
+# Effacement du pager par FortiGate après l'appui sur espace
+PAGER_ERASE = '\r         \r'
+
+_host_key = None
+_host_key_lock = threading.Lock()
+
+
+def host_key():
+    """Clé d'hôte partagée par tous les serveurs (la générer coûte cher)."""
+    global _host_key
+    with _host_key_lock:
+        if _host_key is None:
+            _host_key = paramiko.RSAKey.generate(2048)
+        return _host_key
+
+
+class FortiGateProfile:
+    """Comportement d'un faux boîtier."""
+
+    def __init__(self, latency=0.0, config_lines=5000, page_lines=0, output_lines=20,
+                 interfaces=8, down_interfaces=0):
+        # Délai avant la réponse à chaque commande
+        self.latency = latency
+        # Lignes de show full-configuration
+        self.config_lines = config_lines
+        # Lignes par page en mode shell (0 : pas de pagination)
+        self.page_lines = page_lines
+        # Lignes des réponses aux commandes inconnues
+        self.output_lines = output_lines
+        self.interfaces = interfaces
+        self.down_interfaces = down_interfaces
+
+
+def full_configuration(hostname, lines):
+    """Configuration déterministe d'environ lines lignes."""
+    out = [
+        '#config-version=FGVM64-7.2.5-FW-build1517-230606:opmode=0:vdom=0',
+        'config system global',
+        f'    set hostname "{hostname}"',
+        '    set timezone 28',
+        'end',
+        'config firewall address',
+    ]
+    i = 0
+    while len(out) < lines - 1:
+        out.extend([
+            f'    edit "bench-host-{i}"',
+            f'        set subnet 10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255} 255.255.255.255',
+            f'        set comment "generated object {i}"',
+            '    next',
+        ])
+        i += 1
+    out.append('end')
+    return out
+
+
+class FakeFortiGate:
+    """Un faux boîtier : socket d'écoute, un thread par connexion, un par canal."""
+
+    def __init__(self, hostname, profile=None, host='127.0.0.1'):
+        self.hostname = hostname
+        self.profile = profile or FortiGateProfile()
+        self.host = host
+        self.port = None
+        self.prompt = f'{hostname} # '
+        self._socket = None
+        self._stopped = threading.Event()
+        self._config = None
+        self._stats_lock = threading.Lock()
+        self._transports = set()
+        # (début, durée) de chaque connexion SSH terminée
+        self.sessions = []
+        self.commands = 0
+        self.bytes_sent = 0
+
+    # --- Cycle de vie ---
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, 0))
+        self._socket.listen(128)
+        self._socket.settimeout(ACCEPT_TIMEOUT)
+        self.port = self._socket.getsockname()[1]
+        self._spawn(self._accept_loop)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._socket is not None:
+            self._socket.close()
+        with self._stats_lock:
+            transports = list(self._transports)
+        for transport in transports:
+            transport.close()
+
+    def _spawn(self, target, *args):
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                client, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self._spawn(self._serve_connection, client)
+
+    def _serve_connection(self, client):
+        started = time.perf_counter()
+        transport = paramiko.Transport(client)
+        transport.set_log_channel(TRANSPORT_LOGGER)
+        transport.add_server_key(host_key())
+        with self._stats_lock:
+            self._transports.add(transport)
+        try:
+            # Les canaux ouverts restent référencés par le transport tant
+            # qu'accept() n'est pas appelé ; ils sont servis par les
+            # callbacks shell/exec. join() rend la main à la déconnexion.
+            transport.start_server(server=_ServerInterface(self))
+            transport.join()
+        except (paramiko.SSHException, EOFError, OSError) as e:
+            logger.debug(f"Fake FortiGate {self.hostname}: connection ended ({e})")
+        finally:
+            transport.close()
+            with self._stats_lock:
+                self._transports.discard(transport)
+                self.sessions.append((started, time.perf_counter() - started))
+
+    # --- Réponses ---
+
+    def output_for(self, command):
+        """Lignes de sortie d'une commande."""
+        profile = self.profile
+        if command in ('show full-configuration', 'show'):
+            if self._config is None:
+                self._config = full_configuration(self.hostname, profile.config_lines)
+            return self._config
+        if command == 'get system status':
+            return [
+                'Version: FortiGate-VM64 v7.2.5,build1517,230606 (GA.F)',
+                f'Hostname: {self.hostname}',
+                'Operation Mode: NAT',
+                'Current HA mode: standalone',
+            ]
+        if command in ('get system interface', 'show system interface', 'get system interface physical'):
+            return [
+                f'name: port{i}   mode: static    ip: 10.0.{i}.1 255.255.255.0   '
+                f'status: {"down" if i <= profile.down_interfaces else "up"}    type: physical'
+                for i in range(1, profile.interfaces + 1)
+            ]
+        if not command or command.startswith(('config ', 'end', 'next', 'edit ', 'set ')):
+            return []
+        return [f'{command}: line {i} of {profile.output_lines}' for i in range(1, profile.output_lines + 1)]
+
+    def _send(self, channel, text):
+        data = text.encode()
+        for offset in range(0, len(data), SEND_CHUNK):
+            channel.sendall(data[offset:offset + SEND_CHUNK])
+        with self._stats_lock:
+            self.bytes_sent += len(data)
+
+    def _respond(self, channel, command, paginate):
+        if self.profile.latency:
+            time.sleep(self.profile.latency)
+        lines = self.output_for(command)
+        with self._stats_lock:
+            self.commands += 1
+        page = self.profile.page_lines if paginate else 0
+        if not page or len(lines) <= page:
+            if lines:
+                self._send(channel, '\r\n'.join(lines) + '\r\n')
+            return True
+        for start in range(0, len(lines), page):
+            self._send(channel, '\r\n'.join(lines[start:start + page]) + '\r\n')
+            if start + page >= len(lines):
+                break
+            self._send(channel, PAGER)
+            key = channel.recv(1)
+            if not key or key == b'q':
+                return bool(key)
+            self._send(channel, PAGER_ERASE)
+        return True
+
+    def run_shell(self, channel):
+        try:
+            self._send(channel, f'\r\n{self.prompt}')
+            buffer = ''
+            while not self._stopped.is_set():
+                data = channel.recv(4096)
+                if not data:
+                    break
+                buffer += data.decode('utf-8', errors='ignore')
+                while '\n' in buffer:
+                    line, buffer = buffer.split('\n', 1)
+                    line = line.rstrip('\r')
+                    command = line.strip()
+                    # Écho de la commande puis sortie et prompt
+                    self._send(channel, line + '\r\n')
+                    if command in ('exit', 'quit'):
+                        return
+                    if not self._respond(channel, command, paginate=True):
+                        return
+                    self._send(channel, self.prompt)
+        except (OSError, EOFError):
+            pass
+        finally:
+            _close(channel)
+
+    def run_exec(self, channel, command):
+        try:
+            self._respond(channel, command.strip(), paginate=False)
+            channel.send_exit_status(0)
+            # EOF plutôt que fermeture : la réponse à la requête exec peut
+            # partir après ces données, fermer ici ferait échouer le client
+            channel.shutdown_write()
+            channel.settimeout(EXEC_LINGER)
+            while channel.recv(1024):
+                pass
+        except (OSError, EOFError, socket.timeout):
+            pass
+        finally:
+            _close(channel)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'active_sessions': len(self._transports),
+                'sessions': list(self.sessions),
+                'commands': self.commands,
+                'bytes_sent': self.bytes_sent,
+            }
+
+
+def _close(channel):
+    try:
+        channel.close()
+    except (OSError, EOFError):
+        # Client déjà déconnecté
+        pass
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    def __init__(self, device):
+        self.device = device
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.device._spawn(self.device.run_shell, channel)
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        self.device._spawn(self.device.run_exec, channel, command.decode('utf-8', errors='ignore'))
+        return True
+
+
+class FakeFortiGateFarm:
+    """N faux boîtiers démarrés ensemble (utilisable comme context manager)."""
+
+    def __init__(self, count, profile=None):
+        self.devices = [FakeFortiGate(f'FGT-BENCH-{i:03d}', profile) for i in range(1, count + 1)]
+
+    def start(self):
+        host_key()
+        for device in self.devices:
+            device.start()
+        return self
+
+    def stop(self):
+        for device in self.devices:
+            device.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        """Statistiques cumulées de tous les boîtiers."""
+        total = {'active_sessions': 0, 'sessions': [], 'commands': 0, 'bytes_sent': 0}
+        for device in self.devices:
+            stats = device.stats()
+            for key in ('active_sessions', 'commands', 'bytes_sent'):
+                total[key] += stats[key]
+            total['sessions'].extend(stats['sessions'])
+        return total
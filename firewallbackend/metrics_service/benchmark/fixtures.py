@@ -0,0 +1,201 @@
+"""
+Jeu de données volumineux pour les tests de charge (SQLite ou PostgreSQL).
+
+Les utilisateurs sont créés normalement (signaux : SSHUser, variables, seed
+par défaut) ; le reste est inséré par bulk_create, sans signaux. Les caches
+du serveur (hiérarchie, statistiques) ne voient donc pas ces écritures :
+générer les données avant de démarrer le serveur, ou le redémarrer ensuite.
+
+Tout est déterministe pour une même graine et rattaché à des utilisateurs
+préfixés, supprimés (en cascade) par purge().
+"""
+
+import ipaddress
+import logging
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFIX = 'load'
+DEFAULT_PASSWORD = 'loadtest'
+BATCH_SIZE = 1000
+FIREWALL_TYPES = ('FortiGate', 'Palo Alto', 'Checkpoint')
+# Plage réservée aux tests de performance (RFC 2544) : jamais joignable
+FIXTURE_NETWORK = ipaddress.ip_network('198.18.0.0/15')
+# Échéance des alertes générées : hors de portée du runner de monitoring
+ALERT_NEXT_CHECK_DELAY = timedelta(days=365)
+COMMANDS = (
+    'get system status', 'show full-configuration', 'get system interface',
+    'diagnose sys top 1 10', 'get router info routing-table all',
+)
+HISTORY_SERVICES = ('firewall', 'datacenter', 'command', 'camera', 'dailycheck')
+
+
+def load_users(prefix=DEFAULT_PREFIX):
+    from auth_service.models import User
+
+    return User.objects.filter(username__startswith=f'{prefix}-user-').order_by('username')
+
+
+def purge(prefix=DEFAULT_PREFIX):
+    """Supprime les utilisateurs préfixés et toutes leurs données."""
+    from history_service.models import ServiceHistory
+
+    users = load_users(prefix)
+    usernames = list(users.values_list('username', flat=True))
+    ServiceHistory.objects.filter(user__in=usernames).delete()
+    count = users.count()
+    users.delete()
+    return count
+
+
+def _spread(total, parts):
+    """Répartit total en parts entiers (les premiers reçoivent le reste)."""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def _bulk(model, rows, batch_size):
+    created = []
+    for start in range(0, len(rows), batch_size):
+        created.extend(model.objects.bulk_create(rows[start:start + batch_size], batch_size=batch_size))
+    return created
+
+
+def seed(users=10, datacenters=200, firewalls=5000, alerts=500, commands=20000, history=10000,
+         prefix=DEFAULT_PREFIX, password=DEFAULT_PASSWORD, seed_value=42, batch_size=BATCH_SIZE):
+    """
+    Crée users utilisateurs (le premier est staff) et répartit entre eux les
+    datacenters, firewalls, alertes, commandes et entrées d'historique.
+    Retourne le nombre d'objets créés par type.
+    """
+    from auth_service.models import User
+    from command_service.models import FirewallCommand
+    from datacenter_service.models import DataCenter
+    from firewall_service.models import Firewall, FirewallType
+    from history_service.models import ServiceHistory
+    from interface_monitor_service.models import InterfaceAlert
+
+    rng = random.Random(seed_value)
+    now = timezone.now()
+    hosts = FIXTURE_NETWORK.hosts()
+    existing = load_users(prefix).count()
+
+    owners = []
+    for i in range(existing, existing + users):
+        user = User.objects.create_user(
+            username=f'{prefix}-user-{i:03d}',
+            email=f'{prefix}-user-{i:03d}@example.com',
+            password=password,
+            is_staff=(i == 0),
+        )
+        user.ssh_credentials.set_ssh_password(password)
+        owners.append(user)
+
+    with transaction.atomic():
+        dc_rows = []
+        for owner, count in zip(owners, _spread(datacenters, users)):
+            dc_rows.extend(
+                DataCenter(name=f'{prefix.upper()}-DC-{owner.pk}-{i:04d}', owner=owner,
+                           location=rng.choice(('Paris', 'Lyon', 'Casablanca', 'Rabat', 'Marseille')))
+                for i in range(count)
+            )
+        dcs = _bulk(DataCenter, dc_rows, batch_size)
+
+        type_rows = [
+            FirewallType(name=name, data_center=dc, owner_id=dc.owner_id, attributes_schema={},
+                         description=f'{name} ({dc.name})')
+            for dc in dcs for name in FIREWALL_TYPES
+        ]
+        types = _bulk(FirewallType, type_rows, batch_size)
+        types_by_owner = {}
+        for firewall_type in types:
+            types_by_owner.setdefault(firewall_type.owner_id, []).append(firewall_type)
+
+        firewall_rows = []
+        for owner, count in zip(owners, _spread(firewalls, users)):
+            owner_types = types_by_owner.get(owner.pk)
+            if not owner_types:
+                continue
+            for i in range(count):
+                firewall_type = owner_types[i % len(owner_types)]
+                firewall_rows.append(Firewall(
+                    name=f'{prefix.upper()}-FW-{owner.pk}-{i:05d}',
+                    ip_address=str(next(hosts)),
+                    data_center_id=firewall_type.data_center_id,
+                    firewall_type=firewall_type,
+                    owner=owner,
+                ))
+        fws = _bulk(Firewall, firewall_rows, batch_size)
+        firewalls_by_owner = {}
+        for firewall in fws:
+            firewalls_by_owner.setdefault(firewall.owner_id, []).append(firewall)
+
+        alert_rows = []
+        for owner, count in zip(owners, _spread(alerts, users)):
+            owner_firewalls = firewalls_by_owner.get(owner.pk)
+            if not owner_firewalls:
+                continue
+            alert_rows.extend(
+                InterfaceAlert(
+                    name=f'{prefix} alert {owner.pk}-{i:04d}',
+                    firewall=owner_firewalls[i % len(owner_firewalls)],
+                    alert_type=rng.choice(('interface_down', 'interface_up', 'error_count')),
+                    created_by=owner,
+                    next_check=now + ALERT_NEXT_CHECK_DELAY,
+                    include_admin=False,
+                    include_superuser=False,
+                )
+                for i in range(count)
+            )
+        created_alerts = _bulk(InterfaceAlert, alert_rows, batch_size)
+
+        command_rows = []
+        for owner, count in zip(owners, _spread(commands, users)):
+            owner_firewalls = firewalls_by_owner.get(owner.pk)
+            if not owner_firewalls:
+                continue
+            for i in range(count):
+                command = rng.choice(COMMANDS)
+                status = rng.choices(('completed', 'failed', 'executing'), weights=(90, 8, 2))[0]
+                firewall = rng.choice(owner_firewalls)
+                output = '\n'.join(f'{command}: line {n}' for n in range(rng.randint(1, 40)))
+                # bulk_create ne passe pas par save() : taille renseignée ici
+                command_rows.append(FirewallCommand(
+                    firewall=firewall,
+                    user=owner,
+                    command=command,
+                    status=status,
+                    output=output,
+                    output_size=len(output),
+                    error_message='Timeout' if status == 'failed' else None,
+                ))
+        created_commands = _bulk(FirewallCommand, command_rows, batch_size)
+
+        history_rows = [
+            ServiceHistory(
+                service_name=rng.choice(HISTORY_SERVICES),
+                action=rng.choice(('create', 'update', 'delete', 'ping_all', 'upload_csv')),
+                status=rng.choice(('success', 'success', 'success', 'failed')),
+                details=f'{prefix} history entry {i}',
+                timestamp=now - timedelta(seconds=rng.randint(0, 30 * 24 * 3600)),
+                user=owners[i % len(owners)].username if owners else None,
+                ip_address='127.0.0.1',
+            )
+            for i in range(history)
+        ] if owners else []
+        created_history = _bulk(ServiceHistory, history_rows, batch_size)
+
+    return {
+        'users': len(owners),
+        'datacenters': len(dcs),
+        'firewall_types': len(types),
+        'firewalls': len(fws),
+        'alerts': len(created_alerts),
+        'commands': len(created_commands),
+        'history': len(created_history),
+    }
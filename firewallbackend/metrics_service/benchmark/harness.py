@@ -0,0 +1,265 @@
+"""
+Scénarios de benchmark SSH de bout en bout contre une ferme de faux FortiGate.
+
+Les vues DRF sont appelées directement (APIRequestFactory) : les jobs passent
+par les vraies files et les vrais workers, sans la limitation de débit ni le
+JWT du middleware HTTP. Chaque scénario retourne un BenchmarkResult (débit,
+p50/p99 des opérations côté client et des sessions SSH côté serveur).
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de polling du statut des jobs
+POLL_INTERVAL = 0.1  # seconds
+JOB_TIMEOUT = 600  # seconds
+# Attente de la fermeture des sessions SSH d'un scénario
+SESSION_DRAIN_TIMEOUT = 5  # seconds
+
+DEFAULT_DAILY_CHECK_COMMANDS = ['get system status', 'get system performance status', 'get system ha status']
+DEFAULT_TEMPLATE_COMMANDS = ['get system status', 'get router info routing-table all', 'get system arp']
+
+
+def percentile(samples, q):
+    """Percentile par rang le plus proche (None si aucun échantillon)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class BenchmarkResult:
+    def __init__(self, scenario, operations, wall, latencies, units=None, sessions=None, errors=0):
+        self.scenario = scenario
+        # Opérations (firewalls, alertes ou requêtes) traitées
+        self.operations = operations
+        self.wall = wall
+        self.latencies = latencies
+        self.units = units or 'ops'
+        self.sessions = sessions or []
+        self.errors = errors
+
+    def as_dict(self):
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            'scenario': self.scenario,
+            'operations': self.operations,
+            'units': self.units,
+            'errors': self.errors,
+            'wall_s': round(self.wall, 3),
+            'throughput_per_s': round(self.operations / self.wall, 2) if self.wall else None,
+            'p50_ms': ms(percentile(self.latencies, 50)),
+            'p99_ms': ms(percentile(self.latencies, 99)),
+            'ssh_sessions': len(self.sessions),
+            'session_p50_ms': ms(percentile(self.sessions, 50)),
+            'session_p99_ms': ms(percentile(self.sessions, 99)),
+        }
+
+
+@contextmanager
+def redirect_home(path):
+    """Les workers écrivent dans ~/Documents : le rediriger vers un répertoire jetable."""
+    previous = os.environ.get('HOME')
+    os.environ['HOME'] = path
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop('HOME', None)
+        else:
+            os.environ['HOME'] = previous
+
+
+class BenchmarkEnvironment:
+    """Utilisateur, datacenter et un firewall par faux boîtier de la ferme."""
+
+    def __init__(self, farm):
+        from auth_service.models import User
+        from datacenter_service.models import DataCenter
+        from firewall_service.models import Firewall, FirewallType
+
+        self.farm = farm
+        self.user = User.objects.create_user(username='benchmark', password='benchmark', is_staff=True)
+        # Le SSHUser créé par signal n'a pas de mot de passe : paramiko refuserait de s'authentifier
+        self.user.ssh_credentials.set_ssh_password('benchmark')
+        data_center = DataCenter.objects.create(name='BENCH-DC', owner=self.user)
+        firewall_type = FirewallType.objects.create(
+            name='fortigate', data_center=data_center, owner=self.user, attributes_schema={}
+        )
+        self.firewalls = [
+            Firewall.objects.create(
+                name=device.hostname,
+                ip_address=device.host,
+                ssh_port=device.port,
+                ssh_user='benchmark',
+                ssh_password='benchmark',
+                data_center=data_center,
+                firewall_type=firewall_type,
+                owner=self.user,
+            )
+            for device in farm.devices
+        ]
+        self.factory = APIRequestFactory()
+
+    def call(self, view, method, path, data=None):
+        if method == 'get':
+            request = self.factory.get(path, data)
+        else:
+            request = self.factory.post(path, data, format='json')
+        force_authenticate(request, user=self.user)
+        return view(request)
+
+    def wait_for_task(self, view, path, task_id, timeout=JOB_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            data = self.call(view, 'get', path, {'task_id': task_id}).data
+            if data.get('status') in ('completed', 'failed'):
+                return data
+            time.sleep(POLL_INTERVAL)
+        raise TimeoutError(f"Task {task_id} not finished after {timeout}s")
+
+    def sessions_since(self, since, timeout=SESSION_DRAIN_TIMEOUT):
+        """Durées des sessions SSH ouvertes depuis since (perf_counter), une fois fermées."""
+        deadline = time.monotonic() + timeout
+        while self.farm.stats()['active_sessions'] and time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+        return [duration for started, duration in self.farm.stats()['sessions'] if started >= since]
+
+
+def _run_job_scenario(env, scenario, submit_view, status_view, path, payload, iterations):
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        job_start = time.perf_counter()
+        response = env.call(submit_view, 'post', path, payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"{scenario}: submission failed ({response.status_code}: {response.data})")
+        data = env.wait_for_task(status_view, path, response.data['task_id'])
+        latencies.append(time.perf_counter() - job_start)
+        errors += sum(1 for result in data.get('results', []) if result.get('status') not in ('success', 'SUCCESS'))
+        if data['status'] == 'failed':
+            errors += len(env.firewalls)
+    wall = time.perf_counter() - start
+    return BenchmarkResult(
+        scenario, iterations * len(env.firewalls), wall, latencies,
+        units='firewalls', sessions=env.sessions_since(start), errors=errors
+    )
+
+
+def bench_config_save(env, iterations=1, command='show full-configuration'):
+    """Sauvegarde de configuration en masse (save_bulk_config + polling)."""
+    from command_service.views import FirewallCommandViewSet
+
+    return _run_job_scenario(
+        env, 'config_save',
+        FirewallCommandViewSet.as_view({'post': 'save_bulk_config'}),
+        FirewallCommandViewSet.as_view({'get': 'check_task_status'}),
+        '/api/command/commands/save_bulk_config/',
+        {'firewall_ids': [str(fw.id) for fw in env.firewalls], 'command': command},
+        iterations,
+    )
+
+
+def bench_daily_check(env, iterations=1, commands=None):
+    """Daily check de tous les firewalls (run_multiple_checks + polling)."""
+    from dailycheck_service.views import DailyCheckViewSet
+
+    return _run_job_scenario(
+        env, 'daily_check',
+        DailyCheckViewSet.as_view({'post': 'run_multiple_checks'}),
+        DailyCheckViewSet.as_view({'get': 'check_task_status'}),
+        '/api/daily-check/daily-checks/run_multiple_checks/',
+        {'firewalls': [str(fw.id) for fw in env.firewalls], 'commands': commands or DEFAULT_DAILY_CHECK_COMMANDS},
+        iterations,
+    )
+
+
+def bench_interface_monitor(env, iterations=1, command='get system interface'):
+    """Cycles complets de l'interface monitor (check_all_active_alerts)."""
+    from interface_monitor_service.models import AlertExecution, InterfaceAlert
+    from interface_monitor_service.tasks import check_all_active_alerts
+
+    alerts = InterfaceAlert.objects.bulk_create([
+        InterfaceAlert(
+            name=f'bench {fw.name}',
+            firewall=fw,
+            alert_type='interface_down',
+            command_template=command,
+            created_by=env.user,
+            include_admin=False,
+            include_superuser=False,
+        )
+        for fw in env.firewalls
+    ])
+    alert_ids = [alert.id for alert in alerts]
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        InterfaceAlert.objects.filter(id__in=alert_ids).update(next_check=timezone.now(), is_active=True)
+        summary = check_all_active_alerts()
+        errors += summary.get('errors', 0)
+    wall = time.perf_counter() - start
+    executions = AlertExecution.objects.filter(alert_id__in=alert_ids)
+    latencies = [duration for duration in executions.values_list('duration', flat=True) if duration is not None]
+    errors += executions.filter(status='failed').count()
+    InterfaceAlert.objects.filter(id__in=alert_ids).update(is_active=False)
+    return BenchmarkResult(
+        'interface_monitor', iterations * len(alert_ids), wall, latencies,
+        units='alerts', sessions=env.sessions_since(start), errors=errors
+    )
+
+
+def bench_execute_template(env, requests=50, concurrency=10, commands=None):
+    """Requêtes execute-template concurrentes (une session interactive par requête)."""
+    from command_service.views import FirewallCommandViewSet
+
+    view = FirewallCommandViewSet.as_view({'post': 'execute_template'})
+    commands = commands or DEFAULT_TEMPLATE_COMMANDS
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def one(index):
+        firewall = env.firewalls[index % len(env.firewalls)]
+        begin = time.perf_counter()
+        try:
+            response = env.call(view, 'post', '/api/command/commands/execute-template/',
+                                {'firewall_id': str(firewall.id), 'commands': commands})
+            failed = response.status_code != 200 or any(
+                result['status'] != 'completed' for result in response.data.get('results', [])
+            )
+        except Exception as e:
+            logger.error(f"execute_template benchmark request failed: {e}")
+            failed = True
+        with lock:
+            latencies.append(time.perf_counter() - begin)
+            if failed:
+                errors.append(index)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - start
+    return BenchmarkResult(
+        'execute_template', requests, wall, latencies,
+        units='requests', sessions=env.sessions_since(start), errors=len(errors)
+    )
+
+
+SCENARIOS = {
+    'config_save': bench_config_save,
+    'daily_check': bench_daily_check,
+    'interface_monitor': bench_interface_monitor,
+    'execute_template': bench_execute_template,
+}
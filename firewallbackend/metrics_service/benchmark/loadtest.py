@@ -0,0 +1,403 @@
+"""
+Test de charge HTTP/websocket contre une instance lancée à part
+(run_asgi.py, run_app.py ou runserver) sur la même base et les mêmes settings.
+
+Des utilisateurs virtuels (un thread et une session requests chacun, un
+utilisateur seedé par fixtures.seed chacun) tirent des actions selon un mix
+pondéré : tableau de bord, hiérarchie (revalidation ETag), historique
+des commandes d'un firewall (pagination par curseur), import CSV et sauvegarde de config en masse. Des sessions terminal
+websocket tournent en parallèle. Le rapport donne débit, p50/p95/p99 par
+action, erreurs et 429, et le nombre de requêtes SQL par endpoint relevé
+par l'instrumentation du serveur (INSTRUMENTATION_ENABLED).
+
+Les jobs SSH et le terminal visent des firewalls LOADTEST-FGT-* pointant sur
+une ferme de faux FortiGate démarrée dans ce processus : le serveur doit
+donc tourner sur la même machine.
+"""
+
+import io
+import logging
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from .harness import percentile
+from .websocket_client import WebSocketClient, WebSocketError
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = 30  # seconds
+JOB_TIMEOUT = 300  # seconds
+TERMINAL_TIMEOUT = 120  # seconds
+JOB_POLL_INTERVAL = 0.5  # seconds
+# Message système envoyé par TerminalConsumer.connect_ssh
+SSH_READY_MESSAGE = 'Connexion SSH établie avec succès'
+LOAD_FIREWALL_PREFIX = 'LOADTEST-FGT'
+CSV_ROWS = 20
+# Pages suivies par curseur avant de repartir d'un autre firewall
+HISTORY_PAGES = 20
+# Firewalls (avec commandes) dont chaque utilisateur parcourt l'historique
+HISTORY_FIREWALLS = 20
+
+ACTIONS = ('dashboard', 'hierarchy', 'history', 'csv_import', 'bulk_job')
+# Poids relatifs des actions
+MIXES = {
+    'read': {'dashboard': 4, 'hierarchy': 4, 'history': 2},
+    'mixed': {'dashboard': 3, 'hierarchy': 3, 'history': 2, 'csv_import': 1, 'bulk_job': 1},
+    'write': {'csv_import': 2, 'bulk_job': 2, 'hierarchy': 1},
+}
+# Actions qui ont besoin de faux boîtiers
+DEVICE_ACTIONS = ('bulk_job',)
+
+
+def parse_mix(spec):
+    """Nom de MIXES ou liste 'action=poids,...'."""
+    if spec in MIXES:
+        return dict(MIXES[spec])
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise ValueError(f"Unknown action: {name}")
+        mix[name] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError(f"Empty mix: {spec}")
+    return mix
+
+
+class LoadStats:
+    """Latences et erreurs par action, partagées entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.actions = {}
+
+    def record(self, action, latency, ok=True, throttled=False):
+        with self._lock:
+            row = self.actions.setdefault(action, {'latencies': [], 'errors': 0, 'throttled': 0})
+            row['latencies'].append(latency)
+            if throttled:
+                row['throttled'] += 1
+            elif not ok:
+                row['errors'] += 1
+
+    def report(self, wall):
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+
+        rows = []
+        with self._lock:
+            for action, row in sorted(self.actions.items()):
+                latencies = row['latencies']
+                rows.append({
+                    'action': action,
+                    'requests': len(latencies),
+                    'errors': row['errors'],
+                    'throttled': row['throttled'],
+                    'rps': round(len(latencies) / wall, 2) if wall else None,
+                    'p50_ms': ms(percentile(latencies, 50)),
+                    'p95_ms': ms(percentile(latencies, 95)),
+                    'p99_ms': ms(percentile(latencies, 99)),
+                })
+        return rows
+
+
+class VirtualUser:
+    """Un utilisateur seedé : session HTTP authentifiée et ses identifiants utiles."""
+
+    def __init__(self, base_url, token, firewall_type_id, device_firewall_ids, index, history_firewall_ids=()):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.firewall_type_id = firewall_type_id
+        self.device_firewall_ids = device_firewall_ids
+        self.history_firewall_ids = list(history_firewall_ids)
+        self.history_next = None
+        self.history_pages = 0
+        self.index = index
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+        self.etag = None
+        self.uploads = 0
+        self.rng = random.Random(index)
+
+    def _request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', HTTP_TIMEOUT)
+        return self.session.request(method, self.base_url + path, **kwargs)
+
+    def dashboard(self):
+        return self._request('GET', '/api/dashboard/stats/')
+
+    def hierarchy(self):
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        response = self._request('GET', '/api/datacenters/hierarchy/', headers=headers)
+        self.etag = response.headers.get('ETag', self.etag)
+        return response
+
+    def history(self):
+        """Page suivante de l'historique des commandes d'un firewall (lien 'next' du curseur)."""
+        if self.history_next and self.history_pages < HISTORY_PAGES:
+            response = self.session.get(self.history_next, timeout=HTTP_TIMEOUT)
+        elif self.history_firewall_ids:
+            self.history_pages = 0
+            response = self._request('GET', '/api/command/commands/get_firewall_commands/',
+                                     params={'firewall_id': self.rng.choice(self.history_firewall_ids)})
+        else:
+            self.history_pages = 0
+            response = self._request('GET', '/api/command/commands/')
+        self.history_pages += 1
+        self.history_next = response.json().get('next') if response.status_code == 200 else None
+        return response
+
+    def csv_import(self):
+        # Mêmes noms et adresses décalées à chaque envoi : le premier crée, les suivants mettent à jour
+        self.uploads += 1
+        lines = ['name,ip_address'] + [
+            f'LOADTEST-CSV-{self.index:03d}-{i:03d},198.19.{self.index % 256}.{(i + self.uploads) % 254 + 1}'
+            for i in range(CSV_ROWS)
+        ]
+        upload = io.BytesIO('\n'.join(lines).encode())
+        return self._request('POST', '/api/firewalls/upload-csv/',
+                             files={'file': ('loadtest.csv', upload, 'text/csv')},
+                             data={'firewall_type': str(self.firewall_type_id)})
+
+    def bulk_job(self):
+        """Sauvegarde de config en masse puis polling jusqu'à la fin du job."""
+        response = self._request('POST', '/api/command/commands/save_bulk_config/', json={
+            'firewall_ids': self.device_firewall_ids, 'command': 'show full-configuration'
+        })
+        if response.status_code != 200:
+            return response
+        task_id = response.json()['task_id']
+        deadline = time.monotonic() + JOB_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(JOB_POLL_INTERVAL)
+            status_response = self._request('GET', '/api/command/commands/check_task_status/',
+                                            params={'task_id': task_id})
+            if status_response.status_code != 200:
+                return status_response
+            if status_response.json().get('status') in ('completed', 'failed'):
+                return status_response
+        raise TimeoutError(f"Task {task_id} not finished after {JOB_TIMEOUT}s")
+
+
+def _is_ok(action, response):
+    if action == 'bulk_job':
+        return response.status_code == 200 and response.json().get('status') == 'completed'
+    return response.status_code < 400
+
+
+def run_virtual_user(user, mix, stats, stop_at, think_time):
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < stop_at:
+        action = user.rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = getattr(user, action)()
+            latency = time.perf_counter() - start
+            stats.record(action, latency, ok=_is_ok(action, response), throttled=response.status_code == 429)
+        except Exception as e:
+            logger.debug(f"Virtual user {user.index}: {action} failed ({e})")
+            stats.record(action, time.perf_counter() - start, ok=False)
+        if think_time:
+            time.sleep(user.rng.uniform(0, 2 * think_time))
+
+
+def websocket_url(base_url, path):
+    parts = urlsplit(base_url)
+    scheme = 'wss' if parts.scheme == 'https' else 'ws'
+    return f'{scheme}://{parts.netloc}{path}'
+
+
+def terminal_session(base_url, token, firewall_id, command, stats, timeout=TERMINAL_TIMEOUT):
+    """Une session terminal : ouverture, connexion SSH, une commande, fermeture."""
+    url = websocket_url(base_url, f'/ws/terminal/{firewall_id}/?token={token}')
+    start = time.perf_counter()
+    try:
+        with WebSocketClient(url, timeout=timeout) as ws:
+            ws.send_json({'type': 'connect_ssh'})
+            while True:
+                message = ws.recv_json()
+                if message is None or message.get('type') == 'error':
+                    raise WebSocketError(f"SSH connection failed: {message}")
+                if message.get('type') == 'system' and message.get('content') == SSH_READY_MESSAGE:
+                    break
+            connected = time.perf_counter()
+            stats.record('terminal_connect', connected - start)
+
+            ws.send_json({'type': 'command', 'command': command})
+            while True:
+                message = ws.recv_json()
+                if message is None:
+                    raise WebSocketError('Closed before command completion')
+                if message.get('type') == 'pager':
+                    ws.send_json({'type': 'pager_action', 'action': 'page'})
+                elif message.get('type') == 'command_status' and message.get('status') == 'completed':
+                    break
+            stats.record('terminal_command', time.perf_counter() - connected)
+    except (OSError, WebSocketError, ValueError) as e:
+        logger.debug(f"Terminal session on {firewall_id} failed: {e}")
+        stats.record('terminal_connect', time.perf_counter() - start, ok=False)
+
+
+def run_terminal(base_url, token, firewall_ids, command, stats, stop_at, index):
+    rng = random.Random(index)
+    while time.monotonic() < stop_at:
+        terminal_session(base_url, token, rng.choice(firewall_ids), command, stats)
+
+
+def prepare_users(count, prefix, farm=None):
+    """
+    Jetons JWT des count premiers utilisateurs seedés et, si une ferme est
+    fournie, un firewall LOADTEST-FGT-* par faux boîtier pour chacun.
+    """
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from command_service.models import FirewallCommand
+    from datacenter_service.models import DataCenter
+    from firewall_service.models import Firewall, FirewallType
+    from .fixtures import load_users
+
+    users = list(load_users(prefix)[:count])
+    if len(users) < count:
+        raise ValueError(f"Only {len(users)} '{prefix}' users seeded, {count} requested")
+
+    prepared = []
+    for user in users:
+        firewall_type = FirewallType.objects.filter(owner=user).order_by('name').first()
+        device_ids = []
+        if farm is not None:
+            data_center, _ = DataCenter.objects.get_or_create(name=f'{LOAD_FIREWALL_PREFIX}-DC', owner=user)
+            device_type, _ = FirewallType.objects.get_or_create(
+                name='fortigate', data_center=data_center, owner=user, defaults={'attributes_schema': {}}
+            )
+            for device in farm.devices:
+                firewall, _ = Firewall.objects.update_or_create(
+                    name=f'{LOAD_FIREWALL_PREFIX}-{device.hostname}', owner=user,
+                    defaults={
+                        'ip_address': device.host,
+                        'ssh_port': device.port,
+                        'data_center': data_center,
+                        'firewall_type': device_type,
+                    },
+                )
+                device_ids.append(str(firewall.id))
+        history_ids = (
+            FirewallCommand.objects.filter(user=user, firewall__owner=user)
+            .order_by().values_list('firewall_id', flat=True).distinct()[:HISTORY_FIREWALLS]
+        )
+        prepared.append({
+            'user': user,
+            'token': str(AccessToken.for_user(user)),
+            'firewall_type_id': firewall_type.id if firewall_type else None,
+            'device_firewall_ids': device_ids,
+            'history_firewall_ids': [str(firewall_id) for firewall_id in history_ids],
+        })
+    return prepared
+
+
+# Lignes _sum/_count des histogrammes par endpoint exportés sur /metrics
+SERIES_RE = re.compile(
+    r'^(http_request_db_queries|http_request_db_seconds|http_requests_total)(_sum|_count)?'
+    r'\{endpoint="((?:[^"\\]|\\.)*)",method="([A-Z]+)"\} (\S+)$'
+)
+
+
+def query_counts(base_url, admin_token):
+    """
+    Requêtes SQL par endpoint selon l'instrumentation du serveur (None si
+    inactive). Lu sur /metrics, exempté de limitation de débit : le budget
+    de l'administrateur est déjà consommé par la charge.
+    """
+    try:
+        response = requests.get(f"{base_url.rstrip('/')}/metrics",
+                                headers={'Authorization': f'Bearer {admin_token}'}, timeout=HTTP_TIMEOUT)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    series = {}
+    for line in response.text.splitlines():
+        match = SERIES_RE.match(line)
+        if match:
+            name, suffix, endpoint, method, value = match.groups()
+            series.setdefault((endpoint, method), {})[name + (suffix or '')] = float(value)
+    if not series:
+        return None
+
+    def average(values, name, scale=1):
+        count = values.get(f'{name}_count')
+        return round(values.get(f'{name}_sum', 0) / count * scale, 2) if count else 0
+
+    rows = [
+        {
+            'endpoint': endpoint,
+            'method': method,
+            'requests': int(values.get('http_requests_total', 0)),
+            'queries_avg': average(values, 'http_request_db_queries'),
+            'db_time_ms_avg': average(values, 'http_request_db_seconds', 1000),
+        }
+        for (endpoint, method), values in series.items()
+    ]
+    return sorted(rows, key=lambda row: row['queries_avg'] * row['requests'], reverse=True)
+
+
+def reset_query_counts(base_url, admin_token):
+    try:
+        requests.delete(f"{base_url.rstrip('/')}/api/metrics/endpoints/",
+                        headers={'Authorization': f'Bearer {admin_token}'}, timeout=HTTP_TIMEOUT)
+    except requests.RequestException:
+        pass
+
+
+def run(base_url, prepared, mix, duration, think_time=0.0, terminals=0,
+        terminal_command='show full-configuration', admin_token=None):
+    """Lance les utilisateurs virtuels et les terminaux pendant duration secondes."""
+    device_ids = [fw for entry in prepared for fw in entry['device_firewall_ids']]
+    if not device_ids:
+        mix = {name: weight for name, weight in mix.items() if name not in DEVICE_ACTIONS}
+        terminals = 0
+    if not mix and not terminals:
+        raise ValueError('Nothing to run: the mix needs fake devices (--fake-devices)')
+
+    if admin_token:
+        reset_query_counts(base_url, admin_token)
+    stats = LoadStats()
+    stop_at = time.monotonic() + duration
+    threads = []
+    if mix:
+        for index, entry in enumerate(prepared):
+            user = VirtualUser(base_url, entry['token'], entry['firewall_type_id'],
+                               entry['device_firewall_ids'], index, entry['history_firewall_ids'])
+            threads.append(threading.Thread(target=run_virtual_user,
+                                            args=(user, mix, stats, stop_at, think_time), daemon=True))
+    for index in range(terminals):
+        entry = prepared[index % len(prepared)]
+        threads.append(threading.Thread(
+            target=run_terminal,
+            args=(base_url, entry['token'], entry['device_firewall_ids'], terminal_command, stats, stop_at, index),
+            daemon=True,
+        ))
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    actions = stats.report(wall)
+    return {
+        'wall_s': round(wall, 3),
+        'virtual_users': len(prepared) if mix else 0,
+        'terminals': terminals,
+        'mix': mix,
+        'total_requests': sum(row['requests'] for row in actions),
+        'throughput_per_s': round(sum(row['requests'] for row in actions) / wall, 2) if wall else None,
+        'actions': actions,
+        'queries': query_counts(base_url, admin_token) if admin_token else None,
+    }
@@ -0,0 +1,109 @@
+"""
+Profil de démarrage : django.setup() puis chargement de l'application
+(WSGI + URLconf, comme au premier appel d'un worker gunicorn ou de
+l'exécutable, ou ASGI avec le routage WebSocket) dans des interpréteurs
+neufs. Durées à froid mesurées sans instrumentation, puis un passage
+avec -X importtime pour la répartition par module et par paquet.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+# Bibliothèques lourdes qui ne doivent être chargées qu'à la première utilisation
+HEAVY_MODULES = ('pandas', 'numpy', 'paramiko', 'pythonping', 'openpyxl', 'xlsxwriter')
+STARTUP_TIMEOUT = 120  # seconds
+
+_SCRIPT = """
+import json, os, sys, threading
+import django
+django.setup()
+from django.conf import settings
+if {target!r} == 'asgi':
+    import firewallbackend.asgi
+else:
+    from django.urls import get_resolver
+    import firewallbackend.wsgi
+    get_resolver().url_patterns
+print(json.dumps({{
+    'threads': sorted(t.name for t in threading.enumerate() if t is not threading.main_thread()),
+    'heavy': [name for name in {heavy!r} if name in sys.modules],
+    'modules': len(sys.modules),
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Lignes de -X importtime : [(module, self µs, cumulé µs, profondeur)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def by_package(rows):
+    """Temps d'import propre cumulé par paquet racine, en ms."""
+    totals = {}
+    for name, self_us, _, _ in rows:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return {package: round(us / 1000, 1) for package, us in sorted(totals.items(), key=lambda item: -item[1])}
+
+
+def _run(target, workers, importtime=False):
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = os.environ.get('DJANGO_SETTINGS_MODULE', 'firewallbackend.settings')
+    env['BACKGROUND_WORKERS_ENABLED'] = 'True' if workers else 'False'
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', _SCRIPT.format(target=target, heavy=HEAVY_MODULES)]
+    start = time.perf_counter()
+    process = subprocess.run(command, cwd=settings.BASE_DIR, env=env, capture_output=True,
+                             text=True, timeout=STARTUP_TIMEOUT)
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"Startup failed ({target}):\n{process.stderr[-2000:]}")
+    # Dernière ligne : le rapport JSON du script (les logs passent avant)
+    report = json.loads(process.stdout.strip().splitlines()[-1])
+    return elapsed, report, process.stderr
+
+
+def profile(target='wsgi', runs=3, workers=True, top=15):
+    """
+    runs démarrages à froid chronométrés, puis un démarrage -X importtime.
+    Retourne durées, modules lourds chargés, threads démarrés et les plus
+    gros imports.
+    """
+    durations = []
+    for _ in range(runs):
+        elapsed, report, _ = _run(target, workers)
+        durations.append(elapsed)
+    _, report, stderr = _run(target, workers, importtime=True)
+    rows = parse_importtime(stderr)
+    packages = by_package(rows)
+    return {
+        'target': target,
+        'workers': workers,
+        'runs': runs,
+        'median_s': round(statistics.median(durations), 3) if durations else None,
+        'min_s': round(min(durations), 3) if durations else None,
+        'import_ms': round(sum(row[1] for row in rows) / 1000, 1),
+        'modules': report['modules'],
+        'heavy_loaded': report['heavy'],
+        'threads': report['threads'],
+        'packages': dict(list(packages.items())[:top]),
+        'slowest': [
+            {'module': name, 'cumulative_ms': round(cumulative / 1000, 1)}
+            for name, _, cumulative, depth in sorted(rows, key=lambda row: -row[2]) if depth == 0
+        ][:top],
+    }
@@ -0,0 +1,135 @@
+"""
+Client websocket minimal (RFC 6455, texte uniquement, bloquant) pour les tests
+de charge du terminal, sans dépendance supplémentaire.
+"""
+
+import base64
+import json
+import os
+import socket
+import struct
+from urllib.parse import urlsplit
+
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class WebSocketError(Exception):
+    pass
+
+
+class WebSocketClient:
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        if parts.scheme != 'ws':
+            raise WebSocketError(f"Unsupported scheme: {parts.scheme}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.resource = parts.path + (f'?{parts.query}' if parts.query else '')
+        self.timeout = timeout
+        self.sock = None
+        self._buffer = b''
+        # Octets reçus (trames incluses), pour le débit
+        self.bytes_received = 0
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        key = base64.b64encode(os.urandom(16)).decode()
+        request = (
+            f'GET {self.resource} HTTP/1.1\r\n'
+            f'Host: {self.host}:{self.port}\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Key: {key}\r\n'
+            'Sec-WebSocket-Version: 13\r\n'
+            f'Origin: http://{self.host}:{self.port}\r\n\r\n'
+        )
+        self.sock.sendall(request.encode())
+        while b'\r\n\r\n' not in self._buffer:
+            self._fill()
+        head, self._buffer = self._buffer.split(b'\r\n\r\n', 1)
+        status_line = head.split(b'\r\n', 1)[0].decode(errors='replace')
+        if ' 101 ' not in status_line + ' ':
+            raise WebSocketError(f"Handshake refused: {status_line}")
+        return self
+
+    def close(self):
+        if self.sock is None:
+            return
+        try:
+            self._send_frame(OP_CLOSE, struct.pack('!H', 1000))
+        except OSError:
+            pass
+        self.sock.close()
+        self.sock = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _fill(self):
+        data = self.sock.recv(65536)
+        if not data:
+            raise WebSocketError('Connection closed by server')
+        self.bytes_received += len(data)
+        self._buffer += data
+
+    def _read(self, size):
+        while len(self._buffer) < size:
+            self._fill()
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _send_frame(self, opcode, payload):
+        # Les trames du client sont toujours masquées
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack('!H', length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack('!Q', length)
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.sock.sendall(header + mask + masked)
+
+    def send_json(self, data):
+        self._send_frame(OP_TEXT, json.dumps(data).encode())
+
+    def recv(self):
+        """Prochain message (str ou bytes) ; None si le serveur ferme."""
+        fragments, message_opcode = [], None
+        while True:
+            first, second = self._read(2)
+            fin, opcode = first & 0x80, first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', self._read(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', self._read(8))[0]
+            mask = self._read(4) if second & 0x80 else None
+            payload = self._read(length)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+            if opcode == OP_PING:
+                self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                return None
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+            fragments.append(payload)
+            if fin:
+                data = b''.join(fragments)
+                return data.decode('utf-8', errors='replace') if message_opcode == OP_TEXT else data
+
+    def recv_json(self):
+        message = self.recv()
+        if message is None:
+            return None
+        return json.loads(message)
@@ -0,0 +1,248 @@
+"""
+Instrumentation des requêtes HTTP (activée par INSTRUMENTATION_ENABLED).
+
+Pour chaque vue : temps total, nombre et temps des requêtes SQL, temps passé
+dans paramiko et taille de la réponse, agrégés par endpoint dans un Registry
+dédié (mêmes histogrammes sans verrou que les métriques applicatives). Les
+requêtes lentes sont journalisées avec leurs requêtes SQL les plus coûteuses.
+"""
+
+import contextvars
+import functools
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+
+from .lazy import when_imported
+from .registry import LATENCY_BUCKETS, Registry, histogram_quantile
+
+logger = logging.getLogger(__name__)
+
+# Au-delà, la requête est journalisée comme lente
+SLOW_REQUEST_THRESHOLD = 1.0  # seconds
+# Nombre de requêtes SQL gardées dans le journal des requêtes lentes
+SLOW_QUERY_TOP_N = 5
+# Nombre de requêtes lentes conservées pour le rapport
+SLOW_LOG_SIZE = 50
+SQL_MAX_LENGTH = 500
+
+# Bornes des histogrammes
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+
+
+class RequestRecord:
+    """Mesures d'une requête en cours."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+        self.ssh_time = 0.0
+        self._slowest = []
+
+    def add_query(self, sql, duration):
+        self.query_count += 1
+        self.query_time += duration
+        entry = (duration, self.query_count, sql[:SQL_MAX_LENGTH])
+        if len(self._slowest) < SLOW_QUERY_TOP_N:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    def slowest_queries(self):
+        return [
+            {'duration_ms': round(duration * 1000, 2), 'sql': sql}
+            for duration, _, sql in sorted(self._slowest, reverse=True)
+        ]
+
+
+_current_record = contextvars.ContextVar('request_record', default=None)
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrapper : chronomètre chaque requête SQL."""
+    record = _current_record.get()
+    if record is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record.add_query(sql, time.perf_counter() - start)
+
+
+# Métriques par (endpoint, méthode)
+COUNTERS = (
+    ('http_requests_total', 'requests', 'HTTP requests by endpoint'),
+    ('http_requests_errors_total', 'errors', 'HTTP requests answered with a 5xx status'),
+)
+HISTOGRAMS = (
+    ('http_request_duration_seconds', 'duration', 'Wall time of HTTP requests', LATENCY_BUCKETS),
+    ('http_request_db_seconds', 'db_time', 'Time spent in SQL queries per request', LATENCY_BUCKETS),
+    ('http_request_db_queries', 'query_count', 'SQL queries per request', QUERY_COUNT_BUCKETS),
+    ('http_request_ssh_seconds', 'ssh_time', 'Time spent in paramiko calls per request', LATENCY_BUCKETS),
+    ('http_response_size_bytes', 'response_size', 'Size of HTTP responses', SIZE_BUCKETS),
+)
+LABELS = ('endpoint', 'method')
+
+
+def _summary(value, scale=1):
+    _, total, count = value
+    if not count:
+        return None
+    p50, p95 = histogram_quantile(value, 0.5), histogram_quantile(value, 0.95)
+    return {
+        'avg': round(total / count * scale, 3),
+        'p50_le': p50 * scale if p50 != float('inf') else None,
+        'p95_le': p95 * scale if p95 != float('inf') else None,
+    }
+
+
+class Instrumentation:
+    """Agrégats par (endpoint, méthode), tenus dans un Registry propre."""
+
+    def __init__(self):
+        self.registry = Registry()
+        self.metrics = {
+            attribute: self.registry.counter(name, help_text, LABELS)
+            for name, attribute, help_text in COUNTERS
+        }
+        self.metrics.update({
+            attribute: self.registry.histogram(name, help_text, LABELS, buckets=buckets)
+            for name, attribute, help_text, buckets in HISTOGRAMS
+        })
+        self.slow_requests = deque(maxlen=SLOW_LOG_SIZE)
+
+    def record(self, endpoint, method, status_code, duration, record, response_size):
+        metrics = self.metrics
+        metrics['requests'].labels(endpoint, method).inc()
+        # Série créée même sans erreur, pour exporter 0
+        errors = metrics['errors'].labels(endpoint, method)
+        if status_code >= 500:
+            errors.inc()
+        metrics['duration'].labels(endpoint, method).observe(duration)
+        metrics['db_time'].labels(endpoint, method).observe(record.query_time)
+        metrics['query_count'].labels(endpoint, method).observe(record.query_count)
+        metrics['ssh_time'].labels(endpoint, method).observe(record.ssh_time)
+        if response_size is not None:
+            metrics['response_size'].labels(endpoint, method).observe(response_size)
+
+        if duration >= SLOW_REQUEST_THRESHOLD:
+            slow = {
+                'endpoint': endpoint,
+                'method': method,
+                'status': status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'queries': record.query_count,
+                'db_time_ms': round(record.query_time * 1000, 1),
+                'ssh_time_ms': round(record.ssh_time * 1000, 1),
+                'top_queries': record.slowest_queries(),
+                'timestamp': time.time(),
+            }
+            self.slow_requests.append(slow)
+            logger.warning(
+                f"Slow request {method} {endpoint}: {slow['duration_ms']} ms, "
+                f"{record.query_count} queries ({slow['db_time_ms']} ms), SSH {slow['ssh_time_ms']} ms"
+            )
+            for query in slow['top_queries']:
+                logger.warning(f"  {query['duration_ms']} ms: {query['sql']}")
+
+    def snapshot(self):
+        """{(endpoint, méthode): {métrique: valeur}} ; un histogramme vaut (cumul, somme, nombre)."""
+        snapshot = {}
+        for attribute, metric in self.metrics.items():
+            for pairs, value in metric.collect():
+                key = tuple(value for _, value in pairs)
+                snapshot.setdefault(key, {})[attribute] = value
+        return snapshot
+
+    def report(self):
+        empty = ([], 0, 0)
+        endpoints = []
+        for (endpoint, method), values in self.snapshot().items():
+            endpoints.append({
+                'endpoint': endpoint,
+                'method': method,
+                'requests': values.get('requests', 0),
+                'errors': values.get('errors', 0),
+                'duration_ms': _summary(values.get('duration', empty), 1000),
+                'db_time_ms': _summary(values.get('db_time', empty), 1000),
+                'queries': _summary(values.get('query_count', empty)),
+                'ssh_time_ms': _summary(values.get('ssh_time', empty), 1000),
+                'response_bytes': _summary(values.get('response_size', empty)),
+            })
+        endpoints.sort(key=lambda row: row['duration_ms']['avg'] * row['requests'] if row['duration_ms'] else 0,
+                       reverse=True)
+        return {'endpoints': endpoints, 'slow_requests': list(self.slow_requests)}
+
+    def reset(self):
+        for metric in self.metrics.values():
+            metric.clear()
+        self.slow_requests.clear()
+
+
+instrumentation = Instrumentation()
+
+
+def start_request():
+    record = RequestRecord()
+    return record, _current_record.set(record)
+
+
+def end_request(token):
+    _current_record.reset(token)
+
+
+# --- paramiko ---
+
+PARAMIKO_METHODS = {
+    'SSHClient': ('connect', 'exec_command', 'invoke_shell', 'close'),
+    'Channel': ('recv', 'send', 'sendall', 'recv_exit_status'),
+}
+
+_paramiko_installed = False
+_install_lock = threading.Lock()
+
+
+def _timed(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        record = _current_record.get()
+        if record is None:
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record.ssh_time += time.perf_counter() - start
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def _hook_paramiko(paramiko):
+    for class_name, methods in PARAMIKO_METHODS.items():
+        cls = getattr(paramiko, class_name)
+        for name in methods:
+            method = getattr(cls, name)
+            if not getattr(method, '__instrumented__', False):
+                setattr(cls, name, _timed(method))
+
+
+def install_paramiko_hooks():
+    """Chronomètre les appels paramiko faits pendant une requête instrumentée (dès son import)."""
+    global _paramiko_installed
+    with _install_lock:
+        if _paramiko_installed:
+            return
+        when_imported('paramiko', _hook_paramiko)
+        _paramiko_installed = True
+
+
+# --- Export Prometheus ---
+
+
+def render_prometheus(stats=None):
+    """Agrégats par endpoint au format texte Prometheus 0.0.4."""
+    return (stats or instrumentation).registry.render()
@@ -0,0 +1,53 @@
+"""
+Hooks posés au premier import d'un module : paramiko n'est plus importé au
+démarrage, l'instrumentation SSH s'installe quand il est chargé.
+"""
+
+import importlib.abc
+import importlib.util
+import sys
+import threading
+
+_lock = threading.Lock()
+
+
+class _PostImportFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, name):
+        self.name = name
+        self.callbacks = []
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != self.name:
+            return None
+        with _lock:
+            if self in sys.meta_path:
+                sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(fullname)
+        if spec is None or spec.loader is None:
+            return spec
+        exec_module = spec.loader.exec_module
+        callbacks = self.callbacks
+
+        def exec_and_hook(module):
+            exec_module(module)
+            for callback in callbacks:
+                callback(module)
+
+        spec.loader.exec_module = exec_and_hook
+        return spec
+
+
+def when_imported(name, callback):
+    """callback(module) maintenant si name est déjà importé, sinon juste après son import."""
+    with _lock:
+        module = sys.modules.get(name)
+        if module is None:
+            for finder in sys.meta_path:
+                if isinstance(finder, _PostImportFinder) and finder.name == name:
+                    finder.callbacks.append(callback)
+                    return
+            finder = _PostImportFinder(name)
+            finder.callbacks.append(callback)
+            sys.meta_path.insert(0, finder)
+            return
+    callback(module)
@@ -0,0 +1,57 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from metrics_service.benchmark import database, fixtures
+
+
+class Command(BaseCommand):
+    help = (
+        'Valide le profil de base (DATABASE_PROFILE) sur les données de seed_load_fixtures : '
+        'réglages effectifs, contention écritures/lectures entre threads, export en flux '
+        'et réutilisation des connexions. Écrit (puis supprime) des lignes d\'historique marquées.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Threads d\'écriture (défaut: 4)')
+        parser.add_argument('--readers', type=int, default=8, help='Threads de lecture (défaut: 8)')
+        parser.add_argument('--duration', type=float, default=10, help='Durée de la contention en secondes (défaut: 10)')
+        parser.add_argument('--chunk-size', type=int, default=database.EXPORT_CHUNK_SIZE,
+                            help=f'Lignes par lot de l\'export en flux (défaut: {database.EXPORT_CHUNK_SIZE})')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Cycles de requête du test de réutilisation des connexions (défaut: 50)')
+        parser.add_argument('--prefix', default=fixtures.DEFAULT_PREFIX, help='Préfixe des utilisateurs seedés')
+        parser.add_argument('--json', dest='json_path', help='Écrire le rapport dans ce fichier JSON')
+
+    def handle(self, *args, **options):
+        if not fixtures.load_users(options['prefix']).exists():
+            raise CommandError(f"Aucun utilisateur '{options['prefix']}' : lancer d'abord seed_load_fixtures")
+        if options['verbosity'] < 2:
+            logging.disable(logging.INFO)
+
+        report = {'profile': database.profile_report()}
+        self._write_section('profile', report['profile'])
+
+        self.stdout.write(f"Contention ({options['writers']} writers, {options['readers']} readers)...")
+        report['contention'] = database.contention(
+            writers=options['writers'], readers=options['readers'],
+            duration=options['duration'], prefix=options['prefix'],
+        )
+        for kind in ('write', 'read'):
+            self._write_section(f'contention {kind}', report['contention'][kind])
+
+        report['export'] = database.export(prefix=options['prefix'], chunk_size=options['chunk_size'])
+        for mode, values in report['export'].items():
+            self._write_section(f'export {mode}', values)
+
+        report['connection_reuse'] = database.connection_reuse(options['requests'])
+        self._write_section('connection reuse', report['connection_reuse'])
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['json_path']}"))
+
+    def _write_section(self, title, values):
+        self.stdout.write(f"{title:<20} " + '  '.join(f'{key}={value}' for key, value in values.items()))
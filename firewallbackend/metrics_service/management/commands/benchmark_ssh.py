@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from metrics_service.benchmark.fake_fortigate import FakeFortiGateFarm, FortiGateProfile
+from metrics_service.benchmark.harness import SCENARIOS, BenchmarkEnvironment, redirect_home
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark SSH hors ligne : démarre N faux FortiGate locaux et mesure sauvegarde de config, '
+        'daily check, interface monitor et execute-template (débit, p50/p99). '
+        'Utilise une base jetable, jamais la base configurée.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--devices', type=int, default=10, help='Nombre de faux FortiGate (défaut: 10)')
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help='Latence par commande en secondes (défaut: 0.05)')
+        parser.add_argument('--config-lines', type=int, default=5000,
+                            help='Lignes de show full-configuration (défaut: 5000)')
+        parser.add_argument('--page-lines', type=int, default=100,
+                            help='Lignes par page --More-- en mode shell, 0 pour désactiver (défaut: 100)')
+        parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS),
+                            help='Scénarios à exécuter (défaut: tous)')
+        parser.add_argument('--iterations', type=int, default=1,
+                            help='Répétitions des scénarios de jobs et de monitoring (défaut: 1)')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Requêtes execute-template (défaut: 50)')
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help='Requêtes execute-template simultanées (défaut: 10)')
+        parser.add_argument('--json', dest='json_path', help='Écrire les résultats dans ce fichier JSON')
+
+    def handle(self, *args, **options):
+        if options['devices'] < 1:
+            raise CommandError('--devices doit être au moins 1')
+        if options['verbosity'] < 2:
+            # Les services journalisent chaque commande en INFO
+            logging.disable(logging.INFO)
+        # Aucune alerte ne doit partir par SMTP pendant un benchmark
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+        profile = FortiGateProfile(
+            latency=options['latency'],
+            config_lines=options['config_lines'],
+            page_lines=options['page_lines'],
+        )
+        scenario_options = {
+            'config_save': {'iterations': options['iterations']},
+            'daily_check': {'iterations': options['iterations']},
+            'interface_monitor': {'iterations': options['iterations']},
+            'execute_template': {'requests': options['requests'], 'concurrency': options['concurrency']},
+        }
+
+        results = []
+        with tempfile.TemporaryDirectory(prefix='fw-benchmark-') as workdir, redirect_home(workdir):
+            old_name = self._create_database(workdir)
+            try:
+                with FakeFortiGateFarm(options['devices'], profile) as farm:
+                    environment = BenchmarkEnvironment(farm)
+                    for name in options['scenarios']:
+                        self.stdout.write(f"Running {name}...")
+                        result = SCENARIOS[name](environment, **scenario_options[name]).as_dict()
+                        results.append(result)
+                        self._write_row(result)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({'options': {key: options[key] for key in (
+                    'devices', 'latency', 'config_lines', 'page_lines', 'iterations', 'requests', 'concurrency'
+                )}, 'results': results}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['json_path']}"))
+
+    def _create_database(self, workdir):
+        """Base jetable (fichier temporaire en SQLite) ; retourne le nom de la base d'origine."""
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'benchmark.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        return old_name
+
+    def _write_row(self, result):
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['scenario']}: {result['operations']} {result['units']} in {result['wall_s']} s "
+            f"({result['throughput_per_s']}/s), p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, "
+            f"{result['errors']} errors | SSH sessions: {result['ssh_sessions']}, "
+            f"p50 {result['session_p50_ms']} ms, p99 {result['session_p99_ms']} ms"
+        ))
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from metrics_service.benchmark import startup
+
+
+class Command(BaseCommand):
+    help = (
+        'Profil de démarrage dans des interpréteurs neufs : durée à froid de django.setup() et du '
+        'chargement de l\'application, modules lourds chargés, threads démarrés et répartition '
+        '-X importtime par paquet.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=('wsgi', 'asgi'), default='wsgi',
+                            help='Application chargée (défaut: wsgi, comme run_app.py et gunicorn)')
+        parser.add_argument('--runs', type=int, default=3, help='Démarrages chronométrés (défaut: 3)')
+        parser.add_argument('--no-workers', action='store_true',
+                            help='Démarrer avec BACKGROUND_WORKERS_ENABLED=False')
+        parser.add_argument('--top', type=int, default=15, help='Paquets et modules affichés (défaut: 15)')
+        parser.add_argument('--json', dest='json_path', help='Écrire le rapport dans ce fichier JSON')
+
+    def handle(self, *args, **options):
+        report = startup.profile(
+            target=options['target'], runs=options['runs'],
+            workers=not options['no_workers'], top=options['top'],
+        )
+        self.stdout.write(
+            f"{report['target']}: médiane {report['median_s']} s (min {report['min_s']} s) sur {report['runs']} "
+            f"démarrages, imports {report['import_ms']} ms, {report['modules']} modules"
+        )
+        self.stdout.write(f"modules lourds chargés : {', '.join(report['heavy_loaded']) or 'aucun'}")
+        self.stdout.write(f"threads démarrés : {', '.join(report['threads']) or 'aucun'}")
+        self.stdout.write('imports par paquet (ms) :')
+        for package, ms in report['packages'].items():
+            self.stdout.write(f"  {package:<35} {ms:>8}")
+        self.stdout.write('imports de premier niveau les plus lents (ms, cumulé) :')
+        for row in report['slowest']:
+            self.stdout.write(f"  {row['module']:<35} {row['cumulative_ms']:>8}")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['json_path']}"))
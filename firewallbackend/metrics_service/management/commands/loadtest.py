@@ -0,0 +1,96 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from metrics_service.benchmark import fixtures
+from metrics_service.benchmark.fake_fortigate import FakeFortiGateFarm, FortiGateProfile
+from metrics_service.benchmark.loadtest import MIXES, parse_mix, prepare_users, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Test de charge REST et websocket contre une instance déjà lancée (run_asgi.py, run_app.py) '
+        'avec les utilisateurs créés par seed_load_fixtures : débit, p50/p95/p99 par action, '
+        'erreurs, 429 et requêtes SQL par endpoint (INSTRUMENTATION_ENABLED côté serveur).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='URL du serveur testé')
+        parser.add_argument('--users', type=int, default=10, help='Utilisateurs virtuels (défaut: 10)')
+        parser.add_argument('--duration', type=float, default=30, help='Durée en secondes (défaut: 30)')
+        parser.add_argument('--mix', default='mixed',
+                            help=f"Mix d'actions : {', '.join(MIXES)} ou 'action=poids,...' (défaut: mixed)")
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help='Pause moyenne entre deux actions en secondes (défaut: 0)')
+        parser.add_argument('--terminals', type=int, default=0,
+                            help='Sessions terminal websocket simultanées (défaut: 0)')
+        parser.add_argument('--terminal-command', default='show full-configuration',
+                            help='Commande envoyée par chaque session terminal')
+        parser.add_argument('--fake-devices', type=int, default=0,
+                            help='Faux FortiGate locaux pour les jobs SSH et le terminal (défaut: 0)')
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help='Latence des faux FortiGate par commande (défaut: 0.05)')
+        parser.add_argument('--config-lines', type=int, default=5000,
+                            help='Lignes de show full-configuration (défaut: 5000)')
+        parser.add_argument('--prefix', default=fixtures.DEFAULT_PREFIX, help='Préfixe des utilisateurs seedés')
+        parser.add_argument('--json', dest='json_path', help='Écrire le rapport dans ce fichier JSON')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['terminals'] and not options['fake_devices']:
+            raise CommandError('--terminals nécessite --fake-devices')
+        if options['verbosity'] < 2:
+            logging.disable(logging.INFO)
+
+        farm = None
+        if options['fake_devices']:
+            farm = FakeFortiGateFarm(options['fake_devices'], FortiGateProfile(
+                latency=options['latency'], config_lines=options['config_lines'], page_lines=0,
+            )).start()
+        try:
+            try:
+                prepared = prepare_users(options['users'], options['prefix'], farm)
+            except ValueError as e:
+                raise CommandError(f"{e} : lancer seed_load_fixtures d'abord")
+            admin = next((entry for entry in prepared if entry['user'].is_staff), None)
+            self.stdout.write(f"Load test on {options['base_url']} for {options['duration']} s...")
+            report = run(
+                options['base_url'], prepared, mix, options['duration'],
+                think_time=options['think_time'],
+                terminals=options['terminals'],
+                terminal_command=options['terminal_command'],
+                admin_token=admin['token'] if admin else None,
+            )
+        finally:
+            if farm is not None:
+                farm.stop()
+
+        self._write_report(report)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['json_path']}"))
+
+    def _write_report(self, report):
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['total_requests']} requests in {report['wall_s']} s ({report['throughput_per_s']}/s)"
+        ))
+        for row in report['actions']:
+            self.stdout.write(
+                f"  {row['action']:<18} {row['requests']:>6} req {row['rps']:>8}/s  "
+                f"p50 {row['p50_ms']} ms  p95 {row['p95_ms']} ms  p99 {row['p99_ms']} ms  "
+                f"{row['errors']} errors  {row['throttled']} throttled"
+            )
+        if report['queries'] is None:
+            self.stdout.write('SQL queries: unavailable (INSTRUMENTATION_ENABLED off on the server?)')
+            return
+        self.stdout.write('SQL queries per request:')
+        for row in report['queries']:
+            self.stdout.write(
+                f"  {row['method']:<6} {row['endpoint']:<50} {row['requests']:>6} req  "
+                f"{row['queries_avg']} queries  {row['db_time_ms_avg']} ms DB"
+            )
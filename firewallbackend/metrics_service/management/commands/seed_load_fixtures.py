@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from metrics_service.benchmark import fixtures
+
+
+class Command(BaseCommand):
+    help = (
+        'Génère un jeu de données volumineux et déterministe pour les tests de charge '
+        '(utilisateurs préfixés, datacenters, firewalls, alertes, commandes, historique). '
+        'Écrit dans la base configurée : à lancer serveur arrêté.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Utilisateurs, le premier est staff (défaut: 10)')
+        parser.add_argument('--datacenters', type=int, default=200, help='Datacenters (défaut: 200)')
+        parser.add_argument('--firewalls', type=int, default=5000, help='Firewalls (défaut: 5000)')
+        parser.add_argument('--alerts', type=int, default=500, help='Alertes d\'interface (défaut: 500)')
+        parser.add_argument('--commands', type=int, default=20000, help='Commandes exécutées (défaut: 20000)')
+        parser.add_argument('--history', type=int, default=10000, help='Entrées d\'historique (défaut: 10000)')
+        parser.add_argument('--prefix', default=fixtures.DEFAULT_PREFIX,
+                            help=f'Préfixe des utilisateurs (défaut: {fixtures.DEFAULT_PREFIX})')
+        parser.add_argument('--password', default=fixtures.DEFAULT_PASSWORD,
+                            help='Mot de passe (compte et SSH) des utilisateurs')
+        parser.add_argument('--seed', type=int, default=42, help='Graine aléatoire (défaut: 42)')
+        parser.add_argument('--purge', action='store_true',
+                            help='Supprimer d\'abord les utilisateurs préfixés et leurs données')
+        parser.add_argument('--purge-only', action='store_true', help='Supprimer sans regénérer')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['purge'] or options['purge_only']:
+            count = fixtures.purge(prefix)
+            self.stdout.write(f"{count} utilisateurs '{prefix}' supprimés")
+            if options['purge_only']:
+                return
+        if options['users'] < 1:
+            raise CommandError('--users doit être au moins 1')
+
+        start = time.perf_counter()
+        counts = fixtures.seed(
+            users=options['users'],
+            datacenters=options['datacenters'],
+            firewalls=options['firewalls'],
+            alerts=options['alerts'],
+            commands=options['commands'],
+            history=options['history'],
+            prefix=prefix,
+            password=options['password'],
+            seed_value=options['seed'],
+        )
+        summary = ', '.join(f'{value} {key}' for key, value in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Créés en {time.perf_counter() - start:.1f} s : {summary}"))
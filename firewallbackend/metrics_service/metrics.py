@@ -0,0 +1,163 @@
+"""
+Métriques applicatives exportées sur /metrics.
+
+SSH (connexions, échecs, latence de handshake par firewall, connexions
+partagées des terminaux), durée des commandes, cycles de l'interface
+monitor, files des jobs en arrière-plan (sauvegarde de config, daily check,
+ping) et envoi d'emails.
+"""
+
+import functools
+import logging
+import threading
+import time
+
+from .lazy import when_imported
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+SSH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+COMMAND_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LAG_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+ALERT_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+EMAIL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+ssh_connects = registry.counter(
+    'ssh_connect_total', 'SSH connection attempts', ['host'])
+ssh_connect_failures = registry.counter(
+    'ssh_connect_failures_total', 'SSH connection attempts that raised', ['host', 'error'])
+ssh_handshake_seconds = registry.histogram(
+    'ssh_handshake_seconds', 'Duration of SSHClient.connect (TCP, key exchange, auth)', ['host'],
+    buckets=SSH_BUCKETS)
+
+command_duration_seconds = registry.histogram(
+    'command_duration_seconds', 'Duration of a command on a firewall, send to last output', ['source'],
+    buckets=COMMAND_BUCKETS)
+
+monitor_check_lag_seconds = registry.histogram(
+    'interface_monitor_check_lag_seconds', 'Delay between next_check and the actual check',
+    buckets=LAG_BUCKETS)
+monitor_alerts_per_cycle = registry.histogram(
+    'interface_monitor_alerts_per_cycle', 'Alerts checked by a monitoring cycle',
+    buckets=ALERT_COUNT_BUCKETS)
+monitor_cycle_seconds = registry.histogram(
+    'interface_monitor_cycle_seconds', 'Duration of a monitoring cycle', buckets=COMMAND_BUCKETS)
+monitor_last_cycle_max_lag = registry.gauge(
+    'interface_monitor_last_cycle_max_lag_seconds', 'Largest check lag of the last cycle')
+
+queue_depth = registry.gauge(
+    'job_queue_depth', 'Jobs waiting in a background queue', ['queue'])
+worker_alive = registry.gauge(
+    'job_worker_alive', 'Whether the background worker thread is running', ['queue'])
+worker_busy = registry.gauge(
+    'job_worker_busy', 'Jobs being processed by the background worker', ['queue'])
+worker_busy_seconds = registry.counter(
+    'job_worker_busy_seconds_total', 'Time spent processing jobs (rate() gives utilisation)', ['queue'])
+jobs_processed = registry.counter(
+    'jobs_processed_total', 'Background jobs processed', ['queue'])
+
+ssh_transports_open = registry.gauge(
+    'ssh_transports_open', 'Shared SSH connections held for terminals')
+ssh_transport_channels_open = registry.gauge(
+    'ssh_transport_channels_open', 'Shell channels open over the shared SSH connections')
+
+email_send_seconds = registry.histogram(
+    'email_send_seconds', 'Duration of EmailMessage.send', buckets=EMAIL_BUCKETS)
+email_send_failures = registry.counter(
+    'email_send_failures_total', 'EmailMessage.send calls that raised')
+
+
+# --- Jobs en arrière-plan ---
+
+def watch_queue(name, queue, thread=None):
+    """Expose la profondeur d'une Queue (et l'état de son worker) à chaque scrape."""
+    queue_depth.labels(queue=name).set_function(queue.qsize)
+    if thread is not None:
+        worker_alive.labels(queue=name).set_function(lambda: int(thread.is_alive()))
+
+
+def job_started(name):
+    worker_busy.labels(queue=name).inc()
+    return time.perf_counter()
+
+
+def job_finished(name, started):
+    worker_busy.labels(queue=name).dec()
+    worker_busy_seconds.labels(queue=name).inc(time.perf_counter() - started)
+    jobs_processed.labels(queue=name).inc()
+
+
+def watch_transports(transports):
+    """Connexions et canaux du registre de connexions SSH partagées, à chaque scrape."""
+    ssh_transports_open.labels().set_function(transports.transport_count)
+    ssh_transport_channels_open.labels().set_function(transports.channel_count)
+
+
+# --- Interface monitor ---
+
+def observe_monitor_cycle(now, next_checks, duration):
+    """Un cycle : retard de chaque alerte (now - next_check), nombre d'alertes, durée."""
+    max_lag = 0.0
+    for next_check in next_checks:
+        lag = max(0.0, (now - next_check).total_seconds())
+        monitor_check_lag_seconds.observe(lag)
+        max_lag = max(max_lag, lag)
+    monitor_alerts_per_cycle.observe(len(next_checks))
+    monitor_cycle_seconds.observe(duration)
+    monitor_last_cycle_max_lag.set(max_lag)
+
+
+# --- Hooks paramiko et email (installés dans MetricsServiceConfig.ready) ---
+
+_hooks_installed = False
+_install_lock = threading.Lock()
+
+
+def _measured_connect(connect):
+    @functools.wraps(connect)
+    def wrapper(self, *args, **kwargs):
+        host = str(args[0] if args else kwargs.get('hostname'))
+        ssh_connects.labels(host=host).inc()
+        start = time.perf_counter()
+        try:
+            result = connect(self, *args, **kwargs)
+        except Exception as e:
+            ssh_connect_failures.labels(host=host, error=type(e).__name__).inc()
+            raise
+        ssh_handshake_seconds.labels(host=host).observe(time.perf_counter() - start)
+        return result
+    return wrapper
+
+
+def _measured_send(send):
+    @functools.wraps(send)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return send(self, *args, **kwargs)
+        except Exception:
+            email_send_failures.inc()
+            raise
+        finally:
+            email_send_seconds.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def _hook_paramiko(paramiko):
+    paramiko.SSHClient.connect = _measured_connect(paramiko.SSHClient.connect)
+
+
+def install_hooks():
+    """
+    Mesure paramiko.SSHClient.connect et EmailMessage.send (send_mail compris).
+    paramiko est instrumenté à son premier import, pas au démarrage.
+    """
+    global _hooks_installed
+    with _install_lock:
+        if _hooks_installed:
+            return
+        from django.core.mail import EmailMessage
+        EmailMessage.send = _measured_send(EmailMessage.send)
+        when_imported('paramiko', _hook_paramiko)
+        _hooks_installed = True
@@ -0,0 +1,37 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .instrumentation import (
+    instrumentation, install_paramiko_hooks, query_wrapper, start_request, end_request
+)
+
+
+class InstrumentationMiddleware:
+    """
+    Mesure chaque requête (temps, SQL, SSH, taille de réponse).
+    Ajoutée au MIDDLEWARE seulement si INSTRUMENTATION_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_paramiko_hooks()
+
+    def __call__(self, request):
+        record, token = start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(query_wrapper))
+                response = self.get_response(request)
+        finally:
+            end_request(token)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match else 'unresolved'
+        size = None if response.streaming else len(response.content)
+        instrumentation.record(endpoint, request.method, response.status_code, duration, record, size)
+        return response
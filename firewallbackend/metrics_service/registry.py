@@ -0,0 +1,282 @@
+"""
+Registre de métriques au format Prometheus (compteurs, jauges, histogrammes).
+
+Chemin critique sans verrou : chaque thread écrit dans son propre fragment
+(threading.local), enregistré une seule fois sous verrou à sa première
+écriture. Un fragment n'a qu'un seul écrivain, les additions ne peuvent donc
+pas se perdre ; la lecture (scrape) additionne les fragments et replie ceux
+des threads terminés pour que leur nombre reste borné.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Bornes par défaut des histogrammes de durée
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def histogram_quantile(value, q):
+    """
+    Estimation d'un quantile à partir de la valeur d'un histogramme
+    (cumul, somme, nombre) : borne du premier bucket qui l'atteint.
+    """
+    cumulative, _, count = value
+    if not count:
+        return None
+    rank = q * count
+    for bound, total in cumulative:
+        if total >= rank:
+            return bound
+    return float('inf')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Shards:
+    """Valeurs réparties par thread : width nombres par fragment."""
+
+    def __init__(self, width):
+        self._width = width
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live = []
+        self._retired = [0] * width
+
+    def local(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = [0] * self._width
+            with self._lock:
+                self._live.append((threading.current_thread(), values))
+            return values
+
+    def total(self):
+        with self._lock:
+            alive = []
+            for thread, values in self._live:
+                if thread.is_alive():
+                    alive.append((thread, values))
+                else:
+                    # Plus aucun écrivain : le fragment peut être replié
+                    for i, value in enumerate(values):
+                        self._retired[i] += value
+            self._live = alive
+            total = list(self._retired)
+            for _, values in alive:
+                for i, value in enumerate(values):
+                    total[i] += value
+        return total
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount=1):
+        self._shards.local()[0] += amount
+
+    def value(self):
+        return self._shards.total()[0]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+        self._value = 0
+        self._function = None
+
+    def inc(self, amount=1):
+        self._shards.local()[0] += amount
+
+    def dec(self, amount=1):
+        self._shards.local()[0] -= amount
+
+    def set(self, value):
+        """Valeur absolue (à ne pas mélanger avec inc/dec sur la même jauge)."""
+        self._value = value
+
+    def set_function(self, function):
+        """Valeur calculée à chaque lecture (ex. queue.qsize)."""
+        self._function = function
+
+    def value(self):
+        if self._function is not None:
+            return self._function()
+        return self._value + self._shards.total()[0]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        # Un compteur par bucket (+Inf compris), puis somme et nombre
+        self._shards = _Shards(len(buckets) + 3)
+
+    def observe(self, value):
+        values = self._shards.local()
+        values[bisect.bisect_left(self._buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def value(self):
+        """(liste de (borne, nombre cumulé), somme, nombre)."""
+        total = self._shards.total()
+        cumulative, running = [], 0
+        for bound, count in zip(self._buckets + (float('inf'),), total[:-2]):
+            running += count
+            cumulative.append((bound, running))
+        return cumulative, total[-2], total[-1]
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def collect(self):
+        """Liste de (paires de labels, valeur)."""
+        return [
+            (tuple(zip(self.labelnames, key)), child.value())
+            for key, child in list(self._children.items())
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._children = {}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    """Ensemble nommé de métriques, rendu au format texte Prometheus 0.0.4."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with another type or labels")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for pairs, value in metric.collect():
+                if metric.kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(pairs)} {value}')
+                    continue
+                cumulative, total_sum, count = value
+                for bound, total in cumulative:
+                    bucket_pairs = pairs + (('le', _format_bound(bound)),)
+                    lines.append(f'{name}_bucket{_format_labels(bucket_pairs)} {total}')
+                lines.append(f'{name}_sum{_format_labels(pairs)} {total_sum}')
+                lines.append(f'{name}_count{_format_labels(pairs)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
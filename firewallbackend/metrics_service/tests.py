@@ -0,0 +1,352 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from queue import Queue
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from dailycheck_service import runner
+from . import instrumentation, metrics
+from .benchmark.fake_fortigate import FakeFortiGate, FortiGateProfile
+from .benchmark import fixtures, loadtest
+from .benchmark.harness import percentile
+from .benchmark.loadtest import MIXES, VirtualUser, parse_mix, prepare_users
+from .benchmark.startup import by_package, parse_importtime
+from .lazy import when_imported
+from .instrumentation import Instrumentation, RequestRecord, render_prometheus
+from .registry import Registry, histogram_quantile
+from .views import PROMETHEUS_CONTENT_TYPE
+
+
+class InstrumentationTests(SimpleTestCase):
+    def test_histogram_buckets_and_quantile(self):
+        """Test le cumul des buckets et l'estimation des quantiles"""
+        histogram = Registry().histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+        value = histogram.labels().value()
+        cumulative, _, count = value
+        self.assertEqual(cumulative, [(0.1, 1), (1.0, 3), (float('inf'), 4)])
+        self.assertEqual(histogram_quantile(value, 0.5), 1.0)
+        self.assertIsNone(histogram_quantile(([], 0, 0), 0.5))
+        self.assertEqual(count, 4)
+
+    def test_slow_request_keeps_top_queries(self):
+        """Test le journal des requêtes lentes avec les requêtes SQL les plus coûteuses"""
+        stats = Instrumentation()
+        record = RequestRecord()
+        for i in range(10):
+            record.add_query(f'SELECT {i}', i / 1000)
+
+        with self.assertLogs('metrics_service.instrumentation', level='WARNING'):
+            stats.record('firewall_service:firewall-list', 'GET', 200,
+                         instrumentation.SLOW_REQUEST_THRESHOLD + 1, record, 2048)
+
+        slow = stats.slow_requests[0]
+        self.assertEqual(slow['queries'], 10)
+        self.assertEqual(len(slow['top_queries']), instrumentation.SLOW_QUERY_TOP_N)
+        self.assertEqual(slow['top_queries'][0]['sql'], 'SELECT 9')
+
+        text = render_prometheus(stats)
+        self.assertIn('http_requests_total{endpoint="firewall_service:firewall-list",method="GET"} 1', text)
+        self.assertIn('http_requests_errors_total{endpoint="firewall_service:firewall-list",method="GET"} 0', text)
+        self.assertIn('http_request_db_queries_bucket{endpoint="firewall_service:firewall-list",'
+                      'method="GET",le="10.0"} 1', text)
+
+        report = stats.report()['endpoints'][0]
+        self.assertEqual((report['requests'], report['errors']), (1, 0))
+        self.assertEqual(report['queries'], {'avg': 10.0, 'p50_le': 10, 'p95_le': 10})
+        stats.reset()
+        self.assertEqual(stats.report()['endpoints'], [])
+
+
+class RegistryTests(SimpleTestCase):
+    def test_counter_sums_thread_shards(self):
+        """Test l'addition des fragments par thread, y compris ceux des threads terminés"""
+        counter = Registry().counter('jobs_total', 'Jobs', ['queue'])
+
+        def work():
+            for _ in range(1000):
+                counter.labels(queue='daily_check').inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.labels(queue='daily_check').inc(2)
+
+        self.assertEqual(counter.labels(queue='daily_check').value(), 8002)
+        # Les fragments des threads terminés sont repliés à la lecture
+        self.assertEqual(len(counter.labels(queue='daily_check')._shards._live), 1)
+        self.assertEqual(counter.labels(queue='daily_check').value(), 8002)
+
+    def test_render_histogram_and_gauge_function(self):
+        """Test le rendu Prometheus d'un histogramme labellisé et d'une jauge calculée"""
+        registry = Registry()
+        histogram = registry.histogram('ssh_handshake_seconds', 'Handshake', ['host'], buckets=(0.1, 1.0))
+        histogram.labels(host='10.0.0.1').observe(0.5)
+        histogram.labels(host='10.0.0.1').observe(2.0)
+        queue = Queue()
+        queue.put(1)
+        registry.gauge('job_queue_depth', 'Depth', ['queue']).labels(queue='ping').set_function(queue.qsize)
+
+        text = registry.render()
+        self.assertIn('# TYPE ssh_handshake_seconds histogram', text)
+        self.assertIn('ssh_handshake_seconds_bucket{host="10.0.0.1",le="0.1"} 0', text)
+        self.assertIn('ssh_handshake_seconds_bucket{host="10.0.0.1",le="1.0"} 1', text)
+        self.assertIn('ssh_handshake_seconds_bucket{host="10.0.0.1",le="+Inf"} 2', text)
+        self.assertIn('ssh_handshake_seconds_count{host="10.0.0.1"} 2', text)
+        self.assertIn('job_queue_depth{queue="ping"} 1', text)
+
+    def test_register_is_idempotent(self):
+        """Test qu'un même nom retourne la même métrique et refuse d'autres labels"""
+        registry = Registry()
+        counter = registry.counter('ssh_connect_total', 'Connects', ['host'])
+        self.assertIs(registry.counter('ssh_connect_total', 'Connects', ['host']), counter)
+        with self.assertRaises(ValueError):
+            registry.counter('ssh_connect_total', 'Connects', ['firewall'])
+
+
+class ApplicationMetricsTests(SimpleTestCase):
+    def test_ssh_connect_failure_is_counted(self):
+        """Test le comptage des connexions SSH et des échecs par hôte"""
+        def connect(client, hostname, port=22):
+            raise TimeoutError()
+
+        wrapped = metrics._measured_connect(connect)
+        before = metrics.ssh_connect_failures.labels(host='192.0.2.10', error='TimeoutError').value()
+        with self.assertRaises(TimeoutError):
+            wrapped(None, '192.0.2.10')
+        self.assertEqual(
+            metrics.ssh_connect_failures.labels(host='192.0.2.10', error='TimeoutError').value(), before + 1
+        )
+
+    def test_monitor_cycle_lag(self):
+        """Test le retard (now - next_check) et le nombre d'alertes par cycle"""
+        now = timezone.now()
+        metrics.observe_monitor_cycle(now, [now - timedelta(seconds=90), now - timedelta(seconds=5)], 1.5)
+        self.assertEqual(metrics.monitor_last_cycle_max_lag.labels().value(), 90.0)
+
+    def test_job_marks_worker_busy(self):
+        """Test l'occupation du worker pendant un job"""
+        busy = metrics.worker_busy.labels(queue='test_queue')
+        started = metrics.job_started('test_queue')
+        self.assertEqual(busy.value(), 1)
+        metrics.job_finished('test_queue', started)
+        self.assertEqual(busy.value(), 0)
+        self.assertEqual(metrics.jobs_processed.labels(queue='test_queue').value(), 1)
+
+
+class StartupTests(SimpleTestCase):
+    def test_when_imported_runs_after_import(self):
+        """Test le hook posé au premier import d'un module"""
+        module_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, module_dir, ignore_errors=True)
+        with open(os.path.join(module_dir, 'lazy_probe.py'), 'w') as f:
+            f.write('VALUE = 1\n')
+        sys.path.insert(0, module_dir)
+        self.addCleanup(sys.path.remove, module_dir)
+        self.addCleanup(sys.modules.pop, 'lazy_probe', None)
+
+        seen = []
+        when_imported('lazy_probe', lambda module: seen.append(module.VALUE))
+        self.assertEqual(seen, [])
+        import lazy_probe
+        self.assertEqual(seen, [1])
+        # Module déjà importé : appel immédiat
+        when_imported('lazy_probe', lambda module: seen.append(module.VALUE + 1))
+        self.assertEqual(seen, [1, 2])
+
+    def test_parse_importtime(self):
+        """Test la lecture de la sortie -X importtime"""
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   paramiko.util\n'
+            'import time:       300 |        420 | paramiko\n'
+            'import time:        80 |         80 | json\n'
+        )
+        rows = parse_importtime(stderr)
+        self.assertEqual(rows[0], ('paramiko.util', 120, 120, 1))
+        self.assertEqual(rows[1], ('paramiko', 300, 420, 0))
+        self.assertEqual(by_package(rows), {'paramiko': 0.4, 'json': 0.1})
+
+    def test_workers_start_only_when_serving(self):
+        """Test que les workers enregistrés ne démarrent que depuis un point d'entrée serveur"""
+        from unittest.mock import patch
+        from firewallbackend import workers
+
+        # Processus de test (manage.py) : rien n'a démarré
+        self.assertFalse(workers.workers_enabled())
+        self.assertIn('interface_monitor_service.tasks.start_worker', workers._starters)
+        self.addCleanup(setattr, workers, '_serving', False)
+        with patch('firewallbackend.workers.import_string') as import_string:
+            with override_settings(BACKGROUND_WORKERS_ENABLED=False):
+                workers.start_background_workers()
+            import_string.assert_not_called()
+            with override_settings(BACKGROUND_WORKERS_ENABLED=True):
+                workers.start_background_workers()
+            self.assertEqual(import_string.call_count, len(workers._starters))
+
+
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsEndpointTests(TestCase):
+    def test_requires_token_or_admin(self):
+        """Test l'accès à /metrics avec le jeton du scraper"""
+        from command_service.views import config_task_queue
+        # Aucun worker ne démarre sous manage.py test : la file est exposée à la main
+        metrics.watch_queue('config_save', config_task_queue)
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(
+            self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401
+        )
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], PROMETHEUS_CONTENT_TYPE)
+        self.assertIn('# TYPE ssh_connect_total counter', response.content.decode())
+        self.assertIn('job_queue_depth{queue="config_save"}', response.content.decode())
+
+
+class FakeFortiGateTests(SimpleTestCase):
+    def setUp(self):
+        profile = FortiGateProfile(config_lines=300, page_lines=50)
+        self.device = FakeFortiGate('FGT-TEST', profile).start()
+        self.addCleanup(self.device.stop)
+
+    def test_daily_check_runner_pages_through_configuration(self):
+        """Test le runner de daily check contre le faux FortiGate (pagination --More--)"""
+        results = runner.run_commands(
+            self.device.host, 'admin', 'secret', ['get system status', 'show full-configuration'],
+            port=self.device.port
+        )
+        self.assertIn('Hostname: FGT-TEST', results[0][1])
+        config = results[1][1]
+        self.assertNotIn('--More--', config)
+        self.assertEqual(config.count('set comment'), config.count('    next'))
+        self.assertTrue(config.rstrip().endswith('end'))
+        self.assertGreaterEqual(self.device.stats()['commands'], 2)
+
+    def test_transport_registry_shares_one_connection(self):
+        """Test le partage d'une connexion SSH entre plusieurs canaux shell"""
+        from websocket_service.transport_registry import SSHTransportRegistry, connect_client
+
+        transports = SSHTransportRegistry(idle_timeout=60)
+        self.addCleanup(transports.close_all)
+
+        def connect():
+            return connect_client(self.device.host, self.device.port, 'admin', 'secret')
+
+        first = transports.open_channel(('user', 'fw'), connect)
+        second = transports.open_channel(('user', 'fw'), connect)
+        self.assertIs(first.get_transport(), second.get_transport())
+        self.assertEqual(transports.stats()[0]['channels'], 2)
+
+        transports.release(('user', 'fw'), first)
+        transports.release(('user', 'fw'), second)
+        self.assertEqual(transports.channel_count(), 0)
+        self.assertEqual(transports.sweep(), 0)
+        self.assertEqual(transports.sweep(now=time.monotonic() + 61), 1)
+        self.assertEqual(transports.transport_count(), 0)
+
+    def test_percentile(self):
+        """Test le percentile par rang le plus proche"""
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+
+class LoadFixturesTests(TestCase):
+    def test_seed_and_purge(self):
+        """Test la génération et la suppression du jeu de données de charge"""
+        from firewall_service.models import Firewall
+        from interface_monitor_service.models import InterfaceAlert
+
+        counts = fixtures.seed(users=2, datacenters=4, firewalls=30, alerts=6, commands=40, history=10,
+                               prefix='t')
+        self.assertEqual(counts['users'], 2)
+        self.assertEqual(counts['firewall_types'], 4 * len(fixtures.FIREWALL_TYPES))
+        self.assertEqual(Firewall.objects.filter(name__startswith='T-FW-').count(), 30)
+        self.assertFalse(InterfaceAlert.objects.filter(
+            name__startswith='t alert', next_check__lte=timezone.now()
+        ).exists())
+        self.assertTrue(fixtures.load_users('t').first().is_staff)
+
+        self.assertEqual(fixtures.purge('t'), 2)
+        self.assertFalse(Firewall.objects.filter(name__startswith='T-FW-').exists())
+
+    def test_virtual_user_routes(self):
+        """Test les routes du test de charge : historique par curseur et import CSV"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from urllib.parse import urlsplit
+        from rest_framework.test import APIClient
+        from firewall_service.models import Firewall
+
+        fixtures.seed(users=1, datacenters=1, firewalls=1, alerts=0, commands=60, history=0, prefix='t')
+        entry = prepare_users(1, 't')[0]
+        client = APIClient()
+        client.force_authenticate(user=entry['user'])
+        paths = []
+
+        class ClientSession:
+            """requests.Session minimale au-dessus du client de test."""
+            headers = {}
+
+            def request(self, method, url, params=None, files=None, data=None, json=None, **kwargs):
+                parts = urlsplit(url)
+                path = parts.path + (f'?{parts.query}' if parts.query else '')
+                paths.append(path)
+                if files:
+                    data = dict(data or {}, **{
+                        name: SimpleUploadedFile(filename, upload.read(), content_type)
+                        for name, (filename, upload, content_type) in files.items()
+                    })
+                    return client.post(path, data, format='multipart')
+                return client.get(path, params)
+
+            def get(self, url, **kwargs):
+                return self.request('GET', url)
+
+        user = VirtualUser('http://testserver', entry['token'], entry['firewall_type_id'], [], 0,
+                           entry['history_firewall_ids'])
+        user.session = ClientSession()
+
+        self.assertEqual(user.history().status_code, 200)
+        self.assertTrue(paths[-1].startswith('/api/command/commands/get_firewall_commands/'))
+        self.assertIsNotNone(user.history_next)
+        self.assertEqual(user.history().status_code, 200)
+        self.assertIn('cursor=', paths[-1])
+
+        self.assertLess(user.csv_import().status_code, 400)
+        self.assertEqual(paths[-1], '/api/firewalls/upload-csv/')
+        self.assertEqual(Firewall.objects.filter(name__startswith='LOADTEST-CSV-').count(), loadtest.CSV_ROWS)
+
+    def test_parse_mix(self):
+        """Test le choix d'un mix nommé ou personnalisé"""
+        self.assertEqual(parse_mix('read'), MIXES['read'])
+        self.assertEqual(parse_mix('dashboard=3,history'), {'dashboard': 3.0, 'history': 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix('unknown=1')
+
+    def test_database_export_modes(self):
+        """Test l'export des commandes seedées en liste et en flux"""
+        from metrics_service.benchmark import database
+
+        fixtures.seed(users=1, datacenters=1, firewalls=3, alerts=0, commands=25, history=0, prefix='t')
+        report = database.export(prefix='t', chunk_size=10)
+        self.assertEqual(report['list']['rows'], 25)
+        self.assertEqual(report['iterator']['rows'], 25)
+        self.assertEqual(report['list']['output_bytes'], report['iterator']['output_bytes'])
+        # Le rapport suit la base active : SQLite par défaut, Postgres avec DATABASE_PROFILE=postgres
+        from django.db import connection
+        profile = database.profile_report()
+        self.assertEqual(profile['vendor'], connection.vendor)
+        if connection.vendor == 'sqlite':
+            self.assertTrue(set(database.SQLITE_PRAGMAS) <= set(profile))
+        elif connection.vendor == 'postgresql':
+            self.assertIn('server_version', profile)
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'metrics_service'
+
+urlpatterns = [
+    path('endpoints/', views.endpoint_report, name='endpoint-report'),
+    path('endpoints/prometheus/', views.endpoint_report_prometheus, name='endpoint-report-prometheus'),
+    path('ssh-transports/', views.ssh_transports, name='ssh-transports'),
+]
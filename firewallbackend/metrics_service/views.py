@@ -0,0 +1,65 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+
+from auth_service.authentication import authenticate_request
+from .instrumentation import instrumentation, render_prometheus
+from .registry import registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def endpoint_report(request):
+    """
+    Rapport par endpoint (temps, SQL, SSH, taille) et dernières requêtes lentes.
+    DELETE remet les compteurs à zéro.
+    """
+    if request.method == 'DELETE':
+        instrumentation.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(instrumentation.report())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def endpoint_report_prometheus(request):
+    """Mêmes agrégats au format texte Prometheus."""
+    return HttpResponse(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def ssh_transports(request):
+    """Connexions SSH partagées des terminaux et canaux ouverts sur chacune."""
+    from websocket_service.transport_registry import registry as transports
+
+    return Response({'evictions': transports.evictions, 'transports': transports.stats()})
+
+
+def _scrape_authorized(request):
+    """Jeton METRICS_TOKEN du scraper ou JWT d'un administrateur."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    result = authenticate_request(request)
+    return result is not None and result[0].is_staff
+
+
+@require_GET
+def metrics_export(request):
+    """Registre applicatif (et agrégats HTTP si l'instrumentation est active)."""
+    if not _scrape_authorized(request):
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    body = registry.render()
+    if getattr(settings, 'INSTRUMENTATION_ENABLED', False):
+        body += render_prometheus()
+    return HttpResponse(body, content_type=PROMETHEUS_CONTENT_TYPE)
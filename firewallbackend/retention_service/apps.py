@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class RetentionServiceConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'retention_service'
+    verbose_name = 'Retention Service'
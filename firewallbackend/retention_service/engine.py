@@ -0,0 +1,220 @@
+"""
+Application des politiques de rétention.
+
+Suppression par lots de policy.batch_size lignes, une transaction courte
+par lot et une pause entre les lots : les workers et les requêtes
+obtiennent le verrou d'écriture entre deux lots. Avec archive=True, chaque
+lot est écrit (et vidé) dans
+RETENTION_ARCHIVE_DIR/<app_label.model>/<horodatage>.jsonl.gz avant d'être
+supprimé (fichier créé en exclusivité, jamais partagé entre deux passages) ; une ligne par objet, au format du sérialiseur 'python' de
+Django, les sorties déportées dans le BlobStore remises en entier. Les blobs
+qui ne sont plus référencés sont collectés après le passage quotidien.
+
+Le passage quotidien est réclamé en base (RetentionRun, une ligne par
+date) : un seul processus le lance, même avec plusieurs workers ou après
+un redémarrage. Un passage réclamé mais jamais terminé (processus arrêté en
+cours de route) est repris après STALE_RUN_AFTER.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.utils import timezone
+
+from blob_service import offload
+
+from firewallbackend import workers
+
+from .models import RetentionRun
+from .policies import get_policies
+
+logger = logging.getLogger(__name__)
+
+# Pause entre deux lots
+BATCH_PAUSE = 0.05  # seconds
+# Nouvelles tentatives d'un lot refusé par un verrou SQLite
+LOCK_RETRIES = 3
+LOCK_RETRY_PAUSE = 0.5  # seconds
+# Âge d'un passage non terminé au-delà duquel un autre processus le reprend
+STALE_RUN_AFTER = 6 * 3600  # seconds
+DEFAULT_RETENTION_HOUR = 3
+
+_schedule_lock = threading.Lock()
+_last_run_date = None
+_running = None
+
+
+def open_archive(policy, now):
+    """
+    Crée un nouveau fichier d'archive pour policy ; retourne (chemin, fichier).
+    Deux passages à la même microseconde obtiennent des fichiers distincts.
+    """
+    directory = os.path.join(settings.RETENTION_ARCHIVE_DIR, policy.model.lower())
+    os.makedirs(directory, exist_ok=True)
+    stem = f'{now:%Y%m%dT%H%M%S%f}'
+    suffix = 0
+    while True:
+        name = f'{stem}-{suffix}.jsonl.gz' if suffix else f'{stem}.jsonl.gz'
+        path = os.path.join(directory, name)
+        try:
+            return path, gzip.open(path, 'xt', encoding='utf-8')
+        except FileExistsError:
+            suffix += 1
+
+
+def _archive_rows(objects, related):
+    rows = serializers.serialize('python', objects)
+    for row, obj in zip(rows, objects):
+        if hasattr(obj, 'blob_texts'):
+            row['fields'].update(obj.blob_texts())
+        for name in related:
+            row[name] = serializers.serialize('python', getattr(obj, name).all())
+    return rows
+
+
+def apply_policy(policy, now=None, dry_run=False, pause=BATCH_PAUSE):
+    """
+    Applique une politique ; retourne le résumé (lignes supprimées,
+    archivées, supprimées en cascade, fichier d'archive).
+    """
+    now = now or timezone.now()
+    model = policy.get_model()
+    expired = policy.expired(now).order_by()
+    report = {
+        'model': policy.model,
+        'cutoff': policy.cutoff(now).isoformat(),
+        'deleted': 0,
+        'cascaded': 0,
+        'archived': 0,
+        'archive': None,
+    }
+    if dry_run:
+        report['matched'] = expired.count()
+        return report
+
+    archive = None
+    try:
+        while True:
+            ids = list(expired.values_list('pk', flat=True)[:policy.batch_size])
+            if not ids:
+                break
+            batch = model.objects.filter(pk__in=ids).order_by()
+            if policy.archive:
+                if archive is None:
+                    report['archive'], archive = open_archive(policy, now)
+                objects = list(batch.prefetch_related(*policy.related))
+                for row in _archive_rows(objects, policy.related):
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                # L'archive du lot est sur disque avant la suppression
+                archive.flush()
+                report['archived'] += len(objects)
+            total, per_model = _delete_batch(batch)
+            deleted = per_model.get(model._meta.label, 0)
+            report['deleted'] += deleted
+            report['cascaded'] += total - deleted
+            if len(ids) < policy.batch_size:
+                break
+            time.sleep(pause)
+    finally:
+        if archive is not None:
+            archive.close()
+    if report['deleted']:
+        logger.info(f"Retention {policy.model}: {report['deleted']} rows deleted, {report['archived']} archived")
+    return report
+
+
+def _delete_batch(batch):
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            with transaction.atomic():
+                return batch.delete()
+        except OperationalError as e:
+            # Écriture concurrente (worker, requête) : on retente après une pause
+            if 'locked' not in str(e) or attempt == LOCK_RETRIES:
+                raise
+            time.sleep(LOCK_RETRY_PAUSE)
+
+
+def apply_all(now=None, dry_run=False, models=None):
+    """Applique toutes les politiques actives (ou celles de models)."""
+    now = now or timezone.now()
+    reports = []
+    for policy in get_policies():
+        if models and policy.model not in models:
+            continue
+        try:
+            reports.append(apply_policy(policy, now=now, dry_run=dry_run))
+        except Exception as e:
+            logger.error(f"Retention {policy.model} failed: {e}")
+            reports.append({'model': policy.model, 'error': str(e)})
+    return reports
+
+
+def _run_in_background(run_id):
+    try:
+        apply_all()
+        try:
+            offload.collect_garbage()
+        except Exception as e:
+            logger.error(f"Blob garbage collection failed: {e}")
+        RetentionRun.objects.filter(pk=run_id).update(finished_at=timezone.now())
+    finally:
+        connection.close()
+
+
+def _claim(run_date, now):
+    """
+    Réclame le passage du jour, ou le reprend s'il est resté inachevé trop
+    longtemps ; None s'il revient à un autre processus.
+    """
+    try:
+        with transaction.atomic():
+            return RetentionRun.objects.create(run_date=run_date, started_at=now)
+    except IntegrityError:
+        pass
+    # Mise à jour conditionnelle : un seul processus reprend le passage
+    taken_over = RetentionRun.objects.filter(
+        run_date=run_date, finished_at__isnull=True,
+        started_at__lt=now - timedelta(seconds=STALE_RUN_AFTER),
+    ).update(started_at=now)
+    if taken_over:
+        logger.warning(f"Retention run of {run_date} was not finished, taking it over")
+        return RetentionRun.objects.get(run_date=run_date)
+    return None
+
+
+def run_if_due(now=None):
+    """
+    Entrée du planificateur : lance la rétention dans un thread une fois
+    par jour, tous processus confondus, à partir de RETENTION_HOUR.
+    Retourne True si elle démarre.
+    """
+    global _last_run_date, _running
+    if not getattr(settings, 'RETENTION_SCHEDULE_ENABLED', True) or not workers.workers_enabled():
+        return False
+    now = timezone.localtime(now or timezone.now())
+    if now.hour < getattr(settings, 'RETENTION_HOUR', DEFAULT_RETENTION_HOUR):
+        return False
+    with _schedule_lock:
+        # _last_run_date évite une requête par tour de boucle une fois le jour terminé
+        if _last_run_date == now.date() or (_running is not None and _running.is_alive()):
+            return False
+        run = _claim(now.date(), now)
+        if run is None:
+            # Passage d'un autre processus : revérifié au prochain tour tant qu'il n'est pas terminé
+            if RetentionRun.objects.filter(run_date=now.date(), finished_at__isnull=False).exists():
+                _last_run_date = now.date()
+            return False
+        _last_run_date = now.date()
+        _running = threading.Thread(target=_run_in_background, args=(run.pk,), name='retention', daemon=True)
+    _running.start()
+    return True
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from retention_service import engine
+from retention_service.policies import get_policies
+
+
+class Command(BaseCommand):
+    help = (
+        'Applique les politiques de rétention (retention_service.policies) : suppression par lots '
+        'des lignes expirées, archivées en JSONL compressé si la politique le demande.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models',
+                            help='Limiter à ce modèle (app_label.Model), répétable')
+        parser.add_argument('--dry-run', action='store_true', help='Compter les lignes expirées sans rien supprimer')
+        parser.add_argument('--list', action='store_true', help='Afficher les politiques actives et quitter')
+        parser.add_argument('--json', dest='json_path', help='Écrire le rapport dans ce fichier JSON')
+
+    def handle(self, *args, **options):
+        policies = get_policies()
+        if options['list']:
+            for policy in policies:
+                archive = ''
+                if policy.archive:
+                    archive = f" archivée (+{', '.join(policy.related)})" if policy.related else ' archivée'
+                self.stdout.write(f"{policy.model:<45} {policy.date_field:<12} {policy.days:>4} jours{archive}")
+            return
+
+        known = {policy.model for policy in policies}
+        unknown = set(options['models'] or ()) - known
+        if unknown:
+            raise CommandError(f"Aucune politique active pour : {', '.join(sorted(unknown))}")
+
+        reports = engine.apply_all(dry_run=options['dry_run'], models=options['models'])
+        for report in reports:
+            if 'error' in report:
+                self.stderr.write(self.style.ERROR(f"{report['model']:<45} erreur : {report['error']}"))
+            elif options['dry_run']:
+                self.stdout.write(f"{report['model']:<45} {report['matched']:>8} lignes expirées")
+            else:
+                line = f"{report['model']:<45} {report['deleted']:>8} supprimées"
+                if report['cascaded']:
+                    line += f", {report['cascaded']} en cascade"
+                if report['archive']:
+                    line += f", {report['archived']} archivées dans {report['archive']}"
+                self.stdout.write(line)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(reports, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['json_path']}"))
@@ -0,0 +1,16 @@
+from django.db import models
+from django.utils import timezone
+
+
+class RetentionRun(models.Model):
+    """Passage quotidien de la rétention, réclamé par un seul processus (voir engine.run_if_due)."""
+    run_date = models.DateField(unique=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'retention_run'
+        ordering = ['-run_date']
+
+    def __str__(self):
+        return f"Retention {self.run_date}"
@@ -0,0 +1,85 @@
+"""
+Politiques de rétention des tables à forte rotation.
+
+Une politique : modèle ('app_label.Model'), champ de date, durée de
+conservation en jours, archivage JSONL compressé avant suppression et
+relations inverses à inclure dans l'archive. settings.RETENTION_POLICIES
+surcharge days, archive et batch_size par modèle ; days=None désactive
+la politique.
+
+L'historique de ping des caméras garde sa propre rétention
+(camera_service.timeseries) : elle dépend de l'agrégation.
+"""
+
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+
+# Lignes supprimées par transaction
+BATCH_SIZE = 500
+
+
+class RetentionPolicy:
+    def __init__(self, model, date_field, days, archive=False, related=(), batch_size=BATCH_SIZE):
+        self.model = model
+        self.date_field = date_field
+        self.days = days
+        self.archive = archive
+        # Relations inverses sérialisées avec chaque ligne archivée
+        self.related = tuple(related)
+        self.batch_size = batch_size
+
+    def __repr__(self):
+        return f"RetentionPolicy({self.model}, {self.date_field} > {self.days} days)"
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    def cutoff(self, now):
+        return now - timedelta(days=self.days)
+
+    def expired(self, now):
+        """Lignes au-delà de la durée de conservation."""
+        return self.get_model().objects.filter(**{f'{self.date_field}__lt': self.cutoff(now)})
+
+    def with_overrides(self, **overrides):
+        options = {
+            'days': self.days,
+            'archive': self.archive,
+            'related': self.related,
+            'batch_size': self.batch_size,
+        }
+        options.update(overrides)
+        return RetentionPolicy(self.model, self.date_field, **options)
+
+
+DEFAULT_POLICIES = (
+    RetentionPolicy('command_service.FirewallCommand', 'created_at', 90, archive=True),
+    RetentionPolicy('websocket_service.TerminalCommand', 'created_at', 30, archive=True,
+                    related=('output_chunks',)),
+    RetentionPolicy('email_service.EmailLog', 'sent_at', 90, archive=True),
+    RetentionPolicy('email_service.CommandExecutionResult', 'started_at', 90, archive=True),
+    RetentionPolicy('history_service.ServiceHistory', 'timestamp', 180, archive=True),
+    RetentionPolicy('interface_monitor_service.AlertExecution', 'started_at', 30),
+    RetentionPolicy('interface_monitor_service.InterfaceStatus', 'last_seen', 14),
+    RetentionPolicy('dashboard_service.CommandActivity', 'hour', 8),
+)
+
+
+def get_policies():
+    """Politiques actives, surcharges de settings.RETENTION_POLICIES appliquées."""
+    overrides = getattr(settings, 'RETENTION_POLICIES', {})
+    policies = []
+    for policy in DEFAULT_POLICIES:
+        policy = policy.with_overrides(**overrides.get(policy.model, {}))
+        if policy.days is not None:
+            policies.append(policy)
+    return policies
+
+
+def get_policy(model):
+    for policy in get_policies():
+        if policy.model == model:
+            return policy
+    return None
@@ -0,0 +1,129 @@
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from email_service.models import EmailLog
+from history_service.models import ServiceHistory
+from . import engine
+from .models import RetentionRun
+from .policies import RetentionPolicy, get_policies, get_policy
+
+
+class RetentionEngineTests(TestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        now = timezone.now()
+        ServiceHistory.objects.bulk_create(
+            [ServiceHistory(service_name='firewall', action='update', status='success', details=f'old {i}',
+                            timestamp=now - timedelta(days=200)) for i in range(7)]
+            + [ServiceHistory(service_name='firewall', action='update', status='success', details='recent',
+                              timestamp=now - timedelta(days=1))]
+        )
+
+    def test_batched_delete_with_archive(self):
+        """Test la suppression par lots avec archivage JSONL compressé"""
+        policy = RetentionPolicy('history_service.ServiceHistory', 'timestamp', 180, archive=True, batch_size=3)
+        with override_settings(RETENTION_ARCHIVE_DIR=self.archive_dir):
+            report = engine.apply_policy(policy, pause=0)
+
+        self.assertEqual(report['deleted'], 7)
+        self.assertEqual(report['archived'], 7)
+        self.assertEqual(list(ServiceHistory.objects.values_list('details', flat=True)), ['recent'])
+        with gzip.open(report['archive'], 'rt', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0]['model'], 'history_service.servicehistory')
+        self.assertTrue(rows[0]['fields']['details'].startswith('old'))
+
+    def test_dry_run(self):
+        """Test le comptage des lignes expirées sans suppression"""
+        report = engine.apply_policy(get_policy('history_service.ServiceHistory'), dry_run=True)
+        self.assertEqual(report['matched'], 7)
+        self.assertEqual(ServiceHistory.objects.count(), 8)
+
+    def test_settings_overrides(self):
+        """Test la surcharge et la désactivation des politiques par les settings"""
+        with override_settings(RETENTION_POLICIES={
+            'history_service.ServiceHistory': {'days': 7, 'archive': False},
+            'email_service.EmailLog': {'days': None},
+        }):
+            policy = get_policy('history_service.ServiceHistory')
+            self.assertEqual((policy.days, policy.archive), (7, False))
+            self.assertNotIn('email_service.EmailLog', [policy.model for policy in get_policies()])
+
+    def test_archive_expands_offloaded_text(self):
+        """Test que l'archive contient la sortie complète, pas l'aperçu du BlobStore"""
+        content = 'show full-configuration\n' * 5000
+        blob_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, blob_dir, ignore_errors=True)
+        with override_settings(RETENTION_ARCHIVE_DIR=self.archive_dir, BLOB_STORE_DIR=blob_dir):
+            log = EmailLog.objects.create(recipient='admin@example.com', subject='Backup', content=content)
+            EmailLog.objects.filter(pk=log.pk).update(sent_at=timezone.now() - timedelta(days=100))
+            report = engine.apply_policy(get_policy('email_service.EmailLog'), pause=0)
+
+        self.assertEqual(report['archived'], 1)
+        with gzip.open(report['archive'], 'rt', encoding='utf-8') as f:
+            row = json.loads(f.readline())
+        self.assertEqual(row['fields']['content'], content)
+
+    def test_archives_never_shared(self):
+        """Test que deux archives créées au même instant sont deux fichiers distincts"""
+        policy = get_policy('history_service.ServiceHistory')
+        now = timezone.now()
+        with override_settings(RETENTION_ARCHIVE_DIR=self.archive_dir):
+            first, first_file = engine.open_archive(policy, now)
+            second, second_file = engine.open_archive(policy, now)
+        first_file.close()
+        second_file.close()
+        self.assertNotEqual(first, second)
+
+
+@override_settings(RETENTION_SCHEDULE_ENABLED=True, RETENTION_HOUR=3)
+class RetentionScheduleTests(TestCase):
+    def setUp(self):
+        engine._last_run_date = None
+        engine._running = None
+        self.addCleanup(setattr, engine, '_last_run_date', None)
+        self.addCleanup(setattr, engine, '_running', None)
+        self.now = timezone.localtime().replace(hour=4)
+        # Comme dans un processus serveur (wsgi/asgi)
+        serving = patch('retention_service.engine.workers.workers_enabled', return_value=True)
+        serving.start()
+        self.addCleanup(serving.stop)
+
+    def test_run_claimed_once_across_processes(self):
+        """Test qu'un seul processus lance le passage du jour"""
+        with patch('retention_service.engine.threading.Thread') as thread:
+            self.assertTrue(engine.run_if_due(self.now))
+            # Autre processus (ou redémarrage) : son état en mémoire est vierge
+            engine._last_run_date = None
+            engine._running = None
+            self.assertFalse(engine.run_if_due(self.now))
+        self.assertEqual(thread.return_value.start.call_count, 1)
+        self.assertEqual(RetentionRun.objects.filter(run_date=self.now.date()).count(), 1)
+
+    def test_unfinished_run_taken_over(self):
+        """Test la reprise d'un passage interrompu, et seulement une fois périmé"""
+        RetentionRun.objects.create(run_date=self.now.date(), started_at=self.now - timedelta(hours=1))
+        with patch('retention_service.engine.threading.Thread') as thread:
+            self.assertFalse(engine.run_if_due(self.now))
+            later = self.now + timedelta(seconds=engine.STALE_RUN_AFTER)
+            self.assertTrue(engine.run_if_due(later))
+        self.assertEqual(thread.return_value.start.call_count, 1)
+        self.assertEqual(RetentionRun.objects.get(run_date=self.now.date()).started_at, later)
+
+    def test_not_due_or_disabled(self):
+        """Test que rien ne démarre avant l'heure ni quand la planification est coupée"""
+        with patch('retention_service.engine.threading.Thread') as thread:
+            self.assertFalse(engine.run_if_due(self.now.replace(hour=1)))
+            with override_settings(RETENTION_SCHEDULE_ENABLED=False):
+                self.assertFalse(engine.run_if_due(self.now))
+        thread.assert_not_called()
+        self.assertFalse(RetentionRun.objects.exists())
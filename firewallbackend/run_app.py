@@ -37,6 +37,8 @@ def main():
         
         # Get the WSGI application
         application = get_wsgi_application()
+        from firewallbackend import workers
+        workers.start_background_workers()
         
         # Wrap with WhiteNoise for static files
         application = WhiteNoise(
@@ -100,7 +100,6 @@ a = Analysis(
         'pythonping',
         'waitress',
         'cryptography',
-        'pandas',
         'xlsxwriter',
         'jinja2',
     ],
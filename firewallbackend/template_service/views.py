@@ -5,7 +5,6 @@ from django.shortcuts import get_object_or_404
 from .models import Template, Variable, TemplateVariable
 from .serializers import TemplateSerializer, VariableSerializer
 import logging
-import pandas as pd
 from io import BytesIO
 from django.http import HttpResponse
 from datetime import datetime
@@ -167,11 +166,11 @@ class TemplateViewSet(viewsets.ModelViewSet):
             variable_pattern = r'{{([^}]+)}}'
             variables_in_content = sorted(set(re.findall(variable_pattern, template.content)))
             
-            # Create Excel writer
+            # Create Excel writer (xlsxwriter chargé au premier export)
+            import xlsxwriter
             output = BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            with xlsxwriter.Workbook(output, {'in_memory': True}) as workbook:
                 # Create a new worksheet
-                workbook = writer.book
                 worksheet = workbook.add_worksheet('Template Variables')
                 
                 # Add some formatting
@@ -0,0 +1,124 @@
+"""
+Lecture d'un canal SSH paramiko hors de la boucle asyncio.
+
+Un thread par canal bloque dans channel.recv() et pousse chaque bloc dans
+une asyncio.Queue : la boucle n'est réveillée que lorsque des données
+arrivent et aucune lecture ne la bloque. loop.add_reader sur
+channel.fileno() n'est pas utilisé : la boucle Proactor de Windows (build
+PyInstaller) ne le supporte pas.
+
+Contre-pression : au-delà de queue_limit octets non consommés, le thread
+cesse de lire. La fenêtre SSH se remplit et c'est le firewall qui est
+freiné, au lieu que la mémoire du serveur grossisse.
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Revérification de la fermeture du canal pendant une pause
+PAUSE_CHECK_INTERVAL = 1.0  # seconds
+
+
+class SSHChannelReader:
+    """
+    Thread de lecture d'un canal ; b'' dans la file signale la fin du canal,
+    None un simple réveil (échéances du consumer à recalculer).
+    """
+
+    def __init__(self, channel, loop, read_size=config.SSH_READ_SIZE, queue_limit=config.READER_QUEUE_LIMIT):
+        self.channel = channel
+        self.loop = loop
+        self.read_size = read_size
+        self.queue_limit = queue_limit
+        self.queue = asyncio.Queue()
+        # Octets poussés dans la file et pas encore rendus par read()
+        self._queued = 0
+        self._space = threading.Condition()
+        self.pauses = 0
+        self._thread = threading.Thread(target=self._run, name='ssh-channel-reader', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _wait_for_space(self):
+        """False si le canal a été fermé pendant la pause."""
+        with self._space:
+            if self._queued < self.queue_limit:
+                return True
+            self.pauses += 1
+            while self._queued >= self.queue_limit:
+                if self.channel.closed:
+                    return False
+                self._space.wait(PAUSE_CHECK_INTERVAL)
+        return True
+
+    def _run(self):
+        while True:
+            if not self._wait_for_space():
+                self._push(b'')
+                return
+            try:
+                data = self.channel.recv(self.read_size)
+            except socket.timeout:
+                # Canal configuré avec un timeout : simple relance
+                continue
+            except Exception as e:
+                logger.debug(f"SSH channel read ended: {e}")
+                data = b''
+            if not self._push(data) or not data:
+                return
+
+    def _push(self, data):
+        with self._space:
+            self._queued += len(data)
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, data)
+        except RuntimeError:
+            # Boucle fermée : le consumer n'existe plus
+            return False
+        return True
+
+    def _consumed(self, size):
+        with self._space:
+            self._queued -= size
+            self._space.notify()
+
+    def wake(self):
+        """Réveille read() depuis la boucle."""
+        self.queue.put_nowait(None)
+
+    async def read(self, timeout=None):
+        """
+        Blocs disponibles concaténés ; None si rien n'est arrivé avant timeout
+        (None : attente illimitée), b'' si le canal est fermé.
+        """
+        try:
+            data = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not data:
+            # Réveil (None) ou fin du canal (b'')
+            return data
+        # Regrouper ce qui est déjà arrivé : un seul passage par le traitement
+        chunks, size = [data], len(data)
+        # Borné : un passage traite au plus un quart de la file
+        while not self.queue.empty() and size < self.queue_limit // 4:
+            more = self.queue.get_nowait()
+            if more is None:
+                continue
+            if not more:
+                # Remettre la fin de canal pour le prochain appel
+                self.queue.put_nowait(more)
+                break
+            chunks.append(more)
+            size += len(more)
+        data = b''.join(chunks)
+        self._consumed(len(data))
+        return data
@@ -4,26 +4,46 @@
 
 # SSH Connection Settings
 SSH_TIMEOUT = 10
-# Increase buffer size to improve throughput for large outputs
-SSH_BUFFER_SIZE = 4096
+# Read size of the per-channel SSH reader thread (see channel_reader)
+SSH_READ_SIZE = 64 * 1024
 
 # Command Execution Settings
 # Timeout before we consider a command "completed" without seeing a prompt
 COMMAND_TIMEOUT = 15.0  # seconds
-# Polling interval to check for available bytes on the channel
-OUTPUT_POLLING_INTERVAL = 0.05  # seconds
 # Throttle how often we flush buffered output to the client
 OUTPUT_FLUSH_INTERVAL = 0.05  # seconds
+# Flush at once when this many characters are buffered
+OUTPUT_FLUSH_SIZE = 256 * 1024
 # Max chunk size per flush to client
 OUTPUT_MAX_CHUNK_SIZE = 16384
 # If no output is received for this window while executing a command, mark as completed
 QUIET_COMPLETION_WINDOW = 0.8  # seconds
 
+# Backpressure and memory bounds
+# Max characters waiting to be sent to the client; the oldest are dropped beyond it
+OUTPUT_BUFFER_LIMIT = 1024 * 1024
+# Bytes read from SSH but not yet processed; the reader thread stops reading beyond it,
+# so the SSH window fills up and the firewall itself is throttled
+READER_QUEUE_LIMIT = 1024 * 1024
+# Command output is stored in TerminalCommandOutput chunks of this many characters
+PERSIST_CHUNK_SIZE = 64 * 1024
+# Max characters stored per command (the rest is still streamed, then marked truncated)
+PERSIST_LIMIT = 16 * 1024 * 1024
+
 # Output mode
 # When True: buffer entire command output and send once upon completion
 # When False: stream output chunks as they arrive (throttled)
 BATCH_OUTPUT = False
 
+# Binary output frames (opt-in per connection: ?protocol=binary[&compression=zlib], see framing)
+# Max characters of output per binary frame
+BINARY_MAX_CHUNK_SIZE = 256 * 1024
+# Frames smaller than this (bytes) are never compressed
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVEL = 6
+# Frames larger than this (bytes) are compressed in a worker thread, off the event loop
+COMPRESSION_OFFLOAD_SIZE = 256 * 1024
+
 # Pager handling for FortiGate "--More--" prompts
 # Options: 'page' (auto send space), 'line' (auto send Enter), 'manual' (frontend decides)
 PAGER_MODE = 'page'
@@ -1,16 +1,22 @@
 import json
 import asyncio
-import paramiko
+import codecs
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from firewall_service.models import Firewall
 from auth_service.models import SSHUser
+from auth_service.credentials import get_ssh_credentials
 from .models import TerminalSession, TerminalCommand
+from .channel_reader import SSHChannelReader
+from .output import CommandOutputSpool, OutputBuffer, OutputCleaner
+from . import framing, transport_registry
 import uuid
+from urllib.parse import parse_qs
 from . import config
 from django.utils import timezone
+from metrics_service import metrics
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -21,23 +27,34 @@ class TerminalConsumer(AsyncWebsocketConsumer):
         super().__init__(*args, **kwargs)
         self.firewall_id = None
         self.user = None
-        self.ssh_client = None
         self.ssh_channel = None
+        # Clé (utilisateur, firewall) de la connexion partagée (voir transport_registry)
+        self.transport_key = None
         self.session = None
         self.room_group_name = None
         self.command_lock = asyncio.Lock()
         self.is_command_executing = False
         self.last_completion_time = 0
-        self._output_buffer = []
+        # Sortie en attente d'envoi (bornée) et sortie de la commande en cours à enregistrer
+        self._output_buffer = OutputBuffer()
+        self._output_spool = None
         self._last_flush_monotonic = 0.0
         self._last_output_monotonic = 0.0
         self._command_output_accumulator = []
+        self._channel_reader = None
+        self._cleaner = OutputCleaner()
+        # Protocole de sortie négocié à l'ouverture (voir framing)
+        self.output_protocol = framing.PROTOCOL_JSON
+        self.output_compression = None
 
     async def connect(self):
         """Handle WebSocket connection"""
         try:
             self.firewall_id = self.scope['url_route']['kwargs']['firewall_id']
             self.user = self.scope.get('user')
+            self.output_protocol, self.output_compression = framing.negotiate(
+                parse_qs(self.scope.get('query_string', b'').decode())
+            )
             
             if not self.user:
                 await self.close(code=4001)
@@ -143,10 +160,10 @@ class TerminalConsumer(AsyncWebsocketConsumer):
     def get_ssh_credentials(self):
         """Get SSH credentials for current user"""
         try:
-            ssh_user = SSHUser.objects.get(user=self.user)
+            ssh_user = get_ssh_credentials(self.user)
             return {
                 'username': ssh_user.ssh_username,
-                'password': ssh_user.get_ssh_password()
+                'password': ssh_user.password
             }
         except SSHUser.DoesNotExist:
             return None
@@ -166,29 +183,25 @@ class TerminalConsumer(AsyncWebsocketConsumer):
                 await self.send_message('error', 'Pare-feu non trouvé')
                 return
 
-            # Create SSH client
-            self.ssh_client = paramiko.SSHClient()
-            self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            if self.ssh_channel:
+                await self.close_ssh_connection()
+
+            # Shell channel over the (user, firewall) connection shared by all terminal tabs
+            key = (self.user.id, firewall.id)
 
-            # Connect to firewall
-            def ssh_connect():
-                return self.ssh_client.connect(
+            def open_shell():
+                channel = transport_registry.registry.open_channel(key, lambda: transport_registry.connect_client(
                     firewall.ip_address,
-                    22,
+                    firewall.ssh_port or 22,
                     ssh_credentials['username'],
                     ssh_credentials['password'],
-                    timeout=config.SSH_TIMEOUT,
-                )
-
-            await asyncio.get_event_loop().run_in_executor(None, ssh_connect)
-
-            # Create shell channel
-            def create_shell():
-                channel = self.ssh_client.invoke_shell()
-                channel.settimeout(1)
+                ))
+                # Pas de timeout : le thread de lecture bloque sans se réveiller à vide
+                channel.settimeout(None)
                 return channel
 
-            self.ssh_channel = await asyncio.get_event_loop().run_in_executor(None, create_shell)
+            self.ssh_channel = await asyncio.get_event_loop().run_in_executor(None, open_shell)
+            self.transport_key = key
 
             await self.send_message('system', 'Connexion SSH établie avec succès')
             asyncio.create_task(self.read_ssh_output())
@@ -206,6 +219,10 @@ class TerminalConsumer(AsyncWebsocketConsumer):
                     return
 
                 self.is_command_executing = True
+                # La fenêtre d'inactivité part de l'envoi : réarmer l'échéance du lecteur
+                self._last_output_monotonic = asyncio.get_running_loop().time()
+                if self._channel_reader:
+                    self._channel_reader.wake()
                 # Notify UI explicitly
                 await self.send(text_data=json.dumps({
                     'type': 'command_status',
@@ -214,7 +231,8 @@ class TerminalConsumer(AsyncWebsocketConsumer):
                 }))
 
                 # Save command to database
-                await self.save_command(command)
+                terminal_command = await self.save_command(command)
+                self._output_spool = CommandOutputSpool(terminal_command) if terminal_command else None
 
                 # Send command
                 def send_command():
@@ -294,15 +312,18 @@ class TerminalConsumer(AsyncWebsocketConsumer):
         await self.update_command_status(command_id, 'failed', 'Timeout atteint')
 
     @database_sync_to_async
-    def update_command_status(self, command_id, status, output=''):
+    def update_command_status(self, command_id, status, output='', truncated=False):
         """Update command status in database"""
         try:
-            command = TerminalCommand.objects.get(command_id=command_id)
+            command = TerminalCommand.objects.select_related('session').get(command_id=command_id)
             command.status = status
-            if output:
-                command.output = output
             command.completed_at = timezone.now()
-            command.save()
+            command.output_truncated = command.output_truncated or truncated
+            command.save(update_fields=['status', 'completed_at', 'output_truncated'])
+            if output:
+                command.extend_output(output)
+            if status == 'completed':
+                command.compact_output()
             logger.info(f"📝 [WEBSOCKET] Updated command {command_id} status to {status}")
         except TerminalCommand.DoesNotExist:
             logger.error(f"❌ [WEBSOCKET] Command {command_id} not found")
@@ -319,68 +340,72 @@ class TerminalConsumer(AsyncWebsocketConsumer):
 
     async def read_ssh_output(self):
         """Read SSH output and send to client with throttled flushes for large results"""
+        loop = asyncio.get_running_loop()
+        # Lecture par un thread dédié : la boucle ne se réveille que sur données ou échéance
+        reader = self._channel_reader = SSHChannelReader(self.ssh_channel, loop).start()
+        # Décodage incrémental : un caractère UTF-8 peut être coupé entre deux lectures
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
         try:
-            self._last_flush_monotonic = asyncio.get_event_loop().time()
-            while self.ssh_channel and not self.ssh_channel.closed:
-                if self.ssh_channel.recv_ready():
-                    try:
-                        output_bytes = self.ssh_channel.recv(config.SSH_BUFFER_SIZE)
-                    except Exception:
-                        output_bytes = b''
-                    output = output_bytes.decode('utf-8', errors='ignore')
-                    if output:
-                        self._last_output_monotonic = asyncio.get_event_loop().time()
-                        # Handle FortiGate pager prompts
-                        if '--More--' in output:
-                            # Remove pager indicator from what we display
-                            output = output.replace('--More--', '')
-                            mode = getattr(config, 'PAGER_MODE', 'page')
-                            if mode == 'page':
-                                key = ' '
-                            elif mode == 'line':
-                                key = '\n'
-                            elif mode == 'manual':
-                                key = None
-                                # Inform frontend pager is waiting
-                                await self.send(text_data=json.dumps({
-                                    'type': 'pager',
-                                    'status': 'more'
-                                }))
-                            else:
-                                key = ' '
-
-                            if key is not None:
-                                try:
-                                    await asyncio.get_event_loop().run_in_executor(
-                                        None, lambda: self.ssh_channel.send(key)
-                                    )
-                                except Exception:
-                                    pass
-                    if output:
-                        cleaned = self._clean_output(output)
-                        if cleaned:
-                            self._output_buffer.append(cleaned)
-
-                        # Check for command completion markers on the raw chunk
-                        if self.is_command_executing and self.is_command_complete(output):
-                            await self.handle_command_completion()
+            self._last_flush_monotonic = loop.time()
+            while True:
+                output_bytes = await reader.read(timeout=self._next_reader_wakeup(loop.time()))
+                if output_bytes == b'':
+                    # Canal fermé
+                    break
+                output = decoder.decode(output_bytes) if output_bytes else ''
+                if output_bytes is None and self._cleaner.pending:
+                    # Rien de plus n'est arrivé : libérer la fin de bloc retenue
+                    await self._add_output(self._cleaner.flush())
+                if output:
+                    self._last_output_monotonic = loop.time()
+                    # Handle FortiGate pager prompts
+                    if '--More--' in output:
+                        # Remove pager indicator from what we display
+                        output = output.replace('--More--', '')
+                        mode = getattr(config, 'PAGER_MODE', 'page')
+                        if mode == 'page':
+                            key = ' '
+                        elif mode == 'line':
+                            key = '\n'
+                        elif mode == 'manual':
+                            key = None
+                            # Inform frontend pager is waiting
+                            await self.send(text_data=json.dumps({
+                                'type': 'pager',
+                                'status': 'more'
+                            }))
+                        else:
+                            key = ' '
+
+                        if key is not None and self.ssh_channel:
+                            channel = self.ssh_channel
+                            try:
+                                await loop.run_in_executor(None, lambda: channel.send(key))
+                            except Exception:
+                                pass
+
+                    cleaned = self._cleaner.feed(output)
+                    if cleaned:
+                        await self._add_output(cleaned)
+
+                    # Check for command completion markers on the raw chunk
+                    if self.is_command_executing and self.is_command_complete(output):
+                        await self.handle_command_completion()
 
                 # Flush buffered output at controlled interval
-                now = asyncio.get_event_loop().time()
-                if self._output_buffer and (now - self._last_flush_monotonic) >= config.OUTPUT_FLUSH_INTERVAL:
-                    combined = ''.join(self._output_buffer)
-                    self._output_buffer.clear()
+                now = loop.time()
+                # (ou dès que le tampon est gros : l'envoi attendu freine la lecture SSH)
+                if self._output_buffer and (
+                    now - self._last_flush_monotonic >= config.OUTPUT_FLUSH_INTERVAL
+                    or self._output_buffer.size >= config.OUTPUT_FLUSH_SIZE
+                ):
+                    combined, dropped = self._output_buffer.take()
+                    if dropped:
+                        await self.send_message('system', f'[{dropped} caractères de sortie ignorés : client trop lent]')
 
                     # Always send output immediately for better responsiveness
                     if combined.strip():
-                        # If extremely large, send in slices
-                        start_index = 0
-                        total_len = len(combined)
-                        while start_index < total_len:
-                            end_index = min(start_index + config.OUTPUT_MAX_CHUNK_SIZE, total_len)
-                            chunk = combined[start_index:end_index]
-                            await self.send_message('output', chunk)
-                            start_index = end_index
+                        await self.send_output(combined)
 
                     self._last_flush_monotonic = now
 
@@ -391,11 +416,21 @@ class TerminalConsumer(AsyncWebsocketConsumer):
                     if (now - last_out) >= config.QUIET_COMPLETION_WINDOW:
                         await self.handle_command_completion()
 
-                await asyncio.sleep(config.OUTPUT_POLLING_INTERVAL)
-
         except Exception as e:
             logger.error(f"SSH output reading error: {str(e)}")
 
+    def _next_reader_wakeup(self, now):
+        """Délai avant le prochain flush ou la complétion par inactivité ; None si rien n'est en attente."""
+        deadlines = []
+        if self._output_buffer or self._cleaner.pending:
+            deadlines.append(self._last_flush_monotonic + config.OUTPUT_FLUSH_INTERVAL)
+        if self.is_command_executing:
+            last_out = self._last_output_monotonic or self._last_flush_monotonic
+            deadlines.append(last_out + config.QUIET_COMPLETION_WINDOW)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+
     def is_command_complete(self, output):
         """Check if command execution is complete"""
         # Check for FortiGate prompt patterns
@@ -421,15 +456,22 @@ class TerminalConsumer(AsyncWebsocketConsumer):
             self.last_completion_time = current_time
             
             # Get the latest command and update its status
-            latest_command = await self.get_latest_executing_command()
+            spool, self._output_spool = self._output_spool, None
+            latest_command = spool.command if spool else await self.get_latest_executing_command()
             if latest_command:
-                # Collect all output from buffer
-                output = ''.join(self._output_buffer)
-                self._output_buffer.clear()
-                
-                # Update command status with collected output
-                await self.update_command_status(latest_command.command_id, 'completed', output)
-                logger.info(f"✅ [WEBSOCKET] Command {latest_command.command_id} completed with output length: {len(output)}")
+                # Last output chunk, then status
+                if spool:
+                    await self.persist_output(spool, final=True)
+                await self.update_command_status(
+                    latest_command.command_id, 'completed', truncated=bool(spool and spool.truncated)
+                )
+                metrics.command_duration_seconds.labels(source='terminal').observe(
+                    (timezone.now() - latest_command.created_at).total_seconds()
+                )
+                logger.info(
+                    f"✅ [WEBSOCKET] Command {latest_command.command_id} completed with output length: "
+                    f"{spool.accepted if spool else 0}"
+                )
             
             # Notify UI explicitly
             await self.send(text_data=json.dumps({
@@ -463,40 +505,58 @@ class TerminalConsumer(AsyncWebsocketConsumer):
         """Close SSH connection"""
         try:
             if self.ssh_channel:
-                self.ssh_channel.close()
+                # Le thread de lecture reçoit b'' et s'arrête ; la connexion reste aux autres onglets
+                transport_registry.registry.release(self.transport_key, self.ssh_channel)
                 self.ssh_channel = None
-            
-            if self.ssh_client:
-                self.ssh_client.close()
-                self.ssh_client = None
+                self._channel_reader = None
                 
             self.is_command_executing = False
             self._output_buffer.clear()
+            # Garder ce qui a déjà été reçu de la commande interrompue
+            spool, self._output_spool = self._output_spool, None
+            if spool:
+                await self.persist_output(spool, final=True)
+            self._cleaner = OutputCleaner()
             
         except Exception as e:
             logger.error(f"SSH close error: {str(e)}")
 
-    def _clean_output(self, text: str) -> str:
-        """Remove unwanted control characters and normalize newlines."""
-        if not text:
-            return text
-        # Remove carriage returns used for progress updates
-        text = text.replace('\r', '')
-        # Replace any stray nulls
-        text = text.replace('\x00', '')
-        # Remove backspaces
-        text = text.replace('\x08', '')
-        # Strip common ANSI escape sequences
+    async def _add_output(self, text):
+        """Output for the client buffer and, while a command runs, for the database"""
+        self._output_buffer.append(text)
+        spool = self._output_spool
+        if spool and spool.add(text):
+            await self.persist_output(spool)
+
+    async def persist_output(self, spool, final=False):
+        """Write the complete chunks of a command output (all of it if final)"""
+        for sequence, text in spool.chunks(final):
+            await self.save_output_chunk(spool.command, sequence, text)
+
+    @database_sync_to_async
+    def save_output_chunk(self, command, sequence, text):
         try:
-            import re
-            ansi_escape = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
-            text = ansi_escape.sub('', text)
-            # Remove various forms of pager markers
-            pager_pattern = re.compile(r"--More--\s*", re.IGNORECASE)
-            text = pager_pattern.sub('', text)
-        except Exception:
-            pass
-        return text
+            command.append_output(text, sequence)
+        except Exception as e:
+            logger.error(f"❌ [WEBSOCKET] Error saving output of command {command.command_id}: {str(e)}")
+
+    async def send_output(self, text):
+        """Send command output, as JSON slices or as binary frames (see framing)"""
+        if self.output_protocol != framing.PROTOCOL_BINARY:
+            # If extremely large, send in slices
+            for start_index in range(0, len(text), config.OUTPUT_MAX_CHUNK_SIZE):
+                await self.send_message('output', text[start_index:start_index + config.OUTPUT_MAX_CHUNK_SIZE])
+            return
+        loop = asyncio.get_running_loop()
+        for start_index in range(0, len(text), config.BINARY_MAX_CHUNK_SIZE):
+            payload = text[start_index:start_index + config.BINARY_MAX_CHUNK_SIZE].encode('utf-8')
+            compress = framing.should_compress(payload, self.output_compression)
+            if compress and len(payload) >= config.COMPRESSION_OFFLOAD_SIZE:
+                # zlib libère le GIL : les grosses trames sont compressées hors de la boucle
+                frame = await loop.run_in_executor(None, framing.encode_frame, payload, framing.FRAME_OUTPUT, True)
+            else:
+                frame = framing.encode_frame(payload, compress=compress)
+            await self.send(bytes_data=frame)
 
     @database_sync_to_async
     def save_command(self, command):
@@ -0,0 +1,58 @@
+"""
+Trames binaires de sortie du terminal (protocole optionnel).
+
+Négocié à l'ouverture du websocket : ?protocol=binary, et en plus
+&compression=zlib pour compresser les grosses trames. Seule la sortie des
+commandes passe en binaire ; les autres messages restent en JSON texte.
+
+Format : 1 octet de type, 1 octet de drapeaux, puis la charge utile en
+UTF-8, compressée zlib (RFC 1950) si FLAG_ZLIB est présent. Chaque trame est
+compressée indépendamment : DecompressionStream('deflate') côté navigateur.
+"""
+
+import struct
+import zlib
+
+from . import config
+
+HEADER = struct.Struct('!BB')
+
+FRAME_OUTPUT = 0x01
+
+FLAG_ZLIB = 0x01
+
+PROTOCOL_JSON = 'json'
+PROTOCOL_BINARY = 'binary'
+COMPRESSION_ZLIB = 'zlib'
+
+
+def negotiate(query_params):
+    """(protocole, compression) demandés dans la query string du websocket."""
+    protocol = query_params.get('protocol', [PROTOCOL_JSON])[0]
+    if protocol != PROTOCOL_BINARY:
+        return PROTOCOL_JSON, None
+    compression = query_params.get('compression', [None])[0]
+    return PROTOCOL_BINARY, compression if compression == COMPRESSION_ZLIB else None
+
+
+def should_compress(payload, compression):
+    return compression == COMPRESSION_ZLIB and len(payload) >= config.COMPRESSION_MIN_SIZE
+
+
+def encode_frame(payload, frame_type=FRAME_OUTPUT, compress=False, level=config.COMPRESSION_LEVEL):
+    """Trame prête à envoyer ; la version compressée n'est gardée que si elle est plus petite."""
+    flags = 0
+    if compress:
+        compressed = zlib.compress(payload, level)
+        if len(compressed) < len(payload):
+            payload, flags = compressed, FLAG_ZLIB
+    return HEADER.pack(frame_type, flags) + payload
+
+
+def decode_frame(frame):
+    """(type, charge utile décompressée) d'une trame."""
+    frame_type, flags = HEADER.unpack_from(frame)
+    payload = frame[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return frame_type, payload
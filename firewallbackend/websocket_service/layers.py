@@ -0,0 +1,302 @@
+"""
+Channel layer multi-processus sans service externe : un fichier SQLite (mode
+WAL) partagé par les workers daphne/uvicorn d'une même machine.
+
+Les groupes et les messages destinés à un autre processus passent par la
+base ; un message vers un canal du processus courant lui est remis
+directement. Chaque processus n'a qu'une tâche de lecture : elle consulte
+PRAGMA data_version (aucune lecture de table) et ne relève ses messages que
+si un autre processus a écrit. L'intervalle part de poll_interval et double
+à chaque passage sans message, jusqu'à max_poll_interval ; la tâche s'arrête
+quand plus aucun canal n'est lu dans le processus (receive() la relance).
+
+Seuls les messages websocket sont partagés. Restent propres à chaque
+processus : l'état des jobs en arrière-plan (config_task_status,
+task_status, reachability_task_status) et le registre des connexions SSH
+des terminaux. Avec plusieurs workers, le suivi d'une tâche doit donc
+atteindre le worker qui l'a lancée (affinité de session au proxy), et deux
+onglets sur deux workers ouvrent chacun leur connexion SSH.
+
+Les messages sont sérialisés en JSON. Les appels SQLite passent par
+l'executor : la boucle n'attend jamais un verrou de la base.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import random
+import sqlite3
+import string
+import threading
+import time
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.02  # seconds
+# Intervalle maximal quand aucun message n'arrive d'un autre processus
+MAX_POLL_INTERVAL = 0.5  # seconds
+# Purge des messages et appartenances aux groupes expirés
+CLEANUP_INTERVAL = 30  # seconds
+BUSY_TIMEOUT = 5  # seconds
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS channel_messages ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    ' process TEXT NOT NULL,'
+    ' channel TEXT NOT NULL,'
+    ' expires REAL NOT NULL,'
+    ' body TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS channel_messages_process ON channel_messages (process, id)',
+    'CREATE INDEX IF NOT EXISTS channel_messages_channel ON channel_messages (channel)',
+    'CREATE TABLE IF NOT EXISTS channel_groups ('
+    ' name TEXT NOT NULL,'
+    ' channel TEXT NOT NULL,'
+    ' expires REAL NOT NULL,'
+    ' PRIMARY KEY (name, channel))',
+)
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    extensions = ['groups', 'flush']
+
+    def __init__(self, path='channels.sqlite3', expiry=60, group_expiry=86400, capacity=100,
+                 channel_capacity=None, poll_interval=POLL_INTERVAL, max_poll_interval=MAX_POLL_INTERVAL,
+                 **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.path = str(path)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+        # Identifie les canaux de ce processus : specific.<client_prefix>!<id>
+        self.client_prefix = ''.join(random.choices(string.ascii_letters, k=12))
+        # canal -> (asyncio.Queue, boucle) pour les canaux lus dans ce processus
+        self._local = {}
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._data_version = None
+        self._last_cleanup = 0
+        self._poller = None
+
+    # --- Base SQLite (appelée depuis l'executor) ---
+
+    def _connection(self):
+        if self._db is None:
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._db = db
+        return self._db
+
+    def _execute(self, sql, params=()):
+        with self._db_lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def _insert(self, rows):
+        """Insère (canal, corps) ; retourne les canaux pleins (messages non insérés)."""
+        now = time.time()
+        full = []
+        with self._db_lock:
+            db = self._connection()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                for channel, body in rows:
+                    (queued,) = db.execute(
+                        'SELECT COUNT(*) FROM channel_messages WHERE channel = ? AND expires >= ?', (channel, now)
+                    ).fetchone()
+                    if queued >= self.get_capacity(channel):
+                        full.append(channel)
+                        continue
+                    db.execute(
+                        'INSERT INTO channel_messages (process, channel, expires, body) VALUES (?, ?, ?, ?)',
+                        (self.non_local_name(channel), channel, now + self.expiry, body),
+                    )
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return full
+
+    def _claim(self, processes):
+        """Retire et retourne les messages de processes si un autre processus a écrit."""
+        now = time.time()
+        with self._db_lock:
+            db = self._connection()
+            (version,) = db.execute('PRAGMA data_version').fetchone()
+            if version == self._data_version and now - self._last_cleanup < CLEANUP_INTERVAL:
+                return []
+            self._data_version = version
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                if now - self._last_cleanup >= CLEANUP_INTERVAL:
+                    db.execute('DELETE FROM channel_messages WHERE expires < ?', (now,))
+                    db.execute('DELETE FROM channel_groups WHERE expires < ?', (now,))
+                    self._last_cleanup = now
+                rows = []
+                if processes:
+                    placeholders = ','.join('?' * len(processes))
+                    rows = db.execute(
+                        f'SELECT id, channel, expires, body FROM channel_messages'
+                        f' WHERE process IN ({placeholders}) ORDER BY id',
+                        processes,
+                    ).fetchall()
+                    if rows:
+                        db.execute(
+                            f'DELETE FROM channel_messages WHERE process IN ({placeholders}) AND id <= ?',
+                            (*processes, rows[-1][0]),
+                        )
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        return [(channel, body) for _, channel, expires, body in rows if expires >= now]
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+    # --- Canaux locaux ---
+
+    def _is_own(self, channel):
+        return self.non_local_name(channel).endswith(f'.{self.client_prefix}!')
+
+    def _register(self, channel):
+        loop = asyncio.get_running_loop()
+        target = self._local.get(channel)
+        if target is None or target[1] is not loop:
+            target = (asyncio.Queue(), loop)
+            self._local[channel] = target
+            # Relever au prochain passage ce qui attendait déjà ce canal
+            self._data_version = None
+        return target[0]
+
+    def _deliver_local(self, channel, message):
+        """False si le canal n'est plus lu dans ce processus (consumer parti)."""
+        target = self._local.get(channel)
+        if target is None:
+            return False
+        queue, loop = target
+        if queue.qsize() >= self.get_capacity(channel):
+            raise ChannelFull(channel)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        try:
+            if loop is running:
+                queue.put_nowait(message)
+            else:
+                # group_send depuis du code synchrone (async_to_sync) : autre boucle
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+        except RuntimeError:
+            self._local.pop(channel, None)
+            return False
+        return True
+
+    def _ensure_poller(self):
+        loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done() or self._poller.get_loop() is not loop:
+            self._poller = loop.create_task(self._poll())
+
+    async def _poll(self):
+        interval = self.poll_interval
+        while self._local:
+            processes = sorted({self.non_local_name(channel) for channel in self._local})
+            try:
+                rows = await self._run(self._claim, processes)
+            except sqlite3.Error as e:
+                logger.error(f"Channel layer poll failed: {e}")
+                rows = []
+            for channel, body in rows:
+                try:
+                    if not self._deliver_local(channel, json.loads(body)):
+                        logger.debug(f"Dropping message for closed channel {channel}")
+                except ChannelFull:
+                    logger.warning(f"Channel {channel} full, dropping message")
+            interval = self.poll_interval if rows else min(interval * 2, self.max_poll_interval)
+            await asyncio.sleep(interval)
+
+    # --- API channel layer ---
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        assert '__asgi_channel__' not in message
+        body = json.dumps(message)
+        if channel in self._local:
+            self._deliver_local(channel, json.loads(body))
+        elif not self._is_own(channel):
+            if await self._run(self._insert, [(channel, body)]):
+                raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel)
+        queue = self._register(channel)
+        self._ensure_poller()
+        try:
+            return await queue.get()
+        except asyncio.CancelledError:
+            # Consumer terminé : le canal et ses groupes disparaissent
+            self._local.pop(channel, None)
+            asyncio.get_running_loop().run_in_executor(
+                None, self._execute, 'DELETE FROM channel_groups WHERE channel = ?', (channel,)
+            )
+            raise
+
+    async def new_channel(self, prefix='specific'):
+        channel = f"{prefix}.{self.client_prefix}!{''.join(random.choices(string.ascii_letters, k=12))}"
+        self._register(channel)
+        return channel
+
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group), 'Group name not valid'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        await self._run(
+            self._execute,
+            'INSERT OR REPLACE INTO channel_groups (name, channel, expires) VALUES (?, ?, ?)',
+            (group, channel, time.time() + self.group_expiry),
+        )
+
+    async def group_discard(self, group, channel):
+        assert self.valid_group_name(group), 'Group name not valid'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        await self._run(self._execute, 'DELETE FROM channel_groups WHERE name = ? AND channel = ?', (group, channel))
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        assert self.valid_group_name(group), 'Group name not valid'
+        body = json.dumps(message)
+        members = await self._run(
+            self._execute, 'SELECT channel FROM channel_groups WHERE name = ? AND expires >= ?', (group, time.time())
+        )
+        remote = []
+        for (channel,) in members:
+            if channel in self._local:
+                try:
+                    self._deliver_local(channel, json.loads(body))
+                except ChannelFull:
+                    pass
+            elif not self._is_own(channel):
+                remote.append((channel, body))
+        if remote:
+            # Comme les autres layers, un membre plein ne bloque pas les autres
+            await self._run(self._insert, remote)
+
+    async def flush(self):
+        self._local.clear()
+        await self._run(self._execute, 'DELETE FROM channel_messages')
+        await self._run(self._execute, 'DELETE FROM channel_groups')
+
+    async def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
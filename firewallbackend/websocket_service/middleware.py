@@ -1,12 +1,8 @@
-import json
-import jwt
-from django.contrib.auth import get_user_model
-from django.conf import settings
 from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
 from urllib.parse import parse_qs
 
-User = get_user_model()
+from auth_service.authentication import authenticate_token
 
 
 class JWTAuthMiddleware(BaseMiddleware):
@@ -16,32 +12,11 @@ class JWTAuthMiddleware(BaseMiddleware):
         query_params = parse_qs(query_string)
         token = query_params.get('token', [None])[0]
 
-        if token:
-            try:
-                # Decode JWT token
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-                user_id = payload.get('user_id')
-                
-                if user_id:
-                    # Get user from database
-                    user = await self.get_user(user_id)
-                    if user:
-                        scope['user'] = user
-                        return await super().__call__(scope, receive, send)
-            except jwt.ExpiredSignatureError:
-                pass
-            except jwt.InvalidTokenError:
-                pass
-            except Exception:
-                pass
-
-        # If no valid token, set anonymous user
-        scope['user'] = None
+        # Même vérification et même cache utilisateur que l'API HTTP
+        scope['user'] = await self.get_user(token) if token else None
         return await super().__call__(scope, receive, send)
 
     @database_sync_to_async
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            return None
+    def get_user(self, token):
+        result = authenticate_token(token)
+        return result[0] if result else None
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('websocket_service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='terminalcommand',
+            index=models.Index(fields=['status'], name='terminal_co_status_76a065_idx'),
+        ),
+    ]
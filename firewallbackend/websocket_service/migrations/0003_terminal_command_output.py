@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('websocket_service', '0002_terminalcommand_status_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='terminalcommand',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='terminalcommand',
+            name='output_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='terminalcommand',
+            name='output_truncated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='TerminalCommandOutput',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('data', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('command', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='output_chunks', to='websocket_service.terminalcommand')),
+            ],
+            options={
+                'db_table': 'terminal_command_output',
+                'ordering': ['command', 'sequence'],
+                'constraints': [models.UniqueConstraint(fields=('command', 'sequence'), name='unique_terminal_output_chunk')],
+            },
+        ),
+    ]
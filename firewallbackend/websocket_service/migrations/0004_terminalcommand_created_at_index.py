@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('websocket_service', '0003_terminal_command_output'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='terminalcommand',
+            index=models.Index(fields=['created_at'], name='terminal_co_created_fd6a13_idx'),
+        ),
+    ]
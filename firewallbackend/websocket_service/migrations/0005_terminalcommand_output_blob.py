@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:04
+
+import blob_service.offload
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('websocket_service', '0004_terminalcommand_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='terminalcommand',
+            name='output_blob',
+            field=blob_service.offload.BlobKeyField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
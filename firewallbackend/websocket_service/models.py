@@ -1,8 +1,14 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from firewall_service.models import Firewall
 import uuid
 
+from blob_service.offload import INLINE_LIMIT, BlobKeyField
+from blob_service.store import get_store
+
+from . import config
+
 User = get_user_model()
 
 
@@ -35,12 +41,76 @@ class TerminalCommand(models.Model):
         ('failed', 'Failed')
     ], default='executing')
     created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Caractères de sortie enregistrés (voir TerminalCommandOutput)
+    output_size = models.PositiveBigIntegerField(default=0)
+    # Sortie coupée à config.PERSIST_LIMIT
+    output_truncated = models.BooleanField(default=False)
+    # Sortie complète déplacée dans le BlobStore une fois la commande terminée
+    output_blob = BlobKeyField()
 
     class Meta:
         db_table = 'terminal_command'
         verbose_name = 'Terminal Command'
         verbose_name_plural = 'Terminal Commands'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status']),
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.command[:50]}... - {self.status}"
+
+    def append_output(self, data, sequence):
+        """Enregistre un morceau de sortie sans réécrire les précédents."""
+        TerminalCommandOutput.objects.create(command=self, sequence=sequence, data=data)
+        TerminalCommand.objects.filter(pk=self.pk).update(output_size=F('output_size') + len(data))
+
+    def extend_output(self, text, chunk_size=config.PERSIST_CHUNK_SIZE):
+        """Ajoute text, découpé, à la suite des morceaux existants."""
+        sequence = self.output_chunks.count()
+        for start in range(0, len(text), chunk_size):
+            self.append_output(text[start:start + chunk_size], sequence)
+            sequence += 1
+
+    def get_output(self):
+        if self.output_blob:
+            return get_store().read_text(self.output_blob)
+        return ''.join(self.output_chunks.order_by('sequence').values_list('data', flat=True))
+
+    def compact_output(self):
+        """
+        Commande terminée : au-delà de INLINE_LIMIT, la sortie passe des
+        morceaux en base à un blob compressé. Retourne True si déplacée.
+        """
+        self.refresh_from_db(fields=['output_size', 'output_blob'])
+        if self.output_blob or self.output_size <= INLINE_LIMIT:
+            return False
+        key = get_store().put(self.get_output())
+        with transaction.atomic():
+            TerminalCommand.objects.filter(pk=self.pk).update(output_blob=key)
+            self.output_chunks.all().delete()
+        self.output_blob = key
+        return True
+
+    def blob_texts(self):
+        return {'output': self.get_output()} if self.output_blob else {}
+
+
+class TerminalCommandOutput(models.Model):
+    """Sortie d'une commande, écrite par morceaux au fil de l'exécution."""
+    command = models.ForeignKey(TerminalCommand, on_delete=models.CASCADE, related_name='output_chunks')
+    sequence = models.PositiveIntegerField()
+    data = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'terminal_command_output'
+        ordering = ['command', 'sequence']
+        constraints = [
+            models.UniqueConstraint(fields=['command', 'sequence'], name='unique_terminal_output_chunk'),
+        ]
+
+    def __str__(self):
+        return f"{self.command_id} #{self.sequence}"
@@ -0,0 +1,143 @@
+"""
+Sortie du terminal : nettoyage (séquences ANSI, pager, caractères de
+contrôle), tampon borné vers le client et enregistrement par morceaux.
+"""
+
+import re
+from collections import deque
+
+from . import config
+
+# Retours chariot de progression, nuls et backspaces
+CONTROL_CHARS = str.maketrans('', '', '\r\x00\x08')
+ANSI_ESCAPE_RE = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
+PAGER_RE = re.compile(r'--More--\s*', re.IGNORECASE)
+# Début de séquence ANSI ou de --More-- coupé en fin de bloc
+PARTIAL_TAIL_RE = re.compile(r'(?:\x1B(?:\[[0-?]*[ -/]*)?|-(?:-(?:M(?:o(?:r(?:e(?:-(?:-)?)?)?)?)?)?)?)\Z',
+                             re.IGNORECASE)
+# Longueur maximale examinée pour une séquence coupée
+PARTIAL_TAIL_WINDOW = 32
+
+
+def clean_output(text):
+    """Supprime les caractères de contrôle, les séquences ANSI et les marqueurs du pager."""
+    if not text:
+        return text
+    text = text.translate(CONTROL_CHARS)
+    text = ANSI_ESCAPE_RE.sub('', text)
+    return PAGER_RE.sub('', text)
+
+
+class OutputCleaner:
+    """
+    clean_output appliqué au fil des blocs : une séquence coupée entre deux
+    lectures est retenue jusqu'au bloc suivant (ou jusqu'à flush()).
+    """
+
+    def __init__(self):
+        self._pending = ''
+
+    @property
+    def pending(self):
+        return bool(self._pending)
+
+    def feed(self, text):
+        text = self._pending + text.translate(CONTROL_CHARS)
+        offset = max(0, len(text) - PARTIAL_TAIL_WINDOW)
+        match = PARTIAL_TAIL_RE.search(text, offset)
+        if match and match.group():
+            self._pending = text[match.start():]
+            text = text[:match.start()]
+        else:
+            self._pending = ''
+        return clean_output(text)
+
+    def flush(self):
+        text, self._pending = self._pending, ''
+        return clean_output(text)
+
+
+class OutputBuffer:
+    """
+    Sortie en attente d'envoi au client, bornée à limit caractères : au-delà,
+    les plus anciens sont abandonnés et comptés dans dropped.
+    """
+
+    def __init__(self, limit=config.OUTPUT_BUFFER_LIMIT):
+        self.limit = limit
+        self._chunks = deque()
+        self.size = 0
+        self.dropped = 0
+
+    def __bool__(self):
+        return bool(self._chunks)
+
+    def append(self, text):
+        if len(text) > self.limit:
+            self.dropped += len(text) - self.limit
+            text = text[-self.limit:]
+        self._chunks.append(text)
+        self.size += len(text)
+        while self.size > self.limit:
+            oldest = self._chunks[0]
+            excess = self.size - self.limit
+            if len(oldest) <= excess:
+                self._chunks.popleft()
+                self.size -= len(oldest)
+                self.dropped += len(oldest)
+            else:
+                self._chunks[0] = oldest[excess:]
+                self.size -= excess
+                self.dropped += excess
+
+    def take(self):
+        """(texte en attente, caractères abandonnés depuis le dernier appel)."""
+        text, dropped = ''.join(self._chunks), self.dropped
+        self.clear()
+        return text, dropped
+
+    def clear(self):
+        self._chunks.clear()
+        self.size = 0
+        self.dropped = 0
+
+
+class CommandOutputSpool:
+    """
+    Sortie d'une commande en cours, découpée en morceaux de chunk_size
+    caractères pour TerminalCommand.append_output ; rien au-delà de limit.
+    """
+
+    def __init__(self, command, chunk_size=config.PERSIST_CHUNK_SIZE, limit=config.PERSIST_LIMIT):
+        self.command = command
+        self.chunk_size = chunk_size
+        self.limit = limit
+        self._pending = []
+        self._pending_size = 0
+        self.sequence = 0
+        self.accepted = 0
+        self.truncated = False
+
+    def add(self, text):
+        """Ajoute du texte ; True si un morceau complet est prêt."""
+        room = self.limit - self.accepted
+        if len(text) > room:
+            text = text[:room]
+            self.truncated = True
+        if text:
+            self._pending.append(text)
+            self._pending_size += len(text)
+            self.accepted += len(text)
+        return self._pending_size >= self.chunk_size
+
+    def chunks(self, final=False):
+        """Morceaux (séquence, texte) à écrire ; le reste partiel seulement si final."""
+        data = ''.join(self._pending)
+        cut = len(data) if final else len(data) - len(data) % self.chunk_size
+        self._pending = [data[cut:]] if cut < len(data) else []
+        self._pending_size = len(data) - cut
+        ready = []
+        for start in range(0, cut, self.chunk_size):
+            ready.append((self.sequence, data[start:start + self.chunk_size]))
+            self.sequence += 1
+        return ready
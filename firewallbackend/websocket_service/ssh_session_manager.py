@@ -1,11 +1,11 @@
 #!/usr/bin/env python
 import asyncio
-import paramiko
 import logging
+import time
 from websocket_service.models import TerminalSession, TerminalCommand
-from auth_service.models import SSHUser
-from auth_service.utils.crypto import decrypt_ssh_data
+from auth_service.credentials import get_ssh_credentials
 from django.utils import timezone
+from . import transport_registry
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +15,11 @@ class SSHSessionManager:
     def __init__(self, firewall, admin_user):
         self.firewall = firewall
         self.admin_user = admin_user
-        self.ssh_client = None
+        self.transport_key = None
         self.ssh_channel = None
         self.session = None
         self.is_connected = False
+        self.last_used = time.monotonic()
         
     async def connect(self):
         """Établir une connexion SSH"""
@@ -42,31 +43,22 @@ class SSHSessionManager:
             # Récupérer les identifiants SSH
             ssh_credentials = await self._get_ssh_credentials()
             ssh_user = ssh_credentials.ssh_username
-            ssh_password = decrypt_ssh_data(ssh_credentials.ssh_password)
-            ssh_port = getattr(self.firewall, 'ssh_port', 22)
+            ssh_password = ssh_credentials.password
+            ssh_port = getattr(self.firewall, 'ssh_port', None) or 22
             
-            # Créer la connexion SSH
-            self.ssh_client = paramiko.SSHClient()
-            self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            # Se connecter
-            self.ssh_client.connect(
-                self.firewall.ip_address,
-                port=ssh_port,
-                username=ssh_user,
-                password=ssh_password,
-                timeout=10
+            # Canal shell sur la connexion (utilisateur, firewall) partagée avec les terminaux
+            self.transport_key = (self.admin_user.id, self.firewall.id)
+            self.ssh_channel = await asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: transport_registry.registry.open_channel(
+                    self.transport_key,
+                    lambda: transport_registry.connect_client(
+                        self.firewall.ip_address, ssh_port, ssh_user, ssh_password, timeout=10
+                    ),
+                    width=200,
+                    height=60,
+                ),
             )
-            # Keepalive pour éviter les coupures
-            try:
-                transport = self.ssh_client.get_transport()
-                if transport:
-                    transport.set_keepalive(30)
-            except Exception:
-                pass
-            
-            # Créer un canal shell interactif avec PTY pour des invites stables
-            self.ssh_channel = self.ssh_client.invoke_shell(term='vt100', width=200, height=60)
             self.ssh_channel.settimeout(1)
             
             # Drainer la bannière/avertissements initiaux jusqu'à l'invite
@@ -103,7 +95,6 @@ class SSHSessionManager:
     
     async def _read_output(self, timeout: float = 10.0):
         """Lire la sortie de la commande"""
-        import time
         start_time = time.time()
         output = ""
         last_len = 0
@@ -138,9 +129,13 @@ class SSHSessionManager:
         try:
             command = await self._get_command_by_id(command_id)
             command.status = status
-            command.output = output
             command.completed_at = timezone.now()
             await self._save_command(command)
+            if output:
+                from asgiref.sync import sync_to_async
+                await sync_to_async(command.extend_output)(output)
+                if status == 'completed':
+                    await sync_to_async(command.compact_output)()
         except Exception as e:
             logger.error(f"Erreur mise à jour commande: {str(e)}")
     
@@ -148,9 +143,7 @@ class SSHSessionManager:
         """Fermer la connexion"""
         try:
             if self.ssh_channel:
-                self.ssh_channel.close()
-            if self.ssh_client:
-                self.ssh_client.close()
+                transport_registry.registry.release(self.transport_key, self.ssh_channel)
             if self.session:
                 self.session.is_active = False
                 await self._save_session(self.session)
@@ -174,12 +167,12 @@ class SSHSessionManager:
     async def _get_ssh_credentials(self):
         """Récupérer les identifiants SSH de manière asynchrone"""
         from asgiref.sync import sync_to_async
-        return await sync_to_async(SSHUser.objects.get)(user=self.admin_user)
+        return await sync_to_async(get_ssh_credentials)(self.admin_user)
     
     async def _get_command_by_id(self, command_id):
         """Récupérer une commande par ID de manière asynchrone"""
         from asgiref.sync import sync_to_async
-        return await sync_to_async(TerminalCommand.objects.get)(command_id=command_id)
+        return await sync_to_async(TerminalCommand.objects.select_related('session').get)(command_id=command_id)
     
     async def _save_command(self, command):
         """Sauvegarder une commande de manière asynchrone"""
@@ -191,12 +184,31 @@ class SSHSessionManager:
         from asgiref.sync import sync_to_async
         return await sync_to_async(session.save)()
 
+    def is_alive(self):
+        """Canal ouvert sur une connexion active"""
+        return bool(
+            self.is_connected and self.ssh_channel and not self.ssh_channel.closed
+            and self.ssh_channel.get_transport() and self.ssh_channel.get_transport().is_active()
+        )
+
 # Instance globale pour maintenir la connexion
 _ssh_sessions = {}
+# Session rendue (canal fermé) après cette durée sans commande
+SESSION_IDLE_TIMEOUT = 300  # seconds
+
+
+async def _evict_sessions(now):
+    """Ferme les sessions mortes ou inutilisées depuis SESSION_IDLE_TIMEOUT"""
+    for key, session in list(_ssh_sessions.items()):
+        if not session.is_alive() or now - session.last_used >= SESSION_IDLE_TIMEOUT:
+            del _ssh_sessions[key]
+            await session.disconnect()
 
 async def get_or_create_ssh_session(firewall, admin_user):
     """Obtenir ou créer une session SSH"""
     key = f"{firewall.id}_{admin_user.id}"
+    now = time.monotonic()
+    await _evict_sessions(now)
     
     if key not in _ssh_sessions:
         session = SSHSessionManager(firewall, admin_user)
@@ -204,6 +216,7 @@ async def get_or_create_ssh_session(firewall, admin_user):
         _ssh_sessions[key] = session
     else:
         session = _ssh_sessions[key]
+    session.last_used = now
     
     return session
 
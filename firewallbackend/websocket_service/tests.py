@@ -0,0 +1,419 @@
+import asyncio
+import os
+import queue
+import shutil
+import tempfile
+import time
+import zlib
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+from channels.exceptions import ChannelFull
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from auth_service.models import User
+from blob_service.offload import INLINE_LIMIT
+from datacenter_service.models import DataCenter
+from firewall_service.models import Firewall, FirewallType
+from . import config, framing
+from .channel_reader import SSHChannelReader
+from .layers import SQLiteChannelLayer
+from .models import TerminalCommand, TerminalSession
+from .output import CommandOutputSpool, OutputBuffer, OutputCleaner, clean_output
+
+
+async def wait_until(predicate, timeout=5.0):
+    """Laisse tourner la boucle jusqu'à ce que predicate() soit vrai."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('Condition not reached before timeout')
+        await asyncio.sleep(0.01)
+
+
+class FakeChannel:
+    """Canal paramiko minimal : recv() rend les blocs fournis par feed()."""
+
+    def __init__(self, chunks=()):
+        self._chunks = queue.Queue()
+        self.closed = False
+        self.reads = 0
+        for chunk in chunks:
+            self.feed(chunk)
+
+    def feed(self, data):
+        self._chunks.put(data)
+
+    def recv(self, size):
+        data = self._chunks.get()
+        self.reads += 1
+        return data
+
+    def close(self):
+        self.closed = True
+        self._chunks.put(b'')
+
+
+class ChannelReaderTests(SimpleTestCase):
+    async def test_pauses_at_queue_limit_and_resumes(self):
+        """Test l'arrêt de la lecture au-delà de queue_limit et sa reprise après consommation"""
+        channel = FakeChannel([b'x' * 10] * 10)
+        reader = SSHChannelReader(channel, asyncio.get_running_loop(), queue_limit=30).start()
+        self.addCleanup(channel.close)
+
+        await wait_until(lambda: reader.pauses == 1)
+        self.assertEqual(channel.reads, 3)
+
+        # Un bloc dépasse déjà le quart de la file : read() le rend seul
+        self.assertEqual(await reader.read(timeout=1), b'x' * 10)
+        await wait_until(lambda: reader.pauses == 2)
+        self.assertEqual(channel.reads, 4)
+
+    async def test_read_coalesces_up_to_a_quarter_of_the_limit(self):
+        """Test le regroupement des blocs déjà arrivés, borné au quart de la file"""
+        channel = FakeChannel([b'a' * 40] * 5)
+        reader = SSHChannelReader(channel, asyncio.get_running_loop(), queue_limit=400).start()
+        self.addCleanup(channel.close)
+        await wait_until(lambda: reader.queue.qsize() == 5)
+        reader.wake()
+
+        self.assertEqual(await reader.read(timeout=1), b'a' * 120)
+        # Le réveil (None) en file est ignoré pendant le regroupement
+        self.assertEqual(await reader.read(timeout=1), b'a' * 80)
+        self.assertEqual(reader._queued, 0)
+        self.assertIsNone(await reader.read(timeout=0.05))
+
+    async def test_end_of_channel_requeued(self):
+        """Test la fin de canal (b'') remise en file pour l'appel suivant"""
+        channel = FakeChannel([b'show', b' ver', b''])
+        reader = SSHChannelReader(channel, asyncio.get_running_loop()).start()
+        await wait_until(lambda: reader.queue.qsize() == 3)
+
+        self.assertEqual(await reader.read(timeout=1), b'show ver')
+        self.assertEqual(await reader.read(timeout=1), b'')
+        reader._thread.join(timeout=1)
+        self.assertFalse(reader._thread.is_alive())
+
+    async def test_channel_closed_during_pause(self):
+        """Test la fin de canal signalée quand le canal est fermé pendant une pause"""
+        channel = FakeChannel([b'x' * 10] * 3)
+        with patch('websocket_service.channel_reader.PAUSE_CHECK_INTERVAL', 0.01):
+            reader = SSHChannelReader(channel, asyncio.get_running_loop(), queue_limit=10).start()
+            await wait_until(lambda: reader.pauses == 1)
+            channel.closed = True
+            await wait_until(lambda: reader.queue.qsize() == 2)
+
+        self.assertEqual(await reader.read(timeout=1), b'x' * 10)
+        self.assertEqual(await reader.read(timeout=1), b'')
+
+    async def test_backpressure_against_fake_fortigate(self):
+        """Test la contre-pression sur un vrai canal SSH (faux FortiGate) sans perte de données"""
+        from metrics_service.benchmark.fake_fortigate import FakeFortiGate, FortiGateProfile, full_configuration
+        from .transport_registry import connect_client
+
+        device = FakeFortiGate('FGT-READER', FortiGateProfile(config_lines=3000)).start()
+        self.addCleanup(device.stop)
+        client = await asyncio.to_thread(connect_client, device.host, device.port, 'admin', 'secret')
+        self.addCleanup(client.close)
+        channel = client.invoke_shell()
+        channel.send('show full-configuration\n')
+
+        reader = SSHChannelReader(channel, asyncio.get_running_loop(), read_size=4096,
+                                  queue_limit=16 * 1024).start()
+        expected_end = 'end\r\n' + device.prompt
+        received = []
+        while not ''.join(received).endswith(expected_end):
+            data = await reader.read(timeout=5)
+            self.assertTrue(data, 'Channel ended before the configuration')
+            received.append(data.decode())
+            # Consommateur plus lent que le boîtier
+            await asyncio.sleep(0.005)
+
+        self.assertGreater(reader.pauses, 0)
+        output = ''.join(received)
+        self.assertIn('\r\n'.join(full_configuration('FGT-READER', 3000)), output)
+        channel.close()
+        self.assertEqual(await reader.read(timeout=5), b'')
+
+
+class FramingTests(SimpleTestCase):
+    def test_round_trip(self):
+        """Test l'encodage puis le décodage d'une trame, compressée ou non"""
+        payload = 'config firewall address\r\n    edit "h"\r\n'.encode() * 200
+        for compress in (False, True):
+            frame = framing.encode_frame(payload, compress=compress)
+            self.assertEqual(framing.decode_frame(frame), (framing.FRAME_OUTPUT, payload))
+
+        frame = framing.encode_frame(payload, compress=True)
+        self.assertEqual(frame[1], framing.FLAG_ZLIB)
+        self.assertLess(len(frame), len(payload))
+        self.assertEqual(zlib.decompress(frame[framing.HEADER.size:]), payload)
+
+    def test_zlib_kept_only_if_smaller(self):
+        """Test l'envoi en clair d'une charge que zlib ne réduit pas"""
+        payload = os.urandom(4096)
+        frame = framing.encode_frame(payload, compress=True)
+        self.assertEqual(frame, framing.HEADER.pack(framing.FRAME_OUTPUT, 0) + payload)
+        self.assertEqual(framing.decode_frame(frame)[1], payload)
+
+    def test_negotiate_and_threshold(self):
+        """Test la négociation du protocole et le seuil de compression"""
+        self.assertEqual(framing.negotiate({}), (framing.PROTOCOL_JSON, None))
+        self.assertEqual(framing.negotiate({'protocol': ['binary']}), (framing.PROTOCOL_BINARY, None))
+        self.assertEqual(framing.negotiate({'protocol': ['binary'], 'compression': ['zlib']}),
+                         (framing.PROTOCOL_BINARY, framing.COMPRESSION_ZLIB))
+        self.assertEqual(framing.negotiate({'protocol': ['json'], 'compression': ['zlib']}),
+                         (framing.PROTOCOL_JSON, None))
+        self.assertEqual(framing.negotiate({'protocol': ['binary'], 'compression': ['brotli']}),
+                         (framing.PROTOCOL_BINARY, None))
+
+        small, large = b'x' * (config.COMPRESSION_MIN_SIZE - 1), b'x' * config.COMPRESSION_MIN_SIZE
+        self.assertFalse(framing.should_compress(small, framing.COMPRESSION_ZLIB))
+        self.assertTrue(framing.should_compress(large, framing.COMPRESSION_ZLIB))
+        self.assertFalse(framing.should_compress(large, None))
+
+
+class OutputCleanerTests(SimpleTestCase):
+    def _feed(self, chunks):
+        cleaner = OutputCleaner()
+        return ''.join(cleaner.feed(chunk) for chunk in chunks) + cleaner.flush()
+
+    def test_matches_clean_output(self):
+        """Test le nettoyage des séquences ANSI, du pager et des caractères de contrôle"""
+        text = 'line 1\r\n\x1b[32mOK\x1b[0m\r\n--More-- \x08\x08line 2\r\n'
+        self.assertEqual(clean_output(text), 'line 1\nOK\nline 2\n')
+        self.assertEqual(self._feed([text]), 'line 1\nOK\nline 2\n')
+
+    def test_sequences_split_across_chunks(self):
+        """Test une séquence ANSI ou un --More-- coupé entre deux blocs (PARTIAL_TAIL_RE)"""
+        text = 'port1 \x1b[1;32mup\x1b[0m\n--More-- port2 down\n'
+        expected = clean_output(text)
+        for cut in range(1, len(text)):
+            with self.subTest(cut=cut):
+                self.assertEqual(self._feed([text[:cut], text[cut:]]), expected)
+
+    def test_partial_tail_held_until_next_chunk(self):
+        """Test la retenue d'un début de marqueur, rendu tel quel s'il n'est pas complété"""
+        cleaner = OutputCleaner()
+        self.assertEqual(cleaner.feed('edit "a"\n--Mo'), 'edit "a"\n')
+        self.assertTrue(cleaner.pending)
+        self.assertEqual(cleaner.feed('re-- next\n'), 'next\n')
+        self.assertFalse(cleaner.pending)
+
+        self.assertEqual(cleaner.feed('set comment a-'), 'set comment a')
+        self.assertEqual(cleaner.feed('b\n'), '-b\n')
+        self.assertEqual(cleaner.feed('end \x1b['), 'end ')
+        self.assertEqual(cleaner.flush(), '\x1b[')
+
+
+class OutputBufferTests(SimpleTestCase):
+    def test_drops_oldest_and_counts(self):
+        """Test l'abandon des caractères les plus anciens au-delà de la limite"""
+        buffer = OutputBuffer(limit=10)
+        buffer.append('abcd')
+        buffer.append('efgh')
+        self.assertEqual((buffer.size, buffer.dropped), (8, 0))
+
+        # Le plus ancien bloc est coupé, pas retiré en entier
+        buffer.append('ijk')
+        self.assertEqual((buffer.size, buffer.dropped), (10, 1))
+        buffer.append('lmnop')
+        self.assertEqual(buffer.take(), ('fghijklmnop'[-10:], 6))
+        self.assertFalse(buffer)
+        self.assertEqual((buffer.size, buffer.dropped), (0, 0))
+
+    def test_chunk_larger_than_limit(self):
+        """Test un bloc plus grand que la limite : seule sa fin est gardée"""
+        buffer = OutputBuffer(limit=4)
+        buffer.append('ab')
+        buffer.append('0123456789')
+        self.assertEqual(buffer.take(), ('6789', 8))
+
+
+class CommandOutputSpoolTests(SimpleTestCase):
+    def test_chunk_sequencing(self):
+        """Test le découpage en morceaux complets numérotés, le reste à la fin"""
+        spool = CommandOutputSpool(command=None, chunk_size=4, limit=100)
+        self.assertFalse(spool.add('abc'))
+        self.assertEqual(spool.chunks(), [])
+        self.assertTrue(spool.add('defghij'))
+        self.assertEqual(spool.chunks(), [(0, 'abcd'), (1, 'efgh')])
+        self.assertFalse(spool.add('k'))
+        self.assertEqual(spool.chunks(final=True), [(2, 'ijk')])
+        self.assertEqual(spool.chunks(final=True), [])
+        self.assertEqual((spool.sequence, spool.accepted, spool.truncated), (3, 11, False))
+
+    def test_limit_truncates(self):
+        """Test la coupure à limit caractères"""
+        spool = CommandOutputSpool(command=None, chunk_size=4, limit=6)
+        spool.add('abcd')
+        spool.add('efgh')
+        spool.add('ijkl')
+        self.assertTrue(spool.truncated)
+        self.assertEqual(spool.accepted, 6)
+        self.assertEqual(spool.chunks(final=True), [(0, 'abcd'), (1, 'ef')])
+
+
+class TerminalCommandOutputTests(TestCase):
+    def setUp(self):
+        self.blob_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.blob_dir, ignore_errors=True)
+        settings_override = override_settings(BLOB_STORE_DIR=self.blob_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = User.objects.create_user(username='termuser', email='term@example.com', password='testpass123')
+        datacenter = DataCenter.objects.create(name='Term DC', owner=user)
+        firewall_type = FirewallType.objects.create(
+            name='Term Type', attributes_schema={}, data_center=datacenter, owner=user
+        )
+        firewall = Firewall.objects.create(name='fw-term', ip_address='10.2.0.1', data_center=datacenter,
+                                           firewall_type=firewall_type, owner=user)
+        session = TerminalSession.objects.create(user=user, firewall=firewall, session_id='term-session')
+        self.command = TerminalCommand.objects.create(session=session, command='show', command_id='term-cmd')
+
+    def test_persist_spool_up_to_limit(self):
+        """Test l'enregistrement par morceaux, coupé à la limite et marqué tronqué"""
+        spool = CommandOutputSpool(self.command, chunk_size=5, limit=12)
+        for text in ('line 1\n', 'line 2\n', 'line 3\n'):
+            if spool.add(text):
+                for sequence, chunk in spool.chunks():
+                    self.command.append_output(chunk, sequence)
+        for sequence, chunk in spool.chunks(final=True):
+            self.command.append_output(chunk, sequence)
+
+        self.command.refresh_from_db()
+        self.assertTrue(spool.truncated)
+        self.assertEqual(self.command.output_size, 12)
+        self.assertEqual(self.command.get_output(), 'line 1\nline ')
+        self.assertEqual(list(self.command.output_chunks.values_list('sequence', flat=True)), [0, 1, 2])
+
+    def test_extend_output_continues_sequence(self):
+        """Test l'ajout après les morceaux existants, découpé à chunk_size"""
+        self.command.append_output('head\n', 0)
+        self.command.extend_output('0123456789', chunk_size=4)
+
+        self.command.refresh_from_db()
+        self.assertEqual(self.command.output_size, 15)
+        self.assertEqual(
+            list(self.command.output_chunks.values_list('sequence', 'data')),
+            [(0, 'head\n'), (1, '0123'), (2, '4567'), (3, '89')]
+        )
+
+    def test_compact_output_into_blob(self):
+        """Test le passage d'une grosse sortie terminée dans un blob compressé"""
+        self.command.extend_output('small')
+        self.assertFalse(self.command.compact_output())
+
+        text = 'set comment "generated"\n' * (INLINE_LIMIT // 10)
+        self.command.extend_output(text)
+        self.assertTrue(self.command.compact_output())
+
+        command = TerminalCommand.objects.get(pk=self.command.pk)
+        self.assertTrue(command.output_blob)
+        self.assertFalse(command.output_chunks.exists())
+        self.assertEqual(command.get_output(), 'small' + text)
+        self.assertFalse(command.compact_output())
+
+
+class SQLiteChannelLayerTests(SimpleTestCase):
+    """Deux instances sur un même fichier : deux processus workers."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'channels.sqlite3')
+
+    @asynccontextmanager
+    async def layers(self, **config):
+        config = dict({'poll_interval': 0.005, 'max_poll_interval': 0.02}, **config)
+        first, second = SQLiteChannelLayer(self.path, **config), SQLiteChannelLayer(self.path, **config)
+        try:
+            yield first, second
+        finally:
+            await first.close()
+            await second.close()
+
+    async def test_send_across_processes(self):
+        """Test l'envoi vers un canal lu par un autre processus"""
+        async with self.layers() as (first, second):
+            channel = await first.new_channel()
+            await second.send(channel, {'type': 'terminal.output', 'text': 'FGT #'})
+            self.assertEqual(await asyncio.wait_for(first.receive(channel), 2),
+                             {'type': 'terminal.output', 'text': 'FGT #'})
+
+            # Canal du processus courant : remis sans passer par la base
+            await first.send(channel, {'type': 'local'})
+            self.assertEqual(first._execute('SELECT COUNT(*) FROM channel_messages'), [(0,)])
+            self.assertEqual(await asyncio.wait_for(first.receive(channel), 1), {'type': 'local'})
+
+    async def test_group_send(self):
+        """Test la diffusion à un groupe réparti sur deux processus"""
+        async with self.layers() as (first, second):
+            remote, local = await first.new_channel(), await second.new_channel()
+            await first.group_add('alerts', remote)
+            await second.group_add('alerts', local)
+            await second.group_send('alerts', {'type': 'alert', 'id': 1})
+
+            self.assertEqual(await asyncio.wait_for(second.receive(local), 1), {'type': 'alert', 'id': 1})
+            self.assertEqual(await asyncio.wait_for(first.receive(remote), 2), {'type': 'alert', 'id': 1})
+
+            await first.group_discard('alerts', remote)
+            await second.group_send('alerts', {'type': 'alert', 'id': 2})
+            self.assertEqual(await asyncio.wait_for(second.receive(local), 1), {'type': 'alert', 'id': 2})
+            self.assertEqual(first._execute('SELECT COUNT(*) FROM channel_messages'), [(0,)])
+
+    async def test_capacity(self):
+        """Test ChannelFull au-delà de la capacité, en base comme en local"""
+        async with self.layers(capacity=2) as (first, second):
+            channel = await first.new_channel()
+            await second.send(channel, {'type': 'm', 'n': 1})
+            await second.send(channel, {'type': 'm', 'n': 2})
+            with self.assertRaises(ChannelFull):
+                await second.send(channel, {'type': 'm', 'n': 3})
+
+            local = await second.new_channel()
+            await second.send(local, {'type': 'm'})
+            await second.send(local, {'type': 'm'})
+            with self.assertRaises(ChannelFull):
+                await second.send(local, {'type': 'm'})
+
+            # Un membre plein ne bloque pas la diffusion aux autres
+            other = await first.new_channel()
+            await second.group_add('g', channel)
+            await second.group_add('g', other)
+            await second.group_send('g', {'type': 'broadcast'})
+            self.assertEqual([
+                (await asyncio.wait_for(first.receive(channel), 2))['n'],
+                (await asyncio.wait_for(first.receive(channel), 2))['n'],
+            ], [1, 2])
+            self.assertEqual(await asyncio.wait_for(first.receive(other), 2), {'type': 'broadcast'})
+
+    async def test_expiry(self):
+        """Test l'abandon des messages expirés avant d'être relevés"""
+        async with self.layers(expiry=0.05) as (first, second):
+            channel = await first.new_channel()
+            await second.send(channel, {'type': 'stale'})
+            await asyncio.sleep(0.1)
+            await second.send(channel, {'type': 'fresh'})
+            self.assertEqual(await asyncio.wait_for(first.receive(channel), 2), {'type': 'fresh'})
+
+    async def test_receive_cancellation_cleans_up(self):
+        """Test le retrait du canal et de ses groupes quand le consumer s'arrête, puis l'arrêt du poller"""
+        async with self.layers() as (first, second):
+            channel = await first.new_channel()
+            await first.group_add('terminal', channel)
+            receiver = asyncio.ensure_future(first.receive(channel))
+            await wait_until(lambda: first._poller is not None)
+            receiver.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await receiver
+
+            self.assertNotIn(channel, first._local)
+            await wait_until(lambda: first._execute('SELECT COUNT(*) FROM channel_groups') == [(0,)])
+            # Plus aucun canal lu : la tâche de lecture s'arrête
+            await wait_until(first._poller.done)
+
+            await second.group_send('terminal', {'type': 'nobody'})
+            self.assertEqual(second._execute('SELECT COUNT(*) FROM channel_messages'), [(0,)])
@@ -0,0 +1,264 @@
+"""
+Registre des connexions SSH partagées entre terminaux.
+
+Une seule connexion authentifiée (paramiko Transport) par (utilisateur,
+firewall) : chaque onglet de terminal, et chaque session interactive des
+emails, y ouvre son propre canal shell. Une connexion sans canal reste
+ouverte IDLE_TIMEOUT secondes pour l'onglet suivant, puis est fermée ; au
+plus MAX_TRANSPORTS connexions inutilisées sont gardées (LRU). Une connexion
+restée inactive plus de PROBE_AFTER secondes est sondée avant d'être
+réutilisée.
+
+Le registre est propre au processus : avec plusieurs workers, les
+terminaux servis par des workers différents ne partagent pas de connexion.
+
+Les méthodes sont bloquantes : les appeler depuis un thread (executor).
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from metrics_service import metrics
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Connexions gardées au plus (les connexions avec des canaux ouverts ne sont jamais évincées)
+MAX_TRANSPORTS = 50
+# Fermeture d'une connexion sans canal
+IDLE_TIMEOUT = 300  # seconds
+# Inactivité au-delà de laquelle une connexion est sondée avant réutilisation
+PROBE_AFTER = 30  # seconds
+PROBE_TIMEOUT = 5  # seconds
+SWEEP_INTERVAL = 60  # seconds
+KEEPALIVE_INTERVAL = 30  # seconds
+
+
+class _Entry:
+    def __init__(self, key, client):
+        self.key = key
+        self.client = client
+        self.transport = client.get_transport()
+        self.host = self.transport.getpeername()[0] if self.transport else None
+        self.channels = set()
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.channels_opened = 0
+
+    def prune(self):
+        self.channels = {channel for channel in self.channels if not channel.closed}
+        return len(self.channels)
+
+    def is_active(self):
+        return self.transport is not None and self.transport.is_active()
+
+    def close(self):
+        for channel in list(self.channels):
+            try:
+                channel.close()
+            except Exception:
+                pass
+        self.channels.clear()
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+def probe(transport, timeout=PROBE_TIMEOUT):
+    """
+    Aller-retour keepalive@openssh.com : toute réponse, même un refus, prouve
+    que la connexion vit. global_request n'a pas de timeout, d'où le thread.
+    """
+    result = []
+
+    def request():
+        transport.global_request('keepalive@openssh.com', wait=True)
+        result.append(transport.is_active())
+
+    thread = threading.Thread(target=request, name='ssh-transport-probe', daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return bool(result and result[0])
+
+
+class SSHTransportRegistry:
+    def __init__(self, max_transports=MAX_TRANSPORTS, idle_timeout=IDLE_TIMEOUT, probe_after=PROBE_AFTER):
+        self.max_transports = max_transports
+        self.idle_timeout = idle_timeout
+        self.probe_after = probe_after
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Un verrou par clé : deux onglets simultanés ne se connectent qu'une fois
+        self._key_locks = {}
+        self._sweeper = None
+        self.evictions = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def open_channel(self, key, connect, term='vt100', width=80, height=24):
+        """
+        Canal shell sur la connexion de key ; connect() doit retourner un
+        SSHClient connecté quand il faut en ouvrir une.
+        """
+        # paramiko n'est chargé qu'à la première session SSH
+        import paramiko
+
+        self._start_sweeper()
+        with self._key_lock(key):
+            entry = self._reusable(key)
+            if entry is None:
+                client = connect()
+                transport = client.get_transport()
+                if transport is not None:
+                    transport.set_keepalive(KEEPALIVE_INTERVAL)
+                entry = _Entry(key, client)
+            try:
+                channel = entry.transport.open_session()
+                channel.get_pty(term, width, height)
+                channel.invoke_shell()
+            except (paramiko.SSHException, EOFError, OSError) as e:
+                # Canal refusé (limite de sessions du firewall) : la connexion reste valable
+                refused = isinstance(e, paramiko.ChannelException) and entry.is_active()
+                with self._lock:
+                    registered = self._entries.get(key) is entry
+                    if registered and not refused:
+                        del self._entries[key]
+                if not (registered and refused):
+                    entry.close()
+                raise
+            with self._lock:
+                entry.channels.add(channel)
+                entry.channels_opened += 1
+                entry.last_used = time.monotonic()
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                evicted = self._evict_lru()
+        for old in evicted:
+            old.close()
+        return channel
+
+    def _reusable(self, key):
+        """Connexion existante de key si elle répond, sinon None (et fermée)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        alive = entry.is_active()
+        if alive and time.monotonic() - entry.last_used > self.probe_after:
+            alive = probe(entry.transport)
+        if alive:
+            return entry
+        logger.info(f"SSH transport {key} is dead, reconnecting")
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        entry.close()
+        return None
+
+    def _evict_lru(self):
+        """Sous self._lock : retire les plus anciennes connexions sans canal au-delà de max_transports."""
+        evicted = []
+        excess = len(self._entries) - self.max_transports
+        for key, entry in list(self._entries.items()):
+            if excess <= 0:
+                break
+            if entry.prune() == 0:
+                del self._entries[key]
+                evicted.append(entry)
+                excess -= 1
+        self.evictions += len(evicted)
+        return evicted
+
+    def release(self, key, channel):
+        """Ferme un canal ; la connexion reste ouverte pour les autres onglets."""
+        try:
+            channel.close()
+        except Exception:
+            pass
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.channels.discard(channel)
+                entry.last_used = time.monotonic()
+
+    def sweep(self, now=None):
+        """Ferme les connexions mortes et celles sans canal depuis idle_timeout."""
+        now = time.monotonic() if now is None else now
+        closing = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                idle = entry.prune() == 0 and now - entry.last_used >= self.idle_timeout
+                if idle or not entry.is_active():
+                    del self._entries[key]
+                    closing.append(entry)
+            self.evictions += len(closing)
+        for entry in closing:
+            entry.close()
+        return len(closing)
+
+    def _start_sweeper(self):
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name='ssh-transport-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(SWEEP_INTERVAL)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"SSH transport sweep failed: {e}")
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.close()
+
+    def transport_count(self):
+        with self._lock:
+            return len(self._entries)
+
+    def channel_count(self):
+        with self._lock:
+            return sum(entry.prune() for entry in self._entries.values())
+
+    def stats(self):
+        """Une ligne par connexion : canaux ouverts, âge, inactivité."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'user_id': str(entry.key[0]),
+                    'firewall_id': str(entry.key[1]),
+                    'host': entry.host,
+                    'active': entry.is_active(),
+                    'channels': entry.prune(),
+                    'channels_opened': entry.channels_opened,
+                    'age_seconds': round(now - entry.created, 1),
+                    'idle_seconds': round(now - entry.last_used, 1),
+                }
+                for entry in self._entries.values()
+            ]
+
+
+registry = SSHTransportRegistry()
+metrics.watch_transports(registry)
+
+
+def connect_client(host, port, username, password, timeout=config.SSH_TIMEOUT):
+    """SSHClient connecté, pour open_channel."""
+    import paramiko
+
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(host, port, username, password, timeout=timeout)
+    return client
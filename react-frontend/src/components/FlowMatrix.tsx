@@ -3,7 +3,7 @@ import { Upload, Play, Server, Shield, Building, Search, Loader2, Terminal } fro
 import * as XLSX from 'xlsx';
 import axios from 'axios';
 import { API_URL } from '../config.ts';
-import { executeCommand, getCommandHistory, executeTemplate, CommandResponse } from '../services/commandService';
+import { executeCommand, getCommandHistory, getCommandOutput, executeTemplate, CommandResponse } from '../services/commandService';
 import { templateService, Template as CommandTemplate } from '../services/templateService';
 import { navigateTo } from '../utils/navigation';
 
@@ -197,6 +197,7 @@ const FlowMatrix: React.FC = () => {
   const [command, setCommand] = useState('');
   const [commandOutput, setCommandOutput] = useState('');
   const [commandHistory, setCommandHistory] = useState<CommandResponse[]>([]);
+  const [historyNext, setHistoryNext] = useState<string | null>(null);
   const [isExecuting, setIsExecuting] = useState(false);
   const [executionError, setExecutionError] = useState<string | null>(null);
 
@@ -867,11 +868,14 @@ const FlowMatrix: React.FC = () => {
     const loadCommandHistory = async () => {
       if (selectedFirewall) {
         try {
-          const history = await getCommandHistory(selectedFirewall.id);
-          setCommandHistory(Array.isArray(history) ? history : []);
+          // Page la plus récente, du plus ancien au plus récent à l'affichage
+          const page = await getCommandHistory(selectedFirewall.id);
+          setCommandHistory([...page.results].reverse());
+          setHistoryNext(page.next);
         } catch (err) {
           console.error('Error loading command history:', err);
           setCommandHistory([]);
+          setHistoryNext(null);
         }
       }
     };
@@ -879,6 +883,28 @@ const FlowMatrix: React.FC = () => {
     loadCommandHistory();
   }, [selectedFirewall]);
 
+  const loadOlderCommands = async () => {
+    if (!selectedFirewall || !historyNext) return;
+    try {
+      const page = await getCommandHistory(selectedFirewall.id, historyNext);
+      setCommandHistory(prev => [...[...page.results].reverse(), ...prev]);
+      setHistoryNext(page.next);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Failed to fetch command history');
+    }
+  };
+
+  const loadFullOutput = async (commandId: number) => {
+    try {
+      const output = await getCommandOutput(commandId);
+      setCommandHistory(prev => prev.map(item =>
+        item.id === commandId ? { ...item, output, output_truncated: false } : item
+      ));
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Failed to fetch command output');
+    }
+  };
+
   const applyTemplate = () => {
     if (!selectedTemplate) return;
     
@@ -1440,13 +1466,21 @@ const FlowMatrix: React.FC = () => {
                 <span className="text-gray-400">History:</span>
               </div>
               <button
-                onClick={() => setCommandHistory([])}
+                onClick={() => { setCommandHistory([]); setHistoryNext(null); }}
                 className="text-gray-500 hover:text-gray-400 text-sm"
               >
                 Clear History
               </button>
             </div>
             <div className="space-y-2">
+              {historyNext && (
+                <button
+                  onClick={loadOlderCommands}
+                  className="text-blue-400 hover:text-blue-300 text-sm"
+                >
+                  Load older commands
+                </button>
+              )}
               {commandHistory.map((item, index) => (
                 <div 
                   key={`${item.id}-${item.executed_at}-${index}`} 
@@ -1478,6 +1512,14 @@ const FlowMatrix: React.FC = () => {
                       {item.output}
                     </pre>
                   )}
+                  {item.output_truncated && (
+                    <button
+                      onClick={() => loadFullOutput(item.id)}
+                      className="mt-1 text-xs text-blue-400 hover:text-blue-300"
+                    >
+                      Load full output{item.output_size ? ` (${item.output_size} characters)` : ''}
+                    </button>
+                  )}
                   {item.error_message && (
                     <div className="mt-2 text-sm text-red-400">
                       Error: {item.error_message}
@@ -640,10 +640,20 @@ const NetworkMap: React.FC = () => {
     }
     setIsPingingAll(true);
     try {
-      const response = await api.post('/firewalls/ping_all/');
-      console.log('Ping all response:', response.data);
+      const started = await api.post('/firewalls/ping_all/');
+      const taskId = started.data?.task_id;
+      if (!taskId) {
+        throw new Error(started.data?.message || 'Ping process not started');
+      }
+
+      // Les résultats arrivent au fil de l'eau : on ne récupère que les nouveaux
+      let since = 0;
+      let response;
+      do {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        response = await api.get('/firewalls/ping_status/', { params: { task_id: taskId, since } });
+        since = response.data.next;
 
-      if (response.data && response.data.results) {
         const newStatuses: Record<string, FirewallPingStatus> = {};
         response.data.results.forEach((result: { 
           id: string; 
@@ -659,15 +669,15 @@ const NetworkMap: React.FC = () => {
           };
         });
         setFirewallStatuses(prev => ({ ...prev, ...newStatuses }));
-        
-        // Log statistics
-        console.log('Ping statistics:', {
-          total: response.data.total,
-          online: response.data.online,
-          offline: response.data.offline,
-          errors: response.data.errors
-        });
-      }
+      } while (response.data.status === 'pending' || response.data.status === 'running');
+
+      // Log statistics
+      console.log('Ping statistics:', {
+        total: response.data.total,
+        online: response.data.online,
+        offline: response.data.offline,
+        errors: response.data.errors
+      });
     } catch (error) {
       console.error('Error pinging all firewalls:', error);
       setError('Error pinging all firewalls');
@@ -10,6 +10,14 @@ export interface CommandResponse {
   status: 'pending' | 'executing' | 'completed' | 'failed';
   error_message?: string;
   executed_at: string;
+  // Historique : output n'est qu'un aperçu si output_truncated
+  output_size?: number;
+  output_truncated?: boolean;
+}
+
+export interface CommandHistoryPage {
+  results: CommandResponse[];
+  next: string | null;
 }
 
 export const executeCommand = async (firewallId: string, command: string): Promise<CommandResponse> => {
@@ -33,25 +41,46 @@ export const executeCommand = async (firewallId: string, command: string): Promi
   }
 };
 
-export const getCommandHistory = async (firewallId: string): Promise<CommandResponse[]> => {
+export const getCommandHistory = async (firewallId: string, nextUrl?: string | null): Promise<CommandHistoryPage> => {
   try {
+    // nextUrl : curseur de la page suivante renvoyé par l'API
     const response = await axios.get(
-      `${API_URL}/command/commands/`,
+      nextUrl || `${API_URL}/command/commands/get_firewall_commands/`,
       {
-        params: { firewall_id: firewallId },
+        params: nextUrl ? undefined : { firewall_id: firewallId },
         headers: {
           'Authorization': `Bearer ${getAuthToken()}`,
         },
       }
     );
-    return response.data;
+    return { results: response.data.results || [], next: response.data.next || null };
   } catch (error) {
     if (axios.isAxiosError(error)) {
       throw new Error(error.response?.data?.error || 'Failed to fetch command history');
     }
     throw error;
   }
-}; 
+};
+
+export const getCommandOutput = async (commandId: number): Promise<string> => {
+  try {
+    const response = await axios.get(
+      `${API_URL}/command/commands/${commandId}/output/`,
+      {
+        responseType: 'text',
+        headers: {
+          'Authorization': `Bearer ${getAuthToken()}`,
+        },
+      }
+    );
+    return response.data;
+  } catch (error) {
+    if (axios.isAxiosError(error)) {
+      throw new Error(error.response?.data?.error || 'Failed to fetch command output');
+    }
+    throw error;
+  }
+};
 
 export const executeTemplate = async (firewallId: string, commands: string[]): Promise<{ status: string; results: Array<{ command: string; status: string; output?: string; error?: string }> }> => {
   try {
@@ -11,6 +11,16 @@ export interface WebSocketMessage {
     action?: 'page' | 'line' | 'quit';
 }
 
+// Binary output frames (see websocket_service/framing.py): 1 type byte, 1 flags byte, UTF-8 payload
+const FRAME_OUTPUT = 0x01;
+const FLAG_ZLIB = 0x01;
+const supportsZlib = typeof DecompressionStream !== 'undefined';
+
+const inflate = async (payload: Uint8Array): Promise<Uint8Array> => {
+    const stream = new Blob([payload]).stream().pipeThrough(new DecompressionStream('deflate'));
+    return new Uint8Array(await new Response(stream).arrayBuffer());
+};
+
 export class WebSocketService {
     private ws: WebSocket | null = null;
     private reconnectAttempts = 0;
@@ -21,6 +31,9 @@ export class WebSocketService {
     private onDisconnectCallback: (() => void) | null = null;
     private onErrorCallback: ((error: Event) => void) | null = null;
     private isManuallyDisconnected = false; // Flag to prevent auto-reconnect on manual disconnect
+    // Decompression is async: chain message handling to keep output in order
+    private messageChain: Promise<void> = Promise.resolve();
+    private textDecoder = new TextDecoder();
 
     constructor(
         private firewallId: string,
@@ -34,8 +47,10 @@ export class WebSocketService {
                 this.isManuallyDisconnected = false;
                 
                 const token = localStorage.getItem('token');
-                const wsUrl = `${this.baseUrl}/ws/terminal/${this.firewallId}/?token=${token}`;
+                const protocol = supportsZlib ? 'protocol=binary&compression=zlib' : 'protocol=binary';
+                const wsUrl = `${this.baseUrl}/ws/terminal/${this.firewallId}/?token=${token}&${protocol}`;
                 this.ws = new WebSocket(wsUrl);
+                this.ws.binaryType = 'arraybuffer';
 
                 this.ws.onopen = () => {
                     console.log('WebSocket connected');
@@ -47,14 +62,18 @@ export class WebSocketService {
                 };
 
                 this.ws.onmessage = (event) => {
-                    try {
-                        const message: WebSocketMessage = JSON.parse(event.data);
-                        if (this.onMessageCallback) {
-                            this.onMessageCallback(message);
+                    this.messageChain = this.messageChain.then(async () => {
+                        try {
+                            const message = event.data instanceof ArrayBuffer
+                                ? await this.decodeFrame(event.data)
+                                : JSON.parse(event.data) as WebSocketMessage;
+                            if (message && this.onMessageCallback) {
+                                this.onMessageCallback(message);
+                            }
+                        } catch (error) {
+                            console.error('Error parsing WebSocket message:', error);
                         }
-                    } catch (error) {
-                        console.error('Error parsing WebSocket message:', error);
-                    }
+                    });
                 };
 
                 this.ws.onclose = (event) => {
@@ -87,6 +106,15 @@ export class WebSocketService {
         });
     }
 
+    private async decodeFrame(data: ArrayBuffer): Promise<WebSocketMessage | null> {
+        const bytes = new Uint8Array(data);
+        if (bytes.length < 2 || bytes[0] !== FRAME_OUTPUT) {
+            return null;
+        }
+        const payload = bytes[1] & FLAG_ZLIB ? await inflate(bytes.subarray(2)) : bytes.subarray(2);
+        return { type: 'output', content: this.textDecoder.decode(payload) };
+    }
+
     disconnect(): void {
         this.isManuallyDisconnected = true; // Set flag before disconnecting
         if (this.ws) {